@@ -1,2 +1,5 @@
 from .query import *  # noqa: F401, F403
+from .async_query import *  # noqa: F401, F403
 from .manager import *  # noqa: F401, F403
+from .results import *  # noqa: F401, F403
+from .streaming import *  # noqa: F401, F403
@@ -0,0 +1,443 @@
+"""
+This file contains asyncio versions of query functions.
+Every operation gets a worker thread with its own django database connection.
+Parameters are validated, input batches are read and statements are formed in this thread,
+as django database backend and validation code are synchronous.
+
+With psycopg 3 database driver (django 4.2+) batch statements are queued in worker thread
+and executed by psycopg AsyncConnection in event loop, so database waits don't occupy the thread.
+Operations, which execute extra statements or fetch results themselves ('copy' strategy, prepare,
+returning_format 'queryset', 3-query bulk_update_or_create), and psycopg2 driver use thread fallback:
+synchronous query functions are executed in worker thread batch by batch, while event loop awaits the thread.
+It is not asynchronous database access, but it doesn't block event loop.
+Connections are closed, when operation is finished.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from logging import getLogger
+from time import monotonic
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Type, Union  # noqa: F401
+
+from django.db import connections, transaction, DatabaseError, DEFAULT_DB_ALIAS
+from django.db.models import Model  # noqa: F401
+from django.db.models.sql.where import WhereNode  # noqa: F401
+
+from .pipeline import Pipeline, PendingResult, resolve_result  # noqa: F401
+from .query import _BatchedOperation  # noqa: F401
+from .query import _bulk_update_operation, _bulk_update_or_create_operation, _bulk_create_operation, \
+    _bulk_delete_operation
+from .results import BulkOperationResult  # noqa: F401
+from .types import TUpdateValues, TFieldNames, TSetFunctions, TOperators, TDeleteKeys, TDatabase  # noqa: F401
+from .utils import iter_batches, iter_auto_batches, next_auto_batch, get_thread_args, get_retry_delay, \
+    _is_retryable_error
+
+__all__ = ['abulk_update', 'abulk_update_or_create', 'abulk_create', 'abulk_delete']
+
+logger = getLogger('django-pg-bulk-update')
+
+# Returning formats, records of which can be iterated one by one with returning_stream
+ASYNC_STREAM_FORMATS = ('queryset', 'tuples', 'dicts')
+
+# Values of transaction parameter of async functions. Every batch is committed separately.
+ASYNC_TRANSACTION_MODES = (None, 'per_batch')
+
+
+async def _in_thread(executor, func, *args):  # type: (ThreadPoolExecutor, Callable, *Any) -> Any
+    return await asyncio.get_running_loop().run_in_executor(executor, partial(func, *args))
+
+
+def _get_connection(operation):  # type: (_BatchedOperation) -> TDatabase
+    return connections[operation.batch_kwargs.get('using') or DEFAULT_DB_ALIAS]
+
+
+async def _close(executor, async_conn=None):  # type: (ThreadPoolExecutor, Optional[Any]) -> None
+    """
+    Closes async connection, database connection of operation thread and stops the thread
+    """
+    try:
+        if async_conn is not None:
+            await async_conn.close()
+        await _in_thread(executor, connections.close_all)
+    finally:
+        executor.shutdown(wait=False)
+
+
+def async_connection_available(conn):  # type: (TDatabase) -> bool
+    """
+    Checks if database driver has async connection: psycopg 3.
+    :param conn: Database connection used
+    :return: Boolean
+    """
+    return getattr(conn.Database, 'AsyncConnection', None) is not None
+
+
+async def _connect(conn):  # type: (TDatabase) -> Any
+    """
+    Opens psycopg 3 AsyncConnection with parameters and adapters of django database connection.
+    Connection is in autocommit mode, batches open transactions themselves.
+    :param conn: Database connection used
+    :return: psycopg.AsyncConnection instance
+    """
+    psycopg = conn.Database
+    params = conn.get_connection_params()
+
+    # django chooses client side or server side binding cursor
+    cursor_factory = params.pop('cursor_factory', None)
+    server_side_binding = cursor_factory is not None and not issubclass(cursor_factory, psycopg.ClientCursor)
+    params['cursor_factory'] = psycopg.AsyncCursor if server_side_binding else psycopg.AsyncClientCursor
+
+    async_conn = await psycopg.AsyncConnection.connect(autocommit=True, **params)
+    try:
+        options = conn.settings_dict.get('OPTIONS', {})
+        if options.get('isolation_level') is not None:
+            await async_conn.set_isolation_level(options['isolation_level'])
+
+        # See django DatabaseWrapper.init_connection_state()
+        timezone_name = conn.timezone_name
+        if timezone_name and async_conn.info.parameter_status('TimeZone') != timezone_name:
+            await async_conn.execute(conn.ops.set_time_zone_sql(), [timezone_name])
+        if options.get('assume_role'):
+            await async_conn.execute(psycopg.sql.SQL('SET ROLE {}').format(psycopg.sql.Literal(options['assume_role'])))
+    except BaseException:
+        await async_conn.close()
+        raise
+
+    return async_conn
+
+
+class _FetchedCursor(object):
+    """
+    Result of a statement, fetched by async cursor. It is passed to PendingResult as a synchronous cursor.
+    """
+    def __init__(self, description, rowcount, rows):  # type: (Any, int, List[Any]) -> None
+        self.description = description
+        self.rowcount = rowcount
+        self._rows = rows
+
+    @classmethod
+    async def fetch(cls, cursor):  # type: (Any) -> _FetchedCursor
+        rows = await cursor.fetchall() if cursor.description is not None else []
+        return cls(cursor.description, cursor.rowcount, rows)
+
+    def fetchone(self):  # type: () -> Any
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):  # type: () -> List[Any]
+        rows, self._rows = self._rows, []
+        return rows
+
+
+def _queue_batch(operation, batch_items):  # type: (_BatchedOperation, Any) -> Any
+    """
+    Executes operation handler on a batch in operation thread, queueing its statements instead of executing them
+    :return: A tuple of batch result and a list of PendingResult of queued statements
+    """
+    args = get_thread_args(operation.args)
+    args[1] = batch_items
+    with Pipeline(_get_connection(operation)) as pipe:
+        result = operation.handler(*args)
+        return result, pipe.take()
+
+
+async def _run_queued_batch(executor, async_conn, operation, batch_items):
+    # type: (ThreadPoolExecutor, Any, _BatchedOperation, Any) -> Any
+    """
+    Forms batch statements in operation thread and executes them by async connection in a transaction.
+    If awaiting task is canceled, psycopg cancels the query on database side and transaction is rolled back.
+    """
+    result, statements = await _in_thread(executor, _queue_batch, operation, batch_items)
+
+    # Driver errors are converted to django ones, as sync functions raise
+    with _get_connection(operation).wrap_database_errors:
+        async with async_conn.transaction():
+            for statement in statements:
+                logger.debug('EXECUTING STATEMENT ASYNC:\n        %sWITH PARAMETERS [%s]\n'
+                             % (statement.sql, ', '.join(str(v) for v in statement.params)))
+                async with async_conn.cursor() as cursor:
+                    await cursor.execute(statement.sql, statement.params)
+                    statement.set_cursor(await _FetchedCursor.fetch(cursor))
+
+    return resolve_result(result)
+
+
+def _execute_batch(operation, batch_items, state):  # type: (_BatchedOperation, Any, Dict[str, Any]) -> Any
+    """
+    Executes operation handler on a batch in operation thread.
+    Batch is executed in a transaction, so it is rolled back, if it is canceled.
+    :param state: A dict, shared with event loop. Raw connection is saved to it, so query can be canceled.
+    """
+    conn = _get_connection(operation)
+    conn.ensure_connection()
+    state['connection'] = conn.connection
+    if state.get('canceled'):
+        raise asyncio.CancelledError()
+
+    args = get_thread_args(operation.args)
+    args[1] = batch_items
+    with transaction.atomic(using=conn.alias):
+        return operation.handler(*args)
+
+
+async def _run_batch_in_thread(executor, operation, batch_items):
+    # type: (ThreadPoolExecutor, _BatchedOperation, Any) -> Any
+    """
+    Awaits batch execution in operation thread. If awaiting task is canceled,
+    query of the batch is canceled on database side.
+    """
+    state = {}  # type: Dict[str, Any]
+    future = asyncio.get_running_loop().run_in_executor(executor, partial(_execute_batch, operation, batch_items,
+                                                                          state))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        state['canceled'] = True
+        if state.get('connection') is not None:
+            # Database driver can cancel the query from any thread. Batch transaction is rolled back then.
+            state['connection'].cancel()
+
+        # Thread must finish the batch, before its connection is closed
+        try:
+            await future
+        except Exception:
+            pass
+        raise
+
+
+class _AsyncExecutor(object):
+    """
+    Executes batches of an operation: statements are formed in operation thread
+    and executed by async connection, if it is available, or in operation thread otherwise.
+    Batches, failed by deadlock or serialization failure, are retried.
+    """
+    def __init__(self, operation, executor, async_conn=None):
+        # type: (_BatchedOperation, ThreadPoolExecutor, Optional[Any]) -> None
+        """
+        :param operation: Operation to execute
+        :param executor: Operation thread
+        :param async_conn: psycopg AsyncConnection or None to execute batches in operation thread
+        """
+        self.operation = operation
+        self.executor = executor
+        self.async_conn = async_conn
+        # Total number of retries
+        self.retried = 0
+
+    async def run_batch(self, batch_items):  # type: (Any) -> Any
+        retries = self.operation.batch_kwargs.get('retries', 0)
+        attempt = 0
+        while True:
+            try:
+                if self.async_conn is not None:
+                    return await _run_queued_batch(self.executor, self.async_conn, self.operation, batch_items)
+                return await _run_batch_in_thread(self.executor, self.operation, batch_items)
+            except DatabaseError as ex:
+                # Every attempt is a separate transaction
+                if attempt >= retries or not _is_retryable_error(ex):
+                    raise
+
+                attempt += 1
+                self.retried += 1
+                delay = get_retry_delay(attempt)
+                logger.debug('Batch has failed with transient error, retry %d in %.3f seconds: %s'
+                             % (attempt, delay, ex))
+                await asyncio.sleep(delay)
+
+    async def close(self):  # type: () -> None
+        await _close(self.executor, self.async_conn)
+
+
+async def _aiter_batched_results(executor):  # type: (_AsyncExecutor) -> AsyncIterator[Any]
+    """
+    Executes batches of the operation one by one, yielding their results.
+    See batched_operation() for batch_size and batch_delay parameters.
+    Batches are taken in operation thread: lazily validated data reads caller's iterator and validates items,
+    which would block event loop.
+    """
+    operation = executor.operation
+    if operation.handler is None:
+        return
+
+    batch_size = operation.batch_kwargs.get('batch_size')
+    batch_delay = operation.batch_kwargs.get('batch_delay', 0)
+
+    if batch_size != 'auto':
+        batches = iter_batches(operation.data, batch_size)
+        batch_items, j = await _in_thread(executor.executor, next, batches, None), 0
+        while batch_items is not None:
+            logger.debug('Processing batch %d with size %d' % (j + 1, len(batch_items)))
+            yield await executor.run_batch(batch_items)
+            await asyncio.sleep(batch_delay)
+            batch_items, j = await _in_thread(executor.executor, next, batches, None), j + 1
+        return
+
+    # See _auto_batched_operation()
+    batches = iter_auto_batches(operation.data, row_params=operation.batch_kwargs.get('row_params'))
+    batch_items = await _in_thread(executor.executor, next, batches, None)
+    while batch_items is not None:
+        started = monotonic()
+        try:
+            r = await executor.run_batch(batch_items)
+        except DatabaseError as ex:
+            batch_items = await _in_thread(executor.executor, batches.throw, ex)
+            continue
+
+        elapsed = monotonic() - started
+        yield r
+        await asyncio.sleep(batch_delay)
+        batch_items = await _in_thread(executor.executor, next_auto_batch, batches, elapsed)
+
+
+async def _aiter_records(executor):  # type: (_AsyncExecutor) -> AsyncIterator[Any]
+    """
+    Iterates over records, returned by the operation. Next batch is executed, when records of previous one are read.
+    """
+    try:
+        async for r in _aiter_batched_results(executor):
+            for item in executor.operation.concat([r]):
+                yield item
+    finally:
+        await executor.close()
+
+
+def _validate_returning_stream(returning, returning_stream, returning_format):
+    # type: (Optional[TFieldNames], bool, str) -> bool
+    """
+    Validates returning_stream flag of async functions
+    :param returning: Returning parameter
+    :param returning_stream: Flag value
+    :param returning_format: Returning format parameter
+    :return: Validated flag
+    """
+    if type(returning_stream) is not bool:
+        raise TypeError("returning_stream parameter must be boolean")
+    if returning_stream and returning is None:
+        raise ValueError("returning_stream parameter requires returning parameter")
+    if returning_stream and returning_format not in ASYNC_STREAM_FORMATS:
+        raise ValueError("returning_stream parameter can be used with returning_format in [%s] only"
+                         % ', '.join(ASYNC_STREAM_FORMATS))
+
+    return returning_stream
+
+
+def _validate_transaction(mode):  # type: (Optional[str]) -> None
+    """
+    Validates transaction parameter of async functions.
+    Every batch is committed separately: transaction can't be kept open, while event loop awaits next batch.
+    :param mode: Parameter value
+    :return: None
+    """
+    if mode not in ASYNC_TRANSACTION_MODES:
+        raise ValueError("async functions commit every batch separately: transaction parameter can be None "
+                         "or 'per_batch' only")
+
+
+async def _execute(operation_func,  # type: Callable[..., _BatchedOperation]
+                   args,  # type: List[Any]
+                   returning_stream,  # type: bool
+                   ):
+    # type: (...) -> Union[int, BulkOperationResult, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+    """
+    Validates parameters in a new thread and executes the operation
+    :param operation_func: Function, validating parameters and returning _BatchedOperation
+    :param args: Function arguments
+    :param returning_stream: If flag is set, async iterator over returned records is returned
+    :return: Operation result
+    """
+    thread = ThreadPoolExecutor(max_workers=1)
+    try:
+        operation = await _in_thread(thread, operation_func, *args)
+        conn = _get_connection(operation)
+        if operation.handler is not None and operation.queueable and async_connection_available(conn):
+            executor = _AsyncExecutor(operation, thread, async_conn=await _connect(conn))
+        else:
+            executor = _AsyncExecutor(operation, thread)
+    except BaseException:
+        await _close(thread)
+        raise
+
+    if returning_stream:
+        return _aiter_records(executor)
+
+    try:
+        batched_result = [r async for r in _aiter_batched_results(executor)]
+    finally:
+        await executor.close()
+
+    return operation._report_retries(operation.concat(batched_result), executor.retried)
+
+
+async def abulk_update(model, values, key_fields='id', using=None, set_functions=None, key_fields_ops=(), where=None,
+                       returning=None, batch_size=None, batch_delay=0, strategy='values', prepare=False,
+                       skip_unchanged=False, order_keys=None, returning_stream=False, returning_format='queryset',
+                       transaction=None, retries=0, columns=None):
+    # type: (...) -> Union[int, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+    """
+    Asyncio version of bulk_update. See bulk_update for parameters description.
+    Every batch is executed in a separate transaction. If awaiting task is canceled,
+    query of current batch is canceled and its transaction is rolled back. Next batches are not executed.
+    With psycopg 3 driver statements are executed by async connection, other drivers use a worker thread.
+    :param returning_stream: If flag is set, an async iterator over returned records is returned.
+        Every batch is executed, when records of previous one have been read.
+        Records are model instances for 'queryset' returning_format, tuples or dicts for 'tuples' and 'dicts' ones.
+    :param transaction: None or 'per_batch': every batch is committed separately
+    :param retries: Maximum number of retries of a batch, failed by deadlock or serialization failure
+    :return: Number of records updated
+    """
+    returning_stream = _validate_returning_stream(returning, returning_stream, returning_format)
+    _validate_transaction(transaction)
+    return await _execute(_bulk_update_operation,
+                          [model, values, key_fields, using, set_functions, key_fields_ops, where, returning,
+                           batch_size, batch_delay, strategy, prepare, skip_unchanged, order_keys, False,
+                           returning_format, None, None, None, retries, columns], returning_stream)
+
+
+async def abulk_delete(model, keys, key_fields='id', using=None, key_fields_ops=(), where=None, returning=None,
+                       batch_size=None, batch_delay=0, strategy='values', prepare=False, order_keys=None,
+                       returning_stream=False, returning_format='queryset', transaction=None, retries=0):
+    # type: (...) -> Union[int, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+    """
+    Asyncio version of bulk_delete. See bulk_delete for parameters description and abulk_update for async details.
+    :return: Number of records deleted
+    """
+    returning_stream = _validate_returning_stream(returning, returning_stream, returning_format)
+    _validate_transaction(transaction)
+    return await _execute(_bulk_delete_operation,
+                          [model, keys, key_fields, using, key_fields_ops, where, returning, batch_size, batch_delay,
+                           strategy, prepare, order_keys, False, returning_format, None, None, None, retries],
+                          returning_stream)
+
+
+async def abulk_create(model, values, using=None, set_functions=None, returning=None, batch_size=None, batch_delay=0,
+                       strategy='values', prepare=False, returning_stream=False, returning_format='queryset',
+                       transaction=None, retries=0, columns=None):
+    # type: (...) -> Union[int, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+    """
+    Asyncio version of bulk_create. See bulk_create for parameters description and abulk_update for async details.
+    :return: Number of records created
+    """
+    returning_stream = _validate_returning_stream(returning, returning_stream, returning_format)
+    _validate_transaction(transaction)
+    return await _execute(_bulk_create_operation,
+                          [model, values, using, set_functions, returning, batch_size, batch_delay, strategy, prepare,
+                           False, returning_format, None, None, None, retries, columns], returning_stream)
+
+
+async def abulk_update_or_create(model, values, key_fields='id', using=None, set_functions=None, update=True,
+                                 key_is_unique=True, returning=None, batch_size=None, batch_delay=0, constraint=None,
+                                 strategy='values', prepare=False, skip_unchanged=False, order_keys=None,
+                                 report_inserted=False, returning_stream=False, returning_format='queryset',
+                                 transaction=None, retries=0, columns=None):
+    # type: (...) -> Union[int, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+    """
+    Asyncio version of bulk_update_or_create.
+    See bulk_update_or_create for parameters description and abulk_update for async details.
+    :return: Number of records created or updated
+    """
+    returning_stream = _validate_returning_stream(returning, returning_stream, returning_format)
+    _validate_transaction(transaction)
+    return await _execute(_bulk_update_or_create_operation,
+                          [model, values, key_fields, using, set_functions, update, key_is_unique, returning,
+                           batch_size, batch_delay, constraint, strategy, prepare, skip_unchanged, order_keys,
+                           report_inserted, False, returning_format, None, None, None, retries, columns],
+                          returning_stream)
@@ -0,0 +1,95 @@
+"""
+This file contains lazy concatenation of ReturningQuerySet objects, returned by batches of bulk operation.
+It requires django-pg-returning library, so it is imported only when returning is used.
+"""
+from bisect import bisect_right
+from itertools import chain
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union  # noqa: F401
+
+from django.db.models import Model  # noqa: F401
+from django_pg_returning import ReturningQuerySet
+
+__all__ = ['ChainedReturningQuerySet']
+
+
+class ChainedReturningQuerySet(ReturningQuerySet):
+    """
+    ReturningQuerySet, which chains querysets, returned by batches, without copying their records.
+    Concatenation takes O(number of batches), all other methods take O(total number of records) at most.
+    Batches can be consumed one by one with batches property.
+    """
+    def __init__(self, querysets=()):  # type: (Iterable[ReturningQuerySet]) -> None
+        """
+        :param querysets: ReturningQuerySet objects in batches order. All of them must fetch the same fields.
+        """
+        querysets = list(querysets)
+        for qs in querysets[1:]:
+            if qs.fields != querysets[0].fields:
+                raise ValueError("Querysets with different fields can't be concatenated")
+
+        first = querysets[0] if querysets else None
+        super(ChainedReturningQuerySet, self).__init__(
+            None, model=getattr(first, 'model', None), using=getattr(first, '_db', None),
+            fields=getattr(first, 'fields', []))
+
+        # Batches, chained by the queryset. Nested chains are flattened.
+        self._batches = []  # type: List[ReturningQuerySet]
+        for qs in querysets:
+            self._batches.extend(qs.batches if isinstance(qs, ChainedReturningQuerySet) else [qs])
+
+        # Index of the first record of every batch
+        self._offsets = []  # type: List[int]
+        total = 0
+        for qs in self._batches:
+            self._offsets.append(total)
+            total += len(qs)
+        self._len = total
+
+    @property
+    def batches(self):  # type: () -> Tuple[ReturningQuerySet, ...]
+        """
+        ReturningQuerySet objects, returned by batches, in execution order
+        """
+        return tuple(self._batches)
+
+    def __len__(self):  # type: () -> int
+        return self._len
+
+    def __iter__(self):  # type: () -> Iterable[Model]
+        return chain.from_iterable(self._batches)
+
+    def __getitem__(self, k):  # type: (Union[int, slice]) -> Union[Model, List[Model]]
+        if isinstance(k, slice):
+            return list(self)[k]
+
+        if k < 0:
+            k += self._len
+        if not 0 <= k < self._len:
+            raise IndexError('list index out of range')
+
+        batch_index = bisect_right(self._offsets, k) - 1
+        # Empty batches have equal offsets. bisect_right finds the last of them, which is the non empty one.
+        return self._batches[batch_index][k - self._offsets[batch_index]]
+
+    def __add__(self, other):  # type: (ReturningQuerySet) -> ChainedReturningQuerySet
+        if not isinstance(other, ReturningQuerySet):
+            return NotImplemented
+
+        return ChainedReturningQuerySet([self, other])
+
+    def count(self):  # type: () -> int
+        return self._len
+
+    def values(self, *fields):  # type: (*str) -> List[Dict[str, Any]]
+        return list(chain.from_iterable(qs.values(*(fields or self._fields)) for qs in self._batches))
+
+    def values_list(self, *fields, **kwargs):  # type: (*str, **bool) -> List[Union[Tuple[Any], Any]]
+        # Parameters are validated even if there are no batches
+        ReturningQuerySet(None).values_list(*fields, **kwargs)
+        return list(chain.from_iterable(qs.values_list(*fields, **kwargs) for qs in self._batches))
+
+    def first(self):  # type: () -> Optional[Model]
+        return self[0] if self._len else None
+
+    def last(self):  # type: () -> Optional[Model]
+        return self[-1] if self._len else None
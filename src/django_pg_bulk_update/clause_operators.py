@@ -1,11 +1,11 @@
 """
 This function contains operators used in WHERE query part
 """
-from typing import Type, Optional, Any, Iterable, Dict
+from typing import Type, Optional, Any, Iterable, Dict  # noqa: F401
 
 from .compatibility import array_available, get_field_db_type
 from .types import AbstractFieldFormatter
-from .utils import get_subclasses
+from .utils import get_subclasses, get_field_value_formatter
 
 
 class AbstractClauseOperator(AbstractFieldFormatter):
@@ -69,7 +69,7 @@ class AbstractArrayValueOperator(AbstractClauseOperator):
         # So let's validate it as Array of this field
         if array_available():
             from django.contrib.postgres.fields import ArrayField
-            
+
             arr_field = ArrayField(field)
             arr_field.model = field.model
             return super(AbstractArrayValueOperator, self).format_field_value(arr_field, val, connection, **kwargs)
@@ -88,6 +88,25 @@ class AbstractArrayValueOperator(AbstractClauseOperator):
             query = tpl % (', '.join(placeholders), db_type)
             return query, values
 
+    def get_value_formatter(self, field, connection, cast_type=False):
+        if not array_available():
+            return super(AbstractArrayValueOperator, self).get_value_formatter(field, connection, cast_type=cast_type)
+
+        from django.contrib.postgres.fields import ArrayField
+
+        arr_field = ArrayField(field)
+        arr_field.model = field.model
+        arr_formatter = get_field_value_formatter(arr_field, connection, cast_type=cast_type)
+
+        def _format(val):
+            assert isinstance(val, Iterable), "'%s' value must be iterable" % self.__class__.__name__
+            return arr_formatter(val)
+
+        return _format
+
+    def get_value_db_type(self, field, connection):
+        return '%s[]' % get_field_db_type(field, connection)
+
 
 class EqualClauseOperator(AbstractClauseOperator):
     names = {'eq', '=', '=='}
@@ -115,6 +134,13 @@ class IsNullClauseOperator(AbstractClauseOperator):
         tpl = 'CAST(%s AS bool)' if cast_type else '%s'
         return tpl, [bool(val)]
 
+    def get_value_formatter(self, field, connection, cast_type=False):
+        tpl = 'CAST(%s AS bool)' if cast_type else '%s'
+        return lambda val: (tpl, [bool(val)])
+
+    def get_value_db_type(self, field, connection):
+        return 'bool'
+
     def get_django_filters(self, name, value):
         return {'%s__isnull' % name: value}
 
@@ -0,0 +1,153 @@
+"""
+This file contains columnar input of values: a dict of field name to a column of values or pandas DataFrame.
+Columns are validated and split to batches as a whole, without forming python objects for every row.
+'unnest' and 'copy' strategies pass them to database column by column:
+numpy arrays of numbers are encoded to COPY binary format without converting them to python objects at all.
+"""
+import sys
+from typing import Any, Dict, Iterable, Sequence, Tuple  # noqa: F401
+
+from .compatibility import string_types
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def is_numpy_array(value):  # type: (Any) -> bool
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+
+def _get_pandas_class(name):  # type: (str) -> Any
+    """
+    Gets pandas class, if pandas has been imported. If it is not, no instance of it can exist.
+    :param name: Class name
+    :return: Class or None
+    """
+    pandas = sys.modules.get('pandas')
+    return getattr(pandas, name, None) if pandas is not None else None
+
+
+def _is_pandas_instance(value, class_name):  # type: (Any, str) -> bool
+    cls = _get_pandas_class(class_name)
+    return cls is not None and isinstance(value, cls)
+
+
+def _is_column(value):  # type: (Any) -> bool
+    return isinstance(value, (list, tuple)) or is_numpy_array(value) or _is_pandas_instance(value, 'Series')
+
+
+def is_columnar_input(values):  # type: (Any) -> bool
+    """
+    Checks if values are given in columnar form: pandas DataFrame or a non empty dict of field name to column.
+    Column can be a list, tuple, numpy array or pandas Series.
+    Dict of key_values: update_fields_dict is not columnar, as its values are dicts.
+    :param values: values parameter as given
+    :return: Boolean
+    """
+    if _is_pandas_instance(values, 'DataFrame'):
+        return True
+
+    return isinstance(values, dict) and len(values) > 0 \
+        and all(isinstance(name, string_types) and _is_column(col) for name, col in values.items())
+
+
+def get_columns(values):  # type: (Any) -> Dict[str, Sequence[Any]]
+    """
+    Gets columns of columnar input. pandas objects are converted to numpy arrays.
+    :param values: A dict of field name to column or pandas DataFrame
+    :return: A dict of field name to column
+    """
+    if _is_pandas_instance(values, 'DataFrame'):
+        if not all(isinstance(name, string_types) for name in values.columns):
+            raise TypeError("DataFrame column names must be field names")
+        return {name: values[name].to_numpy() for name in values.columns}
+
+    return {name: col.to_numpy() if _is_pandas_instance(col, 'Series') else col for name, col in values.items()}
+
+
+class ColumnarValues(object):
+    """
+    Validated columnar values: field names are mapped to columns of equal length.
+    It is used instead of dict of key_values_tuple: update_fields_dict.
+    """
+    def __init__(self, columns, key_names):  # type: (Dict[str, Sequence[Any]], Tuple[str, ...]) -> None
+        """
+        :param columns: A dict of field name to a list, tuple or 1-dimensional numpy array
+        :param key_names: Names of key fields
+        """
+        self.columns = columns
+        self.key_names = key_names
+        self._length = len(next(iter(columns.values())))
+
+    def __len__(self):  # type: () -> int
+        return self._length
+
+    def slice(self, start, stop):  # type: (int, int) -> ColumnarValues
+        """
+        Gets a batch of rows. numpy arrays are sliced without copying.
+        :param start: Index of the first row
+        :param stop: Index after the last row
+        :return: ColumnarValues instance
+        """
+        return ColumnarValues({name: col[start:stop] for name, col in self.columns.items()}, self.key_names)
+
+    def take(self, indexes):  # type: (Sequence[int]) -> ColumnarValues
+        """
+        Gets rows with given indexes in given order
+        :param indexes: A sequence or numpy array of row indexes
+        :return: ColumnarValues instance
+        """
+        return ColumnarValues({
+            name: col[indexes] if is_numpy_array(col) else [col[i] for i in indexes]
+            for name, col in self.columns.items()
+        }, self.key_names)
+
+    def get_python_column(self, name):  # type: (str) -> Sequence[Any]
+        """
+        Gets column values as python objects. numpy arrays are converted with tolist().
+        :param name: Field name
+        :return: A sequence of values
+        """
+        col = self.columns[name]
+        return col.tolist() if is_numpy_array(col) else col
+
+    def iter_rows(self, names):  # type: (Iterable[str]) -> Iterable[Tuple[Any, ...]]
+        """
+        Iterates over rows of given columns
+        :param names: Field names
+        :return: A generator of tuples of python objects
+        """
+        return zip(*(self.get_python_column(name) for name in names))
+
+    def has_duplicate_keys(self):  # type: () -> bool
+        """
+        Checks if some rows have equal keys. Keys, which can't be compared, are reported as duplicates.
+        :return: Boolean
+        """
+        if not self.key_names:
+            return False
+
+        key_columns = [self.columns[name] for name in self.key_names]
+        if len(key_columns) == 1 and is_numpy_array(key_columns[0]) and key_columns[0].dtype.kind in 'biufmMU':
+            return len(numpy.unique(key_columns[0])) != len(self)
+
+        try:
+            return len(set(self.iter_rows(self.key_names))) != len(self)
+        except TypeError:
+            return True
+
+
+def get_sort_indexes(values):  # type: (ColumnarValues) -> Any
+    """
+    Sorts numpy key columns with numpy.lexsort(), if all key columns are numpy arrays of comparable values
+    :param values: ColumnarValues instance
+    :return: numpy array of row indexes in keys order or None, if keys can't be sorted by numpy
+    """
+    key_columns = [values.columns[name] for name in values.key_names]
+    if not key_columns or not all(is_numpy_array(col) and col.dtype.kind in 'biufmMU' for col in key_columns):
+        return None
+
+    # lexsort sorts by the last key first
+    return numpy.lexsort(key_columns[::-1])
@@ -18,12 +18,20 @@ except ImportError:
     # For django before 3.2
     from django.db import DefaultConnectionProxy as ConnectionProxy  # noqa
 
+try:
+    # For django 4.2+
+    from django.core.exceptions import FullResultSet
+except ImportError:
+    # Django before 4.2 returns empty sql for where clause, matching all records
+    class FullResultSet(Exception):
+        pass
+
 try:
     # This approach applies to python 3.10+
-    from collections.abc import Iterable  # noqa F401
+    from collections.abc import Iterable, Iterator, Mapping  # noqa F401
 except ImportError:
     # This approach applies to python versions less than 3.10
-    from collections import Iterable  # noqa F401
+    from collections import Iterable, Iterator, Mapping  # noqa F401
 
 
 # six.string_types replacement in order to remove dependency
@@ -131,6 +139,22 @@ def returning_available(raise_exception=False):
             return False
 
 
+def numpy_available(raise_exception=False):
+    # type: (bool) -> bool
+    """
+    Tests if numpy library is installed
+    :return: boolean
+    """
+    try:
+        import numpy  # noqa: F401
+        return True
+    except ImportError:
+        if raise_exception:
+            raise ImportError("returning_format='numpy' requires numpy library installed. Use pip install numpy")
+        else:
+            return False
+
+
 def hstore_serialize(value):  # type: (Dict[Any, Any]) -> Dict[str, str]
     """
     Django before 1.10 doesn't convert HStoreField values to string automatically
@@ -155,7 +179,9 @@ def get_postgres_version(using=None, as_tuple=True):
         A single number major*10000 + minor*100 + revision if false.
     """
     conn = connection if using is None else connections[using]
-    num = conn.cursor().connection.server_version
+    raw_conn = conn.cursor().connection
+    # psycopg 3 connection has server version in info attribute only
+    num = raw_conn.server_version if hasattr(raw_conn, 'server_version') else raw_conn.info.server_version
     return (int(num / 10000), int(num % 10000 / 100), num % 100) if as_tuple else num
 
 
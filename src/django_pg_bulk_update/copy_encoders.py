@@ -0,0 +1,338 @@
+"""
+This file contains encoders of COPY binary format.
+Encoder is built once for a column from it's database type and encodes a whole column of values at a time.
+Values are expected to be prepared for database already (as returned by Field.get_db_prep_save()).
+Binary format docs: https://www.postgresql.org/docs/current/sql-copy.html#id-1.9.3.55.9.4
+"""
+import json
+import struct
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import chain, repeat
+from typing import Any, Iterable, List, Optional, Sequence
+
+from .compatibility import string_types, tz_utc
+
+__all__ = ['get_binary_encoder', 'get_binary_encoders', 'encode_binary_copy']
+
+BINARY_COPY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+BINARY_COPY_TRAILER = struct.pack('!h', -1)
+
+PG_EPOCH_DATE = date(2000, 1, 1)
+PG_EPOCH_DATETIME = datetime(2000, 1, 1)
+PG_EPOCH_DATETIME_TZ = datetime(2000, 1, 1, tzinfo=tz_utc)
+
+_NULL = struct.pack('!i', -1)
+_length = struct.Struct('!i')
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class AbstractBinaryEncoder(object):
+    """
+    Encodes values of a single database type to COPY binary format.
+    Encoders raise TypeError or ValueError, if value can't be encoded.
+    """
+    # Type OID, used as element type in arrays. None, if encoder can't be used for array elements.
+    oid = None  # type: Optional[int]
+
+    def encode(self, val):  # type: (Any) -> bytes
+        """
+        Encodes single not NULL value
+        :param val: Value to encode
+        :return: Encoded value without length prefix
+        """
+        raise NotImplementedError("encode() is not implemented in %s" % self.__class__.__name__)
+
+    def encode_column(self, values):  # type: (Sequence[Any]) -> List[bytes]
+        """
+        Encodes a column of values
+        :param values: A sequence of values. None is encoded as NULL
+        :return: A list of encoded fields with length prefixes
+        """
+        encode, pack = self.encode, _length.pack
+        result = []
+        for val in values:
+            if val is None:
+                result.append(_NULL)
+            else:
+                data = encode(val)
+                result.append(pack(len(data)) + data)
+        return result
+
+
+class FixedWidthBinaryEncoder(AbstractBinaryEncoder):
+    """
+    Encodes values, packed with struct format of fixed width
+    """
+    def __init__(self, fmt, oid, numpy_kinds=''):  # type: (str, int, str) -> None
+        """
+        :param fmt: struct format of a single value
+        :param oid: Type OID
+        :param numpy_kinds: numpy dtype kinds, which can be cast to this type without python objects
+        """
+        self.oid = oid
+        self._struct = struct.Struct('!' + fmt)
+        self._field_struct = struct.Struct('!i' + fmt)
+        self._numpy_dtype = '>' + fmt
+        self._numpy_kinds = numpy_kinds
+
+    def convert(self, val):  # type: (Any) -> Any
+        """
+        Converts value to the one, which can be packed with struct format
+        :param val: Not NULL value
+        :return: Converted value
+        """
+        return val
+
+    def encode(self, val):
+        return self._struct.pack(self.convert(val))
+
+    def encode_column(self, values):
+        if numpy is not None and isinstance(values, numpy.ndarray) and values.dtype.kind in self._numpy_kinds:
+            return self._encode_numpy_column(values)
+
+        convert, size, pack = self.convert, self._struct.size, self._field_struct.pack
+        return [_NULL if val is None else pack(size, convert(val)) for val in values]
+
+    def _encode_numpy_column(self, values):  # type: (Any) -> List[bytes]
+        """
+        Encodes typed numpy array without iterating over python objects
+        :param values: 1-dimensional numpy array
+        :return: A list of encoded fields with length prefixes
+        """
+        # numpy casts integers silently, wrapping values which don't fit into the target type
+        if values.dtype.kind in 'iu' and self._struct.format[-1] in 'hiq' and len(values) > 0:
+            limits = numpy.iinfo(self._numpy_dtype)
+            if values.min() < limits.min or values.max() > limits.max:
+                raise ValueError("numpy array values are out of range of %d bytes integer" % self._struct.size)
+
+        fields = numpy.empty(len(values), dtype=[('length', '>i4'), ('value', self._numpy_dtype)])
+        fields['length'] = self._struct.size
+        fields['value'] = values
+        data, width = fields.tobytes(), fields.dtype.itemsize
+        return [data[i:i + width] for i in range(0, len(data), width)]
+
+
+class DateBinaryEncoder(FixedWidthBinaryEncoder):
+    def __init__(self):
+        super(DateBinaryEncoder, self).__init__('i', 1082)
+
+    def convert(self, val):
+        if not isinstance(val, date) or isinstance(val, datetime):
+            raise TypeError("date value expected, got %r" % val)
+        return val.toordinal() - PG_EPOCH_DATE.toordinal()
+
+
+class DateTimeBinaryEncoder(FixedWidthBinaryEncoder):
+    def __init__(self, with_tz):  # type: (bool) -> None
+        super(DateTimeBinaryEncoder, self).__init__('q', 1184 if with_tz else 1114)
+        self._with_tz = with_tz
+        self._epoch = PG_EPOCH_DATETIME_TZ if with_tz else PG_EPOCH_DATETIME
+
+    def convert(self, val):
+        if not isinstance(val, datetime):
+            raise TypeError("datetime value expected, got %r" % val)
+
+        # Naive values of timestamp with time zone are treated by database in session time zone
+        if (val.tzinfo is not None) is not self._with_tz:
+            raise ValueError("%s datetime value expected, got %r" % ('aware' if self._with_tz else 'naive', val))
+
+        delta = val - self._epoch  # type: timedelta
+        return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class TextBinaryEncoder(AbstractBinaryEncoder):
+    def __init__(self, oid):  # type: (int) -> None
+        self.oid = oid
+
+    def encode(self, val):
+        if not isinstance(val, string_types):
+            val = str(val)
+        return val.encode('utf-8')
+
+    def encode_column(self, values):
+        pack = _length.pack
+        result = []
+        for val in values:
+            if val is None:
+                result.append(_NULL)
+            else:
+                data = (val if isinstance(val, string_types) else str(val)).encode('utf-8')
+                result.append(pack(len(data)) + data)
+        return result
+
+
+class JsonBinaryEncoder(AbstractBinaryEncoder):
+    def __init__(self, binary):  # type: (bool) -> None
+        self.oid = 3802 if binary else 114
+        # jsonb binary representation is version number and json text
+        self._prefix = b'\x01' if binary else b''
+
+    def encode(self, val):
+        if isinstance(val, string_types):
+            text = val
+        elif hasattr(val, 'dumps') and hasattr(val, 'adapted'):
+            # psycopg2.extras.Json adapter
+            text = val.dumps(val.adapted)
+        elif hasattr(val, 'dumps') and hasattr(val, 'obj'):
+            # psycopg.types.json.Json and Jsonb wrappers
+            text = val.dumps(val.obj)
+        else:
+            text = json.dumps(val)
+
+        return self._prefix + text.encode('utf-8')
+
+
+class UUIDBinaryEncoder(AbstractBinaryEncoder):
+    oid = 2950
+
+    def encode(self, val):
+        return (val if isinstance(val, uuid.UUID) else uuid.UUID(str(val))).bytes
+
+
+class NumericBinaryEncoder(AbstractBinaryEncoder):
+    oid = 1700
+
+    _header = struct.Struct('!hhHh')
+    _sign_positive = 0x0000
+    _sign_negative = 0x4000
+    _sign_nan = 0xC000
+
+    def encode(self, val):
+        if not isinstance(val, Decimal):
+            val = Decimal(str(val))
+
+        sign, digits, exp = val.as_tuple()
+        if exp == 'n' or exp == 'N':
+            return self._header.pack(0, 0, self._sign_nan, 0)
+        elif exp == 'F':
+            raise ValueError("Infinite numeric values are not supported")
+
+        dscale = max(-exp, 0)
+
+        # Base 10000 digits are aligned to decimal point
+        right_pad = exp % 4
+        digits = digits + (0,) * right_pad
+        exp -= right_pad
+        digits = (0,) * (-len(digits) % 4) + digits
+
+        groups = [digits[i] * 1000 + digits[i + 1] * 100 + digits[i + 2] * 10 + digits[i + 3]
+                  for i in range(0, len(digits), 4)]
+        weight = len(groups) - 1 + exp // 4
+
+        # Leading and trailing zero groups are not stored
+        start, end = 0, len(groups)
+        while start < end and groups[start] == 0:
+            start += 1
+            weight -= 1
+        while end > start and groups[end - 1] == 0:
+            end -= 1
+        groups = groups[start:end]
+
+        if not groups:
+            weight, sign = 0, 0
+
+        header = self._header.pack(len(groups), weight, self._sign_negative if sign else self._sign_positive,
+                                   dscale)
+        return header + struct.pack('!%dh' % len(groups), *groups)
+
+
+class ArrayBinaryEncoder(AbstractBinaryEncoder):
+    """
+    Encodes 1-dimensional arrays
+    """
+    _header = struct.Struct('!iii')
+    _dimension = struct.Struct('!ii')
+
+    def __init__(self, item_encoder):  # type: (AbstractBinaryEncoder) -> None
+        self._item_encoder = item_encoder
+
+    def encode(self, val):
+        if not isinstance(val, (list, tuple)):
+            raise TypeError("list value expected, got %r" % val)
+
+        if not val:
+            return self._header.pack(0, 0, self._item_encoder.oid)
+
+        if any(isinstance(item, (list, tuple)) for item in val):
+            raise ValueError("Multidimensional arrays are not supported")
+
+        has_null = any(item is None for item in val)
+        return b''.join(chain(
+            (self._header.pack(1, int(has_null), self._item_encoder.oid), self._dimension.pack(len(val), 1)),
+            self._item_encoder.encode_column(val)
+        ))
+
+
+_BINARY_ENCODERS = {
+    'smallint': lambda: FixedWidthBinaryEncoder('h', 21, numpy_kinds='biu'),
+    'integer': lambda: FixedWidthBinaryEncoder('i', 23, numpy_kinds='biu'),
+    'bigint': lambda: FixedWidthBinaryEncoder('q', 20, numpy_kinds='biu'),
+    'real': lambda: FixedWidthBinaryEncoder('f', 700, numpy_kinds='biuf'),
+    'double precision': lambda: FixedWidthBinaryEncoder('d', 701, numpy_kinds='biuf'),
+    'boolean': lambda: FixedWidthBinaryEncoder('?', 16, numpy_kinds='b'),
+    'numeric': NumericBinaryEncoder,
+    'uuid': UUIDBinaryEncoder,
+    'date': DateBinaryEncoder,
+    'timestamp with time zone': lambda: DateTimeBinaryEncoder(True),
+    'timestamp': lambda: DateTimeBinaryEncoder(False),
+    'timestamp without time zone': lambda: DateTimeBinaryEncoder(False),
+    'text': lambda: TextBinaryEncoder(25),
+    'varchar': lambda: TextBinaryEncoder(1043),
+    'character varying': lambda: TextBinaryEncoder(1043),
+    'char': lambda: TextBinaryEncoder(1042),
+    'character': lambda: TextBinaryEncoder(1042),
+    'jsonb': lambda: JsonBinaryEncoder(True),
+    'json': lambda: JsonBinaryEncoder(False),
+}
+
+
+def get_binary_encoder(db_type):  # type: (str) -> Optional[AbstractBinaryEncoder]
+    """
+    Builds binary encoder for given database type
+    :param db_type: Database type name, as returned by get_field_db_type()
+    :return: Encoder instance or None, if type is not supported
+    """
+    db_type = db_type.strip()
+    if db_type.endswith('[]'):
+        item_encoder = get_binary_encoder(db_type[:-2])
+        if item_encoder is None or item_encoder.oid is None:
+            return None
+        return ArrayBinaryEncoder(item_encoder)
+
+    # Type modifiers (like varchar length or numeric precision) don't change binary format
+    encoder_cls = _BINARY_ENCODERS.get(db_type.split('(', 1)[0].strip().lower())
+    return encoder_cls() if encoder_cls is not None else None
+
+
+def get_binary_encoders(db_types):  # type: (Iterable[str]) -> Optional[List[AbstractBinaryEncoder]]
+    """
+    Builds binary encoders for a row of columns
+    :param db_types: Database type names of columns
+    :return: A list of encoders or None, if any type is not supported
+    """
+    encoders = [get_binary_encoder(db_type) for db_type in db_types]
+    return None if any(enc is None for enc in encoders) else encoders
+
+
+def encode_binary_copy(encoders, columns, rows_count):
+    # type: (List[AbstractBinaryEncoder], List[Sequence[Any]], int) -> bytes
+    """
+    Encodes data to COPY binary format
+    :param encoders: Encoders of columns
+    :param columns: Column values. Every column must contain rows_count values
+    :param rows_count: Number of rows
+    :return: COPY data, including header and trailer
+    """
+    field_count = struct.pack('!h', len(encoders))
+    encoded_columns = [enc.encode_column(col) for enc, col in zip(encoders, columns)]
+    if encoded_columns:
+        rows = chain.from_iterable(zip(repeat(field_count, rows_count), *encoded_columns))
+    else:
+        rows = repeat(field_count, rows_count)
+    return b''.join(chain((BINARY_COPY_HEADER,), rows, (BINARY_COPY_TRAILER,)))
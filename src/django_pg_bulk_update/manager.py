@@ -17,13 +17,15 @@ Examples:
         objects = CustomManager()
 """
 from logging import getLogger
-from typing import Optional, Iterable, Union
+from typing import Any, AsyncIterator, Optional, Iterable, Union
 
 from django.db import models
 from django.db.models.manager import BaseManager
+from django.db.models.sql.where import WhereNode
 
-from .query import bulk_update, bulk_update_or_create, bulk_create
-from .types import TUpdateValues, TFieldNames, TSetFunctions, TOperators
+from .async_query import abulk_update, abulk_update_or_create, abulk_create, abulk_delete
+from .query import bulk_update, bulk_update_or_create, bulk_create, bulk_delete
+from .types import TUpdateValues, TFieldNames, TSetFunctions, TOperators, TDeleteKeys
 
 logger = getLogger('django-pg-bulk-update')
 
@@ -36,8 +38,10 @@ class BulkUpdateMixin:
     """
 
     def pg_bulk_update(self, values, key_fields='id', set_functions=None, key_fields_ops=(), returning=None,
-                       batch_size=None, batch_delay=0):
-        # type: (TUpdateValues, TFieldNames, TSetFunctions, TOperators, Optional[Iterable[str]], Optional[int], float) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+                       batch_size=None, batch_delay=0, strategy='values', prepare=False, skip_unchanged=False,
+                       order_keys=None, returning_stream=False, returning_format='queryset', parallel=None,
+                       pipeline=None, transaction=None, retries=0, columns=None):
+        # type: (TUpdateValues, TFieldNames, TSetFunctions, TOperators, Optional[Iterable[str]], Optional[int], float, str, bool, bool, Optional[bool], bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', 'ReturningStream', list, dict]  # noqa: F821
         """
         Updates multiple records of a given model, finding them by key_fields.
 
@@ -95,28 +99,43 @@ class BulkUpdateMixin:
             Example: ('eq', 'in') or {'a': 'eq', 'b': 'in'}.
         :param returning: Optional. If given, returns updated values of fields, listed in parameter.
         :param batch_size: Optional. If given, data is split it into batches of given size.
-            Each batch is queried independently.
+            Each batch is queried independently. If 'auto', batch size is adjusted automatically.
         :param batch_delay: Delay in seconds between batches execution, if batch_size is not None.
+        :param strategy: A way values are passed to database: 'values' (default) or 'unnest'
+        :param prepare: If flag is set, query is executed as server side prepared statement, cached per connection
+        :param skip_unchanged: If flag is set, records are updated only if their values change.
+            BulkOperationResult with changed and matched records count is returned.
+        :param order_keys: If flag is set, values are sorted by keys before splitting into batches. Defaults to False.
+        :param returning_stream: If flag is set, ReturningStream, reading returned records in chunks, is returned
+        :param returning_format: Format of returned records: 'queryset' (default), 'tuples', 'dicts', 'keyed',
+            'columns', 'numpy' or 'array_agg'
+        :param parallel: Optional. If given, data is processed by this number of threads with their own connections.
+            Every batch is committed independently.
+        :param pipeline: Optional. If given, statements of this number of batches are sent to database together
+            and executed in a single transaction.
+        :param transaction: Optional. Transaction control of batches: 'single', 'per_batch'
+            or number of batches to commit together. By default batches are executed in current transaction.
+        :param retries: Maximum number of retries of a batch, failed by deadlock or serialization failure
+        :param columns: Optional. Field names of positional rows, given in values instead of dicts
         :return: Number of records updated
         """
         self._for_write = True
         using = self.db
-
-        if getattr(self, 'query', False):
-            if len(self.query.used_aliases) > 1:
-                raise Exception('joins in lookups are restricted in bulk update methods')
-
-            where = getattr(self.query, 'where', None)
-        else:
-            where = None
+        where = self._get_where('bulk update')
 
         return bulk_update(self.model, values, key_fields=key_fields, using=using, set_functions=set_functions,
                            key_fields_ops=key_fields_ops, where=where, returning=returning,
-                           batch_size=batch_size, batch_delay=batch_delay)
+                           batch_size=batch_size, batch_delay=batch_delay, strategy=strategy, prepare=prepare,
+                           skip_unchanged=skip_unchanged, order_keys=order_keys, returning_stream=returning_stream,
+                           returning_format=returning_format, parallel=parallel, pipeline=pipeline,
+                           transaction=transaction, retries=retries, columns=columns)
 
     def pg_bulk_update_or_create(self, values, key_fields='id', set_functions=None, update=True, key_is_unique=True,
-                                 returning=None, batch_size=None, batch_delay=0):
-        # type: (TUpdateValues, TFieldNames, TSetFunctions, bool, bool, Optional[Iterable[str]], Optional[int], float) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+                                 returning=None, batch_size=None, batch_delay=0, strategy='values', prepare=False,
+                                 skip_unchanged=False, order_keys=None, report_inserted=False, returning_stream=False,
+                                 returning_format='queryset', parallel=None, pipeline=None, transaction=None, retries=0,
+                                 columns=None):
+        # type: (TUpdateValues, TFieldNames, TSetFunctions, bool, bool, Optional[Iterable[str]], Optional[int], float, str, bool, bool, Optional[bool], bool, bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', 'ReturningStream', list, dict]  # noqa: F821
         """
         Searches for records, given in values by key_fields. If records are found, updates them from values.
         If not found - creates them from values. Note, that all fields without default value must be present in values.
@@ -137,12 +156,30 @@ class BulkUpdateMixin:
             Functions: [eq, =; incr, +; concat, ||]
             Example: {'name': 'eq', 'int_fields': 'incr'}
         :param update: If this flag is not set, existing records will not be updated
-        :param key_is_unique: Settings this flag to False forces library to use 3-query transactional update,
-            not INSERT ... ON CONFLICT.
+        :param key_is_unique: Settings this flag to False forces library to use MERGE (PostgreSQL 15+)
+            or 3-query transactional update, not INSERT ... ON CONFLICT.
         :param returning: Optional. If given, returns updated values of fields, listed in parameter.
         :param batch_size: Optional. If given, data is split it into batches of given size.
-            Each batch is queried independently.
+            Each batch is queried independently. If 'auto', batch size is adjusted automatically.
         :param batch_delay: Delay in seconds between batches execution, if batch_size is not None.
+        :param strategy: A way values are passed to database: 'values' (default) or 'unnest'
+        :param prepare: If flag is set, query is executed as server side prepared statement, cached per connection
+        :param skip_unchanged: If flag is set, existing records are updated only if their values change.
+            BulkOperationResult with changed and matched records count is returned.
+        :param order_keys: If flag is set, values are sorted by keys before splitting into batches. Defaults to True.
+        :param report_inserted: If flag is set, BulkOperationResult with inserted and updated records count
+            is returned. Returned instances get boolean 'inserted' attribute.
+        :param returning_stream: If flag is set, ReturningStream, reading returned records in chunks, is returned
+        :param returning_format: Format of returned records: 'queryset' (default), 'tuples', 'dicts', 'keyed',
+            'columns', 'numpy' or 'array_agg'
+        :param parallel: Optional. If given, data is processed by this number of threads with their own connections.
+            Every batch is committed independently.
+        :param pipeline: Optional. If given, statements of this number of batches are sent to database together
+            and executed in a single transaction.
+        :param transaction: Optional. Transaction control of batches: 'single', 'per_batch'
+            or number of batches to commit together. By default batches are executed in current transaction.
+        :param retries: Maximum number of retries of a batch, failed by deadlock or serialization failure
+        :param columns: Optional. Field names of positional rows, given in values instead of dicts
         :return: Number of records created or updated
         """
         self._for_write = True
@@ -150,10 +187,17 @@ class BulkUpdateMixin:
 
         return bulk_update_or_create(self.model, values, key_fields=key_fields, using=using,
                                      set_functions=set_functions, update=update, key_is_unique=key_is_unique,
-                                     returning=returning, batch_size=batch_size, batch_delay=batch_delay)
-
-    def pg_bulk_create(self, values, set_functions=None, returning=None, batch_size=None, batch_delay=0):
-        # type: (TUpdateValues, TSetFunctions, Optional[TFieldNames], Optional[int], float) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+                                     returning=returning, batch_size=batch_size, batch_delay=batch_delay,
+                                     strategy=strategy, prepare=prepare, skip_unchanged=skip_unchanged,
+                                     order_keys=order_keys, report_inserted=report_inserted,
+                                     returning_stream=returning_stream, returning_format=returning_format,
+                                     parallel=parallel, pipeline=pipeline, transaction=transaction,
+                                     retries=retries, columns=columns)
+
+    def pg_bulk_create(self, values, set_functions=None, returning=None, batch_size=None, batch_delay=0,
+                       strategy='values', prepare=False, returning_stream=False, returning_format='queryset',
+                       parallel=None, pipeline=None, transaction=None, retries=0, columns=None):
+        # type: (TUpdateValues, TSetFunctions, Optional[TFieldNames], Optional[int], float, str, bool, bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', 'ReturningStream', list, dict]  # noqa: F821
         """
         Creates a batch of records in database.
         Acts like native QuerySet.bulk_create() method, but uses library infrastructure and input formats
@@ -168,15 +212,163 @@ class BulkUpdateMixin:
             Example: {'name': 'eq', 'int_fields': 'incr'}
         :param returning: Optional. If given, returns updated values of fields, listed in parameter.
         :param batch_size: Optional. If given, data is split it into batches of given size.
-            Each batch is queried independently.
+            Each batch is queried independently. If 'auto', batch size is adjusted automatically.
         :param batch_delay: Delay in seconds between batches execution, if batch_size is not None.
+        :param strategy: A way values are passed to database: 'values' (default) or 'unnest'
+        :param prepare: If flag is set, query is executed as server side prepared statement, cached per connection
+        :param returning_stream: If flag is set, ReturningStream, reading returned records in chunks, is returned
+        :param returning_format: Format of returned records: 'queryset' (default), 'tuples', 'dicts', 'keyed',
+            'columns', 'numpy' or 'array_agg'
+        :param parallel: Optional. If given, data is processed by this number of threads with their own connections.
+            Every batch is committed independently.
+        :param pipeline: Optional. If given, statements of this number of batches are sent to database together
+            and executed in a single transaction.
+        :param transaction: Optional. Transaction control of batches: 'single', 'per_batch'
+            or number of batches to commit together. By default batches are executed in current transaction.
+        :param retries: Maximum number of retries of a batch, failed by deadlock or serialization failure
+        :param columns: Optional. Field names of positional rows, given in values instead of dicts
         :return: Number of records created or updated
         """
         self._for_write = True
         using = self.db
 
         return bulk_create(self.model, values, using=using, set_functions=set_functions, returning=returning,
-                           batch_size=batch_size, batch_delay=batch_delay)
+                           batch_size=batch_size, batch_delay=batch_delay, strategy=strategy, prepare=prepare,
+                           returning_stream=returning_stream, returning_format=returning_format, parallel=parallel,
+                           pipeline=pipeline, transaction=transaction, retries=retries, columns=columns)
+
+    def pg_bulk_delete(self, keys, key_fields='id', key_fields_ops=(), returning=None, batch_size=None, batch_delay=0,
+                       strategy='values', prepare=False, order_keys=None, returning_stream=False,
+                       returning_format='queryset', parallel=None, pipeline=None, transaction=None, retries=0):
+        # type: (TDeleteKeys, TFieldNames, TOperators, Optional[Iterable[str]], Optional[int], float, str, bool, Optional[bool], bool, str, Optional[int], Optional[int], Union[None, str, int], int) -> Union[int, 'ReturningQuerySet', 'ReturningStream', list, dict]  # noqa: F821
+        """
+        Deletes multiple records of a given model, finding them by key_fields.
+
+        Example:
+        # Deletes records with (name, int_field) equal to ('item1', 1) or ('item2', 2). Does only 1 database query.
+        deleted = TestModel.objects.pg_bulk_delete([('item1', 1), ('item2', 2)], key_fields=('name', 'int_field'))
+
+        :param keys: Keys of records to delete. An iterable, each item of which can be:
+            + A dict, containing all key_fields as keys. Other fields are ignored.
+            + An iterable of key values. It's length must be equal to key_fields length.
+            + Single object, if key_fields has 1 element
+        :param key_fields: Field names, by which items would be selected.
+            It can be a string, if there's only one key field or iterable of strings for multiple keys
+        :param key_fields_ops: Key fields compare operators.
+            It can be dict with field_name from key_fields as key, operation name as value
+            Or an iterable of operations in key_fields order.
+            The default operator is eq (it will be used for all fields, not set directly).
+            Operators: [in; !in; gt, >; lt, <; gte, >=; lte, <=; !eq, <>, !=; eq, =, ==]
+            Example: ('eq', 'in') or {'a': 'eq', 'b': 'in'}.
+        :param returning: Optional. If given, returns values of deleted records fields, listed in parameter.
+        :param batch_size: Optional. If given, data is split it into batches of given size.
+            Each batch is queried independently. If 'auto', batch size is adjusted automatically.
+        :param batch_delay: Delay in seconds between batches execution, if batch_size is not None.
+        :param strategy: A way values are passed to database: 'values' (default) or 'unnest'
+        :param prepare: If flag is set, query is executed as server side prepared statement, cached per connection
+        :param order_keys: If flag is set, keys are sorted before splitting into batches. Defaults to False.
+        :param returning_stream: If flag is set, ReturningStream, reading returned records in chunks, is returned
+        :param returning_format: Format of returned records: 'queryset' (default), 'tuples', 'dicts', 'keyed',
+            'columns', 'numpy' or 'array_agg'
+        :param parallel: Optional. If given, data is processed by this number of threads with their own connections.
+            Every batch is committed independently.
+        :param pipeline: Optional. If given, statements of this number of batches are sent to database together
+            and executed in a single transaction.
+        :param transaction: Optional. Transaction control of batches: 'single', 'per_batch'
+            or number of batches to commit together. By default batches are executed in current transaction.
+        :param retries: Maximum number of retries of a batch, failed by deadlock or serialization failure
+        :return: Number of records deleted
+        """
+        self._for_write = True
+        using = self.db
+        where = self._get_where('bulk delete')
+
+        return bulk_delete(self.model, keys, key_fields=key_fields, using=using, key_fields_ops=key_fields_ops,
+                           where=where, returning=returning, batch_size=batch_size, batch_delay=batch_delay,
+                           strategy=strategy, prepare=prepare, order_keys=order_keys, returning_stream=returning_stream,
+                           returning_format=returning_format, parallel=parallel, pipeline=pipeline,
+                           transaction=transaction, retries=retries)
+
+    def _get_where(self, method_name):  # type: (str) -> Optional[WhereNode]
+        if getattr(self, 'query', False):
+            if len(self.query.used_aliases) > 1:
+                raise Exception('joins in lookups are restricted in %s methods' % method_name)
+
+            return getattr(self.query, 'where', None)
+        else:
+            return None
+
+    async def apg_bulk_update(self, values, key_fields='id', set_functions=None, key_fields_ops=(), returning=None,
+                              batch_size=None, batch_delay=0, strategy='values', prepare=False, skip_unchanged=False,
+                              order_keys=None, returning_stream=False, returning_format='queryset', transaction=None,
+                              retries=0, columns=None):
+        # type: (TUpdateValues, TFieldNames, TSetFunctions, TOperators, Optional[Iterable[str]], Optional[int], float, str, bool, bool, Optional[bool], bool, str, Optional[str], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+        """
+        Asyncio version of pg_bulk_update. See pg_bulk_update for parameters description.
+        :param returning_stream: If flag is set, an async iterator over returned records is returned
+        :return: Number of records updated
+        """
+        self._for_write = True
+        return await abulk_update(self.model, values, key_fields=key_fields, using=self.db,
+                                  set_functions=set_functions, key_fields_ops=key_fields_ops,
+                                  where=self._get_where('bulk update'), returning=returning, batch_size=batch_size,
+                                  batch_delay=batch_delay, strategy=strategy, prepare=prepare,
+                                  skip_unchanged=skip_unchanged, order_keys=order_keys,
+                                  returning_stream=returning_stream, returning_format=returning_format,
+                                  transaction=transaction, retries=retries, columns=columns)
+
+    async def apg_bulk_update_or_create(self, values, key_fields='id', set_functions=None, update=True,
+                                        key_is_unique=True, returning=None, batch_size=None, batch_delay=0,
+                                        strategy='values', prepare=False, skip_unchanged=False, order_keys=None,
+                                        report_inserted=False, returning_stream=False, returning_format='queryset',
+                                        transaction=None, retries=0, columns=None):
+        # type: (TUpdateValues, TFieldNames, TSetFunctions, bool, bool, Optional[Iterable[str]], Optional[int], float, str, bool, bool, Optional[bool], bool, bool, str, Optional[str], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+        """
+        Asyncio version of pg_bulk_update_or_create. See pg_bulk_update_or_create for parameters description.
+        :param returning_stream: If flag is set, an async iterator over returned records is returned
+        :return: Number of records created or updated
+        """
+        self._for_write = True
+        return await abulk_update_or_create(self.model, values, key_fields=key_fields, using=self.db,
+                                            set_functions=set_functions, update=update, key_is_unique=key_is_unique,
+                                            returning=returning, batch_size=batch_size, batch_delay=batch_delay,
+                                            strategy=strategy, prepare=prepare, skip_unchanged=skip_unchanged,
+                                            order_keys=order_keys, report_inserted=report_inserted,
+                                            returning_stream=returning_stream, returning_format=returning_format,
+                                            transaction=transaction, retries=retries, columns=columns)
+
+    async def apg_bulk_create(self, values, set_functions=None, returning=None, batch_size=None, batch_delay=0,
+                              strategy='values', prepare=False, returning_stream=False, returning_format='queryset',
+                              transaction=None, retries=0, columns=None):
+        # type: (TUpdateValues, TSetFunctions, Optional[TFieldNames], Optional[int], float, str, bool, bool, str, Optional[str], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+        """
+        Asyncio version of pg_bulk_create. See pg_bulk_create for parameters description.
+        :param returning_stream: If flag is set, an async iterator over returned records is returned
+        :return: Number of records created
+        """
+        self._for_write = True
+        return await abulk_create(self.model, values, using=self.db, set_functions=set_functions,
+                                  returning=returning, batch_size=batch_size, batch_delay=batch_delay,
+                                  strategy=strategy, prepare=prepare, returning_stream=returning_stream,
+                                  returning_format=returning_format, transaction=transaction, retries=retries,
+                                  columns=columns)
+
+    async def apg_bulk_delete(self, keys, key_fields='id', key_fields_ops=(), returning=None, batch_size=None,
+                              batch_delay=0, strategy='values', prepare=False, order_keys=None,
+                              returning_stream=False, returning_format='queryset', transaction=None, retries=0):
+        # type: (TDeleteKeys, TFieldNames, TOperators, Optional[Iterable[str]], Optional[int], float, str, bool, Optional[bool], bool, str, Optional[str], int) -> Union[int, 'ReturningQuerySet', AsyncIterator[Any], list, dict]  # noqa: F821
+        """
+        Asyncio version of pg_bulk_delete. See pg_bulk_delete for parameters description.
+        :param returning_stream: If flag is set, an async iterator over returned records is returned
+        :return: Number of records deleted
+        """
+        self._for_write = True
+        return await abulk_delete(self.model, keys, key_fields=key_fields, using=self.db,
+                                  key_fields_ops=key_fields_ops, where=self._get_where('bulk delete'),
+                                  returning=returning, batch_size=batch_size, batch_delay=batch_delay,
+                                  strategy=strategy, prepare=prepare, order_keys=order_keys,
+                                  returning_stream=returning_stream, returning_format=returning_format,
+                                  transaction=transaction, retries=retries)
 
     def bulk_update(self, values, key_fields='id', set_functions=None, key_fields_ops=(), returning=None,
                     batch_size=None, batch_delay=0):
@@ -272,8 +464,8 @@ class BulkUpdateMixin:
             Functions: [eq, =; incr, +; concat, ||]
             Example: {'name': 'eq', 'int_fields': 'incr'}
         :param update: If this flag is not set, existing records will not be updated
-        :param key_is_unique: Settings this flag to False forces library to use 3-query transactional update,
-            not INSERT ... ON CONFLICT.
+        :param key_is_unique: Settings this flag to False forces library to use MERGE (PostgreSQL 15+)
+            or 3-query transactional update, not INSERT ... ON CONFLICT.
         :param returning: Optional. If given, returns updated values of fields, listed in parameter.
         :param batch_size: Optional. If given, data is split it into batches of given size.
             Each batch is queried independently.
@@ -0,0 +1,194 @@
+"""
+This file contains pipelined execution of batches.
+While pipeline is active on a connection, batch handlers don't execute their statements, but queue them.
+Queued statements are sent to database together, when pipeline is flushed.
+psycopg 3 (with libpq 14+) sends them in pipeline mode, without waiting for result of every statement,
+so a group of batches costs a single network round trip. Other drivers don't support pipelines.
+Async functions take queued statements out of pipeline and execute them with async connection (see async_query).
+"""
+from logging import getLogger
+from threading import local
+from typing import Any, Callable, Dict, List, Optional  # noqa: F401
+
+from django.db import transaction
+
+from .types import TDatabase  # noqa: F401
+
+logger = getLogger('django-pg-bulk-update')
+
+# Active pipelines of current thread by database alias
+_local = local()
+
+
+def pipeline_available(conn):  # type: (TDatabase) -> bool
+    """
+    Checks if database driver supports pipeline mode: psycopg 3 with libpq 14+
+    :param conn: Database connection used
+    :return: Boolean
+    """
+    conn.ensure_connection()
+    if not hasattr(conn.connection, 'pipeline'):
+        return False
+
+    try:
+        from psycopg import Pipeline
+        return Pipeline.is_supported()
+    except (ImportError, AttributeError):
+        return False
+
+
+def get_pipeline(conn):  # type: (TDatabase) -> Optional[Pipeline]
+    """
+    Gets pipeline, active on the connection in current thread
+    :param conn: Database connection used
+    :return: Pipeline instance or None
+    """
+    return getattr(_local, 'pipelines', {}).get(conn.alias)
+
+
+def resolve_result(result):  # type: (Any) -> Any
+    """
+    Gets value of batch result, if it is a PendingResult
+    """
+    return result.value if isinstance(result, PendingResult) else result
+
+
+def map_result(result, func):  # type: (Any, Callable[[Any], Any]) -> Any
+    """
+    Applies function to batch result. If result is pending, function is applied, when it is received.
+    :param result: Result of statement execution or PendingResult
+    :param func: Function, converting result value
+    :return: Converted result or PendingResult
+    """
+    if isinstance(result, PendingResult):
+        result.converters.append(func)
+        return result
+
+    return func(result)
+
+
+class PendingResult(object):
+    """
+    Result of a statement, queued in pipeline. Its value is available, when pipeline has been flushed.
+    """
+    def __init__(self, sql, params, fetch, batch_index):  # type: (str, List[Any], Callable[[Any], Any], int) -> None
+        """
+        :param sql: Statement to execute
+        :param params: Statement parameters
+        :param fetch: Function, getting result value from cursor, which has executed the statement
+        :param batch_index: Index of the batch, which has queued the statement
+        """
+        self.sql = sql
+        self.params = params
+        self.fetch = fetch
+        self.batch_index = batch_index
+        self.converters = []  # type: List[Callable[[Any], Any]]
+        self.resolved = False
+        self._value = None
+
+    def set_cursor(self, cursor):  # type: (Any) -> None
+        value = self.fetch(cursor)
+        for converter in self.converters:
+            value = converter(value)
+        self._value = value
+        self.resolved = True
+
+    @property
+    def value(self):  # type: () -> Any
+        if not self.resolved:
+            raise ValueError("Result is not available until pipeline is flushed")
+        return self._value
+
+
+class Pipeline(object):
+    """
+    Queue of statements, sent to database together. Use it as a context manager to activate it on the connection.
+    """
+    def __init__(self, conn):  # type: (TDatabase) -> None
+        """
+        :param conn: Database connection used
+        """
+        self.conn = conn
+        # Index of the batch being processed. It is saved to queued results to find the failed batch.
+        self.batch_index = 0
+        self._pending = []  # type: List[PendingResult]
+
+    def __len__(self):  # type: () -> int
+        return len(self._pending)
+
+    def __enter__(self):
+        pipelines = getattr(_local, 'pipelines', {})  # type: Dict[str, Pipeline]
+        if self.conn.alias in pipelines:
+            raise ValueError("Pipeline is already active on connection '%s'" % self.conn.alias)
+        pipelines[self.conn.alias] = self
+        _local.pipelines = pipelines
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _local.pipelines.pop(self.conn.alias, None)
+        self._pending = []
+        return False
+
+    def queue(self, sql, params, fetch):  # type: (str, List[Any], Callable[[Any], Any]) -> PendingResult
+        """
+        Adds a statement to the pipeline
+        :param sql: Statement to execute
+        :param params: Statement parameters
+        :param fetch: Function, getting result value from cursor, which has executed the statement
+        :return: PendingResult of the statement
+        """
+        logger.debug('QUEUEING STATEMENT:\n        %sWITH PARAMETERS [%s]\n'
+                     % (sql, ', '.join(str(v) for v in params)))
+        result = PendingResult(sql, params, fetch, self.batch_index)
+        self._pending.append(result)
+        return result
+
+    def take(self):  # type: () -> List[PendingResult]
+        """
+        Takes queued statements out of the pipeline. Caller executes them and sets their cursors.
+        :return: A list of PendingResult
+        """
+        pending, self._pending = self._pending, []
+        return pending
+
+    def flush(self):  # type: () -> None
+        """
+        Executes queued statements in a single transaction and sets their results.
+        If a statement fails, the whole transaction is rolled back.
+        batch_index attribute of the exception raised contains index of the batch, which has failed.
+        :return: None
+        """
+        pending = self.take()
+        if not pending:
+            return
+
+        if not pipeline_available(self.conn):
+            raise ValueError("Pipeline requires psycopg 3 database driver with libpq 14+")
+
+        logger.debug('FLUSHING %d STATEMENTS IN PIPELINE MODE' % len(pending))
+        cursors = []
+        try:
+            with transaction.atomic(using=self.conn.alias):
+                with self.conn.connection.pipeline() as pipe:
+                    for result in pending:
+                        cursor = self.conn.cursor()
+                        cursors.append(cursor)
+                        cursor.execute(result.sql, result.params)
+
+                    # Results of all statements are received in a single round trip.
+                    # Error of the first failed statement is raised here, next statements are not executed.
+                    with self.conn.wrap_database_errors:
+                        pipe.sync()
+
+                for result, cursor in zip(pending, cursors):
+                    result.set_cursor(cursor)
+        except Exception as ex:
+            # Statements before the failed one have received their results.
+            # Commit can fail after all results have been received, if constraints are deferred.
+            failed = next((result for result, cursor in zip(pending, cursors)
+                           if getattr(cursor.cursor, 'pgresult', None) is None), pending[-1])
+            ex.batch_index = failed.batch_index
+            raise
+        finally:
+            for cursor in cursors:
+                cursor.close()
@@ -0,0 +1,115 @@
+"""
+This file contains server side prepared statements cache.
+Statements are prepared per database connection and executed by name afterwards,
+so PostgreSQL doesn't parse and plan the same query on every call.
+"""
+import hashlib
+import re
+from logging import getLogger
+from typing import Any, List, Tuple
+
+from .types import TDatabase
+from .utils import LRUCache
+
+logger = getLogger('django-pg-bulk-update')
+
+# Maximum number of statements, prepared on a single connection.
+# Least recently used statements are deallocated, when the limit is exceeded.
+PREPARED_STATEMENTS_LIMIT = 100
+
+STATEMENT_NAME_PREFIX = 'django_pg_bulk_update_'
+
+_placeholder_regex = re.compile(r'%(%|s)')
+
+
+def prepare_available(conn):  # type: (TDatabase) -> bool
+    """
+    Checks if prepared statements can be used on given connection.
+    Prepared statements live in database session. Transaction pooling proxies (like pgbouncer)
+    can execute statement in a session other than the one it has been prepared in.
+    Such databases should have DISABLE_PREPARED_STATEMENTS setting, which makes prepare parameter ignored.
+    :param conn: Database connection used
+    :return: Boolean
+    """
+    return not conn.settings_dict.get('DISABLE_PREPARED_STATEMENTS', False)
+
+
+def _deallocate(conn, name):  # type: (TDatabase, str) -> None
+    """
+    Removes prepared statement from database session
+    :param conn: Database connection used
+    :param name: Statement name
+    :return: None
+    """
+    logger.debug('DEALLOCATING STATEMENT %s' % name)
+    with conn.cursor() as cursor:
+        cursor.execute('DEALLOCATE %s' % name)
+
+
+def get_prepared_statements(conn):  # type: (TDatabase) -> LRUCache
+    """
+    Returns cache of statements, prepared on current database session.
+    Cache is bound to database connection: if it has been reconnected, new empty cache is returned.
+    :param conn: Database connection used
+    :return: LRUCache instance with query text as key and statement name as value
+    """
+    conn.ensure_connection()
+    raw_conn, statements = getattr(conn, '_pg_bulk_update_statements', (None, None))
+
+    if raw_conn is not conn.connection:
+        statements = LRUCache(maxsize=PREPARED_STATEMENTS_LIMIT,
+                              on_evict=lambda sql, name: _deallocate(conn, name))
+        conn._pg_bulk_update_statements = (conn.connection, statements)
+
+    return statements
+
+
+def clear_prepared_statements(conn):  # type: (TDatabase) -> None
+    """
+    Deallocates all statements, prepared on current database session, and clears their cache
+    :param conn: Database connection used
+    :return: None
+    """
+    statements = get_prepared_statements(conn)
+    names = statements.values()
+    if names:
+        logger.debug('DEALLOCATING %d STATEMENTS' % len(names))
+        with conn.cursor() as cursor:
+            cursor.execute('; '.join('DEALLOCATE %s' % name for name in names))
+    statements.clear()
+
+
+def prepare_statement(conn, sql, params):
+    # type: (TDatabase, str, List[Any]) -> Tuple[str, List[Any]]
+    """
+    Prepares query on database session (if it has not been prepared before)
+    and returns query, executing prepared statement with given parameters.
+    Query text is used as cache key: it is fully defined by model, key, update and returning fields,
+    set functions and operators for 'unnest' and 'copy' strategies, so equal queries share a statement.
+    Cache mirrors statements of the session: they are deallocated, when they are evicted from it,
+    so statement is prepared without checking the session.
+    :param conn: Database connection used
+    :param sql: Query to prepare with psycopg2 placeholders
+    :param params: Query parameters
+    :return: A tuple of EXECUTE sql and it's parameters
+    """
+    statements = get_prepared_statements(conn)
+    name = statements.get(sql)
+
+    if name is None:
+        name = STATEMENT_NAME_PREFIX + hashlib.md5(sql.encode('utf-8')).hexdigest()
+
+        counter = iter(range(1, len(params) + 1))
+        prepare_sql = _placeholder_regex.sub(
+            lambda m: '%' if m.group(1) == '%' else '$%d' % next(counter), sql)
+
+        logger.debug('PREPARING STATEMENT %s' % name)
+        with conn.cursor() as cursor:
+            cursor.execute('PREPARE %s AS %s' % (name, prepare_sql))
+
+        statements.set(sql, name)
+
+    if params:
+        return 'EXECUTE %s(%s)' % (name, ', '.join(['%s'] * len(params))), list(params)
+    else:
+        return 'EXECUTE %s' % name, []
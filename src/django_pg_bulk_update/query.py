@@ -5,28 +5,130 @@ This file contains bulk_update query functions
 import inspect
 import json
 
-from itertools import chain
+from functools import partial, wraps
+from itertools import chain, islice
 from logging import getLogger
-from typing import Any, Type, Iterable as TIterable, Union, Optional, List, Tuple
+from typing import Any, Type, Iterable as TIterable, Union, Optional, List, Tuple, Callable, Hashable
 
 from django.db import transaction, connection, connections
+from django.db import models
 from django.db.models import Model, Q, AutoField, Field
 from django.db.models.expressions import BaseExpression
 from django.db.models.sql import UpdateQuery
 from django.db.models.sql.where import WhereNode
 
-from .compatibility import (get_postgres_version, get_model_fields,
-                            returning_available, string_types, Iterable)
+from .clause_operators import EqualClauseOperator
+from .columnar import ColumnarValues, is_columnar_input, get_columns, get_sort_indexes, is_numpy_array
+from .compatibility import (get_postgres_version, get_model_fields, get_field_db_type, FullResultSet,
+                            returning_available, numpy_available, string_types, Iterable, Iterator)
+from .pipeline import get_pipeline, map_result, pipeline_available
+from .prepared import prepare_available, prepare_statement
+from .results import BulkOperationResult, ReturnedRows, RETURNING_FORMATS
 from .set_functions import AbstractSetFunction, NowSetFunction
-from .types import (TOperators, TFieldNames, TUpdateValues, TSetFunctions,
+from .staging import copy_columns_to_staging
+from .streaming import ReturningStream, execute_to_stream
+from .types import (TOperators, TFieldNames, TUpdateValues, TSetFunctions, TDeleteKeys,
                     TOperatorsValid, TUpdateValuesValid,
                     TSetFunctionsValid, TDatabase, FieldDescriptor,
-                    AbstractFieldFormatter)
-from .utils import batched_operation, is_auto_set_field
+                    AbstractFieldFormatter, RowUpdates)
+from .utils import batched_operation, is_auto_set_field, validate_transaction_mode, validate_retries, LRUCache, \
+    CacheInfo, LazyBatches, AUTO_BATCH_INITIAL_SIZE
 
-__all__ = ['pdnf_clause', 'bulk_update', 'bulk_update_or_create', 'bulk_create']
+__all__ = ['pdnf_clause', 'bulk_update', 'bulk_update_or_create', 'bulk_create', 'bulk_delete',
+           'get_sql_cache_info', 'clear_sql_cache']
 logger = getLogger('django-pg-bulk-update')
 
+# Ways of passing values to database:
+# + values - VALUES list with a placeholder for every value
+# + unnest - one typed array parameter per column, unnest()-ed into rows
+# + copy - rows are copied to temporary staging table with COPY ... FROM STDIN
+STRATEGIES = ('values', 'unnest', 'copy')
+
+# Name of a column, returned by upserts with report_inserted flag.
+# It is set as an attribute of returned instances: True for inserted records, False for updated ones.
+INSERTED_COLUMN = 'inserted'
+
+# Maximum number of compiled query parts (everything except values and their parameters) to keep in memory
+SQL_CACHE_SIZE = 256
+
+_sql_cache = LRUCache(maxsize=SQL_CACHE_SIZE)
+
+# Columnar input: numpy arrays of these dtype kinds are passed to 'unnest' and 'copy' strategies as is,
+# if field is an instance of exactly this class and values are formatted by default rules.
+NUMPY_FIELD_KINDS = {
+    cls: kinds
+    for names, kinds in (
+        (('AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+          'PositiveIntegerField', 'PositiveBigIntegerField', 'PositiveSmallIntegerField'), 'iu'),
+        (('FloatField',), 'iuf'),
+        (('BooleanField',), 'b'),
+    )
+    for cls in (getattr(models, name, None) for name in names) if cls is not None
+}
+
+
+def get_sql_cache_info():  # type: () -> CacheInfo
+    """
+    Returns statistics of compiled query parts cache
+    :return: CacheInfo named tuple (hits, misses, evictions, maxsize, currsize)
+    """
+    return _sql_cache.info()
+
+
+def clear_sql_cache():  # type: () -> None
+    """
+    Removes all compiled query parts from cache and resets it's statistics
+    :return: None
+    """
+    _sql_cache.clear()
+
+
+def _get_signature(value):  # type: (Any) -> Optional[Hashable]
+    """
+    Forms hashable value, identifying query part function argument
+    :param value: Argument value
+    :return: Hashable value or None, if value can't be identified
+    """
+    if isinstance(value, FieldDescriptor):
+        return value.get_signature()
+    elif isinstance(value, (tuple, list)):
+        signatures = tuple(_get_signature(item) for item in value)
+        return None if any(sig is None for sig in signatures) else signatures
+
+    try:
+        hash(value)
+    except TypeError:
+        return None
+
+    # None is a valid argument value, but it is used as "can't be identified" marker
+    return value, type(value)
+
+
+def _cached_query_part(func):  # type: (Callable) -> Callable
+    """
+    Decorates a function, forming query part without values, so it's result is cached.
+    Function must take model and connection as first arguments and return a tuple (sql, params).
+    Result is cached by function, model, database alias and signatures of other arguments.
+    :param func: Function to decorate
+    :return: Decorated function
+    """
+    @wraps(func)
+    def wrapper(model, conn, *args):
+        signature = _get_signature(args)
+        if signature is None:
+            return func(model, conn, *args)
+
+        key = (func.__name__, model, conn.alias, signature)
+        result = _sql_cache.get(key)
+        if result is None:
+            result = func(model, conn, *args)
+            _sql_cache.set(key, result)
+
+        sql, params = result
+        return sql, list(params)
+
+    return wrapper
+
 
 def _validate_field_names(field_names, param_name='key_fields'):
     # type: (TFieldNames, str) -> Tuple[FieldDescriptor]
@@ -68,8 +170,6 @@ def _validate_returning(model, returning):
         ret_fds = tuple(FieldDescriptor(f.name)
                         for f in get_model_fields(model, concrete=True))
     else:
-        returning_available(raise_exception=True)
-
         ret_fds = _validate_field_names(returning, param_name='returning')
 
     for i, f in enumerate(ret_fds):
@@ -78,6 +178,153 @@ def _validate_returning(model, returning):
     return ret_fds
 
 
+def _validate_returning_stream(ret_fds, returning_stream):
+    # type: (Optional[Tuple[FieldDescriptor]], bool) -> bool
+    """
+    Validates returning_stream flag
+    :param ret_fds: Validated returning fds
+    :param returning_stream: Flag value
+    :return: Validated flag
+    """
+    if type(returning_stream) is not bool:
+        raise TypeError("returning_stream parameter must be boolean")
+    if returning_stream and ret_fds is None:
+        raise ValueError("returning_stream parameter requires returning parameter")
+
+    return returning_stream
+
+
+def _validate_parallel(parallel, returning_stream):  # type: (Optional[int], bool) -> Optional[int]
+    """
+    Validates parallel parameter
+    :param parallel: Number of parallel workers or None
+    :param returning_stream: Validated returning_stream flag
+    :return: Validated parameter
+    """
+    if parallel is not None and type(parallel) is not int:
+        raise TypeError("parallel parameter must be positive integer or None")
+    if parallel is not None and parallel < 1:
+        raise ValueError("parallel parameter must be positive integer or None")
+    if parallel is not None and parallel > 1 and returning_stream:
+        # Temporary tables are visible only in the connection of worker, which has created them
+        raise ValueError("parallel parameter can't be used with returning_stream")
+
+    return parallel
+
+
+def _validate_pipeline(pipeline,  # type: Optional[int]
+                       batch_size,  # type: Union[None, int, str]
+                       strategy,  # type: str
+                       ret_fds,  # type: Optional[Tuple[FieldDescriptor]]
+                       returning_stream,  # type: bool
+                       returning_format,  # type: str
+                       using,  # type: Optional[str]
+                       ):
+    # type: (...) -> Optional[int]
+    """
+    Validates pipeline parameter
+    :param pipeline: Number of batches, sent to database together, or None
+    :param batch_size: batch_size parameter
+    :param strategy: Validated strategy
+    :param ret_fds: Validated returning fds
+    :param returning_stream: Validated returning_stream flag
+    :param returning_format: Validated returning_format
+    :param using: Validated database alias
+    :return: Validated parameter
+    """
+    if pipeline is not None and type(pipeline) is not int:
+        raise TypeError("pipeline parameter must be positive integer or None")
+    if pipeline is None:
+        return pipeline
+    if pipeline < 1:
+        raise ValueError("pipeline parameter must be positive integer or None")
+    if batch_size == 'auto':
+        # Batch size is adjusted by execution time of every batch
+        raise ValueError("pipeline parameter can't be used with batch_size='auto'")
+    if strategy == 'copy':
+        raise ValueError("pipeline parameter can't be used with 'copy' strategy")
+    if returning_stream:
+        raise ValueError("pipeline parameter can't be used with returning_stream")
+    if ret_fds is not None and returning_format == 'queryset':
+        # ReturningQuerySet executes its query itself
+        raise ValueError("pipeline parameter with returning requires returning_format other than 'queryset'")
+    if not pipeline_available(connection if using is None else connections[using]):
+        raise ValueError("pipeline parameter requires psycopg 3 database driver with libpq 14+")
+
+    return pipeline
+
+
+def _validate_returning_format(ret_fds, returning_format, returning_stream=False):
+    # type: (Optional[Tuple[FieldDescriptor]], str, bool) -> str
+    """
+    Validates returning_format parameter
+    :param ret_fds: Validated returning fds
+    :param returning_format: Format name, one of RETURNING_FORMATS
+    :param returning_stream: Validated returning_stream flag
+    :return: Validated format name
+    """
+    if not isinstance(returning_format, string_types):
+        raise TypeError("returning_format parameter must be string")
+    if returning_format not in RETURNING_FORMATS:
+        raise ValueError("returning_format parameter must be one of [%s]" % ', '.join(RETURNING_FORMATS))
+    if returning_format != 'queryset' and ret_fds is None:
+        raise ValueError("returning_format parameter requires returning parameter")
+    if returning_format != 'queryset' and returning_stream:
+        raise ValueError("returning_format parameter can't be used with returning_stream")
+
+    if returning_format == 'numpy':
+        numpy_available(raise_exception=True)
+    elif returning_format == 'queryset' and ret_fds is not None and not returning_stream:
+        returning_available(raise_exception=True)
+
+    return returning_format
+
+
+def _get_query_returning_fds(model, ret_fds, returning_format, key_fds=()):
+    # type: (Type[Model], Optional[Tuple[FieldDescriptor]], str, Tuple[FieldDescriptor]) -> Optional[Tuple[FieldDescriptor]]
+    """
+    Gets descriptors of fields, returned by upsert query.
+    'keyed' format requires key fields to be returned, even if they are not requested.
+    Record key values are equal to input keys only if keys are compared by equality.
+    Update and delete queries return input keys from "vals" table instead (see _keyed_returning_query_part).
+    :param model: Model to get fields from
+    :param ret_fds: Validated returning fds
+    :param returning_format: Validated returning format
+    :param key_fds: Validated key fds
+    :return: None, if returning is None, a tuple of fds otherwise
+    """
+    if ret_fds is None or returning_format != 'keyed':
+        return ret_fds
+
+    if not key_fds:
+        raise ValueError("returning_format='keyed' requires key fields")
+    if any(type(fd.key_operator) is not EqualClauseOperator for fd in key_fds):
+        raise ValueError("returning_format='keyed' requires all key fields to be compared by 'eq' operator")
+
+    ret_attnames = {fd.get_field(model).attname for fd in ret_fds}
+    query_fds = ret_fds + tuple(FieldDescriptor(fd.name) for fd in key_fds
+                                if fd.get_field(model).attname not in ret_attnames)
+    for i, fd in enumerate(query_fds):
+        fd.set_prefix('ret', i)
+
+    return query_fds
+
+
+def _get_returning_fields(model, ret_fds, report_inserted=False):
+    # type: (Type[Model], Optional[Tuple[FieldDescriptor]], bool) -> List[str]
+    """
+    Gets names of fields, which are returned to user in returning_format other than 'queryset'
+    :param model: Model to get fields from
+    :param ret_fds: Validated returning fds
+    :param report_inserted: If flag is set, INSERTED_COLUMN is returned as the last field
+    :return: A list of field attnames
+    """
+    if ret_fds is None:
+        return []
+
+    return [fd.get_field(model).attname for fd in ret_fds] + ([INSERTED_COLUMN] if report_inserted else [])
+
+
 def _validate_operators(key_fds, operators):
     # type: (Tuple[FieldDescriptor], TOperators) -> TOperatorsValid
     """
@@ -110,11 +357,11 @@ def _validate_operators(key_fds, operators):
     return key_fds
 
 
-def _validate_update_values(model, key_fds, values):
-    # type: (Type[Model], Tuple[FieldDescriptor], TUpdateValues) -> Tuple[Tuple[FieldDescriptor], TUpdateValuesValid]
+def _validate_update_values(model, key_fds, values, duplicates=None, upd_field_names=None, columns=None):
+    # type: (Type[Model], Tuple[FieldDescriptor], TUpdateValues, Optional[dict], Optional[Tuple[str]], Optional[Iterable[str]]) -> Tuple[Tuple[FieldDescriptor], TUpdateValuesValid]
     """
     Parses and validates input data for bulk_update and bulk_update_or_create.
-    It can come in 2 forms:
+    It can come in 3 forms:
         + Iterable of dicts. Each dict is update or create data.
             Each dict must contain all key_fields as keys.
             You can't update key_fields with this format.
@@ -122,18 +369,35 @@ def _validate_update_values(model, key_fds, values):
             - key_values can be iterable or single object.
             - If iterable, key_values length must be equal to key_fields length.
             - If single object, key_fields is expected to have 1 element
+        + Iterable of tuples or lists, if columns are given. See _validate_update_rows().
+        + Dict of field name: column of values or pandas DataFrame. See _validate_columnar_values().
     :param key_fds: A tuple of FieldDescriptor objects, by which
                     data will be selected
     :param values: Input data as given
+    :param duplicates: If given, update values of duplicate keys are collected here:
+        key tuple is mapped to a list of previous update values with this key.
+        Otherwise, last update values with the same key are used.
+    :param upd_field_names: If given, update field names of previous batches. All items must update these fields.
+    :param columns: Field names of positional rows. If given, values must be an iterable of rows.
     :return: Returns a tuple:
         + A tuple with FieldDescriptor objects to update
           (which are not in key_field_descriptors)
         + A dict, keys are tuples of key_fields values, and
-          values are update_values
+          values are update_values. ColumnarValues instance for columnar input.
     """
-    upd_keys_tuple = tuple()
+    upd_keys_tuple = upd_field_names or tuple()
     result = {}
-    if isinstance(values, dict):
+    if columns is not None:
+        upd_keys_tuple, result = _validate_update_rows(key_fds, values, columns, duplicates=duplicates)
+
+    elif is_columnar_input(values):
+        upd_keys_tuple, result = _validate_columnar_values(key_fds, values)
+
+        # Duplicate keys are coalesced row by row
+        if duplicates is not None and result.has_duplicate_keys():
+            result = _columnar_to_rows(key_fds, result, duplicates=duplicates)
+
+    elif isinstance(values, dict):
         if not key_fds:
             raise TypeError(
                 "'values' parameter can not be dict for create only operation")
@@ -157,6 +421,8 @@ def _validate_update_values(model, key_fds, values):
                 raise ValueError("All update data must update same fields")
 
             # keys may have changed it's format
+            if duplicates is not None and keys in result:
+                duplicates.setdefault(keys, []).append(result[keys])
             result[keys] = updates
 
     elif isinstance(values, Iterable):
@@ -193,7 +459,10 @@ def _validate_update_values(model, key_fds, values):
             if not upd_key_values:
                 upd_key_values = (i,)
 
-            result[tuple(upd_key_values)] = upd_values
+            upd_key_values = tuple(upd_key_values)
+            if duplicates is not None and upd_key_values in result:
+                duplicates.setdefault(upd_key_values, []).append(result[upd_key_values])
+            result[upd_key_values] = upd_values
 
     else:
         raise TypeError("'values' parameter must be dict or Iterable")
@@ -215,6 +484,107 @@ def _validate_update_values(model, key_fds, values):
     return descriptors, result
 
 
+def _validate_update_rows(key_fds, rows, columns, duplicates=None):
+    # type: (Tuple[FieldDescriptor], Iterable[Union[Tuple[Any, ...], List[Any]]], Iterable[str], Optional[dict]) -> Tuple[Tuple[str], TUpdateValuesValid]
+    """
+    Parses and validates positional rows. Field names are validated once by columns header.
+    Rows are not converted to dicts: update values are RowUpdates, reading row values by column index.
+    :param key_fds: A tuple of FieldDescriptor objects, by which data will be selected
+    :param rows: Iterable of tuples or lists with values in columns order
+    :param columns: Field names of row values. Must contain all key_fields.
+    :param duplicates: If given, update values of duplicate keys are collected here. See _validate_update_values().
+    :return: Returns a tuple:
+        + A tuple of update field names (columns, which are not key_fields)
+        + A dict, keys are tuples of key_fields values, and values are RowUpdates
+    """
+    if isinstance(columns, string_types) or not isinstance(columns, Iterable):
+        raise TypeError("columns parameter must be Iterable of field names")
+    columns = tuple(columns)
+    if not all(isinstance(name, string_types) for name in columns):
+        raise TypeError("columns parameter must be Iterable of field names")
+    if len(set(columns)) != len(columns):
+        raise ValueError("columns parameter can't contain duplicate field names")
+
+    key_names = [fd.name for fd in key_fds]
+    if set(key_names) - set(columns):
+        raise ValueError("columns parameter doesn't contain all key fields")
+
+    if isinstance(rows, (dict, string_types)) or not isinstance(rows, Iterable):
+        raise TypeError("'values' parameter must be Iterable of tuples or lists, if columns are given")
+
+    key_indexes = [columns.index(name) for name in key_names]
+    upd_index = {name: i for i, name in enumerate(columns) if name not in key_names}
+    row_length = len(columns)
+
+    result = {}
+    for i, row in enumerate(rows):
+        if not isinstance(row, (tuple, list)):
+            raise TypeError("All items of iterable must be tuples or lists, if columns are given")
+        if len(row) != row_length:
+            raise ValueError("Length of row is not equal to columns length")
+
+        upd_key_values = []
+        for j in key_indexes:
+            if isinstance(row[j], dict):
+                raise TypeError("Dict is currently not supported as key field")
+            elif isinstance(row[j], Iterable) and not isinstance(row[j], string_types):
+                upd_key_values.append(tuple(row[j]))
+            else:
+                upd_key_values.append(row[j])
+
+        upd_key_values = tuple(upd_key_values) if key_indexes else (i,)
+        if duplicates is not None and upd_key_values in result:
+            duplicates.setdefault(upd_key_values, []).append(result[upd_key_values])
+        result[upd_key_values] = RowUpdates(row, upd_index)
+
+    return tuple(upd_index), result
+
+
+def _validate_columnar_values(key_fds, values):
+    # type: (Tuple[FieldDescriptor], Any) -> Tuple[Tuple[str], ColumnarValues]
+    """
+    Validates columnar values: a dict of field name to column of values or pandas DataFrame.
+    Column can be a list, tuple, 1-dimensional numpy array or pandas Series. All columns must have equal length.
+    Columns are not converted to rows: batches are sliced from them and numpy arrays of numbers
+    are passed to database as is by 'unnest' and 'copy' strategies.
+    :param key_fds: A tuple of FieldDescriptor objects, by which data will be selected
+    :param values: Input data as given
+    :return: Returns a tuple:
+        + A tuple of update field names (columns, which are not key_fields)
+        + ColumnarValues instance
+    """
+    columns = get_columns(values)
+    if not columns:
+        raise ValueError("'values' parameter doesn't contain any columns")
+
+    for name, col in columns.items():
+        if is_numpy_array(col) and col.ndim != 1:
+            raise ValueError("Column '%s' must be 1-dimensional numpy array" % name)
+
+    if len({len(col) for col in columns.values()}) != 1:
+        raise ValueError("All columns must have equal length")
+
+    key_names = tuple(fd.name for fd in key_fds)
+    if set(key_names) - set(columns):
+        raise ValueError("Columns don't contain all key fields")
+
+    return tuple(name for name in columns if name not in key_names), ColumnarValues(columns, key_names)
+
+
+def _columnar_to_rows(key_fds, values, duplicates=None):
+    # type: (Tuple[FieldDescriptor], ColumnarValues, Optional[dict]) -> TUpdateValuesValid
+    """
+    Converts columnar values to validated rows. It is used by features, processing values row by row.
+    :param key_fds: A tuple of FieldDescriptor objects, by which data will be selected
+    :param values: ColumnarValues instance
+    :param duplicates: If given, update values of duplicate keys are collected here. See _validate_update_values().
+    :return: A dict, keys are tuples of key_fields values, and values are RowUpdates
+    """
+    names = tuple(values.columns)
+    _, result = _validate_update_rows(key_fds, values.iter_rows(names), names, duplicates=duplicates)
+    return result
+
+
 def _validate_set_functions(model, fds, functions):
     # type: (Type[Model], Tuple[FieldDescriptor], TSetFunctions) -> TSetFunctionsValid
     """
@@ -268,6 +638,244 @@ def _validate_set_functions(model, fds, functions):
     return fds + tuple(no_value_fds)
 
 
+def _coalesce_duplicates(model, upd_fds, values, duplicates, keep_first=False):
+    # type: (Type[Model], Tuple[FieldDescriptor], TUpdateValuesValid, dict, bool) -> TUpdateValuesValid
+    """
+    Merges update values, given for the same key, into one row. Each field is merged by its set function,
+    so the row has the same effect as applying all rows one by one: 'incr' values are summed,
+    'concat' values are concatenated, 'eq' takes last value and so on.
+    PostgreSQL can't update a record twice in one query, so duplicate keys would be lost or fail the query otherwise.
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param upd_fds: Validated FieldDescriptor objects to update
+    :param values: Validated values. Dict of key_values_tuple: update_fields_dict. It will be modified.
+    :param duplicates: Previous update values of duplicate keys, collected by _validate_update_values()
+    :param keep_first: If flag is set, the first row of a key is kept. It is used, when existing records
+        are not updated: the first row is inserted and the next ones are ignored.
+    :return: Modified values
+    """
+    for key, previous in duplicates.items():
+        updates = previous[0]
+        if keep_first:
+            values[key] = updates
+            continue
+
+        for next_updates in chain(previous[1:], (values[key],)):
+            updates = {
+                fd.name: fd.set_function.merge_values(fd.get_field(model), updates[fd.name], next_updates[fd.name])
+                for fd in upd_fds if fd.name in next_updates
+            }
+        values[key] = updates
+
+    if duplicates:
+        logger.debug('COALESCED %d DUPLICATE KEYS' % len(duplicates))
+
+    return values
+
+
+def _get_key_sort_value(key):  # type: (Any) -> Any
+    """
+    Forms a value to compare key tuples by. None values are placed after all others, as PostgreSQL does.
+    :param key: Key tuple or it's item
+    :return: Comparable value
+    """
+    if isinstance(key, tuple):
+        return tuple(_get_key_sort_value(item) for item in key)
+
+    return (1,) if key is None else (0, key)
+
+
+def _order_by_keys(values):
+    # type: (TUpdateValuesValid) -> TUpdateValuesValid
+    """
+    Sorts values by keys. This way concurrent queries lock records in the same order and do not deadlock.
+    Besides, index pages are touched sequentially.
+    If keys can't be compared (for instance, have different types), original order is kept.
+    :param values: Validated values. Dict of key_values_tuple: update_fields_dict or ColumnarValues
+    :return: Values, ordered by key
+    """
+    if isinstance(values, ColumnarValues):
+        return _order_columnar_by_keys(values)
+
+    try:
+        return dict(sorted(values.items(), key=lambda item: _get_key_sort_value(item[0])))
+    except TypeError as ex:
+        logger.debug("Values can't be ordered by keys: %s" % ex)
+        return values
+
+
+def _order_columnar_by_keys(values):  # type: (ColumnarValues) -> ColumnarValues
+    """
+    Sorts columnar values by keys. numpy arrays of numbers are sorted by numpy, other keys as _order_by_keys() does.
+    :param values: ColumnarValues instance
+    :return: ColumnarValues, ordered by key
+    """
+    indexes = get_sort_indexes(values)
+    if indexes is None:
+        keys = list(values.iter_rows(values.key_names))
+        try:
+            indexes = sorted(range(len(keys)), key=lambda i: _get_key_sort_value(keys[i]))
+        except TypeError as ex:
+            logger.debug("Values can't be ordered by keys: %s" % ex)
+            return values
+
+    return values.take(indexes)
+
+
+def _validate_delete_keys(key_fds, keys):
+    # type: (Tuple[FieldDescriptor], TDeleteKeys) -> TUpdateValuesValid
+    """
+    Parses and validates input keys for bulk_delete.
+    Each item can be:
+        + A dict, containing all key_fields as keys. Other fields are ignored,
+            so update data can be used to delete records.
+        + An iterable of key values. It's length must be equal to key_fields length.
+        + Single object, if key_fields has 1 element
+    :param key_fds: A tuple of FieldDescriptor objects, by which data will be selected
+    :param keys: Input keys as given
+    :return: A dict, keys are tuples of key_fields values, values are empty dicts.
+        This is values format of other operations without update fields.
+    """
+    if isinstance(keys, (dict, string_types)) or not isinstance(keys, Iterable):
+        raise TypeError("'keys' parameter must be Iterable")
+
+    result = {}
+    for item in keys:
+        if isinstance(item, dict):
+            if {fd.name for fd in key_fds} - set(item.keys()):
+                raise ValueError("One of keys doesn't contain all key fields")
+            item = tuple(item[fd.name] for fd in key_fds)
+        elif len(key_fds) == 1:
+            item = (item,)
+        elif isinstance(item, Iterable) and not isinstance(item, string_types):
+            item = tuple(item)
+            if len(item) != len(key_fds):
+                raise ValueError("Length of key tuple is not equal to key_fields length")
+        else:
+            raise TypeError("Keys must be iterables of key_fields length or dicts, if there are multiple key_fields")
+
+        # Iterable values (for 'in' operator, for instance) must be hashable
+        item = tuple(tuple(val) if isinstance(val, Iterable) and not isinstance(val, (string_types, dict)) else val
+                     for val in item)
+        if any(isinstance(val, dict) for val in item):
+            raise TypeError("Dict is currently not supported as key field")
+
+        result[item] = {}
+
+    return result
+
+
+def _is_lazy_input(data, batch_size, parallel):  # type: (Any, Any, Optional[int]) -> bool
+    """
+    Checks if data is validated lazily, batch by batch, when batches are executed.
+    Iterators (generators, for instance) are not read to memory then: only current batch is held.
+    :param data: values or keys parameter as given
+    :param batch_size: batch_size parameter as given
+    :param parallel: parallel parameter as given. Parallel workers need all data to partition it.
+    :return: Boolean
+    """
+    return isinstance(data, Iterator) and ((type(batch_size) is int and batch_size > 0) or batch_size == 'auto') \
+        and (parallel is None or parallel == 1)
+
+
+def _read_first_batch(data, batch_size):  # type: (Iterator, Union[int, str]) -> Tuple[Any, ...]
+    """
+    Reads the first batch of lazily validated data
+    :param data: Iterator over values or keys
+    :param batch_size: batch_size parameter. Automatic batches start with AUTO_BATCH_INITIAL_SIZE items.
+    :return: A tuple of items
+    """
+    return tuple(islice(data, AUTO_BATCH_INITIAL_SIZE if batch_size == 'auto' else batch_size))
+
+
+def _get_batched_values(key_fds, values, batch_size, parallel, by_rows=False):
+    # type: (Tuple[FieldDescriptor], TUpdateValuesValid, Union[None, int, str], Optional[int], bool) -> TUpdateValuesValid
+    """
+    Converts columnar values to rows, if batches are formed or executed row by row:
+    automatic batch sizes are estimated by rows and parallel workers get partitions of rows.
+    Otherwise batches are sliced from columns.
+    :param key_fds: A tuple of FieldDescriptor objects, by which data will be selected
+    :param values: Validated values
+    :param batch_size: batch_size parameter
+    :param parallel: Validated parallel parameter
+    :param by_rows: If flag is set, batch handler processes values row by row
+    :return: Validated values
+    """
+    if isinstance(values, ColumnarValues) and (by_rows or batch_size == 'auto' or (parallel or 1) > 1):
+        return _columnar_to_rows(key_fds, values)
+
+    return values
+
+
+def _validate_values_batch(model, key_fds, upd_fds, upd_field_names, order_keys, columns, items, keep_first=False):
+    # type: (Type[Model], Tuple[FieldDescriptor], Tuple[FieldDescriptor], Tuple[str], bool, Optional[Tuple[str]], Tuple[Any, ...], bool) -> TUpdateValuesValid
+    """
+    Validates a batch of values, read lazily from an iterator.
+    Update fields and set functions are validated on the first batch, next batches must update the same fields.
+    Duplicate keys are coalesced and keys are ordered within the batch.
+    :param model: Model updated
+    :param key_fds: A tuple of FieldDescriptor objects, by which data will be selected
+    :param upd_fds: Validated FieldDescriptor objects to update
+    :param upd_field_names: Update field names of the first batch
+    :param order_keys: If flag is set, values are ordered by keys
+    :param columns: Field names of positional rows or None
+    :param items: Batch items as given
+    :param keep_first: If flag is set, the first row of duplicate keys is kept. See _coalesce_duplicates()
+    :return: Validated values of the batch
+    """
+    duplicates = {}
+    _, values = _validate_update_values(model, key_fds, items, duplicates=duplicates, upd_field_names=upd_field_names,
+                                        columns=columns)
+    values = _coalesce_duplicates(model, upd_fds, values, duplicates, keep_first=keep_first)
+    if order_keys:
+        values = _order_by_keys(values)
+    return values
+
+
+def _validate_delete_keys_batch(key_fds, order_keys, items):
+    # type: (Tuple[FieldDescriptor], bool, Tuple[Any, ...]) -> TUpdateValuesValid
+    """
+    Validates a batch of keys, read lazily from an iterator. Keys are ordered within the batch.
+    :param key_fds: A tuple of FieldDescriptor objects, by which data will be selected
+    :param order_keys: If flag is set, keys are ordered
+    :param items: Batch items as given
+    :return: Validated keys of the batch
+    """
+    keys = _validate_delete_keys(key_fds, items)
+    return _order_by_keys(keys) if order_keys else keys
+
+
+def _validate_strategy(strategy):
+    # type: (str) -> str
+    """
+    Validates strategy parameter
+    :param strategy: Strategy name to validate
+    :return: Validated strategy name
+    """
+    if not isinstance(strategy, string_types):
+        raise TypeError("'strategy' parameter must be string")
+    if strategy not in STRATEGIES:
+        raise ValueError("'strategy' parameter must be one of: %s" % ', '.join(STRATEGIES))
+
+    return strategy
+
+
+def _validate_prepare(prepare, strategy):  # type: (bool, str) -> bool
+    """
+    Validates prepare parameter
+    :param prepare: Parameter value
+    :param strategy: Validated strategy
+    :return: Validated prepare flag
+    """
+    if type(prepare) is not bool:
+        raise TypeError("prepare parameter must be boolean")
+    if prepare and strategy == 'values':
+        # Query text of 'values' strategy depends on number of rows and NULL values,
+        # so every batch would prepare a new statement
+        raise ValueError("prepare parameter can be used with 'unnest' and 'copy' strategies only")
+
+    return prepare
+
+
 def _validate_where(model, where, using):
     # type: (Type[Model], Optional[WhereNode], Optional[str]) -> Tuple[str, tuple]
     """
@@ -291,7 +899,10 @@ def _validate_where(model, where, using):
     query = UpdateQuery(model)
     conn = connections[using] if using else connection
     compiler = query.get_compiler(connection=conn)
-    sql, params = where.as_sql(compiler, conn)
+    try:
+        sql, params = where.as_sql(compiler, conn)
+    except FullResultSet:
+        return '', tuple()
 
     # I change table name to "t" inside queries
     if sql:
@@ -394,168 +1005,501 @@ def _generate_fds_sql(conn, fields, format_bases, values, cast_type):
     return sql_list, tuple(chain(*params_list))
 
 
-def _with_values_query_part(model, values, conn, key_fds, upd_fds, default_fds=()):
-    # type: (Type[Model], TUpdateValuesValid, TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Tuple[FieldDescriptor]) -> Tuple[str, List[Any]]
+def _default_values_query_part(model, conn, default_fds):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor]) -> Tuple[str, List[Any]]
     """
-    Forms query part, selecting input values
+    Forms query part, selecting default values of fields, which are not present in values
     :param model: Model to update, a subclass of django.db.models.Model
-    :param values: Data to update. All items must update same fields!!!
-        Dict of key_values_tuple: update_fields_dict
     :param conn: Database connection used
-    :return: Names of fields in select. A tuple of sql and it's parameters
+    :param default_fds: FieldDescriptor objects to take defaults for
+    :return: A tuple of sql and it's parameters
     """
-    tpl = "WITH vals(%s) AS (VALUES %s)%s"  # noqa
+    if not default_fds:
+        return '', []
 
-    # Form data for VALUES section
-    # It includes both keys and update data: keys will be used in WHERE section,
-    # while update data in SET section
-    values_items = []
-    values_update_params = []
+    # Prepare default values to insert into database, if they are
+    # not provided in updates or keys
+    # Dictionary keys list all db column names to be inserted.
+    defaults_sel_sql = ', '.join(
+        '"%s"' % fd.prefixed_name for fd in default_fds)
+    default_values = (fd.get_field(model).get_default() for fd in default_fds)
+    defaults_fields = tuple(fd.get_field(model) for fd in default_fds)
+    defaults_format_bases = tuple(fd.set_function for fd in default_fds)
+    defaults_sql_items, defaults_params = _generate_fds_sql(
+        conn, defaults_fields, defaults_format_bases, default_values, True)
+    defaults_sql = ",\n default_vals(%s) AS (VALUES (%s))" % (
+        defaults_sel_sql, ', '.join(defaults_sql_items))
 
-    if default_fds:
-        # Prepare default values to insert into database, if they are
-        # not provided in updates or keys
-        # Dictionary keys list all db column names to be inserted.
-        defaults_sel_sql = ', '.join(
-            '"%s"' % fd.prefixed_name for fd in default_fds)
-        default_values = (fd.get_field(model).get_default() for fd in default_fds)
-        defaults_fields = tuple(fd.get_field(model) for fd in default_fds)
-        defaults_format_bases = tuple(fd.set_function for fd in default_fds)
-        defaults_sql_items, defaults_params = _generate_fds_sql(
-            conn, defaults_fields, defaults_format_bases, default_values, True)
-        defaults_sql = ",\n default_vals(%s) AS (VALUES (%s))" % (
-            defaults_sel_sql, ', '.join(defaults_sql_items))
-    else:
-        defaults_sql = ''
-        defaults_params = []
+    return defaults_sql, list(defaults_params)
 
-    first = True
-    key_fields = tuple(fd.get_field(model) for fd in key_fds)
-    key_format_bases = tuple(fd.key_operator for fd in key_fds)
 
-    # I remove file descriptors which don't require any value from updates
-    #   as they should not be present in values SQL.
-    #   See issue https://github.com/M1ha-Shvn/django-pg-bulk-update/issues/71
-    upd_fds_with_values = tuple(
-        fd for fd in upd_fds if fd.set_function.needs_value)
-    upd_fields = tuple(fd.get_field(model) for fd in upd_fds_with_values)
-    upd_format_bases = tuple(fd.set_function for fd in upd_fds_with_values)
+def _get_values_columns(model, conn, key_fds, upd_fds):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor]) -> Tuple[Tuple[FieldDescriptor, Field, AbstractFieldFormatter, str]]
+    """
+    Lists columns of "vals" table
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param key_fds: FieldDescriptor objects, by which items would be selected
+    :param upd_fds: FieldDescriptor objects to update
+    :return: A tuple of (descriptor, field, value formatter, value database type) tuples
+    """
+    return tuple(
+        (fd, fd.get_field(model), format_base, format_base.get_value_db_type(fd.get_field(model), conn))
+        for fd, format_base in chain(
+            ((fd, fd.key_operator) for fd in key_fds),
+            ((fd, fd.set_function) for fd in upd_fds if fd.set_function.needs_value)
+        )
+    )
 
-    for keys, updates in values.items():
-        upd_values = [updates[fd.name] for fd in upd_fds_with_values]
-        upd_sql_items, upd_params = _generate_fds_sql(
-            conn, upd_fields, upd_format_bases, upd_values, first)
-        key_sql_items, key_params = _generate_fds_sql(
-            conn, key_fields, key_format_bases, keys, first)
 
-        sql_items = key_sql_items + upd_sql_items
+def _get_data_columns(values, columns, keys_count):
+    # type: (TUpdateValuesValid, Tuple[Tuple[FieldDescriptor, Field, AbstractFieldFormatter, str]], int) -> List[Any]
+    """
+    Gets columns of values in "vals" table columns order. Columnar values are taken as is.
+    :param values: Data to update. Dict of key_values_tuple: update_fields_dict or ColumnarValues
+    :param columns: Columns of "vals" table, got from _get_values_columns()
+    :param keys_count: Number of key fields.
+        Key tuple contains item index, if there are no key fields (create operations)
+    :return: A list of columns. Every column is a sequence or numpy array of values
+    """
+    if isinstance(values, ColumnarValues):
+        return [values.columns[fd.name] for fd, _, _, _ in columns]
 
-        values_items.append(sql_items)
-        values_update_params.extend(chain(key_params, upd_params))
-        first = False
+    return [[keys[i] for keys in values.keys()] for i in range(keys_count)] \
+        + [[updates[fd.name] for updates in values.values()] for fd, _, _, _ in columns[keys_count:]]
 
-    # NOTE. No extra brackets here or VALUES will return nothing
-    values_sql = ', '.join(
-        '(%s)' % ', '.join(item) for item in values_items
-    )
 
-    sel_sql = ', '.join(
-        '"%s"' % fd.prefixed_name
-        for fd in chain(key_fds, upd_fds) if fd.set_function.needs_value
-    )
+def _iter_values_rows(values, columns, keys_count):
+    # type: (TUpdateValuesValid, Tuple[Tuple[FieldDescriptor, Field, AbstractFieldFormatter, str]], int) -> TIterable[TIterable[Any]]
+    """
+    Iterates over rows of values in "vals" table columns order
+    :param values: Data to update. Dict of key_values_tuple: update_fields_dict or ColumnarValues
+    :param columns: Columns of "vals" table, got from _get_values_columns()
+    :param keys_count: Number of key fields. See _get_data_columns()
+    :return: A generator of rows
+    """
+    if isinstance(values, ColumnarValues):
+        return values.iter_rows(fd.name for fd, _, _, _ in columns)
 
-    return (tpl % (sel_sql, values_sql, defaults_sql),
-            values_update_params + list(defaults_params))
+    upd_names = [fd.name for fd, _, _, _ in columns[keys_count:]]
+    return (chain(keys[:keys_count], (updates[name] for name in upd_names)) for keys, updates in values.items())
 
 
-def _bulk_update_query_part(model, conn, key_fds, upd_fds, where):
-    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Tuple[str, tuple]) -> Tuple[str, List[Any]]
+def _is_native_numpy_column(column, data_column):
+    # type: (Tuple[FieldDescriptor, Field, AbstractFieldFormatter, str], Any) -> bool
     """
-    Forms bulk update query part without values, counting that all keys
-    and values are already in "vals" table
-    :param model: Model to update, a subclass of django.db.models.Model
-    :param conn: Database connection used
-    :param key_fds: Field names, by which items would be selected (tuple)
-    :param upd_fds: FieldDescriptor objects to update
-    :param where: A sql, params tuple to filter query data before update
-    :return: A tuple of sql and it's parameters
+    Checks if numpy array can be passed to database without formatting every value:
+    it must contain numbers or booleans of a plain model field, formatted by default rules.
+    :param column: Column of "vals" table, got from _get_values_columns()
+    :param data_column: Column values
+    :return: Boolean
     """
+    _, field, format_base, _ = column
+    kinds = NUMPY_FIELD_KINDS.get(type(field))
+    return kinds is not None and is_numpy_array(data_column) and data_column.dtype.kind in kinds \
+        and all(getattr(type(format_base), name) is getattr(AbstractFieldFormatter, name)
+                for name in ('format_field_value', 'get_value_formatter', 'get_value_db_type'))
 
-    # Query template. We will form its substitutes in next sections
-    query = """
-        UPDATE %s AS t SET %s
-        FROM "vals"
-        WHERE %s
+
+def _format_column_params(data_column, conn, column, strategy):
+    # type: (Any, TDatabase, Tuple[FieldDescriptor, Field, AbstractFieldFormatter, str], str) -> List[Any]
+    """
+    Formats a column of values for database.
+    Every value is passed as a single parameter, so values, formatted as sql expressions, are not supported.
+    :param data_column: Column values. A sequence or numpy array
+    :param conn: Database connection used
+    :param column: Column of "vals" table, got from _get_values_columns()
+    :param strategy: A way values are passed to database. Used in error messages
+    :return: A list of parameters
     """
+    _, field, format_base, _ = column
+    formatter = format_base.get_value_formatter(field, conn)
+
+    params = []
+    for val in (data_column.tolist() if is_numpy_array(data_column) else data_column):
+        val_sql, val_params = formatter(val)
+        if val_sql == '%s':
+            params.append(val_params[0])
+        elif val_sql == 'NULL':
+            params.append(None)
+        else:
+            raise ValueError("strategy '%s' can't pass value of field '%s' as a parameter"
+                             % (strategy, field.name))
+    return params
 
-    # Table we save data to
-    db_table = model._meta.db_table
 
-    # Form data for WHERE section
-    # Remember that field names in sel table have prefixes.
-    where_items = []
-    for fd in key_fds:
-        table_field = '"t"."%s"' % fd.get_field(model).column
-        prefixed_sel_field = '"vals"."%s"' % fd.prefixed_name
-        where_items.append(fd.key_operator.get_sql(
-            table_field, prefixed_sel_field))
-    where_sql = ' AND '.join(where_items)
-    where_params = []
+def _with_unnest_query_part(model, values, conn, key_fds, upd_fds):
+    # type: (Type[Model], TUpdateValuesValid, TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor]) -> Tuple[str, List[Any]]
+    """
+    Forms "vals" table body, passing every column as a single typed array parameter.
+    Unlike VALUES list, query text doesn't depend on number of rows.
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param values: Data to update. All items must update same fields!!!
+        Dict of key_values_tuple: update_fields_dict or ColumnarValues
+    :param conn: Database connection used
+    :param key_fds: FieldDescriptor objects, by which items would be selected
+    :param upd_fds: FieldDescriptor objects to update
+    :return: A tuple of sql and it's parameters
+    """
+    columns = _get_values_columns(model, conn, key_fds, upd_fds)
 
-    if where[0]:
-        where_sql = '(%s) AND (%s)' % (where_sql, where[0])
-        where_params.extend(where[1])
+    for _, field, _, db_type in columns:
+        if db_type.endswith(']'):
+            raise ValueError("strategy 'unnest' doesn't support array values of field '%s'" % field.name)
 
-    # Form data for SET section
-    set_items, set_params = [], []
-    for fd in upd_fds:
-        func_sql, params = fd.set_function.get_sql(
-            fd.get_field(model),
-            '"vals"."%s"' % fd.prefixed_name,
-            conn, val_as_param=False)
-        set_items.append(func_sql)
-        set_params.extend(params)
-    set_sql = ', '.join(set_items)
+    arrays = [
+        data_column.tolist() if _is_native_numpy_column(column, data_column)
+        else _format_column_params(data_column, conn, column, 'unnest')
+        for column, data_column in zip(columns, _get_data_columns(values, columns, len(key_fds)))
+    ]
 
-    # Substitute query placeholders and concatenate with VALUES section
-    quoted_table = conn.ops.quote_name(db_table)
-    query = query % (quoted_table, set_sql, where_sql)
-    return query, set_params + where_params
+    sql = 'SELECT * FROM unnest(%s)' % ', '.join('%%s::%s[]' % db_type for _, _, _, db_type in columns)
+    return sql, arrays
 
 
-def _returning_query_part(model, ret_fds):
-    # type: (Type[Model], Optional[Tuple[FieldDescriptor]]) -> Tuple[str, List[Any]]
+def _with_copy_query_part(model, values, conn, key_fds, upd_fds):
+    # type: (Type[Model], TUpdateValuesValid, TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor]) -> Tuple[str, List[Any]]
     """
-    Forms returning query part
+    Copies values to temporary staging table and forms "vals" table body, selecting from it.
+    Staging table is cleaned up on commit, so query must be executed in the same transaction.
     :param model: Model to update, a subclass of django.db.models.Model
-    :param ret_fds: FieldDescriptors to return
+    :param values: Data to update. All items must update same fields!!!
+        Dict of key_values_tuple: update_fields_dict or ColumnarValues
+    :param conn: Database connection used
+    :param key_fds: FieldDescriptor objects, by which items would be selected
+    :param upd_fds: FieldDescriptor objects to update
     :return: A tuple of sql and it's parameters
     """
-    # No returning statement
-    if ret_fds is None:
-        return '', []
+    columns = _get_values_columns(model, conn, key_fds, upd_fds)
+    staging_columns = [(fd.prefixed_name, db_type) for fd, _, _, db_type in columns]
 
-    fields = ', '.join('"%s"' % fd.get_field(model).column for fd in ret_fds)
-    return "RETURNING %s" % fields, []
+    # numpy arrays of numbers are encoded to binary format as is
+    data_columns = [
+        data_column if _is_native_numpy_column(column, data_column)
+        else _format_column_params(data_column, conn, column, 'copy')
+        for column, data_column in zip(columns, _get_data_columns(values, columns, len(key_fds)))
+    ]
 
+    table = copy_columns_to_staging(conn, staging_columns, data_columns, len(values))
+    return 'SELECT %s FROM "%s"' % (', '.join('"%s"' % name for name, _ in staging_columns), table), []
 
-def _execute_update_query(model, conn, sql, params, ret_fds):
-    # type: (Type[Model], TDatabase, str, List[Any], Optional[Tuple[FieldDescriptor]]) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+
+def _get_row_params(strategy, *fds_groups):
+    # type: (str, *TIterable[FieldDescriptor]) -> Optional[int]
     """
-    Does bulk update, skipping parameters validation.
-    It is used for speed up in bulk_update_or_create, where parameters are already formatted.
-    :param model: Model to update, a subclass of django.db.models.Model
-    :param conn: Database connection used
-    :param ret_fds: Optional fds to return as ReturningQuerySet
-    :return: Number of records updated if ret_fds not given. ReturningQuerySet otherwise
+    Gets number of query parameters, passed for every values row. It limits batch_size='auto'.
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :param fds_groups: FieldDescriptors, passed for every row
+    :return: Number of parameters or None, if it doesn't depend on number of rows
     """
-    # Execute query
+    if strategy != 'values':
+        return None
+    return sum(len(tuple(fds)) for fds in fds_groups)
+
+
+def _strategy_transaction(conn, strategy):  # type: (TDatabase, str) -> Any
+    """
+    Returns context manager, wrapping batch query execution.
+    Staging table of 'copy' strategy is cleaned up on commit, so copying and query must share a transaction.
+    :param conn: Database connection used
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :return: Context manager
+    """
+    if strategy == 'copy':
+        return transaction.atomic(using=conn.alias)
+
+    return _NoTransaction()
+
+
+class _NoTransaction(object):
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+def _with_values_query_part(model, values, conn, key_fds, upd_fds, default_fds=(), strategy='values'):
+    # type: (Type[Model], TUpdateValuesValid, TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Tuple[FieldDescriptor], str) -> Tuple[str, List[Any]]
+    """
+    Forms query part, selecting input values
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param values: Data to update. All items must update same fields!!!
+        Dict of key_values_tuple: update_fields_dict or ColumnarValues
+    :param conn: Database connection used
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :return: Names of fields in select. A tuple of sql and it's parameters
+    """
+    tpl = "WITH vals(%s) AS (%s)%s"  # noqa
+
+    defaults_sql, defaults_params = _default_values_query_part(model, conn, default_fds)
+
+    sel_sql = ', '.join(
+        '"%s"' % fd.prefixed_name
+        for fd in chain(key_fds, upd_fds) if fd.set_function.needs_value
+    )
+
+    if strategy in {'unnest', 'copy'}:
+        query_part_func = _with_unnest_query_part if strategy == 'unnest' else _with_copy_query_part
+        values_sql, values_params = query_part_func(model, values, conn, key_fds, upd_fds)
+        return tpl % (sel_sql, values_sql, defaults_sql), values_params + defaults_params
+
+    # Form data for VALUES section
+    # It includes both keys and update data: keys will be used in WHERE section,
+    # while update data in SET section
+    values_items = []
+    values_update_params = []
+
+    # Update descriptors which don't require any value are not present in columns,
+    #   as they should not be present in values SQL.
+    #   See issue https://github.com/M1ha-Shvn/django-pg-bulk-update/issues/71
+    columns = _get_values_columns(model, conn, key_fds, upd_fds)
+
+    # Formatters are compiled once for a column. Values of the first row are casted to field types.
+    first_formatters, formatters = (
+        [format_base.get_value_formatter(field, conn, cast_type=cast_type) for _, field, format_base, _ in columns]
+        for cast_type in (True, False)
+    )
+
+    row_formatters = first_formatters
+    for row in _iter_values_rows(values, columns, len(key_fds)):
+        sql_items = []
+        for formatter, val in zip(row_formatters, row):
+            val_sql, val_params = formatter(val)
+            sql_items.append(val_sql)
+            values_update_params.extend(val_params)
+
+        values_items.append(sql_items)
+        row_formatters = formatters
+
+    # NOTE. No extra brackets here or VALUES will return nothing
+    values_sql = 'VALUES %s' % ', '.join(
+        '(%s)' % ', '.join(item) for item in values_items
+    )
+
+    return (tpl % (sel_sql, values_sql, defaults_sql),
+            values_update_params + defaults_params)
+
+
+def _key_where_sql(model, key_fds, where):
+    # type: (Type[Model], Tuple[FieldDescriptor], Tuple[str, tuple]) -> Tuple[str, List[Any]]
+    """
+    Forms condition, joining records of table "t" with "vals" table by key fields
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param key_fds: Field names, by which items would be selected (tuple)
+    :param where: A sql, params tuple to filter query data before update
+    :return: A tuple of sql and it's parameters
+    """
+    # Remember that field names in sel table have prefixes.
+    where_items = []
+    for fd in key_fds:
+        table_field = '"t"."%s"' % fd.get_field(model).column
+        prefixed_sel_field = '"vals"."%s"' % fd.prefixed_name
+        where_items.append(fd.key_operator.get_sql(
+            table_field, prefixed_sel_field))
+    where_sql = ' AND '.join(where_items)
+    where_params = []
+
+    if where[0]:
+        where_sql = '(%s) AND (%s)' % (where_sql, where[0])
+        where_params.extend(where[1])
+
+    return where_sql, where_params
+
+
+def _skip_unchanged_sql(model, conn, upd_fds, table, value_refs=None, with_table=False):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], str, Optional[List[str]], bool) -> Tuple[str, List[Any]]
+    """
+    Forms condition, which is true only if update changes record.
+    New values are computed by set functions, so 'incr' with zero or 'union' with existing items change nothing.
+    Fields, set to NOW() (auto_now fields for instance), are not compared: they are updated only with other fields.
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param upd_fds: FieldDescriptor objects to update
+    :param table: Quoted name or alias of updated table
+    :param value_refs: Sql references to input values in upd_fds order. Defaults to "vals" table columns
+    :param with_table: Passed to set functions, if their sql should reference columns with table name
+    :return: A tuple of sql and it's parameters. Sql is empty, if there's nothing to compare
+    """
+    if value_refs is None:
+        value_refs = ['"vals"."%s"' % fd.prefixed_name for fd in upd_fds]
+
+    columns, values, params = [], [], []
+    for fd, value_ref in zip(upd_fds, value_refs):
+        if isinstance(fd.set_function, NowSetFunction):
+            continue
+
+        field = fd.get_field(model)
+        func_sql, func_params = fd.set_function.get_sql_value(
+            field, value_ref, conn, val_as_param=False, with_table=with_table)
+        columns.append('%s."%s"' % (table, field.column))
+        values.append(func_sql)
+        params.extend(func_params)
+
+    if not columns:
+        return '', []
+
+    # Brackets form a row, if there are multiple columns. NULL values are compared as equal.
+    return '(%s) IS DISTINCT FROM (%s)' % (', '.join(columns), ', '.join(values)), params
+
+
+@_cached_query_part
+def _bulk_update_query_part(model, conn, key_fds, upd_fds, where, skip_unchanged=False):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Tuple[str, tuple], bool) -> Tuple[str, List[Any]]
+    """
+    Forms bulk update query part without values, counting that all keys
+    and values are already in "vals" table
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param key_fds: Field names, by which items would be selected (tuple)
+    :param upd_fds: FieldDescriptor objects to update
+    :param where: A sql, params tuple to filter query data before update
+    :param skip_unchanged: If flag is set, records which would not change are not updated
+    :return: A tuple of sql and it's parameters
+    """
+
+    # Query template. We will form its substitutes in next sections
+    query = """
+        UPDATE %s AS t SET %s
+        FROM "vals"
+        WHERE %s
+    """
+
+    # Table we save data to
+    db_table = model._meta.db_table
+
+    # Form data for WHERE section
+    where_sql, where_params = _key_where_sql(model, key_fds, where)
+
+    if skip_unchanged:
+        guard_sql, guard_params = _skip_unchanged_sql(model, conn, upd_fds, '"t"')
+        if guard_sql:
+            where_sql = '%s AND %s' % (where_sql, guard_sql)
+            where_params.extend(guard_params)
+
+    # Form data for SET section
+    set_items, set_params = [], []
+    for fd in upd_fds:
+        func_sql, params = fd.set_function.get_sql(
+            fd.get_field(model),
+            '"vals"."%s"' % fd.prefixed_name,
+            conn, val_as_param=False)
+        set_items.append(func_sql)
+        set_params.extend(params)
+    set_sql = ', '.join(set_items)
+
+    # Substitute query placeholders and concatenate with VALUES section
+    quoted_table = conn.ops.quote_name(db_table)
+    query = query % (quoted_table, set_sql, where_sql)
+    return query, set_params + where_params
+
+
+@_cached_query_part
+def _bulk_update_matched_query_part(model, conn, key_fds, where):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[str, tuple]) -> Tuple[str, List[Any]]
+    """
+    Forms query part, counting records changed by "changed" update statement and records matched by keys.
+    Every record is counted once, even if it is matched by multiple "vals" rows, as it is done by UPDATE.
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param key_fds: Field names, by which items would be selected (tuple)
+    :param where: A sql, params tuple to filter query data before update
+    :return: A tuple of sql and it's parameters
+    """
+    key_sql, key_params = _key_where_sql(model, key_fds, ('', tuple()))
+    matched_sql = 'SELECT COUNT(*) FROM %s AS t WHERE EXISTS (SELECT 1 FROM "vals" WHERE %s)' \
+                  % (conn.ops.quote_name(model._meta.db_table), key_sql)
+    if where[0]:
+        matched_sql = '%s AND (%s)' % (matched_sql, where[0])
+        key_params.extend(where[1])
+
+    return 'SELECT (SELECT COUNT(*) FROM "changed"), (%s)' % matched_sql, key_params
+
+
+@_cached_query_part
+def _returning_query_part(model, conn, ret_fds):
+    # type: (Type[Model], TDatabase, Optional[Tuple[FieldDescriptor]]) -> Tuple[str, List[Any]]
+    """
+    Forms returning query part
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param ret_fds: FieldDescriptors to return
+    :return: A tuple of sql and it's parameters
+    """
+    # No returning statement
+    if ret_fds is None:
+        return '', []
+
+    fields = ', '.join('"%s"' % fd.get_field(model).column for fd in ret_fds)
+    return "RETURNING %s" % fields, []
+
+
+def _keyed_returning_query_part(ret_sql, key_fds):
+    # type: (str, Tuple[FieldDescriptor]) -> Tuple[str, List[str]]
+    """
+    Adds input key columns of "vals" table to returning query part of update or delete query
+    :param ret_sql: Returning query part
+    :param key_fds: Key FieldDescriptors
+    :return: A tuple of sql and names of added columns
+    """
+    columns = [fd.prefixed_name for fd in key_fds]
+    return '%s, %s' % (ret_sql, ', '.join('"vals"."%s"' % column for column in columns)), columns
+
+
+def _execute_update_query(model, conn, sql, params, ret_fds, prepare=False, fetch_row=False, returning_stream=False,
+                          returning_format='queryset', extra_columns=()):
+    # type: (Type[Model], TDatabase, str, List[Any], Optional[Tuple[FieldDescriptor]], bool, bool, bool, str, TIterable[str]) -> Union[int, Tuple[Any], 'ReturningQuerySet', ReturningStream, ReturnedRows]  # noqa: F821
+    """
+    Does bulk update, skipping parameters validation.
+    It is used for speed up in bulk_update_or_create, where parameters are already formatted.
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param ret_fds: Optional fds to return as ReturningQuerySet
+    :param prepare: If flag is set, query is executed as server side prepared statement
+    :param fetch_row: If flag is set and ret_fds is not given, query result row is returned instead of rowcount
+    :param returning_stream: If flag is set and ret_fds are given, returned rows are saved to temporary table
+        and ReturningStream is returned. Such query can't be prepared.
+    :param returning_format: If format is not 'queryset' and ret_fds are given,
+        returned rows are fetched by cursor as ReturnedRows without creating model instances
+    :param extra_columns: Names of columns, returned by query in addition to ret_fds
+    :return: Number of records updated if ret_fds not given. ReturningQuerySet otherwise.
+        PendingResult, if statement is queued to active pipeline.
+    """
+    if ret_fds is not None and returning_stream:
+        logger.debug('EXECUTING STATEMENT TO STREAM:\n        %sWITH PARAMETERS [%s]\n'
+                     % (sql, ', '.join(str(v) for v in params)))
+        return execute_to_stream(model, conn, sql, params, [fd.get_field(model).attname for fd in ret_fds])
+
+    if ret_fds is not None and returning_format == 'array_agg':
+        # Every column is aggregated into array, so a single row is transferred
+        columns = [fd.get_field(model).column for fd in ret_fds] + list(extra_columns)
+        sql = 'WITH "returned" AS (%s) SELECT %s FROM "returned"' \
+              % (sql, ', '.join('array_agg("%s") AS "%s"' % (column, column) for column in columns))
+
+    if prepare and prepare_available(conn):
+        sql, params = prepare_statement(conn, sql, params)
+
+    if ret_fds is None:
+        def fetch(cursor):
+            return cursor.fetchone() if fetch_row else cursor.rowcount
+    elif returning_format != 'queryset':
+        def fetch(cursor):
+            return ReturnedRows.from_cursor(model, conn, cursor, arrays=returning_format == 'array_agg')
+    else:
+        fetch = None
+
+    # Pipelined batches queue statements, which are executed when pipeline is flushed
+    pipeline = get_pipeline(conn)
+    if fetch is not None and pipeline is not None:
+        return pipeline.queue(sql, params, fetch)
+
+    # Execute query
     logger.debug('EXECUTING STATEMENT:\n        %sWITH PARAMETERS [%s]\n'
                  % (sql, ', '.join(str(v) for v in params)))
-    if ret_fds is None:
-        cursor = conn.cursor()
-        cursor.execute(sql, params=params)
-        return cursor.rowcount
+    if fetch is not None:
+        with conn.cursor() as cursor:
+            cursor.execute(sql, params=params)
+            return fetch(cursor)
     else:
         from django_pg_returning import ReturningQuerySet
         return ReturningQuerySet(sql, model=model, params=params,
@@ -564,9 +1508,10 @@ def _execute_update_query(model, conn, sql, params, ret_fds):
                                          for fd in ret_fds])
 
 
-def _bulk_update_no_validation(model, values, conn, key_fds,
-                               upd_fds, ret_fds, where):
-    # type: (Type[Model], TUpdateValuesValid, TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Tuple[str, tuple]) -> Union[int, 'ReturningQuerySet']    # noqa: F821
+def _bulk_update_no_validation(model, values, conn, key_fds, upd_fds, ret_fds, where, strategy='values',
+                               prepare=False, skip_unchanged=False, returning_stream=False,
+                               returning_format='queryset'):
+    # type: (Type[Model], TUpdateValuesValid, TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Tuple[str, tuple], str, bool, bool, bool, str) -> Union[int, 'ReturningQuerySet']    # noqa: F821
     """
     Does bulk update, skipping parameters validation.
     It is used for speed up in bulk_update_or_create, where parameters are already formatted.
@@ -578,56 +1523,251 @@ def _bulk_update_no_validation(model, values, conn, key_fds,
     :param upd_fds: FieldDescriptor objects to update
     :param ret_fds: Optional fds to return as ReturningQuerySet
     :param where: A sql, params tuple to filter query data before update
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :param prepare: If flag is set, query is executed as server side prepared statement
+    :param skip_unchanged: If flag is set, records which would not change are not updated.
+        BulkOperationResult is returned instead of number of records updated.
+    :param returning_stream: If flag is set, ReturningStream is returned instead of ReturningQuerySet
+    :param returning_format: If format is not 'queryset', ReturnedRows are returned instead of ReturningQuerySet
     :return: Number of records updated if ret_fds not given. ReturningQuerySet otherwise
     """
     # No any values to update. Return that everything is done.
     if not upd_fds or not values:
-        from django_pg_returning import ReturningQuerySet
-        return len(values) if ret_fds is None else ReturningQuerySet(None)
-
-    values_sql, values_params = _with_values_query_part(
-        model, values, conn, key_fds, upd_fds)
-    upd_sql, upd_params = _bulk_update_query_part(
-        model, conn, key_fds, upd_fds, where)
-    ret_sql, ret_params = _returning_query_part(model, ret_fds)
-
-    sql = "%s %s %s" % (values_sql, upd_sql, ret_sql)
-    params = values_params + upd_params + ret_params
-
-    return _execute_update_query(model, conn, sql, params, ret_fds)
-
-
-def _concat_batched_result(batched_result, ret_fds):
-    # type: (List[Any], Optional[Tuple[FieldDescriptor]]) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+        if ret_fds is not None and returning_stream:
+            return ReturningStream(model, conn, fields=[fd.get_field(model).attname for fd in ret_fds])
+        elif ret_fds is not None and returning_format != 'queryset':
+            key_columns = [fd.prefixed_name for fd in key_fds] if returning_format == 'keyed' else []
+            return ReturnedRows([fd.get_field(model).attname for fd in ret_fds] + key_columns)
+
+        if ret_fds is not None:
+            from django_pg_returning import ReturningQuerySet
+            return ReturningQuerySet(None)
+        return BulkOperationResult(len(values)) if skip_unchanged else len(values)
+
+    with _strategy_transaction(conn, strategy):
+        values_sql, values_params = _with_values_query_part(
+            model, values, conn, key_fds, upd_fds, strategy=strategy)
+        upd_sql, upd_params = _bulk_update_query_part(
+            model, conn, key_fds, upd_fds, where, skip_unchanged)
+
+        if skip_unchanged and ret_fds is None:
+            # Updated records are counted by RETURNING, matched - by the same join as in update
+            count_sql, count_params = _bulk_update_matched_query_part(model, conn, key_fds, where)
+            sql = '%s, "changed" AS (%s RETURNING 1) %s' % (values_sql, upd_sql, count_sql)
+            params = values_params + upd_params + count_params
+            result = _execute_update_query(model, conn, sql, params, None, prepare=prepare, fetch_row=True)
+            return map_result(result, lambda row: BulkOperationResult(*row))
+
+        ret_sql, ret_params = _returning_query_part(model, conn, ret_fds)
+        key_columns = []
+        if ret_fds is not None and returning_format == 'keyed':
+            ret_sql, key_columns = _keyed_returning_query_part(ret_sql, key_fds)
+
+        sql = "%s %s %s" % (values_sql, upd_sql, ret_sql)
+        params = values_params + upd_params + ret_params
+
+        return _execute_update_query(model, conn, sql, params, ret_fds, prepare=prepare,
+                                     returning_stream=returning_stream, returning_format=returning_format,
+                                     extra_columns=key_columns)
+
+
+def _concat_batched_result(batched_result, ret_fds, skip_unchanged=False, report_inserted=False,
+                           returning_stream=False, returning_format='queryset', fields=(), key_fields=()):
+    # type: (List[Any], Optional[Tuple[FieldDescriptor]], bool, bool, bool, str, TIterable[str], TIterable[str]) -> Union[int, BulkOperationResult, 'ReturningQuerySet', ReturningStream, list, dict]  # noqa: F821
     """
     Gets results of batched execution and format it to appropriate request answer
     :param batched_result: Batched result
     :param ret_fds: Descriptors of fields to return.
-    :return: ReturningQuerySet if returning is not None
+    :param skip_unchanged: If flag is set, BulkOperationResult is returned instead of records count
+    :param report_inserted: If flag is set, BulkOperationResult with number of inserted records is returned
+    :param returning_stream: If flag is set, batches return ReturningStream objects
+    :param returning_format: If format is not 'queryset', batches return ReturnedRows objects,
+        which are concatenated and formatted
+    :param fields: Names of fields to return in returning_format other than 'queryset'
+    :param key_fields: Names of key fields for 'keyed' returning_format
+    :return: ChainedReturningQuerySet if returning is not None
              or updated/inserted records count otherwise
     """
-    if ret_fds is None:
-        return sum(batched_result)
-    elif len(batched_result) == 0:
-        from django_pg_returning import ReturningQuerySet
-        return ReturningQuerySet(None)
-    else:
-        # I can't use chain here, as it iterates over QuerySets,
-        # and I have to return ReturningQuerySet
-        from django_pg_returning import ReturningQuerySet
+    if ret_fds is None and report_inserted:
+        return sum(batched_result, BulkOperationResult(0, 0, 0))
+    elif ret_fds is None:
+        return sum(batched_result, BulkOperationResult(0)) if skip_unchanged else sum(batched_result)
+    elif returning_format != 'queryset':
+        result = ReturnedRows.concat(batched_result) if batched_result \
+            else ReturnedRows(list(fields) + list(key_fields))
+        return result.format(returning_format, fields, key_fields)
+    elif len(batched_result) == 0 and returning_stream:
+        return ReturningStream(None, None)
+    elif returning_stream:
         return sum(batched_result[1:], batched_result[0])
+    else:
+        # Batches are chained lazily: summing querysets copies accumulated records on every addition
+        from .chained import ChainedReturningQuerySet
+        return ChainedReturningQuerySet(batched_result)
+
+
+def _is_queueable(strategy, prepare, ret_fds, returning_stream, returning_format):
+    # type: (str, bool, Optional[Tuple[FieldDescriptor]], bool, str) -> bool
+    """
+    Checks if batch handler queues all its statements to active Pipeline and executes none of them itself.
+    'copy' strategy and prepared statements execute extra statements,
+    returning_stream and ReturningQuerySet execute query with current connection.
+    :return: Boolean
+    """
+    return strategy != 'copy' and not prepare and not returning_stream \
+        and (ret_fds is None or returning_format != 'queryset')
+
+
+class _BatchedOperation(object):
+    """
+    Validated bulk operation: a function, executed on every batch of data, and its parameters.
+    Sync functions execute it with batched_operation(), async ones execute batches one by one (see async_query).
+    """
+    def __init__(self,
+                 handler,  # type: Optional[Callable]
+                 data,  # type: Union[list, dict, LazyBatches]
+                 args=(),  # type: Tuple[Any, ...]
+                 batch_kwargs=None,  # type: Optional[dict]
+                 concat_args=(),  # type: Tuple[Any, ...]
+                 queueable=False,  # type: bool
+                 ):
+        # type: (...) -> None
+        """
+        :param handler: Function, executed on every batch. Batch data is passed as its second argument.
+            None, if data is empty.
+        :param data: Validated data to split to batches or LazyBatches, validating batches when they are read
+        :param args: Handler arguments. Second argument is a placeholder, replaced by batch data.
+        :param batch_kwargs: batched_operation() parameters
+        :param concat_args: _concat_batched_result() parameters after batched result
+        :param queueable: If flag is set, all statements of the handler are queued to active Pipeline,
+            so they can be executed by other connection. See _is_queueable.
+        """
+        self.handler = handler
+        self.data = data
+        self.args = args
+        self.batch_kwargs = batch_kwargs or {}
+        self.concat_args = concat_args
+        self.queueable = queueable
+
+    def concat(self, batched_result):
+        # type: (List[Any]) -> Union[int, BulkOperationResult, 'ReturningQuerySet', ReturningStream, list, dict]  # noqa: F821
+        """
+        Formats results of batches to the operation result. See _concat_batched_result.
+        """
+        return _concat_batched_result(batched_result, *self.concat_args)
+
+    def execute(self):
+        # type: () -> Union[int, BulkOperationResult, 'ReturningQuerySet', ReturningStream, list, dict]  # noqa: F821
+        """
+        Executes the operation in current thread (or threads of parallel workers)
+        :return: Operation result
+        """
+        if self.handler is None:
+            return self._report_retries(self.concat([]), 0)
+
+        batched_result = batched_operation(self.handler, self.data, args=self.args, data_arg_index=1,
+                                           **self.batch_kwargs)
+        return self._report_retries(self.concat(batched_result), batched_result.retries)
+
+    def _report_retries(self, result, retries):
+        # type: (Any, int) -> Any
+        """
+        If batches can be retried, records count is returned as BulkOperationResult with number of retries
+        """
+        if not self.batch_kwargs.get('retries') or not isinstance(result, int):
+            return result
+
+        if not isinstance(result, BulkOperationResult):
+            result = BulkOperationResult(result)
+        result.retries = retries
+        return result
+
+
+def _bulk_update_operation(model, values, key_fields, using, set_functions, key_fields_ops, where, returning,
+                           batch_size, batch_delay, strategy, prepare, skip_unchanged, order_keys, returning_stream,
+                           returning_format, parallel, pipeline, transaction, retries, columns):
+    # type: (Type[Model], TUpdateValues, TFieldNames, Optional[str], TSetFunctions, TOperators, Optional[WhereNode], Optional[TFieldNames], Optional[int], float, str, bool, bool, Optional[bool], bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> _BatchedOperation
+    """
+    Validates bulk_update parameters and prepares the operation. See bulk_update for parameters description.
+    :return: _BatchedOperation instance
+    """
+    # Validate data
+    if not inspect.isclass(model):
+        raise TypeError("model must be django.db.models.Model subclass")
+    if not issubclass(model, Model):
+        raise TypeError("model must be django.db.models.Model subclass")
+    if using is not None and not isinstance(using, string_types):
+        raise TypeError("using parameter must be None or string")
+    if using and using not in connections:
+        raise ValueError("using parameter must be existing database alias")
+
+    key_fields = _validate_field_names(key_fields)
+    values_iter = None
+    if _is_lazy_input(values, batch_size, parallel):
+        # Only the first batch is read here, next ones are read and validated, when they are executed
+        values_iter, values = values, _read_first_batch(values, batch_size)
+
+    duplicates = {}
+    upd_fds, values = _validate_update_values(model, key_fields, values, duplicates=duplicates, columns=columns)
+    ret_fds = _validate_returning(model, returning)
+    returning_stream = _validate_returning_stream(ret_fds, returning_stream)
+    parallel = _validate_parallel(parallel, returning_stream)
+    returning_format = _validate_returning_format(ret_fds, returning_format, returning_stream)
+    where = _validate_where(model, where, using)
+    strategy = _validate_strategy(strategy)
+    prepare = _validate_prepare(prepare, strategy)
+    pipeline = _validate_pipeline(pipeline, batch_size, strategy, ret_fds, returning_stream, returning_format,
+                                  using)
+    transaction = validate_transaction_mode(transaction, parallel=parallel, pipeline=pipeline)
+    retries = validate_retries(retries, pipeline=pipeline)
+    if type(skip_unchanged) is not bool:
+        raise TypeError("skip_unchanged parameter must be boolean")
+    if order_keys is not None and type(order_keys) is not bool:
+        raise TypeError("order_keys parameter must be boolean or None")
+
+    key_fields = _validate_operators(key_fields, key_fields_ops)
+    _get_query_returning_fds(model, ret_fds, returning_format, key_fields)
+    ret_fields = _get_returning_fields(model, ret_fds)
+    ret_key_fields = [fd.prefixed_name for fd in key_fields]
+    concat_args = (ret_fds, skip_unchanged, False, returning_stream, returning_format, ret_fields, ret_key_fields)
+
+    if len(values) == 0:
+        return _BatchedOperation(None, values, batch_kwargs=dict(retries=retries), concat_args=concat_args)
+
+    upd_fds = _validate_set_functions(model, upd_fds, set_functions)
+    values = _coalesce_duplicates(model, upd_fds, values, duplicates)
+    if order_keys:
+        values = _order_by_keys(values)
+    if values_iter is not None:
+        upd_field_names = tuple(next(iter(values.values())).keys())
+        values = LazyBatches(values, values_iter, partial(_validate_values_batch, model, key_fields, upd_fds,
+                                                          upd_field_names, bool(order_keys), columns))
+    values = _get_batched_values(key_fields, values, batch_size, parallel)
+    conn = connection if using is None else connections[using]
+
+    return _BatchedOperation(_bulk_update_no_validation, values,
+                             args=(model, None, conn, key_fields, upd_fds, ret_fds, where, strategy,
+                                   prepare, skip_unchanged, returning_stream, returning_format),
+                             batch_kwargs=dict(batch_size=batch_size, batch_delay=batch_delay, using=using,
+                                               row_params=_get_row_params(strategy, key_fields, upd_fds),
+                                               parallel=parallel, pipeline=pipeline,
+                                               transaction=transaction, retries=retries),
+                             concat_args=concat_args,
+                             queueable=_is_queueable(strategy, prepare, ret_fds, returning_stream, returning_format))
 
 
 def bulk_update(model, values, key_fields='id', using=None, set_functions=None,
                 key_fields_ops=(), where=None, returning=None,
-                batch_size=None, batch_delay=0):
-    # type: (Type[Model], TUpdateValues, TFieldNames, Optional[str], TSetFunctions, TOperators, Optional[WhereNode], Optional[TFieldNames], Optional[int], float) -> Union[int, 'ReturningQuerySet']    # noqa: F821
+                batch_size=None, batch_delay=0, strategy='values', prepare=False, skip_unchanged=False,
+                order_keys=None, returning_stream=False, returning_format='queryset', parallel=None, pipeline=None,
+                transaction=None, retries=0, columns=None):
+    # type: (Type[Model], TUpdateValues, TFieldNames, Optional[str], TSetFunctions, TOperators, Optional[WhereNode], Optional[TFieldNames], Optional[int], float, str, bool, bool, Optional[bool], bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', ReturningStream, list, dict]    # noqa: F821
     """
     Updates multiple records of a given model, finding them by key_fields.
 
     :param model: Model to update, a subclass of django.db.models.Model
     :param values: Data to update. All items must update same fields!!!
-        It can come in 2 forms:
+        It can come in 4 forms:
         + Iterable of dicts. Each dict is update or create data.
             Each dict must contain all key_fields as keys.
             You can't update key_fields with this format.
@@ -635,6 +1775,9 @@ def bulk_update(model, values, key_fields='id', using=None, set_functions=None,
             - key_values can be iterable or single object.
             - If iterable, key_values length must be equal to key_fields length.
             - If single object, key_fields is expected to have 1 element
+        + Iterable of tuples or lists, if columns parameter is given. Each row contains values in columns order.
+        + Dict of field name: column of values (list, tuple, numpy array or pandas Series) or pandas DataFrame.
+            Columns must contain all key_fields and have equal length.
     :param key_fields: Field names, by which items would be selected.
         It can be a string, if there's only one key field
         or iterable of strings for multiple keys
@@ -655,10 +1798,119 @@ def bulk_update(model, values, key_fields='id', using=None, set_functions=None,
                       listed in parameter.
     :param batch_size: Optional. If given, data is split it into batches
                        of given size. Each batch is queried independently.
+                       If 'auto', size of every batch is computed by query parameters limit,
+                       estimated values size and execution time of previous batches.
     :param batch_delay: Delay in seconds between batches execution,
                         if batch_size is not None.
+    :param strategy: A way values are passed to database:
+        'values' (default) - VALUES list with a placeholder for every value,
+        'unnest' - a typed array parameter for every column. Query text doesn't depend on number of rows.
+        'copy' - rows are copied to temporary staging table with COPY ... FROM STDIN. Fastest on big data sets.
+    :param prepare: If flag is set, query is executed as server side prepared statement, cached per connection.
+        It is ignored for databases with DISABLE_PREPARED_STATEMENTS setting (transaction pooling).
+        It requires 'unnest' or 'copy' strategy: 'values' strategy query text changes with number of rows.
+    :param skip_unchanged: If flag is set, records are updated only if values, computed by set functions,
+        differ from current ones (IS DISTINCT FROM). Unchanged records produce no dead tuples, WAL and index writes.
+        Function returns BulkOperationResult: number of records changed with matched and skipped counters.
+        If returning is given, only changed records are returned.
+    :param order_keys: If flag is set, values are sorted by keys before splitting into batches,
+        so concurrent updates lock records in the same order and don't deadlock. Defaults to False.
+    :param returning_stream: If flag is set, returned records are saved to temporary table on database side
+        and ReturningStream is returned instead of ReturningQuerySet. It reads records with server side cursor
+        in chunks, so memory usage doesn't depend on number of records returned. Stream can be iterated once.
+    :param returning_format: Format of returned records, one of RETURNING_FORMATS.
+        Formats other than 'queryset' (default) don't create model instances and don't require django-pg-returning.
+        'keyed' format requires all key fields to be compared by 'eq' operator.
+    :param parallel: Optional. If given, values are split to this number of partitions by key hash.
+        Partitions are processed in parallel threads, each with its own database connection.
+        Every batch is committed independently, so it can't be used inside a transaction.
+        If any batch fails, ParallelBatchError is raised, containing results of committed batches.
+        Results are concatenated in partitions order. It can't be used with returning_stream.
+    :param pipeline: Optional. If given, statements of this number of batches are sent to database together,
+        without waiting for result of every batch (pipeline mode of psycopg 3). It requires psycopg 3 with libpq 14+.
+        Every group of batches is executed in a single transaction. If a statement fails, exception raised has
+        batch_index attribute: index of the failed batch. Previous groups are committed.
+        It can't be used with batch_size='auto', 'copy' strategy, returning_stream and 'queryset' returning_format.
+    :param transaction: Optional. Transaction control of batches. By default they are executed in current transaction.
+        'single' - all batches are executed in a single transaction.
+        'per_batch' - every batch is committed after execution, releasing its locks.
+        Integer N ('every_n' mode) - every N batches are committed together.
+        Inside transaction.atomic() block every transaction is a savepoint.
+        With parallel every worker commits its own batches, so 'single' can't be used.
+        pipeline can be combined with 'single' only.
+    :param retries: Maximum number of retries of a batch, failed by deadlock or serialization failure.
+        Every attempt is rolled back and retried after jittered exponential backoff.
+        Attempt is a new transaction, if transaction is None, 'per_batch' or 1 outside transaction.atomic() block.
+        Otherwise it is a savepoint, and serialization failures are raised without retries.
+        If returning is not given, BulkOperationResult with number of retries is returned.
+        It can't be used with pipeline.
+    :param columns: Optional. Field names of positional rows, given in values instead of dicts.
+        Must contain all key_fields. Rows are validated by this header once and are not converted to dicts.
     :return: Number of records updated
     """
+    return _bulk_update_operation(model, values, key_fields, using, set_functions, key_fields_ops, where, returning,
+                                  batch_size, batch_delay, strategy, prepare, skip_unchanged, order_keys,
+                                  returning_stream, returning_format, parallel, pipeline, transaction,
+                                  retries, columns).execute()
+
+
+@_cached_query_part
+def _bulk_delete_query_part(model, conn, key_fds, where):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[str, tuple]) -> Tuple[str, List[Any]]
+    """
+    Forms bulk delete query part without values, counting that all keys are already in "vals" table
+    :param model: Model to delete records of, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param key_fds: Field names, by which items would be selected (tuple)
+    :param where: A sql, params tuple to filter query data before delete
+    :return: A tuple of sql and it's parameters
+    """
+    where_sql, where_params = _key_where_sql(model, key_fds, where)
+    return 'DELETE FROM %s AS t USING "vals" WHERE %s' % (conn.ops.quote_name(model._meta.db_table), where_sql), \
+        where_params
+
+
+def _bulk_delete_no_validation(model, keys, conn, key_fds, ret_fds, where, strategy='values', prepare=False,
+                               returning_stream=False, returning_format='queryset'):
+    # type: (Type[Model], TUpdateValuesValid, TDatabase, Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Tuple[str, tuple], str, bool, bool, str) -> Union[int, 'ReturningQuerySet']    # noqa: F821
+    """
+    Does bulk delete, skipping parameters validation.
+    :param model: Model to delete records of, a subclass of django.db.models.Model
+    :param keys: Keys of records to delete. Dict of key_values_tuple: empty dict
+    :param conn: Database connection used
+    :param key_fds: Field names, by which items would be selected (tuple)
+    :param ret_fds: Optional fds to return as ReturningQuerySet
+    :param where: A sql, params tuple to filter query data before delete
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :param prepare: If flag is set, query is executed as server side prepared statement
+    :param returning_stream: If flag is set, ReturningStream is returned instead of ReturningQuerySet
+    :param returning_format: If format is not 'queryset', ReturnedRows are returned instead of ReturningQuerySet
+    :return: Number of records deleted if ret_fds not given. ReturningQuerySet otherwise
+    """
+    with _strategy_transaction(conn, strategy):
+        values_sql, values_params = _with_values_query_part(model, keys, conn, key_fds, tuple(), strategy=strategy)
+        del_sql, del_params = _bulk_delete_query_part(model, conn, key_fds, where)
+        ret_sql, ret_params = _returning_query_part(model, conn, ret_fds)
+        key_columns = []
+        if ret_fds is not None and returning_format == 'keyed':
+            ret_sql, key_columns = _keyed_returning_query_part(ret_sql, key_fds)
+
+        sql = "%s %s %s" % (values_sql, del_sql, ret_sql)
+        params = values_params + del_params + ret_params
+
+        return _execute_update_query(model, conn, sql, params, ret_fds, prepare=prepare,
+                                     returning_stream=returning_stream, returning_format=returning_format,
+                                     extra_columns=key_columns)
+
+
+def _bulk_delete_operation(model, keys, key_fields, using, key_fields_ops, where, returning, batch_size, batch_delay,
+                           strategy, prepare, order_keys, returning_stream, returning_format, parallel, pipeline,
+                           transaction, retries):
+    # type: (Type[Model], TDeleteKeys, TFieldNames, Optional[str], TOperators, Optional[WhereNode], Optional[TFieldNames], Optional[int], float, str, bool, Optional[bool], bool, str, Optional[int], Optional[int], Union[None, str, int], int) -> _BatchedOperation
+    """
+    Validates bulk_delete parameters and prepares the operation. See bulk_delete for parameters description.
+    :return: _BatchedOperation instance
+    """
     # Validate data
     if not inspect.isclass(model):
         raise TypeError("model must be django.db.models.Model subclass")
@@ -670,45 +1922,115 @@ def bulk_update(model, values, key_fields='id', using=None, set_functions=None,
         raise ValueError("using parameter must be existing database alias")
 
     key_fields = _validate_field_names(key_fields)
-    upd_fds, values = _validate_update_values(model, key_fields, values)
+    keys_iter = None
+    if _is_lazy_input(keys, batch_size, parallel):
+        # Only the first batch is read here, next ones are read and validated, when they are executed
+        keys_iter, keys = keys, _read_first_batch(keys, batch_size)
+
+    keys = _validate_delete_keys(key_fields, keys)
     ret_fds = _validate_returning(model, returning)
+    returning_stream = _validate_returning_stream(ret_fds, returning_stream)
+    parallel = _validate_parallel(parallel, returning_stream)
+    returning_format = _validate_returning_format(ret_fds, returning_format, returning_stream)
     where = _validate_where(model, where, using)
-
-    if len(values) == 0:
-        return _concat_batched_result([], ret_fds)
+    strategy = _validate_strategy(strategy)
+    prepare = _validate_prepare(prepare, strategy)
+    pipeline = _validate_pipeline(pipeline, batch_size, strategy, ret_fds, returning_stream, returning_format,
+                                  using)
+    transaction = validate_transaction_mode(transaction, parallel=parallel, pipeline=pipeline)
+    retries = validate_retries(retries, pipeline=pipeline)
+    if order_keys is not None and type(order_keys) is not bool:
+        raise TypeError("order_keys parameter must be boolean or None")
 
     key_fields = _validate_operators(key_fields, key_fields_ops)
-    upd_fds = _validate_set_functions(model, upd_fds, set_functions)
+    _get_query_returning_fds(model, ret_fds, returning_format, key_fields)
+    ret_fields = _get_returning_fields(model, ret_fds)
+    ret_key_fields = [fd.prefixed_name for fd in key_fields]
+    concat_args = (ret_fds, False, False, returning_stream, returning_format, ret_fields, ret_key_fields)
+
+    if len(keys) == 0:
+        return _BatchedOperation(None, keys, batch_kwargs=dict(retries=retries), concat_args=concat_args)
+
+    if order_keys:
+        keys = _order_by_keys(keys)
+    if keys_iter is not None:
+        keys = LazyBatches(keys, keys_iter, partial(_validate_delete_keys_batch, key_fields, bool(order_keys)))
     conn = connection if using is None else connections[using]
 
-    batched_result = batched_operation(_bulk_update_no_validation, values,
-                                       args=(model, None, conn, key_fields,
-                                             upd_fds, ret_fds, where),
-                                       data_arg_index=1, batch_size=batch_size,
-                                       batch_delay=batch_delay)
-
-    return _concat_batched_result(batched_result, ret_fds)
+    return _BatchedOperation(_bulk_delete_no_validation, keys,
+                             args=(model, None, conn, key_fields, ret_fds, where, strategy, prepare,
+                                   returning_stream, returning_format),
+                             batch_kwargs=dict(batch_size=batch_size, batch_delay=batch_delay, using=using,
+                                               row_params=_get_row_params(strategy, key_fields), parallel=parallel,
+                                               pipeline=pipeline, transaction=transaction, retries=retries),
+                             concat_args=concat_args,
+                             queueable=_is_queueable(strategy, prepare, ret_fds, returning_stream, returning_format))
+
+
+def bulk_delete(model, keys, key_fields='id', using=None, key_fields_ops=(), where=None, returning=None,
+                batch_size=None, batch_delay=0, strategy='values', prepare=False, order_keys=None,
+                returning_stream=False, returning_format='queryset', parallel=None, pipeline=None, transaction=None,
+                retries=0):
+    # type: (Type[Model], TDeleteKeys, TFieldNames, Optional[str], TOperators, Optional[WhereNode], Optional[TFieldNames], Optional[int], float, str, bool, Optional[bool], bool, str, Optional[int], Optional[int], Union[None, str, int], int) -> Union[int, 'ReturningQuerySet', ReturningStream, list, dict]    # noqa: F821
+    """
+    Deletes multiple records of a given model, finding them by key_fields.
+    Records are joined with input keys in a single DELETE ... USING query.
+
+    :param model: Model to delete records of, a subclass of django.db.models.Model
+    :param keys: Keys of records to delete. An iterable, each item of which can be:
+        + A dict, containing all key_fields as keys. Other fields are ignored.
+        + An iterable of key values. It's length must be equal to key_fields length.
+        + Single object, if key_fields has 1 element
+    :param key_fields: Field names, by which items would be selected.
+        It can be a string, if there's only one key field
+        or iterable of strings for multiple keys
+    :param using: Database alias to make query to.
+    :param key_fields_ops: Key fields compare operators.
+        It can be dict with field_name from key_fields as key, operation name as value
+        Or an iterable of operations in key_fields order.
+        The default operator is eq (it will be used for all fields, not set directly).
+        Operators: [in; !in; gt, >; lt, <; gte, >=; lte, <=; !eq, <>, !=; eq, =, ==]
+        Example: ('eq', 'in') or {'a': 'eq', 'b': 'in'}.
+    :param where: A WhereNode instance - filter condition for all query
+    :param returning: Optional. If given, returns values of deleted records fields,
+                      listed in parameter.
+    :param batch_size: Optional. If given, data is split it into batches
+                       of given size. Each batch is queried independently.
+                       If 'auto', size of every batch is computed by query parameters limit,
+                       estimated values size and execution time of previous batches.
+    :param batch_delay: Delay in seconds between batches execution,
+                        if batch_size is not None.
+    :param strategy: A way values are passed to database: 'values' (default), 'unnest' or 'copy'.
+        See bulk_update for details.
+    :param prepare: If flag is set, query is executed as server side prepared statement, cached per connection.
+        See bulk_update for details.
+    :param order_keys: If flag is set, keys are sorted before splitting into batches,
+        so concurrent deletes lock records in the same order and don't deadlock. Defaults to False.
+    :param returning_stream: If flag is set, ReturningStream is returned instead of ReturningQuerySet.
+        See bulk_update for details.
+    :param returning_format: Format of returned records, one of RETURNING_FORMATS. See bulk_update for details.
+    :param parallel: Optional. Number of parallel workers, see bulk_update for details.
+    :param pipeline: Optional. Number of batches, sent to database together, see bulk_update for details.
+    :param transaction: Optional. Transaction control of batches, see bulk_update for details.
+    :param retries: Maximum number of retries of a batch after transient errors, see bulk_update for details.
+    :return: Number of records deleted
+    """
+    return _bulk_delete_operation(model, keys, key_fields, using, key_fields_ops, where, returning, batch_size,
+                                  batch_delay, strategy, prepare, order_keys, returning_stream, returning_format,
+                                  parallel, pipeline, transaction, retries).execute()
 
 
-def _insert_query_part(model, conn, insert_fds, default_fds):
-    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor]) -> Tuple[str, List[Any]]
+def _insert_columns_sql(model, conn, insert_fds, default_fds, defaults_table='default_vals'):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], str) -> Tuple[str, str, List[Any]]
     """
-    Forms bulk update query part without values, counting that all keys and values are already in vals table
+    Forms columns to insert and values to insert into them, counting that values are in vals table
     :param model: Model to update, a subclass of django.db.models.Model
     :param conn: Database connection used
     :param insert_fds: FieldDescriptor objects to insert
     :param default_fds: FieldDescriptor objects to take as default values
-    :return: A tuple of sql and it's parameters
+    :param defaults_table: Name of a table to take default values from
+    :return: A tuple of columns sql, values sql and values parameters
     """
-    query = """
-        INSERT INTO %s (%s)
-        SELECT %s FROM %s
-    """
-
-    # Table we save data to
-    db_table = conn.ops.quote_name(model._meta.db_table)
-    from_table = '"vals" CROSS JOIN "default_vals"' if default_fds else '"vals"'
-
     # Columns to insert to table
     columns = ', '.join(
         '"%s"' % fd.get_field(model).column
@@ -725,20 +2047,44 @@ def _insert_query_part(model, conn, insert_fds, default_fds):
         val_columns_params.extend(params)
 
     for fd in default_fds:
-        val = '"default_vals"."%s"' % fd.prefixed_name
+        val = '"%s"."%s"' % (defaults_table, fd.prefixed_name)
         func_sql, params = fd.set_function.get_sql_value(
             fd.get_field(model), val, conn, val_as_param=False, for_update=False)
         val_columns.append(func_sql)
         val_columns_params.extend(params)
 
-    val_columns = ', '.join(val_columns)
+    return columns, ', '.join(val_columns), val_columns_params
+
+
+@_cached_query_part
+def _insert_query_part(model, conn, insert_fds, default_fds):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor]) -> Tuple[str, List[Any]]
+    """
+    Forms bulk update query part without values, counting that all keys and values are already in vals table
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param insert_fds: FieldDescriptor objects to insert
+    :param default_fds: FieldDescriptor objects to take as default values
+    :return: A tuple of sql and it's parameters
+    """
+    query = """
+        INSERT INTO %s (%s)
+        SELECT %s FROM %s
+    """
+
+    # Table we save data to
+    db_table = conn.ops.quote_name(model._meta.db_table)
+    from_table = '"vals" CROSS JOIN "default_vals"' if default_fds else '"vals"'
+
+    columns, val_columns, val_columns_params = _insert_columns_sql(model, conn, insert_fds, default_fds)
 
     sql = query % (db_table, columns, val_columns, from_table)
     return sql, val_columns_params
 
 
-def _insert_no_validation(model, values, default_fds, insert_fds, ret_fds, using):
-    # type: (Type[Model], TUpdateValues, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Optional[str]) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+def _insert_no_validation(model, values, default_fds, insert_fds, ret_fds, using, strategy='values',
+                          prepare=False, returning_stream=False, returning_format='queryset'):
+    # type: (Type[Model], TUpdateValues, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Optional[str], str, bool, bool, str) -> Union[int, 'ReturningQuerySet']  # noqa: F821
     """
     Creates a batch of records in database.
     Acts like native QuerySet.bulk_create() method, but uses library infrastructure and input formats
@@ -754,24 +2100,91 @@ def _insert_no_validation(model, values, default_fds, insert_fds, ret_fds, using
     :param insert_fds: FieldDescriptor objects to insert
     :param ret_fds: Optional fds to return as ReturningQuerySet
     :param using: Database alias to make query to.
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :param prepare: If flag is set, query is executed as server side prepared statement
+    :param returning_stream: If flag is set, ReturningStream is returned instead of ReturningQuerySet
+    :param returning_format: If format is not 'queryset', ReturnedRows are returned instead of ReturningQuerySet
     :return: A tuple (number of records created, number of records updated)
     """
     conn = connection if using is None else connections[using]
-    val_sql, val_params = _with_values_query_part(
-        model, values, conn, tuple(), insert_fds, default_fds)
-    insert_sql, insert_params = _insert_query_part(
-        model, conn, insert_fds, default_fds)
-    ret_sql, ret_params = _returning_query_part(model, ret_fds)
+    with _strategy_transaction(conn, strategy):
+        val_sql, val_params = _with_values_query_part(
+            model, values, conn, tuple(), insert_fds, default_fds, strategy=strategy)
+        insert_sql, insert_params = _insert_query_part(
+            model, conn, insert_fds, default_fds)
+        ret_sql, ret_params = _returning_query_part(model, conn, ret_fds)
 
-    sql = "%s %s %s" % (val_sql, insert_sql, ret_sql)
-    params = val_params + insert_params + ret_params
+        sql = "%s %s %s" % (val_sql, insert_sql, ret_sql)
+        params = val_params + insert_params + ret_params
 
-    return _execute_update_query(model, conn, sql, params, ret_fds)
+        return _execute_update_query(model, conn, sql, params, ret_fds, prepare=prepare,
+                                     returning_stream=returning_stream, returning_format=returning_format)
+
+
+def _bulk_create_operation(model, values, using, set_functions, returning, batch_size, batch_delay, strategy,
+                           prepare, returning_stream, returning_format, parallel, pipeline, transaction, retries,
+                           columns):
+    # type: (Type[Model], TUpdateValues, Optional[str], TSetFunctions, Optional[TFieldNames], Optional[int], float, str, bool, bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> _BatchedOperation
+    """
+    Validates bulk_create parameters and prepares the operation. See bulk_create for parameters description.
+    :return: _BatchedOperation instance
+    """
+    # Validate data
+    if not inspect.isclass(model):
+        raise TypeError("model must be django.db.models.Model subclass")
+    if not issubclass(model, Model):
+        raise TypeError("model must be django.db.models.Model subclass")
+    if using is not None and not isinstance(using, string_types):
+        raise TypeError("using parameter must be None or existing database alias")
+    if using is not None and using not in connections:
+        raise ValueError(
+            "using parameter must be None or existing database alias")
+    strategy = _validate_strategy(strategy)
+    prepare = _validate_prepare(prepare, strategy)
+
+    values_iter = None
+    if _is_lazy_input(values, batch_size, parallel):
+        # Only the first batch is read here, next ones are read and validated, when they are executed
+        values_iter, values = values, _read_first_batch(values, batch_size)
+
+    insert_fds, values = _validate_update_values(model, tuple(), values, columns=columns)
+    ret_fds = _validate_returning(model, returning)
+    returning_stream = _validate_returning_stream(ret_fds, returning_stream)
+    parallel = _validate_parallel(parallel, returning_stream)
+    returning_format = _validate_returning_format(ret_fds, returning_format, returning_stream)
+    pipeline = _validate_pipeline(pipeline, batch_size, strategy, ret_fds, returning_stream, returning_format,
+                                  using)
+    transaction = validate_transaction_mode(transaction, parallel=parallel, pipeline=pipeline)
+    retries = validate_retries(retries, pipeline=pipeline)
+    _get_query_returning_fds(model, ret_fds, returning_format)
+    ret_fields = _get_returning_fields(model, ret_fds)
+    concat_args = (ret_fds, False, False, returning_stream, returning_format, ret_fields)
+
+    if len(values) == 0:
+        return _BatchedOperation(None, values, batch_kwargs=dict(retries=retries), concat_args=concat_args)
+
+    default_fds = _get_default_fds(model, tuple(insert_fds))
+    insert_fds = _validate_set_functions(model, insert_fds, set_functions)
+    if values_iter is not None:
+        insert_field_names = tuple(next(iter(values.values())).keys())
+        values = LazyBatches(values, values_iter, partial(_validate_values_batch, model, tuple(), insert_fds,
+                                                          insert_field_names, False, columns))
+    values = _get_batched_values(tuple(), values, batch_size, parallel)
+
+    return _BatchedOperation(_insert_no_validation, values,
+                             args=(model, None, default_fds, insert_fds, ret_fds, using, strategy,
+                                   prepare, returning_stream, returning_format),
+                             batch_kwargs=dict(batch_size=batch_size, batch_delay=batch_delay, using=using,
+                                               row_params=_get_row_params(strategy, insert_fds), parallel=parallel,
+                                               pipeline=pipeline, transaction=transaction, retries=retries),
+                             concat_args=concat_args,
+                             queueable=_is_queueable(strategy, prepare, ret_fds, returning_stream, returning_format))
 
 
 def bulk_create(model, values, using=None, set_functions=None, returning=None,
-                batch_size=None, batch_delay=0):
-    # type: (Type[Model], TUpdateValues, Optional[str], TSetFunctions, Optional[TFieldNames], Optional[int], float) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+                batch_size=None, batch_delay=0, strategy='values', prepare=False, returning_stream=False,
+                returning_format='queryset', parallel=None, pipeline=None, transaction=None, retries=0, columns=None):
+    # type: (Type[Model], TUpdateValues, Optional[str], TSetFunctions, Optional[TFieldNames], Optional[int], float, str, bool, bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', ReturningStream, list, dict]  # noqa: F821
     """
     Creates a batch of records in database.
     Acts like native QuerySet.bulk_create() method, but uses library infrastructure and input formats
@@ -781,6 +2194,8 @@ def bulk_create(model, values, using=None, set_functions=None, returning=None,
     :param values: Data to update.
         All items must update same fields!!!
         Iterable of dicts. Each dict is create data.
+        Or iterable of tuples or lists in columns order, if columns parameter is given.
+        Or dict of field name: column of values or pandas DataFrame. See bulk_update for details.
     :param using: Database alias to make query to.
     :param set_functions: Functions to set values.
         Should be a dict of field name as key, function as value.
@@ -789,42 +2204,84 @@ def bulk_create(model, values, using=None, set_functions=None, returning=None,
         Example: {'name': 'eq', 'int_fields': 'incr'}
     :param returning: Optional. If given, returns updated values of fields, listed in parameter.
     :param batch_size: Optional. If given, data is split it into batches of given size.
-        Each batch is queried independently.
+        Each batch is queried independently. If 'auto', size of every batch is computed by query parameters limit,
+        estimated values size and execution time of previous batches.
     :param batch_delay: Delay in seconds between batches execution, if batch_size is not None.
+    :param strategy: A way values are passed to database:
+        'values' (default) - VALUES list with a placeholder for every value,
+        'unnest' - a typed array parameter for every column. Query text doesn't depend on number of rows.
+        'copy' - rows are copied to temporary staging table with COPY ... FROM STDIN. Fastest on big data sets.
+    :param prepare: If flag is set, query is executed as server side prepared statement, cached per connection.
+        It is ignored for databases with DISABLE_PREPARED_STATEMENTS setting (transaction pooling).
+        It requires 'unnest' or 'copy' strategy: 'values' strategy query text changes with number of rows.
+    :param returning_stream: If flag is set, returned records are saved to temporary table on database side
+        and ReturningStream is returned instead of ReturningQuerySet. It reads records with server side cursor
+        in chunks, so memory usage doesn't depend on number of records returned. Stream can be iterated once.
+    :param returning_format: Format of returned records, one of RETURNING_FORMATS except for 'keyed'.
+        See bulk_update for details.
+    :param parallel: Optional. Number of parallel workers, see bulk_update for details.
+        Values have no keys, so they are split to partitions round robin.
+    :param pipeline: Optional. Number of batches, sent to database together, see bulk_update for details.
+    :param transaction: Optional. Transaction control of batches, see bulk_update for details.
+    :param retries: Maximum number of retries of a batch after transient errors, see bulk_update for details.
+    :param columns: Optional. Field names of positional rows, given in values instead of dicts.
     :return: Number of records created or updated
     """
-    # Validate data
-    if not inspect.isclass(model):
-        raise TypeError("model must be django.db.models.Model subclass")
-    if not issubclass(model, Model):
-        raise TypeError("model must be django.db.models.Model subclass")
-    if using is not None and not isinstance(using, string_types):
-        raise TypeError("using parameter must be None or existing database alias")
-    if using is not None and using not in connections:
-        raise ValueError(
-            "using parameter must be None or existing database alias")
+    return _bulk_create_operation(model, values, using, set_functions, returning, batch_size, batch_delay, strategy,
+                                  prepare, returning_stream, returning_format, parallel, pipeline,
+                                  transaction, retries, columns).execute()
 
-    insert_fds, values = _validate_update_values(model, tuple(), values)
-    ret_fds = _validate_returning(model, returning)
 
-    if len(values) == 0:
-        return _concat_batched_result([], ret_fds)
+def _execute_upsert_query(model, conn, values_sql, upsert_sql, params, ret_fds, rows_count, prepare=False,
+                          skip_unchanged=False, report_inserted=False, inserted_sql='"xmax" = 0',
+                          returning_stream=False, returning_format='queryset'):
+    # type: (Type[Model], TDatabase, str, str, List[Any], Optional[Tuple[FieldDescriptor]], int, bool, bool, bool, str, bool, str) -> Union[int, BulkOperationResult, 'ReturningQuerySet', ReturningStream, ReturnedRows]  # noqa: F821
+    """
+    Executes single statement upsert query and reports it's result
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param values_sql: Query part, selecting input values
+    :param upsert_sql: Upsert statement without RETURNING section
+    :param params: Parameters of both query parts
+    :param ret_fds: Optional fds to return as ReturningQuerySet
+    :param rows_count: Number of input rows. Every row either inserts a record or matches existing one
+    :param prepare: If flag is set, query is executed as server side prepared statement
+    :param skip_unchanged: If flag is set, BulkOperationResult is returned instead of number of records changed
+    :param report_inserted: If flag is set, inserted records are reported in the same statement.
+        BulkOperationResult with inserted counter is returned, returned instances get INSERTED_COLUMN attribute.
+    :param inserted_sql: RETURNING expression, which is true for inserted records.
+        Records, inserted by INSERT statement, have no deleting transaction yet, so xmax system column is 0.
+    :param returning_stream: If flag is set, ReturningStream is returned instead of ReturningQuerySet
+    :param returning_format: If format is not 'queryset', ReturnedRows are returned instead of ReturningQuerySet
+    :return: Number of records created or updated if ret_fds not given. ReturningQuerySet otherwise
+    """
+    if report_inserted and ret_fds is None:
+        sql = '%s, "changed" AS (%s RETURNING %s AS "inserted") ' \
+              'SELECT COUNT(*), COUNT(*) FILTER (WHERE "inserted") FROM "changed"' \
+              % (values_sql, upsert_sql, inserted_sql)
+        result = _execute_update_query(model, conn, sql, params, None, prepare=prepare, fetch_row=True)
+        return map_result(result, lambda row: BulkOperationResult(row[0], rows_count, row[1]))
 
-    default_fds = _get_default_fds(model, tuple(insert_fds))
-    insert_fds = _validate_set_functions(model, insert_fds, set_functions)
+    ret_sql, ret_params = _returning_query_part(model, conn, ret_fds)
+    if report_inserted:
+        ret_sql = '%s, %s AS "%s"' % (ret_sql, inserted_sql, INSERTED_COLUMN)
+
+    sql = "%s %s %s" % (values_sql, upsert_sql, ret_sql)
+    result = _execute_update_query(model, conn, sql, params + ret_params, ret_fds, prepare=prepare,
+                                   returning_stream=returning_stream, returning_format=returning_format,
+                                   extra_columns=[INSERTED_COLUMN] if report_inserted else [])
 
-    batched_result = batched_operation(_insert_no_validation, values,
-                                       args=(model, None, default_fds,
-                                             insert_fds, ret_fds, using),
-                                       data_arg_index=1, batch_size=batch_size,
-                                       batch_delay=batch_delay)
+    if skip_unchanged and ret_fds is None:
+        return map_result(result, lambda changed: BulkOperationResult(changed, rows_count))
 
-    return _concat_batched_result(batched_result, ret_fds)
+    return result
 
 
 def _bulk_update_or_create_no_validation(model, values, key_fds, upd_fds, ret_fds,
-                                         using, update, constraint):
-    # type: (Type[Model], TUpdateValues, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Optional[str], bool) -> int
+                                         using, update, constraint, strategy='values', prepare=False,
+                                         skip_unchanged=False, report_inserted=False, returning_stream=False,
+                                         returning_format='queryset'):
+    # type: (Type[Model], TUpdateValues, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Optional[str], bool, Optional[str], str, bool, bool, bool, bool, str) -> int
     """
     Searches for records, given in values by key_fields. If records are found, updates them from values.
     If not found - creates them from values. Note, that all fields without default value must be present in values.
@@ -840,6 +2297,15 @@ def _bulk_update_or_create_no_validation(model, values, key_fds, upd_fds, ret_fd
     :param ret_fds: Optional fds to return as ReturningQuerySet
     :param using: Database alias to make query to.
     :param update: If this flag is not set, existing records will not be updated
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :param prepare: If flag is set, update query is executed as server side prepared statement
+    :param skip_unchanged: If flag is set, records which would not change are not updated
+    :param report_inserted: If flag is set, BulkOperationResult with inserted counter is returned
+        or returned instances get INSERTED_COLUMN attribute
+    :param returning_stream: If flag is set, ReturningStream is returned instead of ReturningQuerySet.
+        Created records are appended to the stream of updated ones.
+    :param returning_format: If format is not 'queryset', ReturnedRows are returned instead of ReturningQuerySet.
+        Created records are appended to rows of updated ones.
     :return: A tuple (number of records created, number of records updated)
     """
     conn = connection if using is None else connections[using]
@@ -847,8 +2313,10 @@ def _bulk_update_or_create_no_validation(model, values, key_fds, upd_fds, ret_fd
     with transaction.atomic(using=using):
         # Find existing values
         key_items = list(values.keys())
+        # Records are locked in key order, so concurrent transactions don't deadlock
         qs = (model.objects
                    .filter(pdnf_clause([fd.name for fd in key_fds], key_items))
+                   .order_by(*[fd.name for fd in key_fds])
                    .using(using).select_for_update())
         existing_values_dict = {
             tuple([item[fd.name] for fd in key_fds]): item
@@ -866,7 +2334,7 @@ def _bulk_update_or_create_no_validation(model, values, key_fds, upd_fds, ret_fd
                 # Form a list of model objects for bulk_create() method
                 # Insert on conflict and bulk update should work in a same way.
                 # So key values will be prior over update on insert
-                kwargs = updates
+                kwargs = dict(updates)
                 kwargs.update(dict(zip([fd.name for fd in key_fds], key)))
 
                 for fd in upd_fds:
@@ -877,7 +2345,10 @@ def _bulk_update_or_create_no_validation(model, values, key_fds, upd_fds, ret_fd
 
         # Update existing records
         update_result = _bulk_update_no_validation(
-            model, update_items, conn, key_fds, upd_fds, ret_fds, ('', tuple()))
+            model, update_items, conn, key_fds, upd_fds, ret_fds, ('', tuple()), strategy=strategy,
+            prepare=prepare, skip_unchanged=skip_unchanged, returning_stream=returning_stream,
+            # Key fields are already returned by ret_fds, the same way as in single query upserts
+            returning_format='tuples' if returning_format == 'keyed' else returning_format)
 
         # Create absent records
         # auto_now and auto_now_add don't work in bulk_create,
@@ -885,9 +2356,32 @@ def _bulk_update_or_create_no_validation(model, values, key_fds, upd_fds, ret_fd
 
         created_items = model.objects.db_manager(using).bulk_create(create_items)
 
-        if ret_fds is None:
+        if ret_fds is None and report_inserted:
+            matched = getattr(update_result, 'matched', update_result) + len(existing_values_dict) - len(update_items)
+            return BulkOperationResult(len(created_items) + update_result, len(created_items) + matched,
+                                       len(created_items))
+        elif ret_fds is None:
             return len(created_items) + update_result
+        elif returning_stream:
+            # Updated records are saved on database side. Created ones are already in memory.
+            created_result = ReturningStream(model, conn, [create_items], update_result.fields)
+            if report_inserted:
+                update_result.annotate(**{INSERTED_COLUMN: False})
+                created_result.annotate(**{INSERTED_COLUMN: True})
+            return update_result + created_result
+        elif returning_format != 'queryset':
+            created_result = ReturnedRows.from_instances(create_items, update_result.columns)
+            if report_inserted:
+                update_result.annotate(**{INSERTED_COLUMN: False})
+                created_result.annotate(**{INSERTED_COLUMN: True})
+            return update_result + created_result
         else:
+            if report_inserted:
+                for item in update_result:
+                    setattr(item, INSERTED_COLUMN, False)
+                for item in create_items:
+                    setattr(item, INSERTED_COLUMN, True)
+
             # HACK There's no way to create ReturningQuerySet
             # from already prefetched items
             res = update_result
@@ -895,9 +2389,10 @@ def _bulk_update_or_create_no_validation(model, values, key_fds, upd_fds, ret_fd
             return res
 
 
+@_cached_query_part
 def _insert_on_conflict_query_part(model, conn, key_fds, upd_fds,
-                                   default_fds, update, constraint):
-    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Tuple[FieldDescriptor], bool) -> Tuple[str, List[Any]]
+                                   default_fds, update, constraint, skip_unchanged=False):
+    # type: (Type[Model], TDatabase, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Tuple[FieldDescriptor], bool, Optional[str], bool) -> Tuple[str, List[Any]]
     """
     Forms bulk update query part without values, counting that all keys and values are already in "vals" table
     :param model: Model to update, a subclass of django.db.models.Model
@@ -905,41 +2400,62 @@ def _insert_on_conflict_query_part(model, conn, key_fds, upd_fds,
     :param key_fds: FieldDescriptor objects to use as key fields
     :param upd_fds: FieldDescriptor objects to update
     :param update: If this flag is not set, existing records will not be updated
+    :param skip_unchanged: If flag is set, conflicting records which would not change are not updated
     :return: A tuple of sql and it's parameters
     """
     query = "%s ON CONFLICT %s %s"
 
+    # Keys of "vals" rows and conflicting rows are compared as text of a row of table column types
+    vals_key_items = []
+    excluded_key_items = []
+    for fd in key_fds:
+        field = fd.get_field(model)
+        vals_key_items.append('CAST("vals"."%s" AS %s)' % (fd.prefixed_name, get_field_db_type(field, conn)))
+        excluded_key_items.append('EXCLUDED."%s"' % field.column)
+
+    vals_key_sql = 'ROW(%s)::text' % ', '.join(vals_key_items)
+    excluded_key_sql = 'ROW(%s)::text' % ', '.join(excluded_key_items)
+
+    # Conflicting row values are taken from EXCLUDED table, which contains the row proposed for insertion.
+    # This way conflict is resolved in constant time.
+    # If set function inserts something different from input value, value is taken from a map of key to value,
+    # which is built from "vals" table once per statement. Looking it up doesn't scan "vals" for every row.
+    key_fields = {fd.get_field(model) for fd in key_fds}
+    value_refs = []
+    for fd in upd_fds:
+        field = fd.get_field(model)
+        if not fd.set_function.needs_value or (fd.set_function.inserts_value and field not in key_fields):
+            value_refs.append('EXCLUDED."%s"' % field.column)
+        else:
+            map_sql = '(SELECT jsonb_object_agg(%s, "vals"."%s"::text) FROM "vals")' % (vals_key_sql, fd.prefixed_name)
+            value_refs.append('CAST(%s ->> %s AS %s)'
+                              % (map_sql, excluded_key_sql, fd.set_function.get_value_db_type(field, conn)))
+
     # Form update data. It would be used in SET section,
     # if values updated and INSERT section if created
     set_items, set_params = [], []
-    set_columns = []
-    for fd in upd_fds:
-        set_columns.append('"%s"' % fd.get_field(model).column)
+    for fd, value_ref in zip(upd_fds, value_refs):
         func_sql, params = fd.set_function.get_sql_value(
-            fd.get_field(model), '"vals"."%s"' % fd.prefixed_name, conn,
-            val_as_param=False, with_table=True)
-        set_items.append(func_sql)
+            fd.get_field(model), value_ref, conn, val_as_param=False, with_table=True)
+        set_items.append('"%s" = %s' % (fd.get_field(model).column, func_sql))
         set_params.extend(params)
 
-    where_columns = []
-    where_items = []
-    for fd in key_fds:
-        where_columns.append('"%s"' % fd.prefixed_name)
-        where_items.append('EXCLUDED."%s"' % fd.get_field(model).column)
-
-    set_sql = ('(%s) = (SELECT %s FROM "vals" WHERE (%s) = (%s))'
-               % (', '.join(set_columns), ', '.join(set_items),
-                  ', '.join(where_columns), ', '.join(where_items)))
-
     if update and upd_fds:
-        conflict_action = 'DO UPDATE SET %s' % set_sql
+        conflict_action = 'DO UPDATE SET %s' % ', '.join(set_items)
         conflict_action_params = set_params
+
+        if skip_unchanged:
+            guard_sql, guard_params = _skip_unchanged_sql(
+                model, conn, upd_fds, conn.ops.quote_name(model._meta.db_table), value_refs=value_refs,
+                with_table=True)
+            if guard_sql:
+                conflict_action += ' WHERE %s' % guard_sql
+                conflict_action_params = conflict_action_params + guard_params
     else:
         conflict_action = 'DO NOTHING'
         conflict_action_params = []
 
     # Columns to insert to table
-    key_fields = {fd.get_field(model) for fd in key_fds}
     insert_fds = tuple(
         chain(key_fds, (fd for fd in upd_fds
                         if fd.get_field(model) not in key_fields)))
@@ -958,8 +2474,10 @@ def _insert_on_conflict_query_part(model, conn, key_fds, upd_fds,
 
 
 def _insert_on_conflict_no_validation(model, values, key_fds, upd_fds, ret_fds,
-                                      using, update, constraint):
-    # type: (Type[Model], TUpdateValues, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Optional[str], bool) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+                                      using, update, constraint, strategy='values', prepare=False,
+                                      skip_unchanged=False, report_inserted=False, returning_stream=False,
+                                      returning_format='queryset'):
+    # type: (Type[Model], TUpdateValues, Tuple[FieldDescriptor], Tuple[FieldDescriptor], Optional[Tuple[FieldDescriptor]], Optional[str], bool, Optional[str], str, bool, bool, bool, bool, str) -> Union[int, 'ReturningQuerySet']  # noqa: F821
     """
     Searches for records, given in values by key_fields. If records are found, updates them from values.
     If not found - creates them from values. Note, that all fields without default value must be present in values.
@@ -975,60 +2493,166 @@ def _insert_on_conflict_no_validation(model, values, key_fds, upd_fds, ret_fds,
     :param ret_fds: Optional fds to return as ReturningQuerySet
     :param using: Database alias to make query to.
     :param update: If this flag is not set, existing records will not be updated
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :param prepare: If flag is set, query is executed as server side prepared statement
+    :param skip_unchanged: If flag is set, conflicting records which would not change are not updated
+    :param report_inserted: If flag is set, inserted records are reported in the same statement
+    :param returning_stream: If flag is set, ReturningStream is returned instead of ReturningQuerySet
+    :param returning_format: If format is not 'queryset', ReturnedRows are returned instead of ReturningQuerySet
     :return: A tuple (number of records created, number of records updated)
     """
     conn = connection if using is None else connections[using]
 
     default_fds = _get_default_fds(model, tuple(chain(key_fds, upd_fds)))
-    val_sql, val_params = _with_values_query_part(
-        model, values, conn, key_fds, upd_fds, default_fds)
-    upd_sql, upd_params = _insert_on_conflict_query_part(
-        model, conn, key_fds, upd_fds, default_fds, update, constraint)
-    ret_sql, ret_params = _returning_query_part(model, ret_fds)
-
-    sql = "%s %s %s" % (val_sql, upd_sql, ret_sql)
-    params = val_params + upd_params + ret_params
+    with _strategy_transaction(conn, strategy):
+        val_sql, val_params = _with_values_query_part(
+            model, values, conn, key_fds, upd_fds, default_fds, strategy=strategy)
+        upd_sql, upd_params = _insert_on_conflict_query_part(
+            model, conn, key_fds, upd_fds, default_fds, update, constraint, skip_unchanged)
+
+        # Every input row either inserts a record or conflicts with existing one
+        return _execute_upsert_query(model, conn, val_sql, upd_sql, val_params + upd_params, ret_fds, len(values),
+                                     prepare=prepare, skip_unchanged=skip_unchanged,
+                                     report_inserted=report_inserted, returning_stream=returning_stream,
+                                     returning_format=returning_format)
+
+
+@_cached_query_part
+def _merge_query_part(model,  # type: Type[Model]
+                      conn,  # type: TDatabase
+                      key_fds,  # type: Tuple[FieldDescriptor]
+                      upd_fds,  # type: Tuple[FieldDescriptor]
+                      default_fds,  # type: Tuple[FieldDescriptor]
+                      update,  # type: bool
+                      skip_unchanged=False,  # type: bool
+                      ):
+    # type: (...) -> Tuple[str, List[Any]]
+    """
+    Forms MERGE query part without values, counting that all keys and values are already in "vals" table
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param conn: Database connection used
+    :param key_fds: FieldDescriptor objects to use as key fields
+    :param upd_fds: FieldDescriptor objects to update
+    :param default_fds: FieldDescriptor objects to take as default values
+    :param update: If this flag is not set, existing records will not be updated
+    :param skip_unchanged: If flag is set, matched records which would not change are not updated
+    :return: A tuple of sql and it's parameters
+    """
+    query = """
+        MERGE INTO %s AS t
+        USING %s
+        ON %s
+        %s
+        WHEN NOT MATCHED THEN INSERT (%s) VALUES (%s)
+    """
 
-    return _execute_update_query(model, conn, sql, params, ret_fds)
+    # MERGE can use a single source table only. default_vals table contains a single row.
+    if default_fds:
+        using_sql = '(SELECT * FROM "vals" CROSS JOIN "default_vals") AS "vals"'
+    else:
+        using_sql = '"vals"'
 
+    on_sql, on_params = _key_where_sql(model, key_fds, ('', tuple()))
 
-def bulk_update_or_create(model, values, key_fields='id', using=None,
-                          set_functions=None, update=True,
-                          key_is_unique=True, returning=None,
-                          batch_size=None, batch_delay=0,
-                          constraint=None):
-    # type: (Type[Model], TUpdateValues, TFieldNames, Optional[str], TSetFunctions, bool, bool, Optional[TFieldNames], Optional[int], float) -> Union[int, 'ReturningQuerySet']  # noqa: F821
+    matched_sql, matched_params = '', []
+    if update and upd_fds:
+        set_items = []
+        for fd in upd_fds:
+            func_sql, params = fd.set_function.get_sql(
+                fd.get_field(model), '"vals"."%s"' % fd.prefixed_name, conn, val_as_param=False)
+            set_items.append(func_sql)
+            matched_params.extend(params)
+
+        guard_sql, guard_params = _skip_unchanged_sql(model, conn, upd_fds, '"t"') if skip_unchanged else ('', [])
+        matched_sql = 'WHEN MATCHED %sTHEN UPDATE SET %s' % ('AND %s ' % guard_sql if guard_sql else '',
+                                                             ', '.join(set_items))
+        matched_params = guard_params + matched_params
+
+    # Key values are prior over update values on insert, as in INSERT ... ON CONFLICT
+    key_fields = {fd.get_field(model) for fd in key_fds}
+    insert_fds = tuple(chain(key_fds, (fd for fd in upd_fds if fd.get_field(model) not in key_fields)))
+    columns, val_columns, insert_params = _insert_columns_sql(model, conn, insert_fds, default_fds,
+                                                              defaults_table='vals')
+
+    sql = query % (conn.ops.quote_name(model._meta.db_table), using_sql, on_sql, matched_sql, columns, val_columns)
+    return sql, on_params + matched_params + insert_params
+
+
+def _merge_no_validation(model,  # type: Type[Model]
+                         values,  # type: TUpdateValues
+                         key_fds,  # type: Tuple[FieldDescriptor]
+                         upd_fds,  # type: Tuple[FieldDescriptor]
+                         ret_fds,  # type: Optional[Tuple[FieldDescriptor]]
+                         using,  # type: Optional[str]
+                         update,  # type: bool
+                         constraint,  # type: Optional[str]
+                         strategy='values',  # type: str
+                         prepare=False,  # type: bool
+                         skip_unchanged=False,  # type: bool
+                         report_inserted=False,  # type: bool
+                         returning_stream=False,  # type: bool
+                         returning_format='queryset',  # type: str
+                         ):
+    # type: (...) -> Union[int, 'ReturningQuerySet']  # noqa: F821
     """
-    Searches for records, given in values by key_fields. If records are found, updates them from values.
-    If not found - creates them from values. Note, that all fields without default value must be present in values.
+    Searches for records, given in values by key_fields, with MERGE statement (PostgreSQL 15+).
+    If records are found, updates them from values. If not found - creates them from values.
+    Unlike INSERT ... ON CONFLICT, key fields are not required to have unique index.
 
     :param model: Model to update, a subclass of django.db.models.Model
     :param values: Data to update. All items must update same fields!!!
-        It can come in 2 forms:
-        + Iterable of dicts. Each dict is update or create data. Each dict must contain all key_fields as keys.
-            You can't update key_fields with this format.
-        + Dict of key_values: update_fields_dict
-            - key_values can be iterable or single object.
-            - If iterable, key_values length must be equal to key_fields length.
-            - If single object, key_fields is expected to have 1 element
-    :param key_fields: Field names, by which items would be selected.
-        It can be a string, if there's only one key field or iterable of strings for multiple keys
+        Dict of key_values: update_fields_dict
+    :param key_fds: FieldDescriptor objects to use as key fields
+    :param upd_fds: FieldDescriptor objects to update
+    :param ret_fds: Optional fds to return as ReturningQuerySet. MERGE supports RETURNING in PostgreSQL 17+
     :param using: Database alias to make query to.
-    :param set_functions: Functions to set values.
-        Should be a dict of field name as key, function as value.
-        Default function is eq.
-        Functions: [eq, =; incr, +; concat, ||]
-        Example: {'name': 'eq', 'int_fields': 'incr'}
     :param update: If this flag is not set, existing records will not be updated
-    :param key_is_unique: Settings this flag to False forces library to use 3-query transactional update,
-            not INSERT ... ON CONFLICT.
-    :param returning: Optional. If given, returns updated values of fields, listed in parameter.
-    :param batch_size: Optional. If given, data is split it into batches of given size.
-        Each batch is queried independently.
-    :param batch_delay: Delay in seconds between batches execution, if batch_size is not None.
-    :param constraint: Hardcoded 'WHERE' clause of partial index
+    :param constraint: Not used. MERGE doesn't need unique index
+    :param strategy: A way values are passed to database. See STRATEGIES
+    :param prepare: If flag is set, query is executed as server side prepared statement
+    :param skip_unchanged: If flag is set, matched records which would not change are not updated
+    :param report_inserted: If flag is set, inserted records are reported in the same statement.
+        It requires PostgreSQL 17+, where MERGE supports RETURNING and merge_action() function.
+    :param returning_stream: If flag is set, ReturningStream is returned instead of ReturningQuerySet
+    :param returning_format: If format is not 'queryset', ReturnedRows are returned instead of ReturningQuerySet
     :return: Number of records created or updated
     """
+    conn = connection if using is None else connections[using]
+
+    default_fds = _get_default_fds(model, tuple(chain(key_fds, upd_fds)))
+    with _strategy_transaction(conn, strategy):
+        val_sql, val_params = _with_values_query_part(
+            model, values, conn, key_fds, upd_fds, default_fds, strategy=strategy)
+        merge_sql, merge_params = _merge_query_part(
+            model, conn, key_fds, upd_fds, default_fds, update, skip_unchanged)
+
+        result = _execute_upsert_query(model, conn, val_sql, merge_sql, val_params + merge_params, ret_fds,
+                                       len(values), prepare=prepare, report_inserted=report_inserted,
+                                       inserted_sql="merge_action() = 'INSERT'", returning_stream=returning_stream,
+                                       returning_format=returning_format)
+
+    # MERGE doesn't report matched records, which have not been updated.
+    # Every input row either inserts a record or matches existing one(s).
+    def _fix_matched(value):
+        if isinstance(value, BulkOperationResult):
+            value.matched = max(value, value.matched)
+        elif skip_unchanged and ret_fds is None:
+            return BulkOperationResult(value, max(value, len(values)))
+        return value
+
+    return map_result(result, _fix_matched)
+
+
+def _bulk_update_or_create_operation(model, values, key_fields, using, set_functions, update, key_is_unique,
+                                     returning, batch_size, batch_delay, constraint, strategy, prepare,
+                                     skip_unchanged, order_keys, report_inserted, returning_stream, returning_format,
+                                     parallel, pipeline, transaction, retries, columns):
+    # type: (Type[Model], TUpdateValues, TFieldNames, Optional[str], TSetFunctions, bool, bool, Optional[TFieldNames], Optional[int], float, Optional[str], str, bool, bool, Optional[bool], bool, bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> _BatchedOperation
+    """
+    Validates bulk_update_or_create parameters and prepares the operation.
+    See bulk_update_or_create for parameters description.
+    :return: _BatchedOperation instance
+    """
     # Validate data
     if not inspect.isclass(model):
         raise TypeError("model must be django.db.models.Model subclass")
@@ -1043,6 +2667,14 @@ def bulk_update_or_create(model, values, key_fields='id', using=None,
         raise TypeError("update parameter must be boolean")
     if type(key_is_unique) is not bool:
         raise TypeError("key_is_unique must be boolean")
+    if type(skip_unchanged) is not bool:
+        raise TypeError("skip_unchanged parameter must be boolean")
+    if order_keys is not None and type(order_keys) is not bool:
+        raise TypeError("order_keys parameter must be boolean or None")
+    if type(report_inserted) is not bool:
+        raise TypeError("report_inserted parameter must be boolean")
+    strategy = _validate_strategy(strategy)
+    prepare = _validate_prepare(prepare, strategy)
 
     key_fds = _validate_field_names(key_fields)
 
@@ -1050,25 +2682,155 @@ def bulk_update_or_create(model, values, key_fields='id', using=None,
     for i, f in enumerate(key_fds):
         f.set_prefix('key', index=i)
 
-    upd_fds, values = _validate_update_values(model, key_fds, values)
-    ret_fds = _validate_returning(model, returning)
+    values_iter = None
+    if _is_lazy_input(values, batch_size, parallel):
+        # Only the first batch is read here, next ones are read and validated, when they are executed
+        values_iter, values = values, _read_first_batch(values, batch_size)
 
+    duplicates = {}
+    upd_fds, values = _validate_update_values(model, key_fds, values, duplicates=duplicates, columns=columns)
+    ret_fds = _validate_returning(model, returning)
+    returning_stream = _validate_returning_stream(ret_fds, returning_stream)
+    parallel = _validate_parallel(parallel, returning_stream)
+    returning_format = _validate_returning_format(ret_fds, returning_format, returning_stream)
+    pipeline = _validate_pipeline(pipeline, batch_size, strategy, ret_fds, returning_stream, returning_format,
+                                  using)
+    transaction = validate_transaction_mode(transaction, parallel=parallel, pipeline=pipeline)
+    retries = validate_retries(retries, pipeline=pipeline)
+    query_ret_fds = _get_query_returning_fds(model, ret_fds, returning_format, key_fds)
+    ret_fields = _get_returning_fields(model, ret_fds, report_inserted)
+    ret_key_fields = [fd.get_field(model).attname for fd in key_fds]
+    if report_inserted and ret_fds is not None \
+            and INSERTED_COLUMN in {f.attname for f in get_model_fields(model, concrete=True)}:
+        raise ValueError("report_inserted can't be used with returning for model with '%s' field" % INSERTED_COLUMN)
+
+    concat_args = (ret_fds, skip_unchanged, report_inserted, returning_stream, returning_format, ret_fields,
+                   ret_key_fields)
     if len(values) == 0:
-        return _concat_batched_result([], ret_fds)
+        return _BatchedOperation(None, values, batch_kwargs=dict(retries=retries), concat_args=concat_args)
 
     upd_fds = _validate_set_functions(model, upd_fds, set_functions)
+    # Existing records are not updated, so the first row of a new key is inserted and the next ones are ignored
+    values = _coalesce_duplicates(model, upd_fds, values, duplicates, keep_first=not update)
+    if order_keys is not False:
+        values = _order_by_keys(values)
+    if values_iter is not None:
+        upd_field_names = tuple(next(iter(values.values())).keys())
+        values = LazyBatches(values, values_iter, partial(_validate_values_batch, model, key_fds, upd_fds,
+                                                          upd_field_names, order_keys is not False, columns,
+                                                          keep_first=not update))
 
     # Insert on conflict is supported in PostgreSQL 9.5 and only with constraint
-    if get_postgres_version(using=using) >= (9, 5) and key_is_unique:
+    # MERGE doesn't require constraint, but it is supported in PostgreSQL 15+ (with RETURNING in 17+)
+    pg_version = get_postgres_version(using=using)
+    if pg_version >= (9, 5) and key_is_unique:
         batch_func = _insert_on_conflict_no_validation
+    elif pg_version >= (15, 0) and ((ret_fds is None and not report_inserted) or pg_version >= (17, 0)):
+        batch_func = _merge_no_validation
     else:
+        if pg_version >= (15, 0):
+            # MERGE ... RETURNING is supported in PostgreSQL 17+ only
+            logger.warning("MERGE can't return records before PostgreSQL 17: bulk_update_or_create with returning "
+                           "or report_inserted falls back to 3-query transactional update")
         batch_func = _bulk_update_or_create_no_validation
 
-    batched_result = batched_operation(batch_func, values,
-                                       args=(model, None, key_fds, upd_fds,
-                                             ret_fds, using, update, constraint),
-                                       data_arg_index=1,
-                                       batch_size=batch_size,
-                                       batch_delay=batch_delay)
+    if pipeline is not None and batch_func is _bulk_update_or_create_no_validation:
+        # Next queries of 3-query upsert depend on results of previous ones
+        raise ValueError("pipeline parameter requires INSERT ... ON CONFLICT or MERGE upsert: "
+                         "set key_is_unique or use PostgreSQL 15+")
+
+    # 3-query upsert splits values to records to create and update
+    values = _get_batched_values(key_fds, values, batch_size, parallel,
+                                 by_rows=batch_func is _bulk_update_or_create_no_validation)
+
+    return _BatchedOperation(batch_func, values,
+                             args=(model, None, key_fds, upd_fds,
+                                   query_ret_fds, using, update, constraint, strategy, prepare,
+                                   skip_unchanged, report_inserted, returning_stream, returning_format),
+                             batch_kwargs=dict(batch_size=batch_size, batch_delay=batch_delay, using=using,
+                                               row_params=_get_row_params(strategy, key_fds, upd_fds),
+                                               parallel=parallel, pipeline=pipeline,
+                                               transaction=transaction, retries=retries),
+                             concat_args=concat_args,
+                             queueable=batch_func is not _bulk_update_or_create_no_validation
+                             and _is_queueable(strategy, prepare, ret_fds, returning_stream, returning_format))
+
 
-    return _concat_batched_result(batched_result, ret_fds)
+def bulk_update_or_create(model, values, key_fields='id', using=None,
+                          set_functions=None, update=True,
+                          key_is_unique=True, returning=None,
+                          batch_size=None, batch_delay=0,
+                          constraint=None, strategy='values', prepare=False, skip_unchanged=False,
+                          order_keys=None, report_inserted=False, returning_stream=False,
+                          returning_format='queryset', parallel=None, pipeline=None, transaction=None, retries=0,
+                          columns=None):
+    # type: (Type[Model], TUpdateValues, TFieldNames, Optional[str], TSetFunctions, bool, bool, Optional[TFieldNames], Optional[int], float, Optional[str], str, bool, bool, Optional[bool], bool, bool, str, Optional[int], Optional[int], Union[None, str, int], int, Optional[Iterable[str]]) -> Union[int, 'ReturningQuerySet', ReturningStream, list, dict]  # noqa: F821
+    """
+    Searches for records, given in values by key_fields. If records are found, updates them from values.
+    If not found - creates them from values. Note, that all fields without default value must be present in values.
+
+    :param model: Model to update, a subclass of django.db.models.Model
+    :param values: Data to update. All items must update same fields!!!
+        It can come in 2 forms:
+        + Iterable of dicts. Each dict is update or create data. Each dict must contain all key_fields as keys.
+            You can't update key_fields with this format.
+        + Dict of key_values: update_fields_dict
+            - key_values can be iterable or single object.
+            - If iterable, key_values length must be equal to key_fields length.
+            - If single object, key_fields is expected to have 1 element
+        It can also be iterable of tuples or lists, if columns parameter is given, or columnar data.
+            See bulk_update for details.
+    :param key_fields: Field names, by which items would be selected.
+        It can be a string, if there's only one key field or iterable of strings for multiple keys
+    :param using: Database alias to make query to.
+    :param set_functions: Functions to set values.
+        Should be a dict of field name as key, function as value.
+        Default function is eq.
+        Functions: [eq, =; incr, +; concat, ||]
+        Example: {'name': 'eq', 'int_fields': 'incr'}
+    :param update: If this flag is not set, existing records will not be updated
+    :param key_is_unique: Settings this flag to False forces library to use MERGE (PostgreSQL 15+)
+            or 3-query transactional update, not INSERT ... ON CONFLICT.
+            MERGE with returning or report_inserted requires PostgreSQL 17+: 3-query update is used before it.
+    :param returning: Optional. If given, returns updated values of fields, listed in parameter.
+    :param batch_size: Optional. If given, data is split it into batches of given size.
+        Each batch is queried independently. If 'auto', size of every batch is computed by query parameters limit,
+        estimated values size and execution time of previous batches.
+    :param batch_delay: Delay in seconds between batches execution, if batch_size is not None.
+    :param constraint: Hardcoded 'WHERE' clause of partial index
+    :param strategy: A way values are passed to database:
+        'values' (default) - VALUES list with a placeholder for every value,
+        'unnest' - a typed array parameter for every column. Query text doesn't depend on number of rows.
+        'copy' - rows are copied to temporary staging table with COPY ... FROM STDIN. Fastest on big data sets.
+    :param prepare: If flag is set, query is executed as server side prepared statement, cached per connection.
+        It is ignored for databases with DISABLE_PREPARED_STATEMENTS setting (transaction pooling).
+        It requires 'unnest' or 'copy' strategy: 'values' strategy query text changes with number of rows.
+    :param skip_unchanged: If flag is set, existing records are updated only if values, computed by set functions,
+        differ from current ones (IS DISTINCT FROM). Unchanged records produce no dead tuples, WAL and index writes.
+        Function returns BulkOperationResult: number of records inserted or changed with matched
+        (inserted or found) and skipped counters.
+        If returning is given, only changed records are returned.
+    :param order_keys: If flag is set, values are sorted by keys before splitting into batches,
+        so concurrent upserts lock records in the same order and don't deadlock. Defaults to True.
+    :param report_inserted: If flag is set, upsert statement reports, which records have been inserted.
+        Function returns BulkOperationResult with inserted and updated counters.
+        If returning is given, every returned instance gets boolean INSERTED_COLUMN ('inserted') attribute.
+    :param returning_stream: If flag is set, returned records are saved to temporary table on database side
+        and ReturningStream is returned instead of ReturningQuerySet. It reads records with server side cursor
+        in chunks, so memory usage doesn't depend on number of records returned. Stream can be iterated once.
+    :param returning_format: Format of returned records, one of RETURNING_FORMATS. See bulk_update for details.
+        If report_inserted is set, INSERTED_COLUMN is returned as the last field.
+    :param parallel: Optional. Number of parallel workers, see bulk_update for details.
+    :param pipeline: Optional. Number of batches, sent to database together, see bulk_update for details.
+        3-query upsert (key_is_unique=False before PostgreSQL 15) can't be pipelined.
+    :param transaction: Optional. Transaction control of batches, see bulk_update for details.
+    :param retries: Maximum number of retries of a batch after transient errors, see bulk_update for details.
+    :param columns: Optional. Field names of positional rows, given in values instead of dicts.
+        Must contain all key_fields. See bulk_update for details.
+    :return: Number of records created or updated
+    """
+    return _bulk_update_or_create_operation(model, values, key_fields, using, set_functions, update, key_is_unique,
+                                            returning, batch_size, batch_delay, constraint, strategy, prepare,
+                                            skip_unchanged, order_keys, report_inserted, returning_stream,
+                                            returning_format, parallel, pipeline, transaction, retries,
+                                            columns).execute()
@@ -0,0 +1,226 @@
+"""
+This file contains classes, describing results of bulk operations
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from django.db.models import Model
+
+from .types import TDatabase
+from .utils import get_db_converters
+
+__all__ = ['BulkOperationResult', 'RETURNING_FORMATS']
+
+# Formats of records, returned by bulk operations:
+# + 'queryset' - django_pg_returning.ReturningQuerySet of model instances (requires django-pg-returning)
+# + 'tuples' - a list of tuples in returning fields order
+# + 'dicts' - a list of dicts with field attname as key
+# + 'keyed' - a dict of input key tuple: dict of returned values
+# + 'columns' - a dict of field attname: list of values
+# + 'numpy' - a dict of field attname: numpy array (requires numpy)
+# + 'array_agg' - same as 'columns', but every column is aggregated into array on database side,
+#   so a single row is transferred
+RETURNING_FORMATS = ('queryset', 'tuples', 'dicts', 'keyed', 'columns', 'numpy', 'array_agg')
+
+
+class BulkOperationResult(int):
+    """
+    Result of bulk operation, which skips writes of unchanged records or reports inserted records.
+    It is an integer number of records changed, so it can be used everywhere records count is expected.
+    Additionally it contains number of records, matched by operation, and number of records inserted, if it is known.
+    If operation retries batches after transient errors, it contains number of retries.
+    """
+    def __new__(cls, changed, matched=None, inserted=None, retries=0):
+        # type: (int, Optional[int], Optional[int], int) -> BulkOperationResult
+        obj = super(BulkOperationResult, cls).__new__(cls, changed)
+        obj.matched = int(changed if matched is None else matched)
+        obj.inserted = None if inserted is None else int(inserted)
+        obj.retries = retries
+        return obj
+
+    @property
+    def changed(self):  # type: () -> int
+        """
+        Number of records, written to database
+        """
+        return int(self)
+
+    @property
+    def skipped(self):  # type: () -> int
+        """
+        Number of records, matched by operation but not written, as their values have not changed
+        """
+        return self.matched - self.changed
+
+    @property
+    def updated(self):  # type: () -> Optional[int]
+        """
+        Number of existing records, written to database. None, if number of inserted records is unknown
+        """
+        return None if self.inserted is None else self.changed - self.inserted
+
+    def __add__(self, other):  # type: (int) -> BulkOperationResult
+        if not isinstance(other, int):
+            return NotImplemented
+
+        other_inserted = getattr(other, 'inserted', None)
+        inserted = None if self.inserted is None or other_inserted is None else self.inserted + other_inserted
+        return BulkOperationResult(int(self) + int(other), self.matched + getattr(other, 'matched', int(other)),
+                                   inserted, self.retries + getattr(other, 'retries', 0))
+
+    __radd__ = __add__
+
+    def __repr__(self):
+        counters = 'changed=%d, matched=%d' % (self.changed, self.matched)
+        if self.inserted is not None:
+            counters += ', inserted=%d' % self.inserted
+        if self.retries:
+            counters += ', retries=%d' % self.retries
+
+        return '%s(%s)' % (self.__class__.__name__, counters)
+
+
+class ReturnedRows(object):
+    """
+    Records, returned by a batch of bulk operation with returning_format other than 'queryset'.
+    Values are kept as database returned them: a list of row tuples or a list of column arrays ('array_agg' format).
+    Batches are concatenated and formatted once, so no model instances are created.
+    """
+    def __init__(self, columns, rows=None, arrays=None):
+        # type: (Iterable[str], Optional[List[Tuple[Any, ...]]], Optional[List[List[Any]]]) -> None
+        """
+        :param columns: Names of returned columns: field attnames or column names for extra columns
+        :param rows: A list of value tuples in columns order
+        :param arrays: A list of value lists for every column. Used, if rows are not given.
+        """
+        self.columns = list(columns)
+        self._rows = rows if rows is not None or arrays is not None else []
+        self._arrays = arrays
+
+    @classmethod
+    def from_cursor(cls, model, conn, cursor, arrays=False):
+        # type: (Type[Model], TDatabase, Any, bool) -> ReturnedRows
+        """
+        Fetches executed query result, applying model fields database converters
+        :param model: Model, query returns records of
+        :param conn: Database connection used
+        :param cursor: Cursor with executed query
+        :param arrays: If flag is set, query returns a single row with array of values for every column
+        :return: ReturnedRows instance
+        """
+        columns = [col[0] for col in cursor.description]
+        converters = get_db_converters(model, conn, columns)
+        names = [attname or column for (attname, _, _), column in zip(converters, columns)]
+        converters = [(i, field_converters, col) for i, (_, field_converters, col) in enumerate(converters)
+                      if field_converters]
+
+        def _convert(val, field_converters, col):  # type: (Any, List[Callable], Any) -> Any
+            for converter in field_converters:
+                val = converter(val, col, conn)
+            return val
+
+        if arrays:
+            # array_agg returns NULL, if there are no rows
+            data = [list(arr or []) for arr in cursor.fetchone()]
+            for i, field_converters, col in converters:
+                data[i] = [_convert(val, field_converters, col) for val in data[i]]
+            return cls(names, arrays=data)
+
+        rows = cursor.fetchall()
+        if converters:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i, field_converters, col in converters:
+                    row[i] = _convert(row[i], field_converters, col)
+            rows = [tuple(row) for row in rows]
+        return cls(names, rows=rows)
+
+    @classmethod
+    def from_instances(cls, instances, columns):  # type: (Iterable[Model], Iterable[str]) -> ReturnedRows
+        """
+        Forms rows from model instances, already fetched
+        :param instances: Model instances
+        :param columns: Attribute names to get
+        :return: ReturnedRows instance
+        """
+        columns = list(columns)
+        return cls(columns, rows=[tuple(getattr(instance, name) for name in columns) for instance in instances])
+
+    @classmethod
+    def concat(cls, parts):  # type: (List[ReturnedRows]) -> ReturnedRows
+        """
+        Concatenates batches results in linear time
+        :param parts: A non empty list of ReturnedRows with the same columns
+        :return: ReturnedRows instance
+        """
+        if all(part._arrays is None for part in parts):
+            return cls(parts[0].columns, rows=[row for part in parts for row in part._rows])
+
+        arrays = [[] for _ in parts[0].columns]
+        for part in parts:
+            for arr, part_arr in zip(arrays, part._get_arrays()):
+                arr.extend(part_arr)
+        return cls(parts[0].columns, arrays=arrays)
+
+    def _get_rows(self):  # type: () -> List[Tuple[Any, ...]]
+        return self._rows if self._arrays is None else list(zip(*self._arrays))
+
+    def _get_arrays(self):  # type: () -> List[List[Any]]
+        if self._arrays is not None:
+            return self._arrays
+        elif self._rows:
+            return [list(arr) for arr in zip(*self._rows)]
+        else:
+            return [[] for _ in self.columns]
+
+    def __len__(self):  # type: () -> int
+        return len(self._rows) if self._arrays is None else len(self._arrays[0]) if self._arrays else 0
+
+    def __add__(self, other):  # type: (ReturnedRows) -> ReturnedRows
+        if not isinstance(other, ReturnedRows):
+            return NotImplemented
+
+        return ReturnedRows.concat([self, other])
+
+    def annotate(self, **values):  # type: (**Any) -> None
+        """
+        Adds columns with constant values to all rows
+        :param values: Column names and values
+        :return: None
+        """
+        for name, val in values.items():
+            if self._arrays is None:
+                self._rows = [row + (val,) for row in self._rows]
+            else:
+                self._arrays.append([val] * len(self))
+            self.columns.append(name)
+
+    def format(self, returning_format, fields, key_fields=()):
+        # type: (str, Iterable[str], Iterable[str]) -> Union[List[Tuple[Any, ...]], List[Dict[str, Any]], Dict[Any, Any]]
+        """
+        Formats returned records
+        :param returning_format: One of RETURNING_FORMATS except for 'queryset'
+        :param fields: Names of columns to return, in required order
+        :param key_fields: Names of key columns. Required for 'keyed' format only.
+        :return: Formatted records
+        """
+        fields = list(fields)
+        indexes = [self.columns.index(name) for name in fields]
+
+        if returning_format in {'columns', 'array_agg', 'numpy'}:
+            arrays = self._get_arrays()
+            if returning_format == 'numpy':
+                import numpy
+                return {name: numpy.array(arrays[i]) for name, i in zip(fields, indexes)}
+            return {name: arrays[i] for name, i in zip(fields, indexes)}
+
+        rows = self._get_rows()
+        if returning_format == 'keyed':
+            key_indexes = [self.columns.index(name) for name in key_fields]
+            return {tuple(row[i] for i in key_indexes): {name: row[i] for name, i in zip(fields, indexes)}
+                    for row in rows}
+        elif returning_format == 'dicts':
+            return [{name: row[i] for name, i in zip(fields, indexes)} for row in rows]
+        elif indexes == list(range(len(self.columns))):
+            return list(rows)
+        else:
+            return [tuple(row[i] for i in indexes) for row in rows]
@@ -2,6 +2,7 @@
 This file contains classes, describing functions which set values to fields.
 """
 import datetime
+from decimal import Decimal
 from typing import Type, Optional, Any, Tuple, Dict
 
 import django
@@ -12,9 +13,10 @@ from django.db.models.sql import UpdateQuery, InsertQuery, Query
 from django.db.models.sql.compiler import SQLCompiler
 
 from .compatibility import get_postgres_version, jsonb_available, Postgres94MergeJSONBMigration, hstore_serialize, \
-    hstore_available, import_pg_field_or_dummy, tz_utc, django_expressions_available
+    hstore_available, import_pg_field_or_dummy, tz_utc, django_expressions_available, get_field_db_type, \
+    array_available
 from .types import TDatabase, AbstractFieldFormatter
-from .utils import get_subclasses, format_field_value
+from .utils import get_subclasses, format_field_value, get_field_value_formatter
 
 # When doing increment operations, we need to replace NULL values with something
 # This dictionary contains field defaults by it's class name.
@@ -68,6 +70,69 @@ NULL_DEFAULTS = {
     'DateRangeField': (base_datetime.date(), base_datetime.date())
 }
 
+# PostgreSQL converts discrete ranges to [) bounds form, adding this step to exclusive lower or inclusive upper bound
+DISCRETE_RANGE_STEPS = {
+    'IntegerRangeField': 1,
+    'BigIntegerRangeField': 1,
+    'DateRangeField': datetime.timedelta(days=1)
+}
+
+
+def _canonical_range(value, step):  # type: (Any, Any) -> Tuple[Any, bool, Any, bool]
+    """
+    Gets bounds of a range, converting discrete range to [) form, as PostgreSQL does
+    :param value: Range instance
+    :param step: Step of discrete range or None
+    :return: A tuple (lower, lower_inc, upper, upper_inc). Infinite bound is None.
+    """
+    lower, lower_inc, upper, upper_inc = value.lower, value.lower_inc, value.upper, value.upper_inc
+    if step is not None and lower is not None and not lower_inc:
+        lower, lower_inc = lower + step, True
+    if step is not None and upper is not None and upper_inc:
+        upper, upper_inc = upper + step, False
+    return lower, lower_inc, upper, upper_inc
+
+
+def _union_ranges(field, first, second):  # type: (Field, Any, Any) -> Any
+    """
+    Unions two ranges as PostgreSQL range + operator does
+    :param field: Range field values are set to
+    :param first: Range instance
+    :param second: Range instance
+    :return: Range instance or None, if result of union would not be contiguous
+    """
+    if first.isempty:
+        return second
+    if second.isempty:
+        return first
+
+    range_class = type(first)
+    step = DISCRETE_RANGE_STEPS.get(field.__class__.__name__)
+    first, second = _canonical_range(first, step), _canonical_range(second, step)
+
+    # Range with smaller lower bound goes first
+    if second[0] is None or (first[0] is not None and second[0] < first[0]):
+        first, second = second, first
+    lower, lower_inc, first_upper, first_upper_inc = first
+    second_lower, second_lower_inc, second_upper, second_upper_inc = second
+    if lower is not None and lower == second_lower:
+        lower_inc = lower_inc or second_lower_inc
+
+    # Ranges must overlap or be adjacent
+    if first_upper is not None and second_lower is not None and (first_upper < second_lower or (
+            first_upper == second_lower and not first_upper_inc and not second_lower_inc)):
+        return None
+
+    if first_upper is None or second_upper is None:
+        upper, upper_inc = None, False
+    elif first_upper == second_upper:
+        upper, upper_inc = first_upper, first_upper_inc or second_upper_inc
+    else:
+        upper, upper_inc = max((first_upper, first_upper_inc), (second_upper, second_upper_inc), key=lambda b: b[0])
+
+    bounds = ('[' if lower_inc and lower is not None else '(') + (']' if upper_inc and upper is not None else ')')
+    return range_class(lower, upper, bounds)
+
 
 class AbstractSetFunction(AbstractFieldFormatter):
     names = set()
@@ -79,6 +144,11 @@ class AbstractSetFunction(AbstractFieldFormatter):
     # If set functions doesn't need value from input, set this to False.
     needs_value = True
 
+    # If function inserts input value as is (get_sql_value() with for_update=False), set this to True.
+    # INSERT ... ON CONFLICT DO UPDATE takes such values from EXCLUDED table
+    # instead of searching them in input values for every conflicting record.
+    inserts_value = False
+
     def modify_create_params(self, model, key, kwargs, connection):
         # type: (Type[Model], str, Dict[str, Any], TDatabase) -> Dict[str, Any]
         """
@@ -98,6 +168,20 @@ class AbstractSetFunction(AbstractFieldFormatter):
 
         return kwargs
 
+    def merge_values(self, field, first, second):
+        # type: (Field, Any, Any) -> Any
+        """
+        Merges two values, given for the same key, into one value.
+        Setting result value should have the same effect as setting first and second values one by one.
+        By default, last value is taken.
+        :param field: Django field values are set to
+        :param first: Value given first
+        :param second: Value given second
+        :return: Merged value
+        :raises ValueError: If values can't be merged
+        """
+        return second
+
     def get_sql_value(self, field, val, connection, val_as_param=True, with_table=False, for_update=True, **kwargs):
         # type: (Field, Any, TDatabase, bool, bool, bool, **Any) -> Tuple[str, Tuple[Any]]
         """
@@ -346,6 +430,7 @@ class DjangoSetFunction(AbstractSetFunction):
 
 class EqualSetFunction(AbstractSetFunction):
     names = {'eq', '='}
+    inserts_value = True
 
     def get_sql_value(self, field, val, connection, val_as_param=True, with_table=False, for_update=True, **kwargs):
         if val_as_param:
@@ -365,6 +450,9 @@ class EqualNotNullSetFunction(AbstractSetFunction):
 
         return kwargs
 
+    def merge_values(self, field, first, second):
+        return first if second is None else second
+
     def get_sql_value(self, field, val, connection, val_as_param=True, with_table=False, for_update=True, **kwargs):
         tpl = 'COALESCE(%s, %s)'
         if for_update:
@@ -380,12 +468,32 @@ class EqualNotNullSetFunction(AbstractSetFunction):
 
 class PlusSetFunction(AbstractSetFunction):
     names = {'+', 'incr'}
+    inserts_value = True
 
     supported_field_classes = {'IntegerField', 'FloatField', 'AutoField', 'BigAutoField', 'BigIntegerField',
                                'SmallIntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField', 'DecimalField',
                                'IntegerRangeField', 'BigIntegerRangeField', 'FloatRangeField', 'DateTimeRangeField',
                                'DateRangeField'}
 
+    def merge_values(self, field, first, second):
+        # NULL value sets NULL, but NULL column is replaced with null_default before adding next value
+        if first is None or second is None:
+            return second
+
+        if isinstance(first, (int, float, Decimal)) and isinstance(second, (int, float, Decimal)):
+            return first + second
+
+        if hasattr(field, 'range_type'):
+            # Range fields convert lists and tuples to ranges
+            first_range, second_range = field.get_prep_value(first), field.get_prep_value(second)
+            if hasattr(first_range, 'isempty') and hasattr(second_range, 'isempty'):
+                result = _union_ranges(field, first_range, second_range)
+                if result is not None:
+                    return result
+
+        # Values can't be added in python (expressions, ranges which are not contiguous). Last one is taken.
+        return second
+
     def get_sql_value(self, field, val, connection, val_as_param=True, with_table=False, for_update=True, **kwargs):
         null_default, null_default_params = self._parse_null_default(field, connection, **kwargs)
 
@@ -404,11 +512,31 @@ class PlusSetFunction(AbstractSetFunction):
 
 class ConcatSetFunction(AbstractSetFunction):
     names = {'||', 'concat'}
+    inserts_value = True
 
     supported_field_classes = {'CharField', 'TextField', 'EmailField', 'FilePathField', 'SlugField', 'HStoreField',
                                'URLField', 'BinaryField', 'JSONField', 'ArrayField', 'CITextField', 'CICharField',
                                'CIEmailField'}
 
+    def merge_values(self, field, first, second):
+        # NULL column is replaced with default before concatenation.
+        # array || NULL is array, but NULL is absorbing for strings, hstore and jsonb
+        ArrayField = import_pg_field_or_dummy('ArrayField', array_available)  # noqa
+        if first is None:
+            return second
+        if second is None:
+            return first if isinstance(field, ArrayField) else None
+
+        if isinstance(first, dict) and isinstance(second, dict):
+            result = dict(first)
+            result.update(second)
+            return result
+
+        try:
+            return first + second
+        except TypeError:
+            raise ValueError("'%s' can't merge values of field '%s'" % (self.__class__.__name__, field.name))
+
     def get_sql_value(self, field, val, connection, val_as_param=True, with_table=False, for_update=True, **kwargs):
         null_default, null_default_params = self._parse_null_default(field, connection, **kwargs)
         JSONField = import_pg_field_or_dummy('JSONField', jsonb_available)  # noqa
@@ -437,9 +565,22 @@ class ConcatSetFunction(AbstractSetFunction):
 
 class UnionSetFunction(AbstractSetFunction):
     names = {'union'}
+    inserts_value = True
 
     supported_field_classes = {'ArrayField'}
 
+    def merge_values(self, field, first, second):
+        result = ConcatSetFunction().merge_values(field, first, second)
+        if result is None:
+            return result
+
+        # Union contains every item once. Order of first appearance is kept.
+        unique = []
+        for item in result:
+            if item not in unique:
+                unique.append(item)
+        return unique
+
     def get_sql_value(self, field, val, connection, val_as_param=True, with_table=False, for_update=True, **kwargs):
         if for_update:
             sub_func = ConcatSetFunction()
@@ -464,6 +605,16 @@ class ArrayRemoveSetFunction(AbstractSetFunction):
 
         return format_field_value(field.base_field, val, connection, cast_type=cast_type)
 
+    def get_value_formatter(self, field, connection, cast_type=False):
+        # Support for django 1.8
+        if not hasattr(field.base_field, 'model'):
+            field.base_field.model = field.model
+
+        return get_field_value_formatter(field.base_field, connection, cast_type=cast_type)
+
+    def get_value_db_type(self, field, connection):
+        return get_field_db_type(field.base_field, connection)
+
     def modify_create_params(self, model, key, kwargs, connection):
         kwargs = super(ArrayRemoveSetFunction, self).modify_create_params(model, key, kwargs, connection)
 
@@ -472,6 +623,13 @@ class ArrayRemoveSetFunction(AbstractSetFunction):
 
         return kwargs
 
+    def merge_values(self, field, first, second):
+        if first != second:
+            raise ValueError("'%s' can't merge different values of field '%s'"
+                             % (self.__class__.__name__, field.name))
+
+        return second
+
     def get_sql_value(self, field, val, connection, val_as_param=True, with_table=False, for_update=True, **kwargs):
         if val_as_param:
             val_sql, params = self.format_field_value(field, val, connection)
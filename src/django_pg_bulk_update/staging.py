@@ -0,0 +1,251 @@
+"""
+This file contains COPY based staging of input values.
+Values are streamed to a temporary table with COPY ... FROM STDIN, which is used instead of VALUES list.
+It is much faster for big data sets: no giant query text is formed, sent and parsed.
+"""
+import binascii
+import hashlib
+import io
+import json
+import struct
+from datetime import date, time, datetime, timedelta
+from logging import getLogger
+from typing import Any, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .columnar import is_numpy_array
+from .compatibility import string_types
+from .copy_encoders import get_binary_encoders, encode_binary_copy
+from .types import TDatabase
+
+logger = getLogger('django-pg-bulk-update')
+
+STAGING_TABLE_PREFIX = 'pg_bulk_update_staging_'
+
+# Temporary tables are not analyzed by autovacuum, so planner knows nothing about staging data.
+# If number of rows copied is not less than this value, table is analyzed before usage.
+# Set to None to disable analyzing.
+STAGING_ANALYZE_THRESHOLD = 10000
+
+# COPY format used to send data: 'binary' or 'text'.
+# Binary format is used only if all columns have binary encoders and all values can be encoded.
+# Otherwise text format is used.
+STAGING_COPY_FORMAT = 'binary'
+
+_copy_escapes = {ord('\\'): u'\\\\', ord('\t'): u'\\t', ord('\n'): u'\\n', ord('\r'): u'\\r'}
+
+
+def get_staging_table_name(columns):  # type: (Iterable[Tuple[str, str]]) -> str
+    """
+    Forms staging table name. Table structure is defined by column names and types,
+    so equal structures share a table in database session.
+    :param columns: An iterable of (column name, database type) tuples
+    :return: Table name
+    """
+    definition = ', '.join('%s %s' % col for col in columns)
+    return STAGING_TABLE_PREFIX + hashlib.md5(definition.encode('utf-8')).hexdigest()
+
+
+def _format_text_value(val, db_type):  # type: (Any, str) -> str
+    """
+    Formats python value, prepared for database, as PostgreSQL text representation
+    :param val: Value to format. Must not be None
+    :param db_type: Database type of the column
+    :return: String
+    """
+    if isinstance(val, bool):
+        return 't' if val else 'f'
+    elif isinstance(val, string_types):
+        return val
+    elif isinstance(val, (datetime, date, time)):
+        return val.isoformat()
+    elif isinstance(val, timedelta):
+        return '%d days %d seconds %d microseconds' % (val.days, val.seconds, val.microseconds)
+    elif isinstance(val, (bytes, bytearray, memoryview)):
+        return '\\x' + binascii.hexlify(bytes(val)).decode('ascii')
+    elif isinstance(val, (list, tuple)):
+        item_type = db_type[:-2] if db_type.endswith('[]') else db_type
+        return '{%s}' % ','.join(_format_array_item(item, item_type) for item in val)
+    elif isinstance(val, dict):
+        if db_type == 'hstore':
+            return ', '.join('%s=>%s' % (_quote(k), 'NULL' if v is None else _quote(v)) for k, v in val.items())
+        return json.dumps(val)
+    elif hasattr(val, 'dumps') and hasattr(val, 'adapted'):
+        # psycopg2.extras.Json adapter
+        return val.dumps(val.adapted)
+    elif hasattr(val, 'dumps') and hasattr(val, 'obj'):
+        # psycopg.types.json.Json and Jsonb wrappers
+        return val.dumps(val.obj)
+    else:
+        return str(val)
+
+
+def _quote(val):  # type: (Any) -> str
+    return '"%s"' % str(val).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _format_array_item(val, db_type):  # type: (Any, str) -> str
+    if val is None:
+        return 'NULL'
+    elif isinstance(val, (list, tuple)):
+        # Multidimensional array
+        return _format_text_value(val, db_type)
+    else:
+        return _quote(_format_text_value(val, db_type))
+
+
+def format_copy_row(row, db_types):  # type: (Iterable[Any], Iterable[str]) -> str
+    """
+    Formats a row of values as a line of COPY text format
+    :param row: Values, prepared for database
+    :param db_types: Database types of columns
+    :return: A line, terminated with new line symbol
+    """
+    return u'\t'.join(
+        u'\\N' if val is None else _format_text_value(val, db_type).translate(_copy_escapes)
+        for val, db_type in zip(row, db_types)
+    ) + u'\n'
+
+
+class CopyStream(object):
+    """
+    Read only file-like object, reading data from an iterable of strings.
+    It is used in order to stream data to COPY without forming it in memory.
+    """
+    def __init__(self, lines):  # type: (Iterable[str]) -> None
+        self._lines = iter(lines)
+        self._buffer = u''
+
+    def read(self, size=-1):  # type: (int) -> str
+        chunks, length = [self._buffer], len(self._buffer)
+        for line in self._lines:
+            chunks.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+
+        data = u''.join(chunks)
+        if 0 <= size < len(data):
+            data, self._buffer = data[:size], data[size:]
+        else:
+            self._buffer = u''
+
+        return data
+
+    def readline(self, size=-1):  # type: (int) -> str
+        if self._buffer:
+            line, self._buffer = self._buffer, u''
+            return line
+
+        return next(self._lines, u'')
+
+
+def _copy_expert(cursor, sql, data):  # type: (Any, str, Union[bytes, Iterable[str]]) -> None
+    """
+    Executes COPY ... FROM STDIN query, sending given data
+    :param cursor: Database cursor
+    :param sql: COPY query
+    :param data: Binary format data or an iterable of lines in text format
+    :return: None
+    """
+    chunks = (data,) if isinstance(data, bytes) else data
+
+    if hasattr(cursor, 'copy_expert'):
+        # psycopg2
+        cursor.copy_expert(sql, io.BytesIO(data) if isinstance(data, bytes) else CopyStream(data))
+    else:
+        # psycopg 3
+        with cursor.copy(sql) as copy:
+            for chunk in chunks:
+                copy.write(chunk)
+
+
+def _encode_binary(db_types, rows):  # type: (List[str], List[List[Any]]) -> Optional[bytes]
+    """
+    Encodes rows to COPY binary format, if it is possible
+    :param db_types: Database types of columns
+    :param rows: Rows of values, prepared for database
+    :return: Binary data or None, if some column type or value is not supported by binary encoders
+    """
+    columns = list(zip(*rows)) if rows else [()] * len(db_types)
+    return _encode_binary_columns(db_types, columns, len(rows))
+
+
+def _encode_binary_columns(db_types, columns, rows_count):
+    # type: (List[str], List[Sequence[Any]], int) -> Optional[bytes]
+    """
+    Encodes columns to COPY binary format, if it is possible
+    :param db_types: Database types of columns
+    :param columns: Columns of values, prepared for database. numpy arrays are encoded without python objects.
+    :param rows_count: Number of rows
+    :return: Binary data or None, if some column type or value is not supported by binary encoders
+    """
+    encoders = get_binary_encoders(db_types)
+    if encoders is None:
+        return None
+
+    try:
+        return encode_binary_copy(encoders, columns, rows_count)
+    except (TypeError, ValueError, struct.error) as ex:
+        # struct.error is raised for numbers, which don't fit into the column type.
+        # Text format passes them to database, which reports the error as usual.
+        logger.debug('Binary COPY encoding failed, falling back to text: %s' % ex)
+        return None
+
+
+def copy_to_staging(conn, columns, rows, rows_count):
+    # type: (TDatabase, List[Tuple[str, str]], Iterable[Iterable[Any]], int) -> str
+    """
+    Creates temporary staging table (if it doesn't exist in current session),
+    cleans it up and copies given rows to it.
+    Table is created with ON COMMIT DELETE ROWS option, so it must be used in the same transaction.
+    :param conn: Database connection used
+    :param columns: A list of (column name, database type) tuples
+    :param rows: Rows of values, prepared for database, in columns order
+    :param rows_count: Number of rows given
+    :return: Staging table name
+    """
+    rows = list(rows)
+    data_columns = list(zip(*rows)) if rows else [()] * len(columns)
+    return copy_columns_to_staging(conn, columns, data_columns, rows_count)
+
+
+def copy_columns_to_staging(conn, columns, data_columns, rows_count):
+    # type: (TDatabase, List[Tuple[str, str]], List[Sequence[Any]], int) -> str
+    """
+    Copies given columns of values to staging table. See copy_to_staging().
+    Binary format is encoded column by column: numpy arrays of numbers are encoded without python objects.
+    :param conn: Database connection used
+    :param columns: A list of (column name, database type) tuples
+    :param data_columns: Columns of values, prepared for database, in columns order.
+        Every column is a sequence or numpy array of rows_count values.
+    :param rows_count: Number of rows given
+    :return: Staging table name
+    """
+    table = get_staging_table_name(columns)
+    column_names = ', '.join('"%s"' % name for name, _ in columns)
+    db_types = [db_type for _, db_type in columns]
+
+    copy_sql = 'COPY "%s" (%s) FROM STDIN' % (table, column_names)
+    data = None
+    if STAGING_COPY_FORMAT == 'binary':
+        data = _encode_binary_columns(db_types, data_columns, rows_count)
+
+    with conn.cursor() as cursor:
+        # Table may already exist and contain data, if it has been used earlier in current transaction
+        cursor.execute('CREATE TEMPORARY TABLE IF NOT EXISTS "%s" (%s) ON COMMIT DELETE ROWS; TRUNCATE "%s"' % (
+            table, ', '.join('"%s" %s' % col for col in columns), table))
+
+        # COPY methods are called on driver cursor, so its errors are converted to django ones here
+        with conn.wrap_database_errors:
+            if data is not None:
+                logger.debug('COPYING %d ROWS TO %s IN BINARY FORMAT' % (rows_count, table))
+                _copy_expert(cursor, copy_sql + ' WITH (FORMAT binary)', data)
+            else:
+                logger.debug('COPYING %d ROWS TO %s' % (rows_count, table))
+                rows = zip(*(col.tolist() if is_numpy_array(col) else col for col in data_columns))
+                _copy_expert(cursor, copy_sql, (format_copy_row(row, db_types) for row in rows))
+
+        if STAGING_ANALYZE_THRESHOLD is not None and rows_count >= STAGING_ANALYZE_THRESHOLD:
+            cursor.execute('ANALYZE "%s"' % table)
+
+    return table
@@ -0,0 +1,213 @@
+"""
+This file contains streaming of records, returned by bulk operations.
+PostgreSQL doesn't allow data modifying statements in DECLARE CURSOR, so they can't be read by server side cursor.
+Instead, returned rows are saved to a temporary table in the same statement.
+The table is read by server side cursor in chunks, so client memory doesn't depend on number of records returned.
+"""
+import uuid
+from logging import getLogger
+from typing import Any, Dict, Iterable, List, Tuple, Type, Union
+
+from django.db.models import Model
+
+from .types import TDatabase
+from .utils import get_db_converters
+
+__all__ = ['ReturningStream']
+
+logger = getLogger('django-pg-bulk-update')
+
+RETURNING_TABLE_PREFIX = 'pg_bulk_update_returning_'
+
+# Number of rows, fetched from database at once
+RETURNING_STREAM_CHUNK_SIZE = 2000
+
+
+def execute_to_stream(model, conn, sql, params, fields):
+    # type: (Type[Model], TDatabase, str, List[Any], List[str]) -> ReturningStream
+    """
+    Executes query with RETURNING section, saving returned rows to a temporary table
+    :param model: Model, query returns records of
+    :param conn: Database connection used
+    :param sql: Query with RETURNING section
+    :param params: Query parameters
+    :param fields: Attribute names of returned fields
+    :return: ReturningStream instance, reading the table
+    """
+    table = RETURNING_TABLE_PREFIX + uuid.uuid4().hex
+    with conn.cursor() as cursor:
+        cursor.execute('CREATE TEMPORARY TABLE "%s" AS WITH "returned" AS (' % table + sql
+                       + ') SELECT * FROM "returned"', params)
+        rows_count = cursor.rowcount
+
+    logger.debug('SAVED %d RETURNED ROWS TO %s' % (rows_count, table))
+    return ReturningStream(model, conn, [(table, rows_count, {})], fields)
+
+
+class ReturningStream(object):
+    """
+    Iterable over records, returned by bulk operation with returning_stream flag.
+    Rows are fetched from database in chunks of RETURNING_STREAM_CHUNK_SIZE.
+    Stream can be iterated only once: temporary tables are dropped, when they have been read or stream is closed.
+    Iteration returns model instances. Use values() and values_list() methods to get dicts and tuples.
+    """
+    def __init__(self, model, conn, parts=(), fields=()):
+        # type: (Type[Model], TDatabase, Iterable[Union[Tuple[str, int, Dict[str, Any]], List[Model]]], Iterable[str]) -> None
+        """
+        :param model: Model, records of which are returned
+        :param conn: Database connection used
+        :param parts: Parts of the stream in iteration order. A part is either a tuple
+            (temporary table, rows count, constant values dict) or a list of model instances, already fetched
+        :param fields: Attribute names of returned fields
+        """
+        self.model = model
+        self._conn = conn
+        self._parts = list(parts)
+        self._fields = list(fields)
+
+    @property
+    def fields(self):  # type: () -> List[str]
+        return self._fields
+
+    def __len__(self):  # type: () -> int
+        return sum(part[1] if isinstance(part, tuple) else len(part) for part in self._parts)
+
+    def count(self):  # type: () -> int
+        """
+        Returns number of records, which have not been read yet
+        :return: Integer
+        """
+        return len(self)
+
+    def __add__(self, other):  # type: (ReturningStream) -> ReturningStream
+        if not isinstance(other, ReturningStream):
+            return NotImplemented
+
+        fields = self._fields + [f for f in other._fields if f not in self._fields]
+        res = ReturningStream(self.model, self._conn, self._parts + other._parts, fields)
+        self._parts, other._parts = [], []
+        return res
+
+    def annotate(self, **values):  # type: (**Any) -> None
+        """
+        Sets constant attribute values to all records of the stream
+        :param values: Attribute names and values
+        :return: None
+        """
+        for part in self._parts:
+            if isinstance(part, tuple):
+                part[2].update(values)
+            else:
+                for instance in part:
+                    for name, val in values.items():
+                        setattr(instance, name, val)
+
+        self._fields.extend(name for name in values if name not in self._fields)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def close(self):  # type: () -> None
+        """
+        Drops temporary tables, which have not been read
+        :return: None
+        """
+        while self._parts:
+            self._drop_part(self._parts.pop(0))
+
+    def _drop_part(self, part):  # type: (Union[Tuple[str, int, Dict[str, Any]], List[Model]]) -> None
+        if isinstance(part, tuple):
+            with self._conn.cursor() as cursor:
+                cursor.execute('DROP TABLE IF EXISTS "%s"' % part[0])
+
+    def _iter_table(self, table, constants):  # type: (str, Dict[str, Any]) -> Iterable[Dict[str, Any]]
+        # chunked_cursor() is a server side cursor, if DISABLE_SERVER_SIDE_CURSORS setting is not set
+        with self._conn.chunked_cursor() as cursor:
+            cursor.execute('SELECT * FROM "%s"' % table)
+            converters = None
+            while True:
+                rows = cursor.fetchmany(RETURNING_STREAM_CHUNK_SIZE)
+                if not rows:
+                    break
+
+                # Server side cursor gets description with the first chunk
+                if converters is None:
+                    converters = get_db_converters(self.model, self._conn, [col[0] for col in cursor.description])
+
+                for row in rows:
+                    item = dict(constants)
+                    for (attname, field_converters, col), column, val in zip(converters, cursor.description, row):
+                        for converter in field_converters:
+                            val = converter(val, col, self._conn)
+                        item[attname or column[0]] = val
+                    yield item
+
+    def _iter_items(self):  # type: () -> Iterable[Union[Dict[str, Any], Model]]
+        """
+        Iterates over returned records: dicts of field attname (or column name for extra columns) and value
+        for records, read from database, and model instances for records, which have already been fetched.
+        Parts are removed from the stream, when they have been read.
+        """
+        while self._parts:
+            part = self._parts[0]
+            try:
+                if isinstance(part, tuple):
+                    for item in self._iter_table(part[0], part[2]):
+                        yield item
+                else:
+                    for instance in part:
+                        yield instance
+            finally:
+                # Stream may have been closed during iteration
+                if self._parts and self._parts[0] is part:
+                    self._parts.pop(0)
+                    self._drop_part(part)
+
+    def _iter_dicts(self, fields):  # type: (Iterable[str]) -> Iterable[Dict[str, Any]]
+        for item in self._iter_items():
+            if isinstance(item, Model):
+                yield {f: getattr(item, f) for f in fields or self._fields}
+            else:
+                yield {f: item[f] for f in fields} if fields else item
+
+    def __iter__(self):  # type: () -> Iterable[Model]
+        for item in self._iter_items():
+            if isinstance(item, Model):
+                yield item
+                continue
+
+            field_names = [f.attname for f in self.model._meta.concrete_fields if f.attname in item]
+            instance = self.model.from_db(self._conn.alias, field_names, [item.pop(name) for name in field_names])
+            for name, val in item.items():
+                setattr(instance, name, val)
+            yield instance
+
+    def values(self, *fields):  # type: (*str) -> Iterable[Dict[str, Any]]
+        """
+        Iterates over returned records as dicts
+        :param fields: Fields to get. If not given, all returned fields are fetched.
+        :return: A generator of values dicts
+        """
+        return self._iter_dicts(fields)
+
+    def values_list(self, *fields, **kwargs):  # type: (*str, **bool) -> Iterable[Union[Tuple[Any], Any]]
+        """
+        Iterates over returned records as tuples
+        :param fields: Field names to get
+        :param flat: Boolean. If fields has only 1 field and flat is True, returns values, not tuples.
+        :return: A generator of values tuples or values if flat is True
+        """
+        flat = kwargs.pop('flat', False)
+        if not fields:
+            raise TypeError("'fields' parameter is required.")
+        if flat and len(fields) > 1:
+            raise TypeError("'flat' is not valid when values_list is called with more than one field.")
+        if kwargs:
+            raise ValueError('Unexpected keyword arguments to values_list: %s' % (list(kwargs),))
+
+        for item in self._iter_dicts(fields):
+            yield item[fields[0]] if flat else tuple(item[f] for f in fields)
@@ -1,9 +1,9 @@
-from typing import Iterable, Union, Dict, Tuple, Any, Optional, Type
+from typing import Iterable, Union, Dict, Tuple, Any, Optional, Type, Hashable, Callable, List
 
 from django.db.models import Model, Field
 from django.db.models.expressions import BaseExpression
 
-from .compatibility import ConnectionProxy, string_types
+from .compatibility import ConnectionProxy, Mapping, string_types
 
 TFieldNames = Union[str, Iterable[str]]
 
@@ -11,8 +11,10 @@ TOperator = Union[str, 'AbstractClauseOperator']  # noqa: F821
 TOperatorsValid = Tuple['FieldDescriptor']
 
 TOperators = Union[Dict[str, TOperator], Iterable[TOperator]]
-TUpdateValuesValid = Dict[Tuple[Any], Dict[str, Any]]
-TUpdateValues = Union[Union[TUpdateValuesValid, Dict[Any, Dict[str, Any]]], Iterable[Dict[str, Any]]]
+TUpdateValuesValid = Dict[Tuple[Any], Union[Dict[str, Any], 'RowUpdates']]
+TUpdateValues = Union[Union[TUpdateValuesValid, Dict[Any, Dict[str, Any]]], Iterable[Dict[str, Any]],
+                      Iterable[Union[Tuple[Any, ...], List[Any]]]]
+TDeleteKeys = Iterable[Union[Any, Iterable[Any], Dict[str, Any]]]
 TSetFunction = Union[str, 'AbstractSetFunction']  # noqa: F821
 TSetFunctions = Optional[Dict[str, TSetFunction]]
 TSetFunctionsValid = Tuple['FieldDescriptor']
@@ -123,6 +125,50 @@ class FieldDescriptor(object):
             raise ValueError('prefix has not been set yet')
         return "%s__%s" % (self._prefix, self.name)
 
+    def get_signature(self):  # type: () -> Optional[Hashable]
+        """
+        Returns hashable value, identifying sql generated for this descriptor
+        :return: Hashable value or None, if set function or key operator can't be identified
+        """
+        set_function_signature = self._set_function.get_signature()
+        key_operator_signature = self._key_operator.get_signature()
+        if set_function_signature is None or key_operator_signature is None:
+            return None
+
+        return self.name, self._prefix, set_function_signature, key_operator_signature
+
+
+class RowUpdates(Mapping):
+    """
+    Update values of a positional row, given with columns parameter.
+    It is read as a dict {field_name: value}, but values are not copied: they are taken from the row by index,
+    which is shared by all rows.
+    """
+    __slots__ = ['_row', '_index']
+
+    def __init__(self, row, index):  # type: (Union[Tuple[Any, ...], List[Any]], Dict[str, int]) -> None
+        """
+        :param row: Row values in columns order
+        :param index: Update field names, mapped to their indexes in row
+        """
+        self._row = row
+        self._index = index
+
+    def __getitem__(self, name):  # type: (str) -> Any
+        return self._row[self._index[name]]
+
+    def __contains__(self, name):  # type: (Any) -> bool
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):  # type: () -> int
+        return len(self._index)
+
+    def __repr__(self):  # type: () -> str
+        return '%s(%s)' % (self.__class__.__name__, dict(self))
+
 
 class AbstractFieldFormatter(object):
     def format_field_value(self, field, val, connection, cast_type=False, **kwargs):
@@ -138,3 +184,47 @@ class AbstractFieldFormatter(object):
         """
         from .utils import format_field_value
         return format_field_value(field, val, connection, cast_type=cast_type)
+
+    def get_value_formatter(self, field, connection, cast_type=False):
+        # type: (Field, TDatabase, bool) -> Callable[[Any], Tuple[str, Tuple[Any]]]
+        """
+        Compiles a function, formatting values of given field the same way format_field_value() does.
+        It is used to format columns of values, doing field dependent work only once.
+        Formatters overriding format_field_value() should override this method too, in order to be compiled.
+        :param field: Django field to take format from
+        :param connection: Connection used to update data
+        :param cast_type: Adds type casting to sql if flag is True
+        :return: A function, taking value and returning a tuple: sql and a tuple of parameters to pass to cursor
+        """
+        defining_cls = next(cls for cls in type(self).__mro__ if 'format_field_value' in cls.__dict__)
+        if defining_cls is not AbstractFieldFormatter:
+            return lambda val: self.format_field_value(field, val, connection, cast_type=cast_type)
+
+        from .utils import get_field_value_formatter
+        return get_field_value_formatter(field, connection, cast_type=cast_type)
+
+    def get_value_db_type(self, field, connection):
+        # type: (Field, TDatabase) -> str
+        """
+        Returns database type of values, formatted by format_field_value() method
+        :param field: Django field to take format from
+        :param connection: Connection used to update data
+        :return: Database type name (str)
+        """
+        from .compatibility import get_field_db_type
+        return get_field_db_type(field, connection)
+
+    def get_signature(self):  # type: () -> Optional[Hashable]
+        """
+        Returns hashable value, identifying sql generated by this formatter:
+        formatters with equal signatures must generate equal sql for the same field.
+        By default it is formed from class and instance attributes.
+        :return: Hashable value or None, if formatter can't be identified (attributes are not hashable)
+        """
+        attrs = tuple(sorted(self.__dict__.items()))
+        try:
+            hash(attrs)
+        except TypeError:
+            return None
+
+        return self.__class__, attrs
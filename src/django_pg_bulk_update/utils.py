@@ -2,21 +2,59 @@
 Contains some project unbind helpers
 """
 import logging
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from itertools import islice
-from time import sleep
-from typing import TypeVar, Set, Any, Tuple, Iterable, Callable, Optional, List
+from random import uniform
+from threading import RLock, Event
+from time import sleep, monotonic
+from zlib import crc32
+from typing import TypeVar, Set, Any, Tuple, Iterable, Callable, Optional, List, Hashable, Type, Union, Generator, \
+    Sequence
 
 from django.core.exceptions import FieldError
-from django.db.models import Field
+from django.db import connections, transaction, DatabaseError, DEFAULT_DB_ALIAS
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import Field, BinaryField, Model
 from django.db.models.sql.subqueries import UpdateQuery
 
-from .compatibility import hstore_serialize, hstore_available, get_field_db_type, import_pg_field_or_dummy
+from .columnar import ColumnarValues
+from .compatibility import hstore_serialize, hstore_available, get_field_db_type, import_pg_field_or_dummy, \
+    array_available, get_model_fields, string_types, Mapping
+from .pipeline import Pipeline, pipeline_available, resolve_result
 from .types import TDatabase
 
 logger = logging.getLogger('django-pg-bulk-update')
 
 T = TypeVar('T')
 
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'evictions', 'maxsize', 'currsize'])
+
+# Limits of batch_size='auto'.
+# PostgreSQL protocol limits number of bind parameters by 65535. Some of them are reserved for query parts other than values.
+AUTO_BATCH_MAX_PARAMS = 65000
+# Maximum estimated size of values in a batch in bytes
+AUTO_BATCH_MAX_BYTES = 8 * 1024 * 1024
+# Batch size is adjusted, so that batch is executed in this time (seconds)
+AUTO_BATCH_TARGET_TIME = 0.5
+AUTO_BATCH_INITIAL_SIZE = 1000
+AUTO_BATCH_MAX_SIZE = 100000
+# SQLSTATE codes of errors, after which batch is retried with smaller size:
+# query_canceled (statement_timeout) and lock_not_available (lock_timeout)
+AUTO_BATCH_TIMEOUT_CODES = {'57014', '55P03'}
+
+# SQLSTATE codes of transient errors, after which batch is retried with retries parameter:
+# serialization_failure and deadlock_detected
+RETRY_ERROR_CODES = {'40001', '40P01'}
+# Retried batch waits for a random time up to RETRY_BASE_DELAY * 2 ^ (attempt - 1), but not more than RETRY_MAX_DELAY
+RETRY_BASE_DELAY = 0.05
+RETRY_MAX_DELAY = 2.0
+
+# Named values of batched_operation transaction parameter. Integer N commits every N batches.
+# + single - all batches are executed in a single transaction
+# + per_batch - every batch is committed after execution
+TRANSACTION_MODES = ('single', 'per_batch')
+
 
 def get_subclasses(cls, recursive=False):  # type: (T, bool) -> Set[T]
     """
@@ -104,6 +142,57 @@ def format_field_value(field, val, conn, cast_type=False):
     return value, tuple(update_params)
 
 
+def get_field_value_formatter(field, conn, cast_type=False):
+    # type: (Field, TDatabase, bool) -> Callable[[Any], Tuple[str, Tuple[Any]]]
+    """
+    Compiles a function, formatting values of given field the same way format_field_value() does.
+    Field dependent work (query compiler, field type checks, placeholder and type cast) is done once,
+    so it is much faster on columns of values. Expressions and model instances are formatted by format_field_value().
+    :param field: Django field to take format from
+    :param conn: Connection used to update data
+    :param cast_type: Adds type casting to sql if flag is True
+    :return: A function, taking value and returning a tuple: sql, replacing value in update
+        and a tuple of parameters to pass to cursor
+    """
+    HStoreField = import_pg_field_or_dummy('HStoreField', hstore_available)  # noqa
+    ArrayField = import_pg_field_or_dummy('ArrayField', array_available)  # noqa
+
+    # django.db.connection proxy looks up thread local connection on every attribute access
+    conn = connections[conn.alias]
+
+    prep_value = field.get_db_prep_save
+    is_hstore = isinstance(field, HStoreField)
+    cast_tpl = 'CAST(%%s AS %s)' % get_field_db_type(field, conn) if cast_type else '%s'
+    null_sql = cast_tpl % 'NULL'
+
+    if not hasattr(field, 'get_placeholder'):
+        value_sql = cast_tpl % '%s'
+    elif isinstance(field, (ArrayField, BinaryField)):
+        compiler = UpdateQuery(field.model).get_compiler(connection=conn)
+        # django 2.2 adds ::serial[] to placeholders for arrays...
+        value_sql = cast_tpl % field.get_placeholder(None, compiler, conn).split('::')[0]
+    else:
+        # Placeholder of some fields (like geometry ones) depends on value
+        value_sql = None
+
+    def _format(val):  # type: (Any) -> Tuple[str, Tuple[Any]]
+        if value_sql is None or hasattr(val, 'resolve_expression') or hasattr(val, 'prepare_database_save'):
+            return format_field_value(field, val, conn, cast_type=cast_type)
+
+        if is_hstore and isinstance(val, dict):
+            val = hstore_serialize(val)
+
+        db_val = prep_value(val, connection=conn)
+        if db_val is None:
+            return null_sql, tuple()
+        elif hasattr(db_val, 'as_sql'):
+            return format_field_value(field, val, conn, cast_type=cast_type)
+        else:
+            return value_sql, (db_val,)
+
+    return _format
+
+
 def batch(data, batch_size):  # type: (Iterable[T], int) -> Iterable[Tuple[T, ...]]
     """
     Splits Iterable data (can be a generator) into tuples with length less or equal to batch_size
@@ -129,8 +218,649 @@ def batch(data, batch_size):  # type: (Iterable[T], int) -> Iterable[Tuple[T, ..
         yield next_batch
 
 
-def batched_operation(handler, data, batch_size=None, batch_delay=0, args=(), kwargs=None, data_arg_index=0):
-    # type: (Callable, Iterable, Optional[int], float, Iterable, Optional[dict], int) -> List[Any]
+def estimate_size(value):  # type: (Any) -> int
+    """
+    Roughly estimates size of value, passed to database, in bytes
+    :param value: Value to estimate
+    :return: Number of bytes
+    """
+    if isinstance(value, (str, bytes, bytearray, memoryview)):
+        return len(value)
+    elif isinstance(value, Mapping):
+        return sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        return sum(estimate_size(v) for v in value)
+    else:
+        return 8
+
+
+def _get_error_code(ex):  # type: (Exception) -> Optional[str]
+    """
+    Gets SQLSTATE code of database error
+    :param ex: Exception raised
+    :return: Error code or None
+    """
+    # django wraps driver exceptions, original one is set as __cause__.
+    # psycopg2 exceptions have pgcode attribute, psycopg 3 ones have sqlstate.
+    cause = ex.__cause__ or ex
+    return getattr(cause, 'pgcode', None) or getattr(cause, 'sqlstate', None)
+
+
+def _is_retryable_error(ex):  # type: (Exception) -> bool
+    """
+    Checks if database error is caused by deadlock or serialization failure, so batch can be retried
+    :param ex: Exception raised
+    :return: Boolean
+    """
+    return _get_error_code(ex) in RETRY_ERROR_CODES
+
+
+def _is_serialization_error(ex):  # type: (Exception) -> bool
+    """
+    Checks if database error is a serialization failure. It can't be fixed by retrying a savepoint:
+    transaction snapshot is kept, so the retry fails the same way.
+    :param ex: Exception raised
+    :return: Boolean
+    """
+    return _get_error_code(ex) == '40001'
+
+
+def _is_timeout_error(ex):  # type: (Exception) -> bool
+    """
+    Checks if database error is caused by statement or lock timeout
+    :param ex: Exception raised
+    :return: Boolean
+    """
+    return _get_error_code(ex) in AUTO_BATCH_TIMEOUT_CODES
+
+
+def get_retry_delay(attempt):  # type: (int) -> float
+    """
+    Gets random delay before retry of a batch, failed by transient error.
+    Full jitter: concurrent jobs, which have failed together, don't retry at the same moment.
+    :param attempt: Number of retry, starting from 1
+    :return: Delay in seconds
+    """
+    return uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1)))
+
+
+class AutoBatchSizer(object):
+    """
+    Computes batch sizes for batch_size='auto'.
+    Batch is limited by number of query parameters and estimated size of values.
+    Within these limits number of rows is adjusted, so batch is executed in AUTO_BATCH_TARGET_TIME:
+    it grows (at most twice) after fast batches and shrinks after slow ones. Timeouts halve it.
+    """
+    def __init__(self, row_params=None):  # type: (Optional[int]) -> None
+        """
+        :param row_params: Number of query parameters, passed for every row. None, if it doesn't depend on rows.
+        """
+        self.max_rows = AUTO_BATCH_MAX_SIZE
+        if row_params:
+            self.max_rows = max(1, min(self.max_rows, AUTO_BATCH_MAX_PARAMS // row_params))
+        self.rows = min(AUTO_BATCH_INITIAL_SIZE, self.max_rows)
+
+    def next_batch(self, items, start):  # type: (List[T], int) -> List[T]
+        """
+        Takes next batch of items
+        :param items: All items to process
+        :param start: Index of the first item of the batch
+        :return: A list of items
+        """
+        # Slice is taken directly: islice() would walk all items before start
+        end, size = start, 0
+        for item in items[start:start + self.rows]:
+            size += estimate_size(item)
+            # Batch contains at least one item, whatever it's size is
+            if size > AUTO_BATCH_MAX_BYTES and end > start:
+                break
+            end += 1
+        return items[start:end]
+
+    def on_success(self, rows, elapsed):  # type: (int, float) -> None
+        """
+        Adjusts batch size to measured execution time
+        :param rows: Number of rows in executed batch
+        :param elapsed: Execution time in seconds
+        :return: None
+        """
+        factor = min(2.0, AUTO_BATCH_TARGET_TIME / elapsed) if elapsed > 0 else 2.0
+        self.rows = max(1, min(self.max_rows, int(rows * factor)))
+
+    def on_timeout(self, rows):  # type: (int) -> None
+        """
+        Shrinks batch size after batch execution has been canceled by timeout
+        :param rows: Number of rows in canceled batch
+        :return: None
+        """
+        self.rows = max(1, rows // 2)
+
+
+def _execute_batch(handler, args, kwargs, tx, atomic=False):
+    # type: (Callable, List[Any], dict, BatchTransaction, bool) -> Any
+    """
+    Executes handler on a batch in batch transaction. RetryingHandler controls transactions of its attempts itself.
+    :param atomic: If flag is set, batch is executed in transaction.atomic() block, so it's failure is rolled back
+    :return: Batch result
+    """
+    if isinstance(handler, RetryingHandler):
+        return handler.execute(tx, args, kwargs)
+
+    tx.begin_batch()
+    if atomic:
+        with transaction.atomic(using=tx.using):
+            result = handler(*args, **kwargs)
+    else:
+        result = handler(*args, **kwargs)
+    tx.end_batch(result)
+    return result
+
+
+def iter_auto_batches(data, row_params=None):
+    # type: (Iterable, Optional[int]) -> Generator[Union[dict, Tuple[Any, ...]], Optional[float], None]
+    """
+    Generates batches for batch_size='auto'. See AutoBatchSizer.
+    Caller executes every batch and sends its execution time in seconds to the generator (see next_auto_batch()).
+    If batch fails, caller throws the error into the generator: batch, canceled by timeout,
+    is yielded again with smaller size. Other errors are raised.
+    :param data: Data to split. Dicts are split to dicts by keys.
+        Lists are sliced. Other iterables and LazyBatches are read by chunks of current batch size.
+    :param row_params: Number of query parameters per data item. See AutoBatchSizer.
+    :return: A generator of batches
+    """
+    sizer = AutoBatchSizer(row_params=row_params)
+
+    j = 0
+    for chunk in _iter_auto_chunks(data, sizer):
+        is_dict = isinstance(chunk, dict)
+        items = list(chunk.items()) if is_dict else chunk
+
+        start = 0
+        while start < len(items):
+            batch_items = sizer.next_batch(items, start)
+            logger.debug('Processing batch %d with size %d' % (j + 1, len(batch_items)))
+            try:
+                elapsed = yield dict(batch_items) if is_dict else tuple(batch_items)
+            except DatabaseError as ex:
+                if len(batch_items) == 1 or not _is_timeout_error(ex):
+                    raise
+                logger.debug('Batch %d has been canceled by timeout, retrying with smaller size' % (j + 1))
+                sizer.on_timeout(len(batch_items))
+                continue
+
+            sizer.on_success(len(batch_items), elapsed)
+            start += len(batch_items)
+            j += 1
+
+
+def _iter_auto_chunks(data, sizer):  # type: (Iterable, AutoBatchSizer) -> Iterable[Union[dict, Sequence[Any]]]
+    """
+    Reads data for iter_auto_batches() by chunks. Batches are taken from a chunk and never join two chunks:
+    LazyBatches coalesces duplicate keys within a converted chunk only.
+    :param data: Data to split
+    :param sizer: AutoBatchSizer. Every chunk is read with its current batch size.
+    :return: A generator of dicts or sequences
+    """
+    if isinstance(data, (list, tuple)):
+        # Data is already in memory: batches are sliced from it
+        yield data
+        return
+
+    if isinstance(data, LazyBatches):
+        yield data.first_batch
+        items, convert = data.items, data.convert
+    elif isinstance(data, dict):
+        items, convert = iter(data.items()), dict
+    else:
+        items, convert = iter(data), tuple
+
+    chunk = tuple(islice(items, sizer.rows))
+    while chunk:
+        yield convert(chunk)
+        chunk = tuple(islice(items, sizer.rows))
+
+
+def next_auto_batch(batches, elapsed):
+    # type: (Generator[Union[dict, Tuple[Any, ...]], Optional[float], None], float) -> Union[None, dict, Tuple[Any, ...]]
+    """
+    Reports execution time of the previous batch to iter_auto_batches() generator and takes the next batch
+    :param batches: Generator, returned by iter_auto_batches()
+    :param elapsed: Execution time of the previous batch in seconds
+    :return: Next batch or None, if all items have been processed
+    """
+    try:
+        return batches.send(elapsed)
+    except StopIteration:
+        return None
+
+
+def _auto_batched_operation(handler, data, batch_delay, args, kwargs, data_arg_index, row_params, using, tx,
+                            stop=None):
+    # type: (Callable, Iterable, float, List[Any], dict, int, Optional[int], Optional[str], BatchTransaction, Optional[Event]) -> None
+    """
+    Executes batched_operation with batch_size='auto'. See batched_operation and iter_auto_batches().
+    Every batch is executed in a transaction (or a savepoint), so batch, canceled by timeout, can be retried.
+    Results of batches are passed to BatchTransaction.
+    """
+    batches = iter_auto_batches(data, row_params=row_params)
+    batch_items = next(batches, None)
+    while batch_items is not None and not (stop is not None and stop.is_set()):
+        args[data_arg_index] = batch_items
+        started = monotonic()
+        try:
+            _execute_batch(handler, args, kwargs, tx, atomic=True)
+        except DatabaseError as ex:
+            batch_items = batches.throw(ex)
+            continue
+
+        elapsed = monotonic() - started
+        sleep(batch_delay)
+        batch_items = next_auto_batch(batches, elapsed)
+
+
+class BatchResults(list):
+    """
+    A list of batch results, returned by batched_operation.
+    It additionally contains number of batch retries after transient errors.
+    """
+    retries = 0
+
+
+class RetryingHandler(object):
+    """
+    Wraps batch handler of batched_operation with retries parameter.
+    Every attempt is executed in a transaction (or a savepoint), so a batch, failed by deadlock
+    or serialization failure, is rolled back and retried after jittered exponential backoff.
+    Serialization failures are retried only, if the attempt is a new transaction:
+    a savepoint retry sees the same snapshot and fails the same way, so error is raised at once.
+    """
+    def __init__(self, handler, retries, using):  # type: (Callable, int, Optional[str]) -> None
+        """
+        :param handler: Batch handler
+        :param retries: Maximum number of retries of every batch
+        :param using: Database alias, handler queries
+        """
+        self.handler = handler
+        self.retries = retries
+        self.using = using
+        # Total number of retries. Parallel workers share the handler.
+        self.retried = 0
+        self._lock = RLock()
+
+    def __call__(self, *args, **kwargs):
+        return self.execute(None, args, kwargs)
+
+    def execute(self, tx, args, kwargs):  # type: (Optional[BatchTransaction], Iterable[Any], dict) -> Any
+        """
+        Executes a batch with retries.
+        If batch transaction is committed after every batch outside of transaction.atomic() block,
+        it is rolled back after failed attempt, so the next attempt starts a new transaction.
+        Otherwise attempts are savepoints in current transaction.
+        :param tx: BatchTransaction of the batch or None, if it is controlled by caller
+        :param args: Handler arguments
+        :param kwargs: Handler keyword arguments
+        :return: Batch result
+        """
+        conn = connections[self.using or DEFAULT_DB_ALIAS]
+        attempt = 0
+        while True:
+            new_transaction = not conn.in_atomic_block and (tx is None or tx.commits_every_batch)
+            if tx is not None:
+                tx.begin_batch()
+
+            try:
+                with transaction.atomic(using=self.using):
+                    result = self.handler(*args, **kwargs)
+            except DatabaseError as ex:
+                if attempt >= self.retries or not _is_retryable_error(ex) \
+                        or (not new_transaction and _is_serialization_error(ex)):
+                    raise
+
+                if new_transaction and tx is not None:
+                    tx.rollback()
+
+                attempt += 1
+                with self._lock:
+                    self.retried += 1
+                delay = get_retry_delay(attempt)
+                logger.debug('Batch has failed with transient error, retry %d in %.3f seconds: %s'
+                             % (attempt, delay, ex))
+                sleep(delay)
+                continue
+
+            if tx is not None:
+                tx.end_batch(result)
+            return result
+
+
+class BatchTransaction(object):
+    """
+    Controls transactions of batches, executed by batched_operation. See its transaction parameter.
+    Transactions are committed outside transaction.atomic() block and released as savepoints inside it.
+    Results of batches are appended to results list, when their transaction has been committed.
+    """
+    def __init__(self, using, mode, results):  # type: (Optional[str], Union[None, str, int], List[Any]) -> None
+        """
+        :param using: Database alias, handler queries
+        :param mode: None (batches are executed in current transaction), one of TRANSACTION_MODES
+            or number of batches to commit together
+        :param results: A list to append results of committed batches to
+        """
+        self.using = using
+        self.mode = mode
+        self.results = results
+        self._atomic = None  # type: Optional[transaction.Atomic]
+        self._pending = []  # type: List[Any]
+
+    def __enter__(self):
+        if self.mode == 'single':
+            self._begin()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._end(exc_type, exc_val, exc_tb)
+        return False
+
+    def _begin(self):  # type: () -> None
+        self._atomic = transaction.atomic(using=self.using)
+        self._atomic.__enter__()
+
+    def _end(self, exc_type=None, exc_val=None, exc_tb=None):  # type: (Optional[type], Optional[BaseException], Any) -> None
+        atomic, self._atomic = self._atomic, None
+        if atomic is not None:
+            # Transaction is rolled back, if exception is given
+            atomic.__exit__(exc_type, exc_val, exc_tb)
+
+        if exc_type is None:
+            self.results.extend(self._pending)
+        self._pending = []
+
+    @property
+    def commits_every_batch(self):  # type: () -> bool
+        """
+        Checks if every batch is finished by commit (or autocommit), so it can be retried in a new transaction
+        """
+        return self.mode is None or self.mode == 'per_batch' or (type(self.mode) is int and self.mode == 1)
+
+    def rollback(self):  # type: () -> None
+        """
+        Rolls back current transaction. Results of its batches are dropped.
+        """
+        self._end(DatabaseError, DatabaseError('Batch is rolled back'), None)
+
+    def begin_batch(self):  # type: () -> None
+        """
+        Starts a transaction before the batch, if it is not started yet
+        """
+        if self._atomic is None and self.mode not in (None, 'single'):
+            self._begin()
+
+    def end_batch(self, result):  # type: (Any) -> None
+        """
+        Saves result of executed batch. Commits the transaction, if it contains enough batches.
+        :param result: Batch result
+        """
+        self._pending.append(result)
+        if self.mode is None or self.mode == 'per_batch' or (type(self.mode) is int and len(self._pending) >= self.mode):
+            self._end()
+
+
+class LazyBatches(object):
+    """
+    Data, read from an iterator and converted batch by batch, when batches are executed.
+    So memory usage is proportional to batch size, not to data size, and the first batch starts immediately.
+    """
+    def __init__(self, first_batch, items, convert):  # type: (Any, Iterable[Any], Callable[[Tuple[Any, ...]], Any]) -> None
+        """
+        :param first_batch: The first batch, already converted
+        :param items: Iterator over the rest of items
+        :param convert: Function, converting a tuple of items to a batch
+        """
+        self.first_batch = first_batch
+        self.items = items
+        self.convert = convert
+
+    def iter_batches(self, batch_size):  # type: (int) -> Iterable[Any]
+        """
+        Reads items and converts them to batches. Iterator can be read once only.
+        :param batch_size: Number of items in a batch
+        :return: A generator of converted batches
+        """
+        yield self.first_batch
+        for b in batch(self.items, batch_size):
+            yield self.convert(b)
+
+
+def iter_batches(data, batch_size):  # type: (Iterable, Optional[int]) -> Iterable[Union[dict, Tuple[Any, ...], ColumnarValues]]
+    """
+    Splits data to batches of given size
+    :param data: Data to split. Must be iterable. If dict, will be split to dicts by keys.
+        If LazyBatches, its batches are read and converted one by one.
+        If ColumnarValues, its columns are sliced.
+    :param batch_size: Size of batches. If None, data is a single batch.
+    :return: A generator of batches
+    """
+    if isinstance(data, LazyBatches):
+        for b in data.iter_batches(batch_size):
+            yield b
+    elif batch_size is None:
+        yield data
+    elif isinstance(data, ColumnarValues):
+        if type(batch_size) is not int:
+            raise TypeError("batch_size must be positive integer")
+        elif batch_size <= 0:
+            raise ValueError("batch_size must be positive integer")
+
+        for start in range(0, len(data), batch_size):
+            yield data.slice(start, start + batch_size)
+    elif isinstance(data, dict):
+        for b in batch(data.items(), batch_size):
+            yield dict(b)
+    else:
+        for b in batch(data, batch_size):
+            yield b
+
+
+def get_thread_args(args):  # type: (Iterable[Any]) -> List[Any]
+    """
+    django creates a database connection for every thread, and connection can't be used in other threads.
+    Replaces connections in handler arguments with connections of current thread.
+    :param args: Handler arguments
+    :return: A list of arguments
+    """
+    return [connections[arg.alias] if isinstance(arg, BaseDatabaseWrapper) else arg for arg in args]
+
+
+def _pipelined_batches(handler, data, batch_size, batch_delay, args, kwargs, data_arg_index, using, tx,
+                       pipeline, stop=None):
+    # type: (Callable, Iterable, Optional[int], float, List[Any], dict, int, Optional[str], BatchTransaction, int, Optional[Event]) -> None
+    """
+    Executes batched_operation with pipeline parameter. See batched_operation and Pipeline.
+    Statements of batches are queued and flushed in groups of pipeline batches, every group in a single transaction.
+    Results of batches are passed to BatchTransaction, when their group has been committed.
+    """
+    with Pipeline(connections[using or DEFAULT_DB_ALIAS]) as pipe:
+        pending = []  # type: List[Any]
+        for j, batch_items in enumerate(iter_batches(data, batch_size)):
+            if stop is not None and stop.is_set():
+                break
+
+            logger.debug('Queueing batch %d with size %d' % (j + 1, len(batch_items)))
+            pipe.batch_index = j
+            args[data_arg_index] = batch_items
+            pending.append(handler(*args, **kwargs))
+
+            if len(pending) >= pipeline:
+                pipe.flush()
+                for r in pending:
+                    tx.end_batch(resolve_result(r))
+                pending = []
+                sleep(batch_delay)
+
+        pipe.flush()
+        for r in pending:
+            tx.end_batch(resolve_result(r))
+
+
+def _execute_batches(handler, data, batch_size, batch_delay, args, kwargs, data_arg_index, row_params, using,
+                     results, stop=None, pipeline=None, transaction=None):
+    # type: (Callable, Iterable, Union[None, int, str], float, List[Any], dict, int, Optional[int], Optional[str], List[Any], Optional[Event], Optional[int], Union[None, str, int]) -> None
+    """
+    Executes handler on batches of data one by one. See batched_operation.
+    Results of committed batches are appended to results list, so they are available, if some batch has failed.
+    :param stop: If given, execution is stopped before the next batch, when event is set
+    :param pipeline: If given, batches are executed in groups of this size by _pipelined_batches()
+    :param transaction: Transaction mode, see BatchTransaction
+    """
+    with BatchTransaction(using, transaction, results) as tx:
+        if pipeline is not None:
+            _pipelined_batches(handler, data, batch_size, batch_delay, args, kwargs, data_arg_index, using, tx,
+                               pipeline, stop=stop)
+            return
+
+        if batch_size == 'auto':
+            _auto_batched_operation(handler, data, batch_delay, args, kwargs, data_arg_index, row_params, using,
+                                    tx, stop=stop)
+            return
+
+        for j, batch_items in enumerate(iter_batches(data, batch_size)):
+            if stop is not None and stop.is_set():
+                break
+
+            logger.debug('Processing batch %d with size %d' % (j + 1, len(batch_items)))
+            args[data_arg_index] = batch_items
+            _execute_batch(handler, args, kwargs, tx)
+            sleep(batch_delay)
+
+
+class ParallelBatchError(Exception):
+    """
+    Raised by batched_operation with parallel parameter, if any of workers has failed.
+    Batches are committed independently, so batches executed before the error are saved in database.
+    Other workers stop before their next batch.
+    """
+    def __init__(self, errors, results):  # type: (List[Exception], List[Any]) -> None
+        """
+        :param errors: Exceptions, raised by failed workers, in partitions order
+        :param results: Results of committed batches, in partitions order and batches order inside a partition
+        """
+        self.errors = errors
+        self.results = results
+        super(ParallelBatchError, self).__init__(
+            '%d of parallel workers failed. First error: %r' % (len(errors), errors[0]))
+
+
+def partition_data(data, parallel):  # type: (Iterable, int) -> List[Union[dict, list]]
+    """
+    Splits data to partitions, which can be processed in parallel.
+    Dicts are split by stable hash of the key, so equal keys always get into the same partition
+    and parallel workers don't update the same records. Other iterables are split round robin.
+    Items order inside a partition is kept.
+    :param data: Data to split. Must be iterable. If dict, will be split to dicts by keys.
+    :param parallel: Number of partitions
+    :return: A list of non empty partitions
+    """
+    if isinstance(data, dict):
+        dict_parts = [{} for _ in range(parallel)]
+        for key, val in data.items():
+            # Builtin hash() of strings is randomized for every process. It would make partitions non deterministic.
+            dict_parts[crc32(repr(key).encode('utf-8')) % parallel][key] = val
+        parts = dict_parts
+    else:
+        list_parts = [[] for _ in range(parallel)]
+        for i, item in enumerate(data):
+            list_parts[i % parallel].append(item)
+        parts = list_parts
+
+    return [part for part in parts if part]
+
+
+def _parallel_batched_operation(handler, data, batch_size, batch_delay, args, kwargs, data_arg_index, row_params,
+                                using, parallel, pipeline=None, transaction=None):
+    # type: (Callable, Iterable, Union[None, int, str], float, List[Any], dict, int, Optional[int], Optional[str], int, Optional[int], Union[None, str, int]) -> List[Any]
+    """
+    Executes batched_operation with parallel parameter. See batched_operation.
+    """
+    if connections[using or DEFAULT_DB_ALIAS].in_atomic_block:
+        raise ValueError("parallel parameter can't be used inside a transaction: "
+                         "workers use their own connections and commit every batch independently")
+
+    partitions = partition_data(data, parallel)
+    stop = Event()
+
+    def _worker(partition):  # type: (Union[dict, list]) -> Tuple[List[Any], Optional[Exception]]
+        worker_results = []
+        try:
+            _execute_batches(handler, partition, batch_size, batch_delay, get_thread_args(args), kwargs, data_arg_index,
+                             row_params, using, worker_results, stop=stop, pipeline=pipeline,
+                             transaction=transaction)
+            return worker_results, None
+        except Exception as ex:
+            stop.set()
+            return worker_results, ex
+        finally:
+            connections.close_all()
+
+    if not partitions:
+        return []
+
+    with ThreadPoolExecutor(max_workers=len(partitions)) as executor:
+        outcomes = list(executor.map(_worker, partitions))
+
+    results = [r for worker_results, _ in outcomes for r in worker_results]
+    errors = [ex for _, ex in outcomes if ex is not None]
+    if errors:
+        raise ParallelBatchError(errors, results)
+
+    return results
+
+
+def validate_transaction_mode(mode, parallel=None, pipeline=None):
+    # type: (Union[None, str, int], Optional[int], Optional[int]) -> Union[None, str, int]
+    """
+    Validates transaction parameter of batched_operation
+    :param mode: Parameter value
+    :param parallel: Validated parallel parameter
+    :param pipeline: Validated pipeline parameter
+    :return: Validated parameter
+    """
+    if mode is None:
+        return mode
+    if not isinstance(mode, string_types) and type(mode) is not int:
+        raise TypeError("transaction must be None, one of [%s] or positive integer" % ', '.join(TRANSACTION_MODES))
+    if isinstance(mode, string_types) and mode not in TRANSACTION_MODES:
+        raise ValueError("transaction must be None, one of [%s] or positive integer" % ', '.join(TRANSACTION_MODES))
+    if type(mode) is int and mode < 1:
+        raise ValueError("transaction must be None, one of [%s] or positive integer" % ', '.join(TRANSACTION_MODES))
+    if mode == 'single' and parallel is not None and parallel > 1:
+        raise ValueError("transaction='single' can't be used with parallel: workers use their own connections")
+    if mode != 'single' and pipeline is not None:
+        raise ValueError("pipeline can be used with transaction='single' only: "
+                         "every group of pipelined batches is executed in its own transaction")
+
+    return mode
+
+
+def validate_retries(retries, pipeline=None):  # type: (int, Optional[int]) -> int
+    """
+    Validates retries parameter of batched_operation
+    :param retries: Parameter value
+    :param pipeline: Validated pipeline parameter
+    :return: Validated parameter
+    """
+    if type(retries) is not int:
+        raise TypeError("retries must be non negative integer")
+    if retries < 0:
+        raise ValueError("retries must be non negative integer")
+    if retries and pipeline is not None:
+        raise ValueError("retries can't be used with pipeline")
+
+    return retries
+
+
+def batched_operation(handler, data, batch_size=None, batch_delay=0, args=(), kwargs=None, data_arg_index=0,
+                      row_params=None, using=None, parallel=None, pipeline=None, transaction=None, retries=0):
+    # type: (Callable, Iterable, Union[None, int, str], float, Iterable, Optional[dict], int, Optional[int], Optional[str], Optional[int], Optional[int], Union[None, str, int], int) -> BatchResults
     """
     Splits data to batches, configured by batch_size parameter and executes handler on each of them
     Makes a delay between every batch.
@@ -138,12 +868,43 @@ def batched_operation(handler, data, batch_size=None, batch_delay=0, args=(), kw
     :param handler: A callable to apply to a batch
     :param data: Data to process. Must be iterable. If dict, will be split to dicts by keys.
     :param batch_size: Size of parts to split data to.
+        If 'auto', batch size is computed by AutoBatchSizer for every batch.
     :param batch_delay: Delay between batches handling in seconds
     :param args: Additional arguments to pass to handler
     :param kwargs: Additional arguments to pass to handler
     :param data_arg_index: If data is not first argument (by default), you can pass its index in args here.
         Note, that args must contain any placeholder value, which will be replaced by batch data
-    :return: A list of results for each batch
+    :param row_params: Number of query parameters per data item, used with batch_size='auto'.
+        None, if number of parameters doesn't depend on number of items.
+    :param using: Database alias, handler queries. Used with batch_size='auto', parallel, pipeline, transaction
+        and retries.
+    :param parallel: If given, data is split to this number of partitions by partition_data().
+        Every partition is split to batches and processed in a separate thread with its own database connection.
+        Database connections in args are replaced with the thread ones.
+        Every batch is committed independently. It can't be used inside a transaction.
+        If any worker fails, ParallelBatchError is raised, containing results of committed batches.
+    :param pipeline: If given, handler queues its statements to Pipeline instead of executing them.
+        Statements of this number of batches are sent to database together and executed in a single transaction,
+        without waiting for result of every batch (pipeline mode of psycopg 3).
+        If a statement fails, batch_index attribute of the exception raised contains index of the failed batch.
+        It requires psycopg 3 database driver with libpq 14+ and can't be used with batch_size='auto'.
+    :param transaction: Transaction control. By default batches are executed in current transaction
+        (or in autocommit mode outside of transaction.atomic() block).
+        + 'single' - all batches are executed in a single transaction.
+        + 'per_batch' - every batch is committed after execution, so its locks are released.
+        + Integer N - every N batches are committed together.
+        Inside transaction.atomic() block transactions are savepoints: they are released instead of committed.
+        With parallel, every worker controls transactions of its own batches, 'single' mode can't be used.
+        With pipeline, every group is already executed in a transaction, only 'single' mode can be used.
+    :param retries: Maximum number of retries of a batch, failed by deadlock or serialization failure.
+        Every attempt is executed in a transaction (a savepoint inside transaction.atomic() block),
+        which is rolled back before retry. Retries are delayed by jittered exponential backoff.
+        Every attempt is a new transaction only, if batches are committed one by one (transaction None,
+        'per_batch' or 1) outside transaction.atomic() block. Otherwise attempts are savepoints, and
+        serialization failures are raised without retries: savepoint sees the same transaction snapshot.
+        It can't be used with pipeline.
+    :return: BatchResults: a list of results for each batch with number of retries.
+        If parallel is given, results are ordered by partitions.
     """
     if type(batch_delay) not in {int, float}:
         raise TypeError("batch_delay must be non negative float")
@@ -155,26 +916,38 @@ def batched_operation(handler, data, batch_size=None, batch_delay=0, args=(), kw
     elif not 0 <= data_arg_index < len(tuple(args)):
         raise ValueError("data_arg_num must be integer between 0 and len(args)")
 
-    def _batches_iterator():
-        if batch_size is None:
-            yield data
-        elif isinstance(data, dict):
-            for b in batch(data.items(), batch_size):
-                yield dict(b)
-        else:
-            for b in batch(data, batch_size):
-                yield b
-
-    results = []
-    args = list(args)
-    kwargs = kwargs or {}
-    for j, batch_items in enumerate(_batches_iterator()):
-        logger.debug('Processing batch %d with size %d' % (j + 1, len(batch_items)))
-        args[data_arg_index] = batch_items
-        r = handler(*args, **kwargs)
-        results.append(r)
-        sleep(batch_delay)
+    if parallel is not None and type(parallel) is not int:
+        raise TypeError("parallel must be positive integer or None")
+    elif parallel is not None and parallel < 1:
+        raise ValueError("parallel must be positive integer or None")
+
+    if pipeline is not None and type(pipeline) is not int:
+        raise TypeError("pipeline must be positive integer or None")
+    elif pipeline is not None and pipeline < 1:
+        raise ValueError("pipeline must be positive integer or None")
+    elif pipeline is not None and batch_size == 'auto':
+        raise ValueError("pipeline can't be used with batch_size='auto'")
+    elif pipeline is not None and not pipeline_available(connections[using or DEFAULT_DB_ALIAS]):
+        raise ValueError("pipeline requires psycopg 3 database driver with libpq 14+")
+
+    validate_transaction_mode(transaction, parallel=parallel, pipeline=pipeline)
+    validate_retries(retries, pipeline=pipeline)
+
+    retrying_handler = None
+    if retries:
+        handler = retrying_handler = RetryingHandler(handler, retries, using)
 
+    results = BatchResults()
+    if parallel is not None and parallel > 1:
+        results.extend(_parallel_batched_operation(handler, data, batch_size, batch_delay, list(args), kwargs or {},
+                                                   data_arg_index, row_params, using, parallel, pipeline=pipeline,
+                                                   transaction=transaction))
+    else:
+        _execute_batches(handler, data, batch_size, batch_delay, list(args), kwargs or {}, data_arg_index,
+                         row_params, using, results, pipeline=pipeline, transaction=transaction)
+
+    if retrying_handler is not None:
+        results.retries = retrying_handler.retried
     return results
 
 
@@ -185,3 +958,117 @@ def is_auto_set_field(field):  # type: (Field) -> bool
     :return: Boolean
     """
     return getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)
+
+
+def get_db_converters(model, conn, columns):
+    # type: (Type[Model], TDatabase, Iterable[str]) -> List[Tuple[Optional[str], List[Callable], Any]]
+    """
+    Gets model field attribute names and database value converters of columns, returned by query
+    :param model: Model, query returns records of
+    :param conn: Database connection used
+    :param columns: Returned column names
+    :return: A list of (field attname or None, converters, column expression) tuples.
+        Columns, which are not model fields, have no attname and converters.
+    """
+    fields = {f.column: f for f in get_model_fields(model, concrete=True)}
+    result = []
+    for column in columns:
+        field = fields.get(column)
+        if field is None:
+            result.append((None, [], None))
+        else:
+            col = field.get_col(model._meta.db_table)
+            converters = conn.ops.get_db_converters(col) + col.get_db_converters(conn)
+            result.append((field.attname, converters, col))
+    return result
+
+
+class LRUCache(object):
+    """
+    A dict-like storage, bounded by number of items.
+    If there is no space left, least recently used item is evicted.
+    Counts hits, misses and evictions in order to monitor cache efficiency.
+    """
+    def __init__(self, maxsize=128, on_evict=None):
+        # type: (int, Optional[Callable[[Hashable, Any], None]]) -> None
+        """
+        :param maxsize: Maximum number of items to store
+        :param on_evict: Optional callable, called with key and value of every evicted item
+        """
+        if type(maxsize) is not int:
+            raise TypeError("maxsize must be positive integer")
+        elif maxsize <= 0:
+            raise ValueError("maxsize must be positive integer")
+
+        self.maxsize = maxsize
+        self._on_evict = on_evict
+        self._data = OrderedDict()
+        self._lock = RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def get(self, key, default=None):  # type: (Hashable, Any) -> Any
+        """
+        Gets item from cache, marking it as recently used
+        :param key: Key to search
+        :param default: Value returned if key is not found
+        :return: Cached value or default
+        """
+        with self._lock:
+            try:
+                value = self._data.pop(key)
+            except KeyError:
+                self.misses += 1
+                return default
+
+            self._data[key] = value
+            self.hits += 1
+            return value
+
+    def set(self, key, value):  # type: (Hashable, Any) -> None
+        """
+        Puts item to cache, evicting least recently used items if cache is full
+        :param key: Key to store value with
+        :param value: Value to store
+        :return: None
+        """
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+
+            while len(self._data) > self.maxsize:
+                old_key, old_value = self._data.popitem(last=False)
+                self.evictions += 1
+                if self._on_evict is not None:
+                    self._on_evict(old_key, old_value)
+
+    def values(self):  # type: () -> List[Any]
+        """
+        Returns cached values from least to most recently used
+        :return: A list of values
+        """
+        with self._lock:
+            return list(self._data.values())
+
+    def clear(self):  # type: () -> None
+        """
+        Removes all items from cache and resets counters. on_evict callback is not called.
+        :return: None
+        """
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):  # type: () -> CacheInfo
+        """
+        Returns cache statistics
+        :return: CacheInfo named tuple
+        """
+        return CacheInfo(self.hits, self.misses, self.evictions, self.maxsize, len(self._data))
@@ -0,0 +1,153 @@
+import asyncio
+import threading
+from unittest import mock
+
+from django.db import connection, transaction, OperationalError
+from django.test import TransactionTestCase
+
+from django_pg_bulk_update import async_query, utils
+from django_pg_bulk_update.async_query import abulk_update, abulk_update_or_create, abulk_create, abulk_delete
+from tests.models import TestModel
+
+
+def run(coroutine):
+    return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class AsyncQueryTest(TransactionTestCase):
+    fixtures = ['test_model']
+
+    def test_validation(self):
+        with self.assertRaises(TypeError):
+            run(abulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning='id', returning_stream=1))
+
+        with self.assertRaises(ValueError):
+            run(abulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning_stream=True))
+
+        with self.assertRaises(ValueError):
+            run(abulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning='id', returning_stream=True,
+                             returning_format='columns'))
+
+        # Parameters are validated by sync functions
+        with self.assertRaises(TypeError):
+            run(abulk_update(TestModel, [{'id': 1, 'name': 'test1'}], prepare=1))
+
+        with self.assertRaises(ValueError):
+            run(abulk_update(TestModel, [{'id': 1, 'name': 'test1'}], retries=-1))
+
+        # Every batch is committed separately
+        with self.assertRaises(ValueError):
+            run(abulk_update(TestModel, [{'id': 1, 'name': 'test1'}], transaction='per_operation'))
+
+        self.assertEqual(1, run(abulk_update(TestModel, [{'id': 1, 'name': 'test1'}], transaction='per_batch')))
+
+    def test_update(self):
+        values = [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 6)]
+        self.assertEqual(5, run(abulk_update(TestModel, values, batch_size=2)))
+        self.assertListEqual(['updated_%d' % i for i in range(1, 6)],
+                             list(TestModel.objects.filter(id__lte=5).order_by('id').values_list('name', flat=True)))
+
+        res = run(abulk_update(TestModel, values, returning=('id', 'name'), returning_format='tuples', batch_size='auto'))
+        self.assertListEqual([(i, 'updated_%d' % i) for i in range(1, 6)], sorted(res))
+
+        res = run(TestModel.objects.filter(id__gte=3).apg_bulk_update(values, returning='id'))
+        self.assertListEqual([3, 4, 5], sorted(res.values_list('id', flat=True)))
+
+    def test_lazy_batches(self):
+        threads = []
+
+        def _values():
+            for i in range(1, 6):
+                # Items are read and validated in operation thread, not in event loop one
+                threads.append(threading.current_thread())
+                yield {'id': i, 'name': 'updated_%d' % i}
+
+        self.assertEqual(5, run(abulk_update(TestModel, _values(), batch_size=2)))
+        self.assertEqual(5, len(threads))
+        self.assertNotIn(threading.main_thread(), threads)
+
+    def test_stream(self):
+        values = [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 6)]
+
+        async def _read(limit=None):
+            stream = await abulk_update(TestModel, values, returning=('id', 'name'), returning_stream=True,
+                                        batch_size=2)
+            res = []
+            async for item in stream:
+                res.append((item.id, item.name))
+                if len(res) == limit:
+                    break
+            await stream.aclose()
+            return res
+
+        # Next batch is executed, when records of the previous one have been read
+        self.assertEqual(1, len(run(_read(limit=1))))
+        self.assertEqual(2, TestModel.objects.filter(name__startswith='updated').count())
+
+        self.assertListEqual([(i, 'updated_%d' % i) for i in range(1, 6)], sorted(run(_read())))
+
+    def test_cancel(self):
+        async def _update():
+            task = asyncio.ensure_future(abulk_update(TestModel, [{'id': 1, 'name': 'updated_1'}]))
+            # Record is locked by the test connection, so the query waits for the lock until it is canceled
+            await asyncio.sleep(0.5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with transaction.atomic():
+            TestModel.objects.select_for_update().filter(id=1).first()
+            run(_update())
+
+        self.assertEqual('test1', TestModel.objects.get(id=1).name)
+
+        # Connection of canceled operation is closed
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM pg_stat_activity WHERE datname = current_database()")
+            self.assertEqual(1, cursor.fetchone()[0])
+
+    def test_create_upsert_delete(self):
+        res = run(TestModel.objects.apg_bulk_create([{'id': 10, 'name': 'test10'}], returning='id',
+                                                    returning_format='tuples'))
+        self.assertListEqual([(10,)], res)
+
+        res = run(abulk_update_or_create(TestModel, [{'id': 10, 'name': 'updated10'}, {'id': 11, 'name': 'test11'}],
+                                         report_inserted=True))
+        self.assertEqual(1, res.inserted)
+
+        self.assertEqual(2, run(abulk_delete(TestModel, [10, 11])))
+        self.assertEqual(0, run(abulk_create(TestModel, [])))
+        self.assertEqual(9, TestModel.objects.count())
+
+    def test_retries(self):
+        class Deadlock(Exception):
+            pgcode = '40P01'
+
+        calls = []
+        queued_batch, thread_batch = async_query._run_queued_batch, async_query._run_batch_in_thread
+
+        async def _run_batch(*args):
+            calls.append(args[-1])
+            if len(calls) == 1:
+                raise OperationalError('deadlock detected') from Deadlock()
+            run_batch = queued_batch if len(args) == 4 else thread_batch
+            return await run_batch(*args)
+
+        values = [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 6)]
+        with mock.patch.object(utils, 'RETRY_BASE_DELAY', 0), \
+                mock.patch.object(async_query, '_run_queued_batch', _run_batch), \
+                mock.patch.object(async_query, '_run_batch_in_thread', _run_batch):
+            res = run(abulk_update(TestModel, values, batch_size=2, retries=1))
+
+        self.assertEqual(5, res)
+        self.assertEqual(1, res.retries)
+        self.assertEqual(4, len(calls))
+        self.assertListEqual(['updated_%d' % i for i in range(1, 6)],
+                             list(TestModel.objects.filter(id__lte=5).order_by('id').values_list('name', flat=True)))
+
+        # Retries are not applied, if retries parameter is not given
+        calls.clear()
+        with self.assertRaises(OperationalError):
+            with mock.patch.object(async_query, '_run_queued_batch', _run_batch), \
+                    mock.patch.object(async_query, '_run_batch_in_thread', _run_batch):
+                run(abulk_update(TestModel, values, batch_size=2))
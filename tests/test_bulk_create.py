@@ -33,6 +33,10 @@ class TestInputFormats(TestCase):
 
         self.assertEqual(1, bulk_create(TestModel, [{'name': 'abc'}]))
         self.assertEqual(1, bulk_create(TestModel, [{'name': 'abc', 'int_field': 2}]))
+        self.assertEqual(1, bulk_create(TestModel, [('abc', 2)], columns=('name', 'int_field')))
+
+        with self.assertRaises(TypeError):
+            bulk_create(TestModel, ['abc'], columns=('name',))
 
     def test_using(self):
         values = [{
@@ -89,6 +93,20 @@ class TestInputFormats(TestCase):
             bulk_create(TestModel, [{'id': 104, 'name': 'test1'}], batch_size=1, batch_delay=-2)
 
 
+    def test_strategy(self):
+        with self.assertRaises(TypeError):
+            bulk_create(TestModel, [{'id': 100, 'name': 'test1'}], strategy=123)
+
+        with self.assertRaises(ValueError):
+            bulk_create(TestModel, [{'id': 101, 'name': 'test1'}], strategy='invalid')
+
+        with self.assertRaises(ValueError):
+            bulk_create(TestModel, [{'id': 102, 'array_field': [1, 2]}], strategy='unnest')
+
+        self.assertEqual(1, bulk_create(TestModel, [{'id': 103, 'name': 'test1'}], strategy='values'))
+        self.assertEqual(1, bulk_create(TestModel, [{'id': 104, 'name': 'test1'}], strategy='unnest'))
+        self.assertEqual(1, bulk_create(TestModel, [{'id': 105, 'name': 'test1'}], strategy='copy'))
+
 class TestSimple(TestCase):
     fixtures = ['test_model', 'test_upper_case_model']
     multi_db = True
@@ -118,6 +136,13 @@ class TestSimple(TestCase):
                 self.assertEqual('test%d' % pk, name)
                 self.assertEqual(pk, int_field)
 
+    def test_columns(self):
+        rows = [(i, 'bulk_create_%d' % i) for i in range(11, 14)]
+        res = bulk_create(TestModel, rows, columns=('id', 'name'), returning=('id', 'name', 'int_field'),
+                          returning_format='tuples')
+        self.assertListEqual([row + (None,) for row in rows], sorted(res))
+        self.assertEqual(12, TestModel.objects.count())
+
     def test_auto_id(self):
         res = bulk_create(TestModel, [{
             'name': 'bulk_create'
@@ -248,6 +273,51 @@ class TestSimple(TestCase):
         res = bulk_create(TestModel, [], batch_size=10)
         self.assertEqual(0, res)
 
+    def test_strategy_unnest(self):
+        res = bulk_create(TestModel, [{
+            'id': 11,
+            'name': 'bulk_create_11'
+        }, {
+            'id': 12,
+            'name': None
+        }, {
+            'id': 13,
+            'name': 'bulk_create_13'
+        }], strategy='unnest', batch_size=2)
+        self.assertEqual(3, res)
+
+        # 9 from fixture + 3 created
+        self.assertEqual(12, TestModel.objects.all().count())
+
+        for pk, name, int_field in TestModel.objects.all().order_by('id').values_list('id', 'name', 'int_field'):
+            if pk == 12:
+                self.assertIsNone(name)
+                self.assertIsNone(int_field)
+            elif pk > 10:
+                self.assertEqual('bulk_create_%d' % pk, name)
+                self.assertIsNone(int_field)
+            else:
+                self.assertEqual('test%d' % pk, name)
+                self.assertEqual(pk, int_field)
+
+    def test_strategy_copy(self):
+        checked = datetime(2020, 1, 2, 3, 4, 5, 6, tzinfo=tz_utc)
+        res = bulk_create(AutoNowModel, [{
+            'id': 11,
+            'checked': checked
+        }, {
+            'id': 12,
+            'checked': None
+        }], strategy='copy', returning=('id', 'created', 'checked'))
+        self.assertSetEqual({(11, checked), (12, None)}, set(res.values_list('id', 'checked')))
+        for instance in res:
+            self.assertIsNotNone(instance.created)
+
+        res = bulk_create(TestModel, [{'id': i, 'name': 'copy_%d' % i} for i in range(11, 21)],
+                          strategy='copy', batch_size=3)
+        self.assertEqual(10, res)
+        self.assertEqual(10, TestModel.objects.filter(name__startswith='copy_').count())
+
     def test_returning(self):
         res = bulk_create(TestModel, [{
             'id': 11,
@@ -0,0 +1,141 @@
+from django.test import TestCase
+
+from django_pg_bulk_update.query import bulk_delete, STRATEGIES
+from tests.models import TestModel
+
+
+class TestInputFormats(TestCase):
+    fixtures = ['test_model']
+
+    def test_model(self):
+        with self.assertRaises(TypeError):
+            bulk_delete(123, [])
+
+        with self.assertRaises(TypeError):
+            bulk_delete('123', [])
+
+    def test_keys(self):
+        with self.assertRaises(TypeError):
+            bulk_delete(TestModel, 123)
+
+        with self.assertRaises(TypeError):
+            bulk_delete(TestModel, 'abc')
+
+        with self.assertRaises(TypeError):
+            bulk_delete(TestModel, [1, 2], key_fields=('id', 'name'))
+
+        with self.assertRaises(ValueError):
+            bulk_delete(TestModel, [(1, 'test1', 1)], key_fields=('id', 'name'))
+
+        with self.assertRaises(ValueError):
+            bulk_delete(TestModel, [{'name': 'test1'}])
+
+        with self.assertRaises(TypeError):
+            bulk_delete(TestModel, [{'id': {'a': 1}}])
+
+        self.assertEqual(1, bulk_delete(TestModel, [1]))
+        self.assertEqual(1, bulk_delete(TestModel, [{'id': 2, 'name': 'ignored'}]))
+        self.assertEqual(1, bulk_delete(TestModel, [(3, 'test3')], key_fields=('id', 'name')))
+        self.assertEqual(1, bulk_delete(TestModel, [['test4', 4]], key_fields=('name', 'int_field')))
+        self.assertEqual(0, bulk_delete(TestModel, []))
+
+    def test_using(self):
+        with self.assertRaises(ValueError):
+            bulk_delete(TestModel, [1], using='invalid')
+
+        with self.assertRaises(TypeError):
+            bulk_delete(TestModel, [1], using=123)
+
+        self.assertEqual(1, bulk_delete(TestModel, [1], using='default'))
+
+    def test_options(self):
+        with self.assertRaises(TypeError):
+            bulk_delete(TestModel, [1], prepare=1)
+
+        with self.assertRaises(TypeError):
+            bulk_delete(TestModel, [1], order_keys=1)
+
+        with self.assertRaises(ValueError):
+            bulk_delete(TestModel, [1], strategy='invalid')
+
+
+class TestSimple(TestCase):
+    fixtures = ['test_model']
+    multi_db = True
+    databases = ['default', 'secondary']
+
+    def _assert_deleted(self, pks):
+        self.assertListEqual([pk for pk in range(1, 10) if pk not in pks],
+                             list(TestModel.objects.order_by('id').values_list('id', flat=True)))
+
+    def test_delete(self):
+        res = bulk_delete(TestModel, [1, 5, 8, 100])
+        self.assertEqual(3, res)
+        self._assert_deleted({1, 5, 8})
+
+    def test_composite_key(self):
+        res = bulk_delete(TestModel, [('test1', 1), ('test2', 3), ('test5', 5)], key_fields=('name', 'int_field'))
+        self.assertEqual(2, res)
+        self._assert_deleted({1, 5})
+
+    def test_key_fields_ops(self):
+        res = bulk_delete(TestModel, [[1, 2], [7]], key_fields_ops=['in'])
+        self.assertEqual(3, res)
+        self._assert_deleted({1, 2, 7})
+
+        res = bulk_delete(TestModel, [(5, 'test8')], key_fields=('int_field', 'name'), key_fields_ops=('gt', 'eq'))
+        self.assertEqual(1, res)
+        self._assert_deleted({1, 2, 7, 8})
+
+    def test_where(self):
+        res = bulk_delete(TestModel, [1, 5, 8], where=TestModel.objects.filter(int_field__gte=5).query.where)
+        self.assertEqual(2, res)
+        self._assert_deleted({5, 8})
+
+    def test_batch(self):
+        res = bulk_delete(TestModel, [1, 5, 8], batch_size=2, order_keys=True)
+        self.assertEqual(3, res)
+        self._assert_deleted({1, 5, 8})
+
+    def test_strategy(self):
+        for strategy in STRATEGIES:
+            pk = STRATEGIES.index(strategy) + 1
+            self.assertEqual(2, bulk_delete(TestModel, [(pk, 'test%d' % pk), (pk + 3, 'test%d' % (pk + 3))],
+                                            key_fields=('id', 'name'), strategy=strategy,
+                                            prepare=strategy != 'values'))
+
+        self._assert_deleted({1, 2, 3, 4, 5, 6})
+
+    def test_returning(self):
+        res = bulk_delete(TestModel, [1, 5, 8], returning=('id', 'name'), batch_size=2)
+        self.assertEqual(3, res.count())
+        self.assertSetEqual({(1, 'test1'), (5, 'test5'), (8, 'test8')}, {(item.id, item.name) for item in res})
+        self._assert_deleted({1, 5, 8})
+
+    def test_returning_empty(self):
+        res = bulk_delete(TestModel, [], returning='id')
+        self.assertEqual(0, res.count())
+
+    def test_using(self):
+        self.assertEqual(2, bulk_delete(TestModel, [1, 2], using='secondary'))
+        self.assertEqual(7, TestModel.objects.db_manager('secondary').count())
+        self._assert_deleted(set())
+
+
+class TestManager(TestCase):
+    fixtures = ['test_model']
+    multi_db = True
+    databases = ['default', 'secondary']
+
+    def test_bulk_delete(self):
+        self.assertEqual(3, TestModel.objects.pg_bulk_delete([1, 5, 8]))
+        self.assertEqual(6, TestModel.objects.count())
+
+    def test_where(self):
+        self.assertEqual(2, TestModel.objects.filter(int_field__gte=5).pg_bulk_delete([1, 5, 8]))
+        self.assertEqual(7, TestModel.objects.count())
+
+    def test_using(self):
+        self.assertEqual(1, TestModel.objects.db_manager('secondary').pg_bulk_delete([1]))
+        self.assertEqual(8, TestModel.objects.db_manager('secondary').count())
+        self.assertEqual(9, TestModel.objects.count())
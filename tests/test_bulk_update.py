@@ -1,14 +1,19 @@
 from datetime import datetime, date
-from unittest import skipIf
+from unittest import skipIf, mock
 
+from django.db import connection, transaction
 from django.db.models.functions import Upper
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 
 from django_pg_bulk_update.clause_operators import InClauseOperator
 from django_pg_bulk_update.compatibility import jsonb_available, hstore_available, array_available, tz_utc, \
     django_expressions_available
-from django_pg_bulk_update.query import bulk_update
+from django_pg_bulk_update.prepared import get_prepared_statements, clear_prepared_statements, STATEMENT_NAME_PREFIX
+from django_pg_bulk_update.query import bulk_update, get_sql_cache_info, clear_sql_cache, SQL_CACHE_SIZE, \
+    STRATEGIES, _order_by_keys
+from django_pg_bulk_update.results import BulkOperationResult
 from django_pg_bulk_update.set_functions import ConcatSetFunction
 from tests.models import TestModel, RelationModel, UpperCaseModel, AutoNowModel, TestModelWithSchema
 
@@ -47,6 +52,29 @@ class TestInputFormats(TestCase):
         self.assertEqual(1, bulk_update(TestModel, {(2, 'test2'): {'int_field': 2}}, key_fields=('id', 'name')))
         self.assertEqual(1, bulk_update(TestModel, {('test3',): {'int_field': 2}}, key_fields='name'))
 
+    def test_columns(self):
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, [(1, 'abc')], columns='id')
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [(1, 1, 'abc')], columns=('id', 'id', 'name'))
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [('abc',)], columns=('name',))
+
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, {1: ('abc',)}, columns=('id', 'name'))
+
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'abc'}], columns=('id', 'name'))
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [(1, 'abc', 2)], columns=('id', 'name'))
+
+        self.assertEqual(1, bulk_update(TestModel, [(1, 'abc')], columns=('id', 'name')))
+        self.assertEqual(1, bulk_update(TestModel, [[2, 2, 'test2']], key_fields=('id', 'name'),
+                                        columns=['int_field', 'id', 'name']))
+
     def test_key_fields(self):
         values = [{
             'id': 1,
@@ -146,6 +174,20 @@ class TestInputFormats(TestCase):
             bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], batch_size=1, batch_delay=-2)
 
 
+    def test_strategy(self):
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], strategy=123)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], strategy='invalid')
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': [1], 'name': 'test1'}], key_fields_ops=['in'], strategy='unnest')
+
+        self.assertEqual(1, bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], strategy='values'))
+        self.assertEqual(1, bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], strategy='unnest'))
+        self.assertEqual(1, bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], strategy='copy'))
+
 class TestSimple(TestCase):
     fixtures = ['test_model', 'm2m_relation', 'test_upper_case_model', 'auto_now_model', 'test_model_with_schema']
     multi_db = True
@@ -281,6 +323,284 @@ class TestSimple(TestCase):
             res = bulk_update(TestModel, [], batch_size=10)
             self.assertEqual(0, res)
 
+    def test_strategy_unnest(self):
+        res = bulk_update(TestModel, [{
+            'id': 1,
+            'name': 'bulk_update_1',
+            'int_field': 0
+        }, {
+            'id': 5,
+            'name': '\'"',
+            'int_field': 10
+        }, {
+            'id': 8,
+            'name': 'bulk_update_8',
+            'int_field': 11
+        }], set_functions={'int_field': '+'}, strategy='unnest', batch_size=2)
+        self.assertEqual(3, res)
+        for pk, name, int_field in TestModel.objects.all().order_by('id').values_list('id', 'name', 'int_field'):
+            if pk == 1:
+                self.assertEqual('bulk_update_1', name)
+                self.assertEqual(1, int_field)
+            elif pk == 5:
+                self.assertEqual('\'"', name)
+                self.assertEqual(15, int_field)
+            elif pk == 8:
+                self.assertEqual('bulk_update_8', name)
+                self.assertEqual(19, int_field)
+            else:
+                self.assertEqual('test%d' % pk, name)
+                self.assertEqual(pk, int_field)
+
+    def test_strategy_unnest_key_operators(self):
+        res = bulk_update(TestModel, {
+            (1, 3): {'name': 'first'},
+            (6, 8): {'name': 'second'}
+        }, key_fields=('id', 'id'), key_fields_ops=('>=', '<'), strategy='unnest')
+        self.assertEqual(4, res)
+        for pk, name in TestModel.objects.all().order_by('id').values_list('id', 'name'):
+            if pk in {1, 2}:
+                self.assertEqual('first', name)
+            elif pk in {6, 7}:
+                self.assertEqual('second', name)
+            else:
+                self.assertEqual('test%d' % pk, name)
+
+        res = bulk_update(TestModel, {(False,): {'name': 'not_null'}}, key_fields='int_field',
+                          key_fields_ops=['is_null'], strategy='unnest')
+        self.assertEqual(9, res)
+
+    def test_strategy_copy(self):
+        res = bulk_update(TestModel, [{
+            'id': 1,
+            'name': 'tab\tnew line\nback\\slash',
+            'int_field': 0
+        }, {
+            'id': 5,
+            'name': '\'"\\N',
+            'int_field': 10
+        }, {
+            'id': 8,
+            'name': None,
+            'int_field': None
+        }], set_functions={'int_field': '+'}, strategy='copy', batch_size=2)
+        self.assertEqual(3, res)
+        for pk, name, int_field in TestModel.objects.all().order_by('id').values_list('id', 'name', 'int_field'):
+            if pk == 1:
+                self.assertEqual('tab\tnew line\nback\\slash', name)
+                self.assertEqual(1, int_field)
+            elif pk == 5:
+                self.assertEqual('\'"\\N', name)
+                self.assertEqual(15, int_field)
+            elif pk == 8:
+                self.assertIsNone(name)
+                self.assertIsNone(int_field)
+            else:
+                self.assertEqual('test%d' % pk, name)
+                self.assertEqual(pk, int_field)
+
+    def test_strategy_copy_key_operators(self):
+        res = bulk_update(TestModel, {
+            ((1, 2),): {'name': 'first'},
+            ((6, 8),): {'name': 'second'}
+        }, key_fields_ops=['in'], where=TestModel.objects.filter(int_field__lt=8).query.where,
+            returning='id', strategy='copy')
+        self.assertSetEqual({1, 2, 6}, set(res.values_list('id', flat=True)))
+        for pk, name in TestModel.objects.all().order_by('id').values_list('id', 'name'):
+            if pk in {1, 2}:
+                self.assertEqual('first', name)
+            elif pk == 6:
+                self.assertEqual('second', name)
+            else:
+                self.assertEqual('test%d' % pk, name)
+
+    def test_strategy_copy_atomic(self):
+        # Staging table is cleaned up on commit, but data of previous batch stays in outer transaction
+        with transaction.atomic():
+            for i in range(1, 3):
+                res = bulk_update(TestModel, [{'id': i, 'name': 'atomic_%d' % i}], strategy='copy')
+                self.assertEqual(1, res)
+
+        self.assertListEqual(['atomic_1', 'atomic_2', 'test3'],
+                             list(TestModel.objects.filter(pk__lte=3).order_by('id').values_list('name', flat=True)))
+
+    def test_order_keys(self):
+        values = [{'id': i, 'name': 'ordered_%d' % i} for i in (3, 1, 2)]
+        res = bulk_update(TestModel, values, returning='id', batch_size=1, order_keys=True)
+        self.assertListEqual([1, 2, 3], [item.id for item in res])
+
+        res = bulk_update(TestModel, values, returning='id', batch_size=1)
+        self.assertListEqual([3, 1, 2], [item.id for item in res])
+
+        # None values are ordered last, not comparable keys are not ordered
+        self.assertListEqual([(1, 'a'), (1, None), (None, 'a')],
+                             list(_order_by_keys({(None, 'a'): {}, (1, None): {}, (1, 'a'): {}})))
+        self.assertListEqual([(2,), ('1',)], list(_order_by_keys({(2,): {}, ('1',): {}})))
+
+    def test_duplicate_keys(self):
+        res = bulk_update(TestModel, [{'id': 1, 'int_field': 1}, {'id': 2, 'int_field': 5}, {'id': 1, 'int_field': 2}],
+                          set_functions={'int_field': '+'})
+        self.assertEqual(2, res)
+        self.assertListEqual([4, 7], list(TestModel.objects.filter(pk__in={1, 2}).order_by('id')
+                                          .values_list('int_field', flat=True)))
+
+        # NULL is replaced with default before the next value is added, as separate updates would do
+        TestModel.objects.filter(pk=1).update(int_field=None, name=None)
+        res = bulk_update(TestModel, [{'id': 1, 'int_field': None, 'name': None}, {'id': 1, 'int_field': 5, 'name': 'y'}],
+                          set_functions={'int_field': '+', 'name': '||'})
+        self.assertEqual(1, res)
+        self.assertTupleEqual((5, 'y'), TestModel.objects.values_list('int_field', 'name').get(pk=1))
+
+    def test_columns(self):
+        rows = [(i, 'updated_%d' % i, i * 10) for i in range(1, 10)]
+        for strategy in STRATEGIES:
+            res = bulk_update(TestModel, rows, columns=('id', 'name', 'int_field'), strategy=strategy, batch_size=4)
+            self.assertEqual(9, res)
+            self.assertListEqual(rows, list(TestModel.objects.order_by('id').values_list('id', 'name', 'int_field')))
+
+        # Duplicate keys are merged by set functions
+        res = bulk_update(TestModel, iter([(1, 1), (2, 1), (1, 2)]), columns=('id', 'int_field'),
+                          set_functions={'int_field': '+'}, batch_size=3)
+        self.assertEqual(2, res)
+        self.assertListEqual([13, 21], list(TestModel.objects.filter(pk__in={1, 2}).order_by('id')
+                                            .values_list('int_field', flat=True)))
+
+    def test_skip_unchanged(self):
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], skip_unchanged=1)
+
+        for strategy in STRATEGIES:
+            res = bulk_update(TestModel, [{'id': 1, 'name': 'test1', 'int_field': 1},
+                                          {'id': 2, 'name': 'changed', 'int_field': 2},
+                                          {'id': 3, 'name': 'test3', 'int_field': None},
+                                          {'id': 100, 'name': 'absent', 'int_field': 1}],
+                              skip_unchanged=True, strategy=strategy)
+            self.assertIsInstance(res, BulkOperationResult)
+            self.assertTupleEqual((2, 3, 1), (res, res.matched, res.skipped))
+
+            # Now values are equal to stored ones
+            res = bulk_update(TestModel, [{'id': 2, 'name': 'changed', 'int_field': 2},
+                                          {'id': 3, 'name': 'test3', 'int_field': None}],
+                              skip_unchanged=True, strategy=strategy)
+            self.assertTupleEqual((0, 2), (res.changed, res.matched))
+            TestModel.objects.filter(pk=2).update(name='test2')
+            TestModel.objects.filter(pk=3).update(int_field=3)
+
+        # Values are compared after set functions are applied
+        res = bulk_update(TestModel, [{'id': 1, 'int_field': 0}, {'id': 2, 'int_field': 1}],
+                          set_functions={'int_field': '+'}, skip_unchanged=True, batch_size=1)
+        self.assertTupleEqual((1, 2), (res.changed, res.matched))
+        self.assertListEqual([1, 3], list(TestModel.objects.filter(pk__lte=2).order_by('id')
+                                          .values_list('int_field', flat=True)))
+
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'test1'}, {'id': 4, 'name': 'changed'}],
+                          where=TestModel.objects.filter(int_field__lt=4).query.where, skip_unchanged=True)
+        self.assertTupleEqual((0, 1), (res.changed, res.matched))
+
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'test1'}, {'id': 4, 'name': 'changed'}], returning='id',
+                          skip_unchanged=True)
+        self.assertListEqual([4], list(res.values_list('id', flat=True)))
+
+    def test_skip_unchanged_auto_now(self):
+        # auto_now fields are updated only together with changed fields
+        updated = date(2000, 1, 1)
+        AutoNowModel.objects.update(updated=updated)
+        instance = AutoNowModel.objects.first()
+
+        res = bulk_update(AutoNowModel, [{'id': instance.pk, 'checked': instance.checked}], skip_unchanged=True)
+        self.assertTupleEqual((0, 1), (res.changed, res.matched))
+        self.assertEqual(updated, AutoNowModel.objects.get(pk=instance.pk).updated)
+
+        res = bulk_update(AutoNowModel, [{'id': instance.pk, 'checked': datetime(2020, 1, 1, tzinfo=tz_utc)}],
+                          skip_unchanged=True)
+        self.assertTupleEqual((1, 1), (res.changed, res.matched))
+        self.assertEqual(now().date(), AutoNowModel.objects.get(pk=instance.pk).updated)
+
+    def test_prepare(self):
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], prepare=1)
+
+        # Query text of 'values' strategy changes with number of rows
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], prepare=True)
+
+        clear_prepared_statements(connection)
+        statements = get_prepared_statements(connection)
+        for i in range(1, 4):
+            with CaptureQueriesContext(connection) as ctx:
+                res = bulk_update(TestModel, [{'id': i, 'name': 'prepared_%d' % i},
+                                              {'id': i + 4, 'name': 'prepared_%d' % (i + 4)}],
+                                  strategy='unnest', prepare=True)
+            self.assertEqual(2, res)
+            # Statement is prepared on the first call only, session is not checked for it
+            self.assertEqual(2 if i == 1 else 1, len(ctx.captured_queries))
+
+        for pk, name in TestModel.objects.all().order_by('id').values_list('id', 'name'):
+            self.assertEqual('prepared_%d' % pk if pk in {1, 2, 3, 5, 6, 7} else 'test%d' % pk, name)
+
+        self.assertEqual(1, len(statements))
+        self.assertEqual(2, statements.hits)
+
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'prepared_returning'}], returning='id', strategy='unnest',
+                          prepare=True)
+        self.assertListEqual([1], list(res.values_list('id', flat=True)))
+
+    def test_prepare_limit(self):
+        clear_prepared_statements(connection)
+        statements = get_prepared_statements(connection)
+        with mock.patch.object(statements, 'maxsize', 1):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], strategy='unnest', prepare=True)
+            evicted_names = set(statements.values())
+            bulk_update(TestModel, [{'id': 1, 'int_field': 1}], strategy='unnest', prepare=True)
+
+        self.assertEqual(1, statements.evictions)
+        self.assertEqual(1, len(statements))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM pg_prepared_statements WHERE name LIKE %s",
+                           [STATEMENT_NAME_PREFIX + '%'])
+            prepared_names = {row[0] for row in cursor.fetchall()}
+        self.assertSetEqual(set(), evicted_names & prepared_names)
+        self.assertTrue(set(statements.values()).issubset(prepared_names))
+
+    def test_prepare_disabled(self):
+        clear_prepared_statements(connection)
+        statements = get_prepared_statements(connection)
+        with mock.patch.dict(connection.settings_dict, {'DISABLE_PREPARED_STATEMENTS': True}):
+            self.assertEqual(1, bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], strategy='unnest',
+                                            prepare=True))
+        self.assertEqual(0, len(statements))
+
+    def test_sql_cache(self):
+        clear_sql_cache()
+        self.assertEqual(0, get_sql_cache_info().currsize)
+
+        for i in range(1, 4):
+            res = bulk_update(TestModel, [{'id': i, 'name': 'cached_%d' % i}],
+                              set_functions={'name': Upper('name')}, returning='id')
+            self.assertEqual(1, res.count())
+
+        # Update and returning query parts
+        info = get_sql_cache_info()
+        self.assertEqual(2, info.currsize)
+        self.assertEqual(2, info.misses)
+        self.assertEqual(4, info.hits)
+
+        # Different set function and returning forms different query parts
+        self.assertEqual(1, bulk_update(TestModel, [{'id': 1, 'name': 'cached'}], set_functions={'name': '||'}))
+        self.assertEqual(4, get_sql_cache_info().currsize)
+        for pk, name in TestModel.objects.filter(pk__lte=3).order_by('id').values_list('id', 'name'):
+            self.assertEqual('TEST1cached' if pk == 1 else 'TEST%d' % pk, name)
+
+        # Set function which can't be identified is not cached
+        set_function = ConcatSetFunction()
+        set_function.unhashable = []
+        self.assertEqual(1, bulk_update(TestModel, [{'id': 1, 'name': 'cached'}],
+                                        set_functions={'name': set_function}))
+        self.assertEqual(4, get_sql_cache_info().currsize)
+
+        clear_sql_cache()
+        self.assertTupleEqual((0, 0, 0, SQL_CACHE_SIZE, 0), tuple(get_sql_cache_info()))
+
     def test_same_key_fields(self):
         res = bulk_update(TestModel, {
             (1, 3): {
@@ -938,6 +1258,15 @@ class TestFieldTypes(TestCase):
                 self.assertIsNone(json_field)
             self.assertEqual('test%d' % pk, name)
 
+    @skipIf(not array_available() or not jsonb_available(), "ArrayField and JSONB are not available")
+    def test_strategy_copy(self):
+        res = bulk_update(TestModel, [{'id': 1, 'array_field': [1, None], 'json_field': {'a': 'tab\t"\\'}},
+                                      {'id': 2, 'array_field': [], 'json_field': []},
+                                      {'id': 3, 'array_field': None, 'json_field': None}], strategy='copy')
+        self.assertEqual(3, res)
+        values = TestModel.objects.filter(pk__lte=3).order_by('id').values_list('array_field', 'json_field')
+        self.assertListEqual([([1, None], {'a': 'tab\t"\\'}), ([], []), (None, None)], list(values))
+
     @skipIf(not hstore_available(), "HStoreField is available in Django 1.8+")
     def test_hstore(self):
         res = bulk_update(TestModel, [{'id': 1, 'hstore_field': {'test': '1'}},
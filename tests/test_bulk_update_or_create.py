@@ -1,13 +1,17 @@
 from datetime import date, datetime, timedelta
-from unittest import skipIf, expectedFailure
+from unittest import skipIf, expectedFailure, mock
 
+from django.db import connection
 from django.db.models import F
 from django.test import override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils.timezone import now
 
+from django_pg_bulk_update import query
 from django_pg_bulk_update.compatibility import jsonb_available, array_available, hstore_available, tz_utc, \
-    django_expressions_available
+    django_expressions_available, get_postgres_version
 from django_pg_bulk_update.query import bulk_update_or_create
+from django_pg_bulk_update.results import BulkOperationResult
 from django_pg_bulk_update.set_functions import ConcatSetFunction
 from django_pg_returning import ReturningQuerySet
 from tests.compatibility import get_auto_now_date
@@ -155,6 +159,17 @@ class TestInputFormats(TestCase):
             bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], batch_size=1, batch_delay=-2)
 
 
+    def test_strategy(self):
+        with self.assertRaises(TypeError):
+            bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], strategy=123)
+
+        with self.assertRaises(ValueError):
+            bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], strategy='invalid')
+
+        self.assertEqual(1, bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], strategy='values'))
+        self.assertEqual(1, bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], strategy='unnest'))
+        self.assertEqual(1, bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], strategy='copy'))
+
 class TestSimple(TestCase):
     fixtures = ['test_model', 'test_upper_case_model', 'auto_now_model']
     multi_db = True
@@ -330,6 +345,282 @@ class TestSimple(TestCase):
         res = bulk_update_or_create(TestModel, [], batch_size=10)
         self.assertEqual(0, res)
 
+    def test_strategy_unnest(self):
+        for key_is_unique in (True, False):
+            res = bulk_update_or_create(TestModel, [{
+                'id': 1,
+                'name': 'bulk_update_1'
+            }, {
+                'id': 5,
+                'name': 'bulk_update_5'
+            }, {
+                'id': 11,
+                'name': 'bulk_update_11'
+            }], key_is_unique=key_is_unique, strategy='unnest', batch_size=2)
+            self.assertEqual(3, res)
+
+            # 9 from fixture + 1 created
+            self.assertEqual(10, TestModel.objects.all().count())
+
+            for pk, name, int_field in TestModel.objects.all().order_by('id').values_list('id', 'name', 'int_field'):
+                if pk in {1, 5, 11}:
+                    self.assertEqual('bulk_update_%d' % pk, name)
+                else:
+                    self.assertEqual('test%d' % pk, name)
+
+                if pk == 11:
+                    self.assertIsNone(int_field)
+                else:
+                    self.assertEqual(pk, int_field)
+
+    def test_strategy_copy(self):
+        for key_is_unique in (True, False):
+            res = bulk_update_or_create(TestModel, [{
+                'id': 1,
+                'name': 'bulk_update_1',
+                'int_field': 2
+            }, {
+                'id': 5,
+                'name': 'bulk_update_5',
+                'int_field': 3
+            }, {
+                'id': 11,
+                'name': 'bulk_update_11',
+                'int_field': 4
+            }], key_is_unique=key_is_unique, set_functions={'int_field': '+'}, returning=('id', 'int_field'),
+                strategy='copy', batch_size=2)
+            self.assertIsInstance(res, ReturningQuerySet)
+            self.assertEqual(3, res.count())
+
+            # 9 from fixture + 1 created
+            self.assertEqual(10, TestModel.objects.all().count())
+
+            for pk, name, int_field in TestModel.objects.all().order_by('id').values_list('id', 'name', 'int_field'):
+                if pk in {1, 5, 11}:
+                    self.assertEqual('bulk_update_%d' % pk, name)
+                else:
+                    self.assertEqual('test%d' % pk, name)
+
+            self.assertDictEqual({1: 3, 5: 8, 11: 4} if key_is_unique else {1: 5, 5: 11, 11: 8},
+                                 dict(TestModel.objects.filter(pk__in={1, 5, 11}).values_list('id', 'int_field')))
+
+    def test_skip_unchanged(self):
+        with self.assertRaises(TypeError):
+            bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], skip_unchanged=1)
+
+        for key_is_unique in (True, False):
+            res = bulk_update_or_create(TestModel, [
+                {'id': 1, 'name': 'test1', 'int_field': 0},
+                {'id': 2, 'name': 'changed', 'int_field': 2},
+                {'id': 3, 'name': 'test3', 'int_field': 0},
+                {'id': 11, 'name': 'created', 'int_field': 1}
+            ], key_is_unique=key_is_unique, set_functions={'int_field': '+'}, skip_unchanged=True)
+            self.assertIsInstance(res, BulkOperationResult)
+            self.assertTupleEqual((2, 4, 2), (res, res.matched, res.skipped))
+            self.assertDictEqual({1: ('test1', 1), 2: ('changed', 4), 3: ('test3', 3), 11: ('created', 1)}, {
+                pk: (name, int_field) for pk, name, int_field
+                in TestModel.objects.filter(pk__in={1, 2, 3, 11}).values_list('id', 'name', 'int_field')
+            })
+
+            res = bulk_update_or_create(TestModel, [{'id': 2, 'name': 'changed'}, {'id': 11, 'name': 'created'}],
+                                        key_is_unique=key_is_unique, skip_unchanged=True, returning='id')
+            self.assertEqual(0, res.count())
+
+            TestModel.objects.filter(pk=11).delete()
+            TestModel.objects.filter(pk=2).update(name='test2', int_field=2)
+
+    @skipIf(get_postgres_version() < (15, 0), "MERGE is supported in PostgreSQL 15+")
+    def test_merge(self):
+        # name is not unique
+        TestModel.objects.create(id=100, name='test1', int_field=10)
+
+        with mock.patch.object(query, '_merge_no_validation', wraps=query._merge_no_validation) as merge_mock:
+            res = bulk_update_or_create(TestModel, [
+                {'name': 'test1', 'int_field': 1},
+                {'name': 'test2', 'int_field': 0},
+                {'name': 'created', 'int_field': 5}
+            ], key_fields='name', key_is_unique=False, set_functions={'int_field': '+'}, skip_unchanged=True)
+            self.assertEqual(1, merge_mock.call_count)
+
+        # 2 records with name test1 updated and 1 created. test2 is not changed
+        self.assertEqual(3, res)
+        self.assertDictEqual({1: 2, 2: 2, 100: 11}, dict(TestModel.objects.filter(pk__in={1, 2, 100})
+                                                         .values_list('id', 'int_field')))
+        created = TestModel.objects.get(name='created')
+        self.assertEqual(5, created.int_field)
+
+        # Key can't be updated, update flag is respected
+        res = bulk_update_or_create(TestModel, {'created': {'int_field': 1}, 'created2': {'int_field': 1}},
+                                    key_fields='name', key_is_unique=False, update=False)
+        self.assertEqual(1, res)
+        self.assertEqual(5, TestModel.objects.get(name='created').int_field)
+        self.assertEqual(1, TestModel.objects.get(name='created2').int_field)
+
+        # Single MERGE statement is executed
+        with CaptureQueriesContext(connection) as ctx:
+            res = bulk_update_or_create(TestModel, {'created': {'int_field': 2}, 'created3': {'int_field': 3}},
+                                        key_fields='name', key_is_unique=False)
+        self.assertEqual(2, res)
+        self.assertEqual(1, len(ctx.captured_queries))
+        self.assertIn('MERGE INTO', ctx.captured_queries[0]['sql'])
+        self.assertEqual(2, TestModel.objects.get(name='created').int_field)
+
+    @skipIf(get_postgres_version() >= (17, 0) or get_postgres_version() < (15, 0),
+            "MERGE ... RETURNING is supported in PostgreSQL 17+")
+    def test_merge_returning_fallback(self):
+        with self.assertLogs('django-pg-bulk-update', level='WARNING'), \
+                mock.patch.object(query, '_merge_no_validation', wraps=query._merge_no_validation) as merge_mock:
+            res = bulk_update_or_create(TestModel, {'test1': {'int_field': 5}, 'created': {'int_field': 1}},
+                                        key_fields='name', key_is_unique=False, returning='id')
+            self.assertEqual(0, merge_mock.call_count)
+
+        self.assertEqual(2, res.count())
+        self.assertEqual(5, TestModel.objects.get(name='test1').int_field)
+
+    def test_report_inserted(self):
+        with self.assertRaises(TypeError):
+            bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], report_inserted=1)
+
+        values = [{'id': 1, 'name': 'test1'}, {'id': 2, 'name': 'updated2'},
+                  {'id': 100, 'name': 'created100'}, {'id': 101, 'name': 'created101'}]
+        for key_is_unique in (True, False):
+            TestModel.objects.filter(id__gte=100).delete()
+            res = bulk_update_or_create(TestModel, values, key_is_unique=key_is_unique, report_inserted=True,
+                                        batch_size=3)
+            self.assertIsInstance(res, BulkOperationResult)
+            self.assertEqual(4, res)
+            self.assertEqual(2, res.inserted)
+            self.assertEqual(2, res.updated)
+            self.assertEqual(4, res.matched)
+
+            TestModel.objects.filter(id__gte=100).delete()
+            TestModel.objects.filter(id=2).update(name='test2')
+            res = bulk_update_or_create(TestModel, values, key_is_unique=key_is_unique, report_inserted=True,
+                                        skip_unchanged=True)
+            self.assertEqual(BulkOperationResult(3, 4, 2), res)
+            self.assertEqual((3, 4, 2, 1, 1), (res.changed, res.matched, res.inserted, res.updated, res.skipped))
+
+            TestModel.objects.filter(id__gte=100).delete()
+            res = bulk_update_or_create(TestModel, values, key_is_unique=key_is_unique, report_inserted=True,
+                                        returning='id')
+            self.assertDictEqual({1: False, 2: False, 100: True, 101: True},
+                                 {item.id: item.inserted for item in res})
+
+        res = bulk_update_or_create(TestModel, values, update=False, report_inserted=True)
+        self.assertEqual((0, 4, 0), (res.changed, res.matched, res.inserted))
+
+        res = bulk_update_or_create(TestModel, [], report_inserted=True)
+        self.assertEqual((0, 0, 0), (res.changed, res.matched, res.inserted))
+
+    def test_order_keys(self):
+        with self.assertRaises(TypeError):
+            bulk_update_or_create(TestModel, [{'id': 1, 'name': 'test1'}], order_keys=1)
+
+        values = [{'id': i, 'name': 'ordered_%d' % i} for i in (12, 3, 11, 1)]
+        res = bulk_update_or_create(TestModel, values, returning='id', batch_size=1)
+        self.assertListEqual([1, 3, 11, 12], [item.id for item in res])
+
+        res = bulk_update_or_create(TestModel, values, returning='id', batch_size=1, order_keys=False)
+        self.assertListEqual([12, 3, 11, 1], [item.id for item in res])
+
+    def test_duplicate_keys(self):
+        # Duplicates are merged by set functions, so ON CONFLICT doesn't update a record twice
+        for key_is_unique in (True, False):
+            res = bulk_update_or_create(TestModel, [
+                {'id': 1, 'name': 'a', 'int_field': 1},
+                {'id': 11, 'name': 'a', 'int_field': 1},
+                {'id': 1, 'name': 'b', 'int_field': 2},
+                {'id': 11, 'name': 'b', 'int_field': None},
+                {'id': 1, 'name': 'c', 'int_field': 3},
+            ], key_is_unique=key_is_unique, set_functions={'int_field': '+', 'name': '||'})
+            self.assertEqual(2, res)
+            self.assertDictEqual({1: ('test1abc', 7), 11: ('ab', None)}, {
+                pk: (name, int_field) for pk, name, int_field
+                in TestModel.objects.filter(pk__in={1, 11}).values_list('id', 'name', 'int_field')
+            })
+
+            TestModel.objects.filter(pk=11).delete()
+            TestModel.objects.filter(pk=1).update(name='test1', int_field=1)
+
+        res = bulk_update_or_create(TestModel, [
+            {'id': 1, 'name': 'a'}, {'id': 1, 'name': None}, {'id': 2, 'name': None}, {'id': 2, 'name': 'b'}
+        ], set_functions={'name': 'eq_not_null'})
+        self.assertEqual(2, res)
+        self.assertListEqual(['a', 'b'], list(TestModel.objects.filter(pk__in={1, 2}).order_by('id')
+                                              .values_list('name', flat=True)))
+
+    def test_columns(self):
+        rows = [('upserted_%d' % i, i) for i in (1, 11)]
+        for key_is_unique in (True, False):
+            res = bulk_update_or_create(TestModel, rows, columns=('name', 'id'), key_is_unique=key_is_unique,
+                                        report_inserted=True)
+            self.assertEqual(2, res)
+            self.assertEqual(int(key_is_unique), res.inserted)
+            self.assertListEqual(['upserted_1', 'upserted_11'], list(TestModel.objects.filter(pk__in={1, 11})
+                                                                     .order_by('id').values_list('name', flat=True)))
+
+    def test_duplicate_keys_no_update(self):
+        # Existing records are not updated, so the first row of a new key is inserted
+        for key_is_unique in (True, False):
+            res = bulk_update_or_create(TestModel, [{'id': 200, 'int_field': 1}, {'id': 200, 'int_field': 2},
+                                                    {'id': 1, 'int_field': 2}],
+                                        update=False, key_is_unique=key_is_unique, set_functions={'int_field': '+'})
+            self.assertEqual(1, res)
+            self.assertListEqual([(1, 1), (200, 1)], list(TestModel.objects.filter(pk__in={1, 200}).order_by('id')
+                                                          .values_list('id', 'int_field')))
+            TestModel.objects.filter(pk=200).delete()
+
+    @skipIf(not array_available(), "ArrayField is available in Django 1.8+")
+    def test_duplicate_keys_union(self):
+        bulk_update_or_create(TestModel, [{'id': 200, 'array_field': [1, 2]}, {'id': 200, 'array_field': [2, 3]}],
+                              set_functions={'array_field': 'union'})
+        self.assertListEqual([1, 2, 3], sorted(TestModel.objects.get(pk=200).array_field))
+
+    @skipIf(not array_available(), "ArrayField is available in Django 1.8+")
+    def test_duplicate_keys_merge_error(self):
+        with self.assertRaises(ValueError):
+            bulk_update_or_create(TestModel, [{'id': 1, 'array_field': 1}, {'id': 1, 'array_field': 2}],
+                                  set_functions={'array_field': 'array_remove'})
+
+    def test_conflict_mixed_set_functions(self):
+        # int_field is taken from EXCLUDED table, name - from "vals", as eq_not_null inserts default instead of NULL
+        res = bulk_update_or_create(TestModel, [
+            {'id': i, 'name': None if i % 2 else 'updated_%d' % i, 'int_field': i * 10} for i in range(1, 12)
+        ], set_functions={'name': 'eq_not_null', 'int_field': '+'})
+        self.assertEqual(11, res)
+
+        for pk, name, int_field in TestModel.objects.all().order_by('id').values_list('id', 'name', 'int_field'):
+            if pk <= 9:
+                self.assertEqual('test%d' % pk if pk % 2 else 'updated_%d' % pk, name)
+                self.assertEqual(pk * 11, int_field)
+            else:
+                self.assertEqual('' if pk % 2 else 'updated_%d' % pk, name)
+                self.assertEqual(pk * 10, int_field)
+
+    def test_conflict_large_batch(self):
+        TestModel.objects.bulk_create([TestModel(id=i, name='test%d' % i, int_field=i) for i in range(10, 5000)])
+        values = [{'id': i, 'name': None if i % 2 else 'updated_%d' % i, 'int_field': i * 10} for i in range(1, 5010)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = bulk_update_or_create(TestModel, values, set_functions={'name': 'eq_not_null', 'int_field': '+'},
+                                        batch_size=len(values))
+        self.assertEqual(5009, res)
+        for pk in (1, 2, 4998, 4999, 5000, 5001):
+            obj = TestModel.objects.get(pk=pk)
+            if pk < 5000:
+                self.assertEqual('test%d' % pk if pk % 2 else 'updated_%d' % pk, obj.name)
+                self.assertEqual(pk * 11, obj.int_field)
+            else:
+                self.assertEqual('' if pk % 2 else 'updated_%d' % pk, obj.name)
+                self.assertEqual(pk * 10, obj.int_field)
+
+        # Input values of conflicting rows are not searched in "vals" table for every row
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN %s' % ctx.captured_queries[-1]['sql'])
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.assertIn('Conflict Resolution: UPDATE', plan)
+        self.assertNotIn('SubPlan', plan)
+
     def test_unique_not_primary(self):
         """
         Test for issue https://github.com/M1hacka/django-pg-bulk-update/issues/19
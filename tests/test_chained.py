@@ -0,0 +1,70 @@
+from django.test import TestCase
+from django_pg_returning import ReturningQuerySet
+
+from django_pg_bulk_update.chained import ChainedReturningQuerySet
+from django_pg_bulk_update.query import bulk_update
+from tests.models import TestModel
+
+
+class ChainedReturningQuerySetTest(TestCase):
+    fixtures = ['test_model']
+
+    def _update(self, ids, batch_size=None):
+        # Values are processed in given order
+        return bulk_update(TestModel, [{'id': pk, 'name': 'updated_%d' % pk} for pk in ids], returning=('id', 'name'),
+                           batch_size=batch_size)
+
+    def test_batches(self):
+        res = self._update(range(1, 8), batch_size=2)
+        self.assertIsInstance(res, ChainedReturningQuerySet)
+        self.assertIsInstance(res, ReturningQuerySet)
+        self.assertEqual(7, len(res))
+        self.assertEqual(7, res.count())
+        self.assertListEqual([2, 2, 2, 1], [len(batch) for batch in res.batches])
+        self.assertListEqual(list(range(1, 8)), [item.id for item in res])
+        self.assertListEqual(['id', 'name'], res.fields)
+
+    def test_getitem(self):
+        # Batches of ids 100 and 101 return nothing
+        res = self._update([1, 2, 100, 101, 3, 4, 5], batch_size=2)
+        self.assertListEqual([2, 0, 2, 1], [len(batch) for batch in res.batches])
+        self.assertListEqual([1, 2, 3, 4, 5], [res[i].id for i in range(5)])
+        self.assertEqual(5, res[-1].id)
+        self.assertEqual(1, res[-5].id)
+        self.assertListEqual([2, 3], [item.id for item in res[1:3]])
+        self.assertListEqual([1, 3, 5], [item.id for item in res[::2]])
+
+        with self.assertRaises(IndexError):
+            res[5]
+
+        with self.assertRaises(IndexError):
+            res[-6]
+
+        self.assertEqual(1, res.first().id)
+        self.assertEqual(5, res.last().id)
+
+    def test_values(self):
+        res = self._update(range(1, 4), batch_size=2)
+        self.assertListEqual([1, 2, 3], res.values_list('id', flat=True))
+        self.assertListEqual([(1, 'updated_1'), (2, 'updated_2'), (3, 'updated_3')], res.values_list('id', 'name'))
+        self.assertListEqual([{'id': 1}, {'id': 2}, {'id': 3}], res.values('id'))
+        self.assertDictEqual({'id': 1, 'name': 'updated_1'}, res.values()[0])
+
+        with self.assertRaises(TypeError):
+            res.values_list('id', 'name', flat=True)
+
+    def test_add(self):
+        res = self._update([1, 2], batch_size=1) + self._update([3])
+        self.assertIsInstance(res, ChainedReturningQuerySet)
+        self.assertEqual(3, len(res.batches))
+        self.assertListEqual([1, 2, 3], res.values_list('id', flat=True))
+
+        with self.assertRaises(ValueError):
+            res + bulk_update(TestModel, [{'id': 4, 'name': 'updated_4'}], returning='id')
+
+    def test_empty(self):
+        res = self._update([])
+        self.assertEqual(0, len(res))
+        self.assertListEqual([], list(res))
+        self.assertIsNone(res.first())
+        self.assertListEqual([], res.values_list('id', flat=True))
@@ -0,0 +1,98 @@
+from unittest import skipIf
+
+from django.test import TestCase
+
+from django_pg_bulk_update.columnar import ColumnarValues, numpy
+from django_pg_bulk_update.query import bulk_update, bulk_update_or_create, bulk_create, STRATEGIES
+from django_pg_bulk_update.utils import iter_batches
+from tests.models import TestModel
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+class ColumnarValuesTest(TestCase):
+    fixtures = ['test_model']
+
+    def _rows(self, ids):
+        return list(TestModel.objects.filter(pk__in=ids).order_by('id').values_list('id', 'name', 'int_field'))
+
+    def test_batches(self):
+        values = ColumnarValues({'id': [1, 2, 3], 'name': ['a', 'b', 'c']}, ('id',))
+        self.assertListEqual([[('a',), ('b',)], [('c',)]],
+                             [list(b.iter_rows(['name'])) for b in iter_batches(values, 2)])
+
+        with self.assertRaises(ValueError):
+            list(iter_batches(values, 0))
+
+    def test_validation(self):
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, {'id': [1, 2], 'name': ['a']})
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, {'name': ['a']})
+
+        self.assertEqual(0, bulk_update(TestModel, {'id': [], 'name': []}))
+
+    def test_update(self):
+        for strategy in STRATEGIES:
+            values = {'id': [1, 2], 'name': ['%s1' % strategy, '%s2' % strategy], 'int_field': (10, None)}
+            self.assertEqual(2, bulk_update(TestModel, values, strategy=strategy))
+            self.assertListEqual([(1, '%s1' % strategy, 10), (2, '%s2' % strategy, None)], self._rows([1, 2]))
+
+    def test_order_keys(self):
+        values = {'id': [3, 1, 2], 'int_field': [30, 10, 20]}
+        self.assertEqual(3, bulk_update(TestModel, values, order_keys=True, batch_size=2, strategy='unnest'))
+        self.assertListEqual([(1, 'test1', 10), (2, 'test2', 20), (3, 'test3', 30)], self._rows([1, 2, 3]))
+
+    def test_duplicates(self):
+        # Duplicate keys are coalesced by set functions
+        values = {'id': [1, 2, 1], 'int_field': [5, 5, 5]}
+        self.assertEqual(2, bulk_update(TestModel, values, set_functions={'int_field': '+'}, strategy='copy'))
+        self.assertListEqual([(1, 'test1', 11), (2, 'test2', 7)], self._rows([1, 2]))
+
+    def test_auto_batch_size(self):
+        values = {'id': [1, 2, 3], 'name': ['a', 'b', 'c']}
+        self.assertEqual(3, bulk_update(TestModel, values, batch_size='auto'))
+        self.assertListEqual(['a', 'b', 'c'], [row[1] for row in self._rows([1, 2, 3])])
+
+    @skipIf(numpy is None, "numpy is not installed")
+    def test_numpy(self):
+        for strategy in STRATEGIES:
+            pk = STRATEGIES.index(strategy) + 1
+            values = {'id': numpy.array([pk, 10 + pk]), 'int_field': numpy.array([100, 200], dtype='int64'),
+                      'name': numpy.array(['a', 'b'], dtype=object)}
+            res = bulk_update_or_create(TestModel, values, strategy=strategy, report_inserted=True, batch_size=1)
+            self.assertEqual(2, res)
+            self.assertEqual(1, res.inserted)
+            self.assertListEqual([(pk, 'a', 100), (10 + pk, 'b', 200)], self._rows([pk, 10 + pk]))
+
+    @skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_create(self):
+        values = {'id': numpy.arange(20, 25), 'int_field': numpy.arange(5, dtype='int16'), 'name': ['x'] * 5}
+        for strategy in STRATEGIES:
+            TestModel.objects.filter(pk__gte=20).delete()
+            self.assertEqual(5, bulk_create(TestModel, values, strategy=strategy, batch_size=2))
+            self.assertListEqual([(20 + i, 'x', i) for i in range(5)], self._rows(range(20, 25)))
+
+        with self.assertRaises(ValueError):
+            bulk_create(TestModel, {'id': numpy.arange(4).reshape(2, 2)})
+
+    @skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_order_keys(self):
+        values = {'id': numpy.array([3, 1, 2]), 'int_field': numpy.array([30, 10, 20])}
+        res = bulk_update(TestModel, values, order_keys=True, returning=('id', 'int_field'), returning_format='tuples',
+                          batch_size=1)
+        self.assertListEqual([(1, 10), (2, 20), (3, 30)], res)
+
+    @skipIf(pandas is None, "pandas is not installed")
+    def test_data_frame(self):
+        df = pandas.DataFrame({'id': [1, 2], 'name': ['a', 'b'], 'int_field': [10, 20]})
+        for strategy in STRATEGIES:
+            self.assertEqual(2, bulk_update(TestModel, df, strategy=strategy))
+            self.assertListEqual([(1, 'a', 10), (2, 'b', 20)], self._rows([1, 2]))
+
+        self.assertEqual(2, bulk_update(TestModel, {'id': df['id'], 'int_field': df['int_field'] + 1}))
+        self.assertListEqual([(1, 'a', 11), (2, 'b', 21)], self._rows([1, 2]))
@@ -0,0 +1,116 @@
+import json
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from unittest import skipIf, mock
+
+from django.db import DataError, connection, transaction
+from django.test import TestCase
+
+from django_pg_bulk_update import staging
+from django_pg_bulk_update.compatibility import tz_utc
+from django_pg_bulk_update.copy_encoders import get_binary_encoder, numpy
+from django_pg_bulk_update.query import bulk_update
+from django_pg_bulk_update.staging import copy_to_staging
+from tests.models import TestModel
+
+
+class CopyToStagingTest(TestCase):
+    columns = [
+        ('small', 'smallint'),
+        ('int', 'integer'),
+        ('big', 'bigint'),
+        ('real', 'real'),
+        ('double', 'double precision'),
+        ('num', 'numeric(20, 6)'),
+        ('bool', 'boolean'),
+        ('uuid', 'uuid'),
+        ('date', 'date'),
+        ('dt', 'timestamp with time zone'),
+        ('naive_dt', 'timestamp'),
+        ('char', 'varchar(50)'),
+        ('text', 'text'),
+        ('jsonb', 'jsonb'),
+        ('arr', 'integer[]'),
+        ('text_arr', 'text[]'),
+    ]
+
+    rows = [
+        [-1, 2 ** 31 - 1, 2 ** 63 - 1, 1.5, -0.1, Decimal('-12345.678900'), True, uuid.UUID(int=1),
+         date(1999, 12, 31), datetime(2020, 1, 2, 3, 4, 5, 6, tzinfo=tz_utc), datetime(1970, 1, 1, 0, 0, 1),
+         u'tab\t\\"\'\n', u'привет', '{"a": [1, null]}', [1, None, 3], [u'a"b', u'\\']],
+        [0, 0, 0, 0.0, 0.0, Decimal('0'), False, uuid.UUID(int=2), date(2000, 1, 1),
+         datetime(2000, 1, 1, tzinfo=tz_utc), datetime(2000, 1, 1), u'', u'', '{}', [], []],
+        [None] * 16,
+    ]
+
+    def _copy_and_fetch(self, columns, rows):
+        with transaction.atomic():
+            table = copy_to_staging(connection, columns, rows, len(rows))
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT * FROM "%s"' % table)
+                return [list(row) for row in cursor.fetchall()]
+
+    def _test_format(self, copy_format):
+        with mock.patch.object(staging, 'STAGING_COPY_FORMAT', copy_format):
+            result = self._copy_and_fetch(self.columns, self.rows)
+
+        self.assertEqual(len(self.rows), len(result))
+        for expected_row, row in zip(self.rows, result):
+            for (name, db_type), expected_val, val in zip(self.columns, expected_row, row):
+                if db_type == 'jsonb' and isinstance(val, str):
+                    # Django 3.1+ doesn't decode jsonb on psycopg2 level
+                    val, expected_val = json.loads(val), json.loads(expected_val)
+                self.assertEqual(expected_val, val, name)
+
+    def test_binary(self):
+        self.assertIsNotNone(staging._encode_binary([db_type for _, db_type in self.columns], self.rows))
+        self._test_format('binary')
+
+    def test_text(self):
+        self._test_format('text')
+
+    def test_numeric(self):
+        values = ['0.000100', '1000000', '-99999999.99', '12.5', '0.000001', '123456789012.3']
+        result = self._copy_and_fetch([('num', 'numeric(20, 6)')], [[Decimal(v)] for v in values])
+        self.assertListEqual([Decimal(v) for v in values], [row[0] for row in result])
+
+        result = self._copy_and_fetch([('num', 'numeric')], [[Decimal('NaN')], [Decimal('1E+5')]])
+        self.assertTrue(result[0][0].is_nan())
+        self.assertEqual(Decimal('100000'), result[1][0])
+
+    def test_binary_fallback(self):
+        # Not all types have binary encoders
+        self.assertIsNone(get_binary_encoder('interval'))
+        self.assertIsNone(get_binary_encoder('interval[]'))
+
+        # Values, which can't be encoded in binary format, are sent in text format
+        with mock.patch.object(staging, 'encode_binary_copy', wraps=staging.encode_binary_copy) as encode_mock:
+            result = self._copy_and_fetch([('date', 'date')], [['2020-01-02']])
+            self.assertEqual(1, encode_mock.call_count)
+            self.assertListEqual([[date(2020, 1, 2)]], result)
+
+            result = self._copy_and_fetch([('arr', 'integer[]')], [[[[1, 2], [3, 4]]]])
+            self.assertEqual(2, encode_mock.call_count)
+            self.assertListEqual([[[[1, 2], [3, 4]]]], result)
+
+        # Out of range numbers are reported by database as for other strategies
+        self.assertIsNone(staging._encode_binary(['integer'], [[2 ** 40]]))
+        with self.assertRaises(DataError):
+            bulk_update(TestModel, [{'id': 1, 'int_field': 2 ** 40}], strategy='copy')
+
+    @skipIf(numpy is None, "numpy is not installed")
+    def test_numpy_column(self):
+        encoder = get_binary_encoder('bigint')
+        values = [1, -2, 2 ** 40]
+        self.assertListEqual(encoder.encode_column(values), encoder.encode_column(numpy.array(values)))
+
+        encoder = get_binary_encoder('double precision')
+        values = [1.5, -2.0, 0.1]
+        self.assertListEqual(encoder.encode_column(values), encoder.encode_column(numpy.array(values)))
+
+        # int64 values are not wrapped to integer type
+        encoder = get_binary_encoder('integer')
+        self.assertListEqual(encoder.encode_column([1, -2]), encoder.encode_column(numpy.array([1, -2])))
+        with self.assertRaises(ValueError):
+            encoder.encode_column(numpy.array([1, 2 ** 40]))
@@ -0,0 +1,86 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from django_pg_bulk_update import query, utils
+from django_pg_bulk_update.query import bulk_update, bulk_update_or_create, bulk_create, bulk_delete
+from django_pg_bulk_update.utils import LazyBatches, iter_batches, iter_auto_batches, next_auto_batch
+from tests.models import TestModel
+
+
+class LazyValidationTest(TestCase):
+    fixtures = ['test_model']
+
+    def _names(self):
+        return list(TestModel.objects.order_by('id').values_list('name', flat=True))
+
+    def test_lazy_batches(self):
+        data = LazyBatches((1, 2), iter([3, 4, 5]), lambda items: tuple(i * 10 for i in items))
+        self.assertListEqual([(1, 2), (30, 40), (50,)], list(iter_batches(data, 2)))
+
+    def test_read_by_batch(self):
+        updated = []
+
+        def _values():
+            for i in range(1, 10):
+                # Previous batches have been executed, before next items are read
+                updated.append(TestModel.objects.filter(name__startswith='updated').count())
+                yield {'id': i, 'name': 'updated_%d' % i}
+
+        self.assertEqual(9, bulk_update(TestModel, _values(), batch_size=2))
+        self.assertListEqual([0, 0, 2, 2, 4, 4, 6, 6, 8], updated)
+        self.assertListEqual(['updated_%d' % i for i in range(1, 10)], self._names())
+
+    def test_auto_batch_size(self):
+        data = LazyBatches({1: {}, 2: {}}, iter([3, 4, 5, 6, 7]), lambda items: {i: {} for i in items})
+        with mock.patch.object(utils, 'AUTO_BATCH_INITIAL_SIZE', 2):
+            batches = iter_auto_batches(data)
+            self.assertDictEqual({1: {}, 2: {}}, next(batches))
+            # Items are read by chunks of current batch size
+            self.assertDictEqual({3: {}, 4: {}}, next_auto_batch(batches, utils.AUTO_BATCH_TARGET_TIME))
+            self.assertListEqual([5, 6, 7], list(data.items))
+
+        updated = []
+
+        def _values():
+            for i in range(1, 10):
+                updated.append(TestModel.objects.filter(name__startswith='updated').count())
+                yield {'id': i, 'name': 'updated_%d' % i}
+
+        with mock.patch.object(utils, 'AUTO_BATCH_INITIAL_SIZE', 2), \
+                mock.patch.object(query, 'AUTO_BATCH_INITIAL_SIZE', 2), \
+                mock.patch.object(utils, 'AUTO_BATCH_MAX_SIZE', 2):
+            self.assertEqual(9, bulk_update(TestModel, _values(), batch_size='auto'))
+        self.assertListEqual([0, 0, 2, 2, 4, 4, 6, 6, 8], updated)
+        self.assertListEqual(['updated_%d' % i for i in range(1, 10)], self._names())
+
+    def test_same_fields(self):
+        values = iter([{'id': 1, 'name': 'updated_1'}, {'id': 2, 'name': 'updated_2'}, {'id': 3, 'int_field': 3}])
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, batch_size=2)
+
+        # Batches before the invalid one have been executed
+        self.assertListEqual(['updated_1', 'updated_2', 'test3'], self._names()[:3])
+
+    def test_duplicates(self):
+        values = iter([{'id': 3, 'int_field': 1}, {'id': 1, 'int_field': 1}, {'id': 3, 'int_field': 2},
+                       {'id': 2, 'int_field': 5}, {'id': 2, 'int_field': 1}, {'id': 1, 'int_field': 1}])
+        # Duplicate keys are coalesced within a batch
+        self.assertEqual(4, bulk_update(TestModel, values, set_functions={'int_field': '+'}, batch_size=3,
+                                        order_keys=True))
+        self.assertListEqual([3, 8, 6], list(TestModel.objects.filter(pk__in={1, 2, 3}).order_by('id')
+                                             .values_list('int_field', flat=True)))
+
+    def test_create_upsert_delete(self):
+        values = ({'id': i, 'name': 'created_%d' % i} for i in range(10, 15))
+        self.assertEqual(5, bulk_create(TestModel, values, batch_size=2))
+
+        values = ({'id': i, 'name': 'upserted_%d' % i} for i in range(13, 17))
+        res = bulk_update_or_create(TestModel, values, batch_size=3, report_inserted=True)
+        self.assertEqual(4, res)
+        self.assertEqual(2, res.inserted)
+
+        self.assertEqual(7, bulk_delete(TestModel, iter(range(10, 20)), batch_size=3))
+        self.assertEqual(9, TestModel.objects.count())
+
+        self.assertEqual(0, bulk_delete(TestModel, iter([]), batch_size=3))
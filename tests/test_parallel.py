@@ -0,0 +1,85 @@
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase
+
+from django_pg_bulk_update.query import bulk_update, bulk_update_or_create, bulk_create, bulk_delete
+from django_pg_bulk_update.utils import partition_data, ParallelBatchError
+from tests.models import TestModel
+
+
+class PartitionDataTest(TestCase):
+    def test_dict(self):
+        data = {(i,): {'name': 'test%d' % i} for i in range(100)}
+        parts = partition_data(data, 4)
+        self.assertEqual(4, len(parts))
+        self.assertDictEqual(data, {k: v for part in parts for k, v in part.items()})
+
+        # Partitions are deterministic and keep items order
+        self.assertListEqual(parts, partition_data(data, 4))
+        for part in parts:
+            self.assertListEqual(sorted(part.keys()), list(part.keys()))
+
+    def test_list(self):
+        self.assertListEqual([[0, 3], [1, 4], [2]], partition_data(range(5), 3))
+        self.assertListEqual([[0], [1]], partition_data(range(2), 4))
+        self.assertListEqual([], partition_data([], 4))
+
+
+class ParallelTest(TransactionTestCase):
+    fixtures = ['test_model']
+
+    def test_validation(self):
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], parallel='2')
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], parallel=0)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning='id', returning_stream=True, parallel=2)
+
+        # Workers can't take part in the transaction of the caller
+        with transaction.atomic():
+            with self.assertRaises(ValueError):
+                bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], parallel=2)
+
+    def test_update(self):
+        values = [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 10)]
+        self.assertEqual(9, bulk_update(TestModel, values, parallel=3, batch_size=2))
+        self.assertListEqual(['updated_%d' % i for i in range(1, 10)],
+                             list(TestModel.objects.order_by('id').values_list('name', flat=True)))
+
+        res = bulk_update(TestModel, values, returning='id', parallel=3, batch_size=2)
+        self.assertEqual(9, len(res))
+        self.assertListEqual(list(range(1, 10)), sorted(res.values_list('id', flat=True)))
+
+        # Results don't depend on threads timing
+        res = bulk_update(TestModel, values, returning='id', returning_format='tuples', parallel=3, batch_size=2)
+        self.assertListEqual(res, bulk_update(TestModel, values, returning='id', returning_format='tuples',
+                                              parallel=3, batch_size=2))
+
+    def test_upsert(self):
+        values = [{'id': i, 'name': 'upserted_%d' % i} for i in range(5, 15)]
+        for key_is_unique in (True, False):
+            TestModel.objects.filter(id__gte=10).delete()
+            res = bulk_update_or_create(TestModel, values, key_is_unique=key_is_unique, report_inserted=True,
+                                        parallel=2, batch_size='auto')
+            self.assertEqual(10, res)
+            self.assertEqual(5, res.inserted)
+            self.assertEqual(14, TestModel.objects.count())
+
+    def test_create_delete(self):
+        values = [{'id': i, 'name': 'created_%d' % i} for i in range(10, 20)]
+        self.assertEqual(10, bulk_create(TestModel, values, parallel=4, batch_size=2))
+        self.assertEqual(19, TestModel.objects.count())
+
+        self.assertEqual(10, bulk_delete(TestModel, list(range(10, 20)), parallel=4))
+        self.assertEqual(9, TestModel.objects.count())
+
+    def test_error(self):
+        # Record with id 1 exists already. Batches are committed independently.
+        values = [{'id': i, 'name': 'created_%d' % i} for i in [1] + list(range(10, 19))]
+        with self.assertRaises(ParallelBatchError) as ctx:
+            bulk_create(TestModel, values, parallel=2, batch_size=1)
+
+        self.assertEqual(1, len(ctx.exception.errors))
+        self.assertEqual(TestModel.objects.filter(id__gte=10).count(), sum(ctx.exception.results))
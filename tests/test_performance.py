@@ -6,13 +6,20 @@ It is written in order to test performance of library on big number of records.
 """
 import datetime
 import os
+import random
 import sys
+import threading
+import time
 
 import django
 from django.db import connection
+from typing import Tuple
 
 
 class AbstractPerformanceTest(object):
+    # Number of records processed by test
+    rows_count = 1000
+
     @classmethod
     def init_data(cls, count=1000):
         """
@@ -25,6 +32,7 @@ class AbstractPerformanceTest(object):
           name VARCHAR(255),
           int_field INTEGER,
           array_field INTEGER[],
+          big_array_field BIGINT[] NOT NULL DEFAULT '{}',
           json_field jsonb,
           hstore_field hstore
         )"""
@@ -64,19 +72,28 @@ class AbstractPerformanceTest(object):
         raise NotImplementedError("test is not implemented")
 
     @classmethod
-    def run_test(cls):  # type: () -> float
+    def prepare(cls):  # type: () -> None
+        """
+        This method is called before test and is not included in execution time
+        :return:
+        """
+        pass
+
+    @classmethod
+    def run_test(cls):  # type: () -> Tuple[float, float]
         """
         This is test wrapper, which creates and drops data between tests and measures execution time
-        :return: Execution time in seconds
+        :return: A tuple of execution time and CPU time of this process in seconds
         """
-        cls.init_data()
-        start = cls.get_time()
+        cls.init_data(count=cls.rows_count)
+        cls.prepare()
+        start, cpu_start = cls.get_time(), time.process_time()
         try:
             cls.test()
         finally:
-            end = cls.get_time()
+            end, cpu_end = cls.get_time(), time.process_time()
             cls.drop_data()
-        return end - start
+        return end - start, cpu_end - cpu_start
 
 
 class BulkUpdateTest(AbstractPerformanceTest):
@@ -98,18 +115,166 @@ class SingleUpdateTest(AbstractPerformanceTest):
             TestModel.objects.filter(id=item['id']).update(int_field=item['int_field'])
 
 
+class AbstractStrategyUpdateTest(AbstractPerformanceTest):
+    """
+    Compares ways of passing values to database on big updates
+    """
+    rows_count = 100000
+    strategy = 'values'
+    copy_format = 'binary'
+    upd_data = []
+
+    @classmethod
+    def prepare(cls):
+        cls.upd_data = [{'id': i + 1, 'int_field': i + 2, 'name': 'updated_%d' % i} for i in range(cls.rows_count)]
+
+    @classmethod
+    def test(cls):
+        from tests.models import TestModel
+        from django_pg_bulk_update import staging
+
+        staging.STAGING_COPY_FORMAT = cls.copy_format
+        bulk_update(TestModel, cls.upd_data, strategy=cls.strategy, batch_size=10000)
+
+
+class ValuesStrategyUpdateTest(AbstractStrategyUpdateTest):
+    strategy = 'values'
+
+
+class TextCopyStrategyUpdateTest(AbstractStrategyUpdateTest):
+    strategy = 'copy'
+    copy_format = 'text'
+
+
+class BinaryCopyStrategyUpdateTest(AbstractStrategyUpdateTest):
+    strategy = 'copy'
+    copy_format = 'binary'
+
+
+class AbstractUpsertBatchSizeTest(AbstractPerformanceTest):
+    """
+    Measures dependency of INSERT ... ON CONFLICT DO UPDATE time on batch size.
+    Every input row conflicts with existing record.
+    """
+    rows_count = 20000
+    batch_size = 1000
+    upd_data = []
+
+    @classmethod
+    def prepare(cls):
+        cls.upd_data = [{'id': i + 1, 'int_field': i + 2, 'name': 'updated_%d' % i} for i in range(cls.rows_count)]
+
+    @classmethod
+    def test(cls):
+        from tests.models import TestModel
+        bulk_update_or_create(TestModel, cls.upd_data, batch_size=cls.batch_size)
+
+
+class UpsertBatchSize1000Test(AbstractUpsertBatchSizeTest):
+    batch_size = 1000
+
+
+class UpsertBatchSize5000Test(AbstractUpsertBatchSizeTest):
+    batch_size = 5000
+
+
+class UpsertBatchSize20000Test(AbstractUpsertBatchSizeTest):
+    batch_size = 20000
+
+
+class BatchedReturningTest(AbstractPerformanceTest):
+    """
+    Many small batches with returning: concatenation of batch results must not dominate execution time
+    """
+    rows_count = 100000
+    upd_data = []
+
+    @classmethod
+    def prepare(cls):
+        cls.upd_data = [{'id': i + 1, 'int_field': i + 2} for i in range(cls.rows_count)]
+
+    @classmethod
+    def test(cls):
+        from tests.models import TestModel
+        res = bulk_update(TestModel, cls.upd_data, returning='id', batch_size=100)
+        assert len(res) == cls.rows_count
+
+
+class AbstractConcurrentUpsertTest(AbstractPerformanceTest):
+    """
+    Measures deadlock rate and throughput of concurrent upserts over overlapping keys.
+    Every thread upserts all records in its own random order.
+    """
+    rows_count = 5000
+    threads_count = 4
+    iterations = 5
+    batch_size = 1000
+    order_keys = True
+    deadlocks = 0
+
+    @classmethod
+    def _worker(cls, seed):  # type: (int) -> None
+        from django.db import OperationalError, transaction
+        from tests.models import TestModel
+
+        rnd = random.Random(seed)
+        try:
+            for i in range(cls.iterations):
+                upd_data = [{'id': j + 1, 'int_field': i, 'name': 'thread_%d' % seed} for j in range(cls.rows_count)]
+                rnd.shuffle(upd_data)
+                try:
+                    with transaction.atomic():
+                        bulk_update_or_create(TestModel, upd_data, batch_size=cls.batch_size,
+                                              order_keys=cls.order_keys)
+                except OperationalError as ex:
+                    if getattr(ex.__cause__, 'pgcode', None) != '40P01':
+                        raise
+                    with cls.lock:
+                        cls.deadlocks += 1
+        finally:
+            connection.close()
+
+    @classmethod
+    def test(cls):
+        cls.deadlocks = 0
+        cls.lock = threading.Lock()
+        threads = [threading.Thread(target=cls._worker, args=(seed,)) for seed in range(cls.threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    @classmethod
+    def report(cls):  # type: () -> str
+        return '%d of %d transactions deadlocked' % (cls.deadlocks, cls.threads_count * cls.iterations)
+
+
+class ConcurrentOrderedUpsertTest(AbstractConcurrentUpsertTest):
+    order_keys = True
+
+
+class ConcurrentUnorderedUpsertTest(AbstractConcurrentUpsertTest):
+    order_keys = False
+
+
 if __name__ == "__main__":
     print('Django: ', django.VERSION)
     print('Python: ', sys.version)
-    os.environ['DJANGO_SETTINGS_MODULE'] = 'tests.test_settings'
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
     django.setup()
 
     # Django imports must be done after init
     from tests.models import TestModel
     from django_pg_bulk_update.utils import get_subclasses
-    from django_pg_bulk_update import bulk_update
+    from django_pg_bulk_update import bulk_update, bulk_update_or_create
+
+    tests = get_subclasses(AbstractPerformanceTest, recursive=True)
+    for test_cls in sorted(tests, key=lambda cls: cls.__name__):
+        if test_cls.__name__.startswith('Abstract'):
+            continue
 
-    tests = get_subclasses(AbstractPerformanceTest)
-    for test_cls in tests:
-        res = test_cls.run_test()
-        print("Test `%s` executed in %.2f seconds" % (test_cls.__name__, res))
+        res, cpu = test_cls.run_test()
+        print("Test `%s` executed in %.2f seconds (%.2f CPU seconds, %d rows/sec)"
+              % (test_cls.__name__, res, cpu, test_cls.rows_count / res))
+        if hasattr(test_cls, 'report'):
+            print('    ' + test_cls.report())
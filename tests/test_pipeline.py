@@ -0,0 +1,136 @@
+from unittest import skipIf
+
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase
+
+from django_pg_bulk_update.pipeline import Pipeline, PendingResult, get_pipeline, pipeline_available
+from django_pg_bulk_update.query import bulk_update, bulk_update_or_create, bulk_create, bulk_delete
+from django_pg_bulk_update.utils import batched_operation
+from tests.models import TestModel
+
+
+@skipIf(not pipeline_available(connection), "Pipeline mode requires psycopg 3 with libpq 14+")
+class PipelineTest(TestCase):
+    def test_queue(self):
+        with Pipeline(connection) as pipe:
+            self.assertIs(pipe, get_pipeline(connection))
+            result = pipe.queue('SELECT %s', [1], lambda cursor: cursor.fetchone()[0])
+            self.assertIsInstance(result, PendingResult)
+            with self.assertRaises(ValueError):
+                _ = result.value
+
+            pipe.flush()
+            self.assertEqual(1, result.value)
+
+        self.assertIsNone(get_pipeline(connection))
+
+    def test_nested(self):
+        with Pipeline(connection):
+            with self.assertRaises(ValueError):
+                with Pipeline(connection):
+                    pass
+
+    def test_batched_operation(self):
+        def _handler(_, items):
+            return get_pipeline(connection).queue('SELECT %s', [sum(items)], lambda cursor: cursor.fetchone()[0])
+
+        args = (None, None)
+        self.assertListEqual([3, 7, 5], batched_operation(_handler, [1, 2, 3, 4, 5], batch_size=2, args=args,
+                                                          data_arg_index=1, pipeline=2))
+
+        with self.assertRaises(TypeError):
+            batched_operation(_handler, [1, 2], args=args, data_arg_index=1, pipeline='2')
+
+        with self.assertRaises(ValueError):
+            batched_operation(_handler, [1, 2], args=args, data_arg_index=1, pipeline=0)
+
+        with self.assertRaises(ValueError):
+            batched_operation(_handler, [1, 2], batch_size='auto', args=args, data_arg_index=1, pipeline=2)
+
+
+class PipelinedQueryTest(TransactionTestCase):
+    fixtures = ['test_model']
+
+    def test_validation(self):
+        values = [{'id': 1, 'name': 'test1'}]
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, values, pipeline='2')
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, pipeline=0)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, batch_size='auto', pipeline=2)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, strategy='copy', pipeline=2)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, returning='id', pipeline=2)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, returning='id', returning_format='tuples', returning_stream=True,
+                        pipeline=2)
+
+    @skipIf(pipeline_available(connection), "Pipeline mode is supported")
+    def test_not_available(self):
+        # Pipeline is not emulated by executing statements one by one
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'updated'}], pipeline=2)
+
+        with self.assertRaises(ValueError):
+            batched_operation(len, [1, 2], args=(None,), pipeline=2)
+
+        with Pipeline(connection) as pipe:
+            pipe.queue('SELECT %s', [1], lambda cursor: cursor.fetchone()[0])
+            with self.assertRaises(ValueError):
+                pipe.flush()
+
+        self.assertEqual('test1', TestModel.objects.get(pk=1).name)
+
+    @skipIf(not pipeline_available(connection), "Pipeline mode requires psycopg 3 with libpq 14+")
+    def test_update(self):
+        values = [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 10)]
+        self.assertEqual(9, bulk_update(TestModel, values, batch_size=2, pipeline=3))
+        self.assertListEqual(['updated_%d' % i for i in range(1, 10)],
+                             list(TestModel.objects.order_by('id').values_list('name', flat=True)))
+
+        res = bulk_update(TestModel, values, returning=('id', 'name'), returning_format='tuples', batch_size=2,
+                          pipeline=3)
+        self.assertListEqual([(i, 'updated_%d' % i) for i in range(1, 10)], res)
+
+        res = TestModel.objects.pg_bulk_update(values, batch_size=4, pipeline=2, skip_unchanged=True)
+        self.assertEqual(0, res)
+        self.assertEqual(9, res.matched)
+
+    @skipIf(not pipeline_available(connection), "Pipeline mode requires psycopg 3 with libpq 14+")
+    def test_upsert(self):
+        values = [{'id': i, 'name': 'upserted_%d' % i} for i in range(5, 15)]
+        res = bulk_update_or_create(TestModel, values, report_inserted=True, batch_size=3, pipeline=2)
+        self.assertEqual(10, res)
+        self.assertEqual(5, res.inserted)
+        self.assertEqual(14, TestModel.objects.count())
+
+    @skipIf(not pipeline_available(connection), "Pipeline mode requires psycopg 3 with libpq 14+")
+    def test_create_delete(self):
+        values = [{'id': i, 'name': 'created_%d' % i} for i in range(10, 20)]
+        self.assertEqual(10, bulk_create(TestModel, values, batch_size=3, pipeline=2))
+        self.assertEqual(19, TestModel.objects.count())
+
+        res = bulk_delete(TestModel, list(range(10, 20)), returning='id', returning_format='columns', batch_size=3,
+                          pipeline=5)
+        self.assertListEqual(list(range(10, 20)), res['id'])
+        self.assertEqual(9, TestModel.objects.count())
+
+    @skipIf(not pipeline_available(connection), "Pipeline mode requires psycopg 3 with libpq 14+")
+    def test_error(self):
+        # Record with id 1 exists already. It is the batch with index 4, which is in the second group.
+        values = [{'id': i, 'name': 'created_%d' % i} for i in [10, 11, 12, 13, 1, 15]]
+        with self.assertRaises(IntegrityError) as ctx:
+            bulk_create(TestModel, values, batch_size=1, pipeline=3)
+
+        self.assertEqual(4, ctx.exception.batch_index)
+
+        # First group is committed, the second one is rolled back
+        self.assertListEqual([10, 11, 12], list(TestModel.objects.filter(id__gte=10).order_by('id')
+                                                .values_list('id', flat=True)))
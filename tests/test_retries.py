@@ -0,0 +1,103 @@
+from threading import Event, Thread
+from time import sleep
+
+from django.db import DatabaseError, connection, connections, transaction
+from django.test import TransactionTestCase
+
+from django_pg_bulk_update.query import bulk_update, bulk_create
+from django_pg_bulk_update.results import BulkOperationResult
+from tests.models import TestModel
+
+
+class RetriesTest(TransactionTestCase):
+    fixtures = ['test_model']
+
+    def test_result(self):
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'updated1'}], retries=2)
+        self.assertIsInstance(res, BulkOperationResult)
+        self.assertEqual(1, res)
+        self.assertEqual(0, res.retries)
+
+        res = bulk_create(TestModel, [], retries=2)
+        self.assertIsInstance(res, BulkOperationResult)
+        self.assertEqual(0, res)
+
+        res = TestModel.objects.pg_bulk_update_or_create([{'id': 10, 'name': 'test10'}], report_inserted=True,
+                                                         retries=1)
+        self.assertEqual(1, res.inserted)
+        self.assertEqual(0, res.retries)
+
+        # Records are returned as usual
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'updated1'}], returning='id', returning_format='tuples',
+                          retries=2)
+        self.assertListEqual([(1,)], res)
+
+    def test_deadlock(self):
+        locked = Event()
+        errors = []
+
+        def _locker():
+            try:
+                with transaction.atomic():
+                    TestModel.objects.select_for_update().filter(id=2).first()
+                    locked.set()
+                    # Bulk update locks record 1 and waits for record 2 meanwhile
+                    sleep(0.5)
+                    TestModel.objects.filter(id=1).update(name='locker')
+            except Exception as ex:
+                errors.append(ex)
+            finally:
+                connections.close_all()
+
+        thread = Thread(target=_locker)
+        thread.start()
+        locked.wait()
+
+        # Deadlock is detected in bulk update transaction, which has been waiting longer.
+        # Its batch is rolled back, so locker commits, and then batch is retried.
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'updated1'}, {'id': 2, 'name': 'updated2'}], retries=3)
+        thread.join()
+
+        self.assertListEqual([], errors)
+        self.assertEqual(2, res)
+        self.assertEqual(1, res.retries)
+        self.assertListEqual(['updated1', 'updated2'],
+                             list(TestModel.objects.filter(id__lte=2).order_by('id').values_list('name', flat=True)))
+
+    def _serialization_failure(self, **kwargs):
+        locked = Event()
+
+        def _locker():
+            try:
+                with transaction.atomic():
+                    TestModel.objects.filter(id=1).update(name='locker')
+                    locked.set()
+                    # Bulk update takes a snapshot and waits for the record meanwhile
+                    sleep(0.5)
+            finally:
+                connections.close_all()
+
+        thread = Thread(target=_locker)
+        thread.start()
+        locked.wait()
+
+        with connection.cursor() as cursor:
+            cursor.execute('SET SESSION CHARACTERISTICS AS TRANSACTION ISOLATION LEVEL REPEATABLE READ')
+        try:
+            return bulk_update(TestModel, [{'id': 1, 'name': 'updated1'}], retries=3, **kwargs)
+        finally:
+            thread.join()
+            with connection.cursor() as cursor:
+                cursor.execute('SET SESSION CHARACTERISTICS AS TRANSACTION ISOLATION LEVEL READ COMMITTED')
+
+    def test_serialization_failure(self):
+        # Rolled back transaction gets a new snapshot on retry
+        for mode in (None, 'per_batch'):
+            res = self._serialization_failure(transaction=mode)
+            self.assertEqual(1, res)
+            self.assertEqual(1, res.retries)
+            self.assertEqual('updated1', TestModel.objects.get(id=1).name)
+
+        # Savepoint sees the same snapshot, so error is raised without retries
+        with self.assertRaises(DatabaseError):
+            self._serialization_failure(transaction='single')
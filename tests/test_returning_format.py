@@ -0,0 +1,115 @@
+from unittest import skipIf, mock
+
+from django.db.models import F
+from django.test import TestCase
+
+from django_pg_bulk_update.compatibility import jsonb_available, numpy_available
+from django_pg_bulk_update.query import bulk_update, bulk_update_or_create, bulk_create, bulk_delete, STRATEGIES
+from tests.models import TestModel
+
+
+class ReturningFormatTest(TestCase):
+    fixtures = ['test_model']
+
+    def test_without_django_pg_returning(self):
+        # Nothing to update and nothing to return: django-pg-returning is not required
+        with mock.patch.dict('sys.modules', {'django_pg_returning': None}):
+            self.assertEqual(1, bulk_update(TestModel, [{'id': 1}]))
+            self.assertListEqual([], bulk_update(TestModel, [{'id': 1}], returning='id', returning_format='tuples'))
+
+    def test_validation(self):
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning='id', returning_format=1)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning='id', returning_format='invalid')
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning_format='tuples')
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning='id', returning_format='tuples',
+                        returning_stream=True)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': [1, 2], 'name': 'test1'}], returning='id', returning_format='keyed',
+                        key_fields_ops=['in'])
+
+        with self.assertRaises(ValueError):
+            bulk_create(TestModel, [{'id': 10, 'name': 'test10'}], returning='id', returning_format='keyed')
+
+    def test_update(self):
+        values = [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 4)]
+        expected = [(i, 'updated_%d' % i) for i in range(1, 4)]
+
+        res = bulk_update(TestModel, values, returning=('id', 'name'), returning_format='tuples', batch_size=2)
+        self.assertListEqual(expected, sorted(res))
+
+        res = bulk_update(TestModel, values, returning=('name', 'id'), returning_format='dicts', batch_size=2)
+        self.assertListEqual([{'id': pk, 'name': name} for pk, name in expected], sorted(res, key=lambda d: d['id']))
+
+        res = bulk_update(TestModel, values, returning='int_field', returning_format='keyed', batch_size=2)
+        self.assertDictEqual({(i,): {'int_field': i} for i in range(1, 4)}, res)
+
+        for returning_format in ('columns', 'array_agg'):
+            res = bulk_update(TestModel, values, returning=('id', 'name'), returning_format=returning_format,
+                              batch_size=2, order_keys=True)
+            self.assertDictEqual({'id': [1, 2, 3], 'name': ['updated_1', 'updated_2', 'updated_3']}, res)
+
+    @skipIf(not numpy_available(), "numpy is not installed")
+    def test_numpy(self):
+        import numpy
+        values = [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 4)]
+        res = bulk_update(TestModel, values, returning=('id', 'int_field'), returning_format='numpy',
+                          order_keys=True)
+        self.assertIsInstance(res['id'], numpy.ndarray)
+        self.assertListEqual([1, 2, 3], res['int_field'].tolist())
+
+    def test_keyed(self):
+        # Input keys are returned, even if key fields are updated
+        for strategy in STRATEGIES:
+            res = bulk_update(TestModel, {('test1', 1): {'int_field': 10}, ('test2', 2): {'int_field': 20}},
+                              key_fields=('name', 'int_field'), returning='id', returning_format='keyed',
+                              strategy=strategy)
+            self.assertDictEqual({('test1', 1): {'id': 1}, ('test2', 2): {'id': 2}}, res)
+            TestModel.objects.filter(id__in=[1, 2]).update(int_field=F('id'))
+
+    def test_empty(self):
+        for returning_format, expected in [('tuples', []), ('dicts', []), ('keyed', {}),
+                                           ('columns', {'id': []}), ('array_agg', {'id': []})]:
+            self.assertEqual(expected, bulk_update(TestModel, [], returning='id', returning_format=returning_format))
+            self.assertEqual(expected, bulk_delete(TestModel, [100], returning='id',
+                                                   returning_format=returning_format))
+
+    def test_create(self):
+        res = bulk_create(TestModel, [{'id': 10, 'name': 'test10'}, {'id': 11, 'name': 'test11'}],
+                          returning=('id', 'name'), returning_format='tuples', batch_size=1)
+        self.assertListEqual([(10, 'test10'), (11, 'test11')], res)
+
+    def test_delete(self):
+        res = bulk_delete(TestModel, [1, 2, 100], returning='*', returning_format='keyed')
+        self.assertSetEqual({(1,), (2,)}, set(res.keys()))
+        self.assertEqual('test1', res[(1,)]['name'])
+
+    def test_upsert(self):
+        values = [{'id': 1, 'name': 'updated1'}, {'id': 10, 'name': 'created10'}]
+        for key_is_unique in (True, False):
+            for returning_format in ('tuples', 'array_agg'):
+                TestModel.objects.filter(id=10).delete()
+                res = bulk_update_or_create(TestModel, values, returning=('id', 'name'), key_is_unique=key_is_unique,
+                                            returning_format=returning_format, report_inserted=True)
+                if returning_format == 'array_agg':
+                    res = list(zip(res['id'], res['name'], res['inserted']))
+                self.assertListEqual([(1, 'updated1', False), (10, 'created10', True)], sorted(res))
+
+            TestModel.objects.filter(id=10).delete()
+            res = bulk_update_or_create(TestModel, values, returning='name', key_is_unique=key_is_unique,
+                                        returning_format='keyed')
+            self.assertDictEqual({(1,): {'name': 'updated1'}, (10,): {'name': 'created10'}}, res)
+
+    @skipIf(not jsonb_available(), "JSONB type is not available on your django version")
+    def test_converters(self):
+        for returning_format in ('tuples', 'array_agg'):
+            res = bulk_update(TestModel, [{'id': 1, 'json_field': {'a': [1, 2]}}], returning='json_field',
+                              returning_format=returning_format)
+            self.assertEqual({'a': [1, 2]}, res[0][0] if returning_format == 'tuples' else res['json_field'][0])
@@ -0,0 +1,96 @@
+from unittest import mock, skipIf
+
+from django.db import connection
+from django.test import TestCase
+
+from django_pg_bulk_update import streaming
+from django_pg_bulk_update.compatibility import jsonb_available
+from django_pg_bulk_update.query import bulk_update, bulk_update_or_create, bulk_create, bulk_delete
+from django_pg_bulk_update.streaming import ReturningStream, RETURNING_TABLE_PREFIX
+from tests.models import TestModel
+
+
+class ReturningStreamTest(TestCase):
+    fixtures = ['test_model']
+
+    def _get_tables_count(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM pg_class WHERE relname LIKE %s", [RETURNING_TABLE_PREFIX + '%'])
+            return cursor.fetchone()[0]
+
+    def test_validation(self):
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning='id', returning_stream=1)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, [{'id': 1, 'name': 'test1'}], returning_stream=True)
+
+    def test_update(self):
+        values = [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 8)]
+        with mock.patch.object(streaming, 'RETURNING_STREAM_CHUNK_SIZE', 2):
+            res = bulk_update(TestModel, values, returning=('id', 'name'), returning_stream=True, batch_size=3)
+            self.assertIsInstance(res, ReturningStream)
+            self.assertEqual(3, self._get_tables_count())
+            self.assertEqual(7, res.count())
+            self.assertListEqual(['id', 'name'], res.fields)
+
+            items = list(res)
+
+        self.assertListEqual([(i, 'updated_%d' % i) for i in range(1, 8)], [(item.pk, item.name) for item in items])
+        self.assertIsInstance(items[0], TestModel)
+
+        # Stream can be read once. Temporary tables are dropped after reading.
+        self.assertEqual(0, res.count())
+        self.assertListEqual([], list(res))
+        self.assertEqual(0, self._get_tables_count())
+
+    def test_formats(self):
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'updated1'}], returning=('id', 'name'), returning_stream=True)
+        self.assertListEqual([{'id': 1, 'name': 'updated1'}], list(res.values()))
+
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'updated1'}], returning=('id', 'name'), returning_stream=True)
+        self.assertListEqual([('updated1', 1)], list(res.values_list('name', 'id')))
+
+        res = bulk_update(TestModel, [{'id': 1, 'name': 'updated1'}], returning=('id', 'name'), returning_stream=True)
+        self.assertListEqual([1], list(res.values_list('id', flat=True)))
+
+    def test_close(self):
+        res = bulk_create(TestModel, [{'id': 10, 'name': 'test10'}, {'id': 11, 'name': 'test11'}],
+                          returning='id', returning_stream=True, batch_size=1)
+        with res:
+            self.assertEqual(10, next(iter(res)).id)
+            self.assertEqual(1, self._get_tables_count())
+
+        self.assertEqual(0, self._get_tables_count())
+        self.assertEqual(11, TestModel.objects.count())
+
+    def test_empty(self):
+        res = bulk_delete(TestModel, [], returning='id', returning_stream=True)
+        self.assertEqual(0, res.count())
+        self.assertListEqual([], list(res))
+
+        res = bulk_delete(TestModel, [100], returning='id', returning_stream=True)
+        self.assertEqual(0, res.count())
+        self.assertListEqual([], list(res))
+
+    def test_delete(self):
+        res = bulk_delete(TestModel, [1, 2], returning='*', returning_stream=True)
+        self.assertSetEqual({(1, 'test1', 1), (2, 'test2', 2)},
+                            {(item.id, item.name, item.int_field) for item in res})
+        self.assertEqual(7, TestModel.objects.count())
+
+    def test_upsert(self):
+        values = [{'id': 1, 'name': 'updated1'}, {'id': 10, 'name': 'created10'}]
+        for key_is_unique in (True, False):
+            TestModel.objects.filter(id=10).delete()
+            res = bulk_update_or_create(TestModel, values, returning=('id', 'name'), returning_stream=True,
+                                        key_is_unique=key_is_unique, report_inserted=True)
+            self.assertIsInstance(res, ReturningStream)
+            self.assertListEqual([(1, 'updated1', False), (10, 'created10', True)],
+                                 sorted((item.id, item.name, item.inserted) for item in res))
+
+    @skipIf(not jsonb_available(), "JSONB type is not available on your django version")
+    def test_converters(self):
+        res = bulk_update(TestModel, [{'id': 1, 'json_field': {'a': [1, 2]}}], returning=('id', 'json_field'),
+                          returning_stream=True)
+        self.assertListEqual([{'a': [1, 2]}], list(res.values_list('json_field', flat=True)))
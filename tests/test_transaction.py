@@ -0,0 +1,89 @@
+from django.db import IntegrityError, connection, transaction
+from django.test import TransactionTestCase
+
+from django_pg_bulk_update.query import bulk_update, bulk_create
+from django_pg_bulk_update.utils import batched_operation, ParallelBatchError
+from tests.models import TestModel
+
+
+class TransactionModeTest(TransactionTestCase):
+    fixtures = ['test_model']
+
+    # Record with id 1 exists already, so the batch with index 3 fails
+    values = [{'id': i, 'name': 'created_%d' % i} for i in [10, 11, 12, 1, 14]]
+
+    def _created_ids(self):
+        return list(TestModel.objects.filter(id__gte=10).order_by('id').values_list('id', flat=True))
+
+    def test_validation(self):
+        values = [{'id': 1, 'name': 'test1'}]
+        with self.assertRaises(TypeError):
+            bulk_update(TestModel, values, transaction=1.5)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, transaction='every_n')
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, transaction=0)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, transaction='single', parallel=2)
+
+        with self.assertRaises(ValueError):
+            bulk_update(TestModel, values, transaction='per_batch', pipeline=2)
+
+    def test_batches(self):
+        def _handler(_, items):
+            return connection.in_atomic_block, len(items)
+
+        args = (None, None)
+        self.assertListEqual([(False, 2), (False, 1)],
+                             batched_operation(_handler, [1, 2, 3], batch_size=2, args=args, data_arg_index=1))
+        for mode in ('single', 'per_batch', 1):
+            self.assertListEqual([(True, 2), (True, 1)],
+                                 batched_operation(_handler, [1, 2, 3], batch_size=2, args=args, data_arg_index=1,
+                                                   transaction=mode))
+
+        # Transaction is finished after every batch
+        self.assertFalse(connection.in_atomic_block)
+
+    def test_single(self):
+        with self.assertRaises(IntegrityError):
+            bulk_create(TestModel, self.values, batch_size=1, transaction='single')
+
+        self.assertListEqual([], self._created_ids())
+
+    def test_per_batch(self):
+        with self.assertRaises(IntegrityError):
+            bulk_create(TestModel, self.values, batch_size=1, transaction='per_batch')
+
+        self.assertListEqual([10, 11, 12], self._created_ids())
+
+        self.assertEqual(2, TestModel.objects.pg_bulk_update([{'id': 10, 'name': 'a'}, {'id': 11, 'name': 'b'}],
+                                                             batch_size='auto', transaction='per_batch'))
+
+    def test_every_n(self):
+        with self.assertRaises(IntegrityError):
+            bulk_create(TestModel, self.values, batch_size=1, transaction=2)
+
+        # The second group contains the failed batch, so it is rolled back
+        self.assertListEqual([10, 11], self._created_ids())
+
+    def test_savepoint(self):
+        with transaction.atomic():
+            TestModel.objects.filter(id=9).delete()
+            with self.assertRaises(IntegrityError):
+                bulk_create(TestModel, self.values, batch_size=1, transaction='per_batch')
+
+            # Outer transaction can be continued: only the failed batch is rolled back to its savepoint
+            self.assertListEqual([10, 11, 12], self._created_ids())
+            self.assertFalse(TestModel.objects.filter(id=9).exists())
+
+    def test_parallel(self):
+        values = [{'id': i, 'name': 'created_%d' % i} for i in [10, 12, 14, 1, 11, 13]]
+        with self.assertRaises(ParallelBatchError) as ctx:
+            bulk_create(TestModel, values, batch_size=1, parallel=2, transaction=2)
+
+        # Results contain committed batches only
+        self.assertEqual(len(self._created_ids()), sum(ctx.exception.results))
+        self.assertNotIn(12, self._created_ids())
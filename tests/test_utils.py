@@ -0,0 +1,205 @@
+from datetime import date, datetime
+from unittest import mock
+
+from django.db import connection, OperationalError
+from django.db.models import F
+from django.test import TestCase
+
+from django_pg_bulk_update.clause_operators import InClauseOperator, IsNullClauseOperator
+from django_pg_bulk_update.compatibility import tz_utc
+from django_pg_bulk_update.set_functions import ArrayRemoveSetFunction, EqualSetFunction, PlusSetFunction
+from django_pg_bulk_update import utils
+from django_pg_bulk_update.query import bulk_update
+from django_pg_bulk_update.utils import format_field_value, get_field_value_formatter, batched_operation, \
+    AutoBatchSizer
+from tests.models import TestModel, AutoNowModel
+
+
+class GetFieldValueFormatterTest(TestCase):
+    def _test_field(self, model, field_name, values):
+        field = model._meta.get_field(field_name)
+        for cast_type in (False, True):
+            formatter = get_field_value_formatter(field, connection, cast_type=cast_type)
+            for val in values:
+                self.assertEqual(format_field_value(field, val, connection, cast_type=cast_type), formatter(val))
+
+    def test_simple(self):
+        self._test_field(TestModel, 'id', [1, '2', None])
+        self._test_field(TestModel, 'name', ['test', '', None])
+        self._test_field(AutoNowModel, 'checked', [datetime(2020, 1, 1, tzinfo=tz_utc), None])
+
+    def test_array(self):
+        self._test_field(TestModel, 'array_field', [[1, 2], [], None])
+
+    def test_hstore(self):
+        field = TestModel._meta.get_field('hstore_field')
+        formatter = get_field_value_formatter(field, connection)
+        self.assertEqual(format_field_value(field, {'a': 1}, connection), formatter({'a': 1}))
+
+    def test_expression(self):
+        field = TestModel._meta.get_field('int_field')
+        formatter = get_field_value_formatter(field, connection)
+        sql, params = formatter(F('id') + 1)
+        self.assertIn('"id"', sql)
+
+    def test_formatters(self):
+        field = TestModel._meta.get_field('int_field')
+        array_field = TestModel._meta.get_field('array_field')
+        cases = [
+            (EqualSetFunction(), field, 1),
+            (InClauseOperator(), field, [1, 2]),
+            (IsNullClauseOperator(), field, True),
+            (ArrayRemoveSetFunction(), array_field, 1),
+        ]
+        for formatter_obj, f, val in cases:
+            for cast_type in (False, True):
+                formatter = formatter_obj.get_value_formatter(f, connection, cast_type=cast_type)
+                self.assertEqual(tuple(formatter_obj.format_field_value(f, val, connection, cast_type=cast_type)),
+                                 tuple(formatter(val)))
+
+
+class MergeValuesTest(TestCase):
+    def test_incr_ranges(self):
+        from django.contrib.postgres.fields import IntegerRangeField, DateRangeField
+        from psycopg2.extras import NumericRange, DateRange
+
+        set_function = PlusSetFunction()
+        cases = [
+            (IntegerRangeField(), 'int4range', NumericRange(1, 5), NumericRange(3, 8)),
+            (IntegerRangeField(), 'int4range', NumericRange(5, 8), NumericRange(1, 5)),
+            (IntegerRangeField(), 'int4range', NumericRange(1, 4, '[]'), NumericRange(4, 6, '(]')),
+            (IntegerRangeField(), 'int4range', NumericRange(None, 3), NumericRange(2, None)),
+            (IntegerRangeField(), 'int4range', NumericRange(empty=True), NumericRange(2, 3)),
+            (DateRangeField(), 'daterange', DateRange(date(2020, 1, 1), date(2020, 1, 10), '[]'),
+             DateRange(date(2020, 1, 11), date(2020, 1, 20))),
+        ]
+        with connection.cursor() as cursor:
+            for field, db_type, first, second in cases:
+                cursor.execute('SELECT CAST(%%s AS %s) + CAST(%%s AS %s)' % (db_type, db_type), [first, second])
+                self.assertEqual(cursor.fetchone()[0], set_function.merge_values(field, first, second))
+
+        # Lists are converted to ranges, as field does
+        self.assertEqual(NumericRange(1, 8), set_function.merge_values(IntegerRangeField(), [1, 5], (5, 8)))
+
+        # Ranges, which are not contiguous, can't be united: last value is taken
+        field = IntegerRangeField()
+        self.assertEqual(NumericRange(7, 8), set_function.merge_values(field, NumericRange(1, 5), NumericRange(7, 8)))
+
+
+class AutoBatchSizeTest(TestCase):
+    fixtures = ['test_model']
+
+    def test_params_limit(self):
+        self.assertEqual(6500, AutoBatchSizer(row_params=10).max_rows)
+        self.assertEqual(1000, AutoBatchSizer(row_params=10).rows)
+        self.assertEqual(1, AutoBatchSizer(row_params=100000).max_rows)
+        self.assertEqual(utils.AUTO_BATCH_MAX_SIZE, AutoBatchSizer().max_rows)
+
+    def test_bytes_limit(self):
+        items = [{'id': i, 'name': 'x' * 100} for i in range(10)]
+        sizer = AutoBatchSizer()
+        with mock.patch.object(utils, 'AUTO_BATCH_MAX_BYTES', 250):
+            self.assertListEqual(items[:2], sizer.next_batch(items, 0))
+            self.assertListEqual(items[8:], sizer.next_batch(items, 8))
+
+        # A single item, bigger than limit, forms a batch
+        with mock.patch.object(utils, 'AUTO_BATCH_MAX_BYTES', 10):
+            self.assertListEqual(items[3:4], sizer.next_batch(items, 3))
+
+    def test_latency(self):
+        sizer = AutoBatchSizer()
+        sizer.on_success(100, utils.AUTO_BATCH_TARGET_TIME / 10)
+        self.assertEqual(200, sizer.rows)
+        sizer.on_success(200, utils.AUTO_BATCH_TARGET_TIME * 4)
+        self.assertEqual(50, sizer.rows)
+        sizer.on_timeout(50)
+        self.assertEqual(25, sizer.rows)
+
+    def test_timeout(self):
+        class QueryCanceled(Exception):
+            pgcode = '57014'
+
+        batches = []
+
+        def handler(items):
+            if len(items) > 2:
+                raise OperationalError('canceling statement due to statement timeout') from QueryCanceled()
+            batches.append(items)
+            return len(items)
+
+        with mock.patch.object(utils, 'AUTO_BATCH_INITIAL_SIZE', 8):
+            res = batched_operation(handler, list(range(10)), batch_size='auto', args=(None,))
+
+        self.assertListEqual([2] * 5, res)
+        self.assertListEqual(list(range(10)), [item for items in batches for item in items])
+
+        def failing_handler(items):
+            raise OperationalError('canceling statement due to statement timeout') from QueryCanceled()
+
+        with self.assertRaises(OperationalError):
+            batched_operation(failing_handler, list(range(10)), batch_size='auto', args=(None,))
+
+    def test_bulk_update(self):
+        with mock.patch.object(utils, 'AUTO_BATCH_INITIAL_SIZE', 2):
+            res = bulk_update(TestModel, [{'id': i, 'name': 'updated_%d' % i} for i in range(1, 6)],
+                              batch_size='auto')
+
+        self.assertEqual(5, res)
+        self.assertListEqual(['updated_%d' % i for i in range(1, 6)],
+                             list(TestModel.objects.filter(id__lt=6).order_by('id').values_list('name', flat=True)))
+
+
+class RetryTest(TestCase):
+    class Deadlock(Exception):
+        pgcode = '40P01'
+
+    def test_retry(self):
+        calls = []
+
+        def handler(items):
+            calls.append(items)
+            if len(calls) <= 2:
+                raise OperationalError('deadlock detected') from self.Deadlock()
+            return len(items)
+
+        with mock.patch.object(utils, 'RETRY_BASE_DELAY', 0):
+            res = batched_operation(handler, list(range(10)), batch_size=5, args=(None,), retries=2)
+
+        self.assertListEqual([5, 5], res)
+        self.assertEqual(2, res.retries)
+        self.assertEqual(4, len(calls))
+
+    def test_exhausted(self):
+        calls = []
+
+        def handler(items):
+            calls.append(items)
+            raise OperationalError('deadlock detected') from self.Deadlock()
+
+        with mock.patch.object(utils, 'RETRY_BASE_DELAY', 0):
+            with self.assertRaises(OperationalError):
+                batched_operation(handler, list(range(10)), args=(None,), retries=2)
+
+        self.assertEqual(3, len(calls))
+
+        # Other errors are not retried
+        calls = []
+
+        def failing_handler(items):
+            calls.append(items)
+            raise OperationalError('canceling statement due to statement timeout')
+
+        with self.assertRaises(OperationalError):
+            batched_operation(failing_handler, list(range(10)), args=(None,), retries=2)
+
+        self.assertEqual(1, len(calls))
+
+    def test_validation(self):
+        with self.assertRaises(TypeError):
+            batched_operation(len, [1, 2], args=(None,), retries=None)
+
+        with self.assertRaises(ValueError):
+            batched_operation(len, [1, 2], args=(None,), retries=-1)
+
+        with self.assertRaises(ValueError):
+            batched_operation(len, [1, 2], args=(None,), retries=1, pipeline=2)